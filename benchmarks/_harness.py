@@ -0,0 +1,116 @@
+"""Shared helpers for the Eva benchmark scenarios.
+
+Benchmarks run against throwaway state: a temp SQLite file (and embedding
+store beside it), telemetry off, and no OpenAI key, so they never touch ~/.eva,
+~/.config/eva-standalone, or the network.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools")
+if TOOLS_DIR not in sys.path:
+    sys.path.insert(0, TOOLS_DIR)
+
+os.environ.setdefault("EVA_TELEMETRY", "0")
+os.environ.pop("OPENAI_API_KEY", None)
+
+
+def percentile(values, pct):
+    """Nearest-rank style percentile with linear interpolation (ms in, ms out)."""
+    if not values:
+        return None
+    sv = sorted(values)
+    k = (len(sv) - 1) * (pct / 100.0)
+    lo = int(k)
+    hi = min(lo + 1, len(sv) - 1)
+    return sv[lo] + (sv[hi] - sv[lo]) * (k - lo)
+
+
+def stats(values):
+    """Return a compact latency summary dict for a list of millisecond samples."""
+    if not values:
+        return {"n": 0}
+    return {
+        "n": len(values),
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "max": round(max(values), 2),
+    }
+
+
+def format_stats(label, values):
+    s = stats(values)
+    if not s["n"]:
+        return f"  {label:<28} n=0"
+    return f"  {label:<28} n={s['n']:<6} p50={s['p50']:>8.2f}ms  p95={s['p95']:>8.2f}ms  max={s['max']:>8.2f}ms"
+
+
+def temp_db_path(name="memory.db"):
+    return os.path.join(tempfile.mkdtemp(prefix="eva-bench-"), name)
+
+
+def sqlite_bridge(db_path, **mem_kwargs):
+    """Point the bridge at a fresh SqliteMemory and enable cognition."""
+    os.environ["EVA_MEMORY_DB"] = db_path
+    from bridge import state as st
+    from embedding_store import EmbeddingStore
+    from sqlite_memory import SqliteMemory
+    st.memory_backend = "sqlite"
+    st.sqlite_mem = SqliteMemory(db_path, **mem_kwargs)
+    st.embedding_store = EmbeddingStore(os.path.join(os.path.dirname(db_path), "embeddings.db"))
+    st.embedding_cache.clear()
+    st.knowledge_index = None
+    st.cognition_enabled = True
+    st.cognition_launch_id = "bench"
+    st.openai_api_key_cache = ""
+    st.embedding_disabled_logged = True
+    return st.sqlite_mem
+
+
+def seed_knowledge(mem, rows, batch=2000):
+    """Append synthetic Knowledge rows so aggregate queries have real work to do."""
+    cols = ["Timestamp", "Entity", "Relation", "Value", "Confidence", "Source", "Decay"]
+    entities = ["User", "Python", "Rust", "Kusto", "Seattle", "Coffee", "Jazz", "Hiking"]
+    relations = ["likes", "user_interest", "candidate_mentioned", "recurring_topic", "user_location"]
+    pending = []
+    for i in range(rows):
+        pending.append({
+            "Timestamp": f"2026-01-{1 + i % 28:02d}T{i % 24:02d}:00:00Z",
+            "Entity": entities[i % len(entities)],
+            "Relation": relations[i % len(relations)] if i % 7 else f"fact_{i % 97}",
+            "Value": f"synthetic fact {i} about topic {i % 113}",
+            "Confidence": round(0.2 + (i % 8) * 0.1, 2),
+            "Source": "bench",
+            "Decay": 0.01,
+        })
+        if len(pending) >= batch:
+            mem.ingest("Knowledge", cols, pending)
+            pending = []
+    if pending:
+        mem.ingest("Knowledge", cols, pending)
+
+
+@contextlib.contextmanager
+def quiet():
+    """Swallow the bridge's chatty stdout while a scenario runs."""
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        yield buf
+
+
+def random_vectors(n, dim, seed=7):
+    """Deterministic pseudo-random embedding-like vectors (lists of floats)."""
+    import random
+    rng = random.Random(seed)
+    return [[rng.gauss(0.0, 1.0) for _ in range(dim)] for _ in range(n)]
+
+
+def timed_ms(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return (time.perf_counter() - t0) * 1000.0, result
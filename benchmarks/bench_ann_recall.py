@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Knowledge ANN index: recall@k and query latency against exact search.
+
+Builds a VectorIndex from synthetic clustered vectors (facts cluster by topic,
+as real embeddings do; uniform random vectors have no neighbourhood structure
+and are a worst case for any IVF index), then compares index.search() with
+index.exact_search() over the same rows for held-out queries.
+
+    python3 benchmarks/bench_ann_recall.py --sizes 5000,50000 --dim 1536 --k 6
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import _harness
+
+
+def _clustered(np, n, dim, topics, rng, spread):
+    centers = rng.normal(size=(topics, dim)).astype(np.float32)
+    labels = rng.integers(0, topics, n)
+    return centers, centers[labels] + spread * rng.normal(size=(n, dim)).astype(np.float32)
+
+
+def run(sizes, dim, k, queries, nprobes, spread):
+    import numpy as np
+    from vector_index import VectorIndex
+
+    rng = np.random.default_rng(11)
+    print(f"ANN recall@{k}: dim={dim} queries={queries} spread={spread}")
+    for size in sizes:
+        centers, vectors = _clustered(np, size, dim, max(16, size // 100), rng, spread)
+        path = os.path.join(tempfile.mkdtemp(prefix="eva-bench-"), "memory.ann")
+        with _harness.quiet():
+            index = VectorIndex(path, model="bench")
+            t0 = time.perf_counter()
+            for start in range(0, size, 1000):
+                end = min(size, start + 1000)
+                index.add(list(range(start + 1, end + 1)), vectors[start:end], watermark=end)
+            build_s = time.perf_counter() - t0
+        info = index.stats()
+        print(f"  n={size}: lists={info['lists']} build={build_s:.2f}s "
+              f"({size / build_s:,.0f} vectors/s incl. training)")
+
+        qs = centers[rng.integers(0, len(centers), queries)] + spread * rng.normal(size=(queries, dim)).astype(np.float32)
+        exact_ms, truth = [], []
+        for q in qs:
+            ms, hits = _harness.timed_ms(index.exact_search, q, k)
+            exact_ms.append(ms)
+            truth.append({i for _, i in hits})
+        print(_harness.format_stats("exact", exact_ms))
+        for nprobe in nprobes:
+            ann_ms, recall = [], 0.0
+            for q, expected in zip(qs, truth):
+                ms, hits = _harness.timed_ms(index.search, q, k, nprobe or None)
+                ann_ms.append(ms)
+                recall += len(expected & {i for _, i in hits}) / k
+            label = f"ann nprobe={nprobe or 'auto'}"
+            print(_harness.format_stats(label, ann_ms) + f"  recall@{k}={recall / len(qs):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="5000,50000", help="comma-separated index sizes")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--nprobe", default="0,4,16", help="comma-separated nprobe values (0 = auto)")
+    parser.add_argument("--spread", type=float, default=2.0,
+                        help="within-topic noise; higher values blur topic boundaries")
+    args = parser.parse_args()
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("NumPy is not installed; the ANN index is disabled without it.")
+        return
+    run([int(s) for s in args.sizes.split(",") if s.strip()], args.dim, args.k, args.queries,
+        [int(s) for s in args.nprobe.split(",") if s.strip()], args.spread)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Embedding providers: recall quality and latency on a local fixture set.
+
+Embeds the facts in fixtures/embedding_recall.json (as _knowledge_text()
+renders Knowledge rows) and ranks them for each query with the same top-k
+scorer recall uses. Reports recall@k and MRR overall and per query kind
+("lexical" shares a word stem with a relevant fact, "paraphrase" does not),
+plus how many relevant facts clear the provider's min_score, and the
+per-query embed latency the chat request pays.
+
+The local provider always runs. The OpenAI provider runs only with --openai
+and an OPENAI_API_KEY in the environment (one batched call for the facts,
+one call per query), since the harness otherwise keeps benchmarks offline.
+
+    python3 benchmarks/bench_embedding_providers.py
+    OPENAI_API_KEY=... python3 benchmarks/bench_embedding_providers.py --openai
+"""
+
+import argparse
+import json
+import os
+import time
+
+_OPENAI_KEY = os.environ.get("OPENAI_API_KEY", "").strip()  # read before _harness clears it
+
+import _harness  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "embedding_recall.json")
+
+
+def evaluate(provider, fixture, ks):
+    from bridge import memory
+    facts = fixture["facts"]
+    texts = [memory._knowledge_text(f) for f in facts]
+    t0 = time.perf_counter()
+    fact_map = provider.embed(texts)
+    fact_ms = (time.perf_counter() - t0) * 1000
+    fact_vecs = [fact_map.get(t) for t in texts]
+
+    query_ms = []
+    per_kind = {}
+    for q in fixture["queries"]:
+        ms, qmap = _harness.timed_ms(provider.embed, [q["query"]])
+        query_ms.append(ms)
+        qvec = qmap.get(q["query"])
+        ranked = memory._top_k_cosine(qvec, fact_vecs, len(facts)) if qvec else []
+        order = [facts[i]["id"] for _, i in ranked]
+        scores = {facts[i]["id"]: s for s, i in ranked}
+        relevant = set(q["relevant"])
+        row = {f"recall@{k}": len(relevant & set(order[:k])) / len(relevant) for k in ks}
+        first = next((pos for pos, fid in enumerate(order) if fid in relevant), None)
+        row["mrr"] = 1.0 / (first + 1) if first is not None else 0.0
+        row["above_min"] = sum(1 for fid in relevant if scores.get(fid, -1) >= provider.min_score) / len(relevant)
+        for kind in ("all", q["kind"]):
+            per_kind.setdefault(kind, []).append(row)
+    return fact_ms, query_ms, per_kind
+
+
+def report(provider, fixture, ks):
+    fact_ms, query_ms, per_kind = evaluate(provider, fixture, ks)
+    n = len(fixture["facts"])
+    print(f"{provider.name}  namespace={provider.namespace}  min_score={provider.min_score}")
+    print(f"  embed {n} facts: {fact_ms:.1f}ms ({fact_ms / n:.3f}ms/text)")
+    print(_harness.format_stats("embed query", query_ms))
+    cols = [f"recall@{k}" for k in ks] + ["mrr", "above_min"]
+    print(f"  {'kind':<12} {'n':>3}  " + "  ".join(f"{c:>9}" for c in cols))
+    for kind in ("all", "lexical", "paraphrase"):
+        rows = per_kind.get(kind) or []
+        if not rows:
+            continue
+        avgs = [sum(r[c] for r in rows) / len(rows) for c in cols]
+        print(f"  {kind:<12} {len(rows):>3}  " + "  ".join(f"{a:>9.3f}" for a in avgs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--k", default="1,3,6", help="comma-separated cutoffs")
+    parser.add_argument("--dim", type=int, default=512, help="local provider sketch width")
+    parser.add_argument("--openai", action="store_true", help="also benchmark OpenAI (needs OPENAI_API_KEY)")
+    args = parser.parse_args()
+    from embedding_providers import HashedNgramProvider, OpenAIEmbeddingProvider
+    from bridge import config
+    with open(args.fixture) as f:
+        fixture = json.load(f)
+    ks = [int(k) for k in args.k.split(",") if k.strip()]
+
+    report(HashedNgramProvider(dim=args.dim, min_score=config.LOCAL_EMBEDDING_MIN_SCORE), fixture, ks)
+    if args.openai:
+        if not _OPENAI_KEY:
+            print("openai: skipped (OPENAI_API_KEY not set)")
+            return
+        print()
+        report(OpenAIEmbeddingProvider(config.EMBEDDING_MODEL, lambda: _OPENAI_KEY,
+                                       min_score=config.SEMANTIC_MIN_SCORE), fixture, ks)
+    else:
+        print("openai: skipped (pass --openai with OPENAI_API_KEY set to compare)")
+
+
+if __name__ == "__main__":
+    main()
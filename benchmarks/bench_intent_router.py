@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Per-turn intent classification: regex chains vs the one-pass router.
+
+"regex chains" is the routing _aig_chat and the memory-context builder did
+before bridge.intent: the small-talk matches, _classify_request_type's
+searches, the raw-output and row-recall detectors and the four live-data
+searches, each a separate pass over the lowercased message. "router" is
+_route_intents() with its per-message cache bypassed; "router (cached)"
+is the second lookup in the same turn.
+
+Messages are the recorded golden set (eval fixtures plus probes) and, with
+--long, the same messages padded to ~2 KB as pasted text would be.
+
+    python3 benchmarks/bench_intent_router.py --rounds 200
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+
+import _harness  # noqa: F401  (puts tools/ on sys.path)
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools", "eval", "intent_golden.json")
+
+_FINANCE_STRONG = re.compile(r'\b(stock price|share price|stock market|stock quote|market cap|ticker symbol|'
+                             r'nasdaq|s&p ?500|dow jones|earnings report)\b')
+_TICKER = re.compile(r'(?:^|\s)\$[a-z]{1,5}\b')
+_FINANCE_NOUN = re.compile(r'\b(stock|stocks|shares?|ticker|equit(?:y|ies)|crypto|bitcoin|etf)\b')
+_FINANCE_ACTION = re.compile(r'\b(price|prices|quote|quotes|market|trading|trade|buy|sell|invest|worth|value)\b')
+_CHAIN = [
+    re.compile(r'\b(weather|forecast|temperature|raining|snowing|humidity|wind speed)\b'),
+    re.compile(r'\b(news|headlines?|breaking news|current events?)\b'),
+    re.compile(r'\blatest\b.*\b(update|report|story|stories|happening|developments?)\b'),
+    re.compile(r'\b(kql|kusto|run a query|execute a query|table schema|sample rows|show me data)\b'),
+    re.compile(r'\b(count|summarize|filter by|group by|\bjoin\b|distinct|top \d|take \d)\b'),
+    re.compile(r'\b(search the web|web search|look up|google|what happened|who won|search for)\b'),
+]
+_GREETING = re.compile(r'^(hi|hey|hello|howdy|yo|sup|good morning|good evening|good afternoon|thanks|thank you|'
+                       r'ok|okay|bye|goodbye|see you|great|cool|nice|sure|yes|no|nah|yep|nope)\b')
+_META = re.compile(r'^(how are you|how do you feel|what is your name|who are you|what can you do|tell me about yourself)\b')
+_DETECTORS = [
+    re.compile(r'\b(raw outputs?|raw rows?|raw results?|verbatim|exact output|return only|no commentary|no explanation)\b'),
+    re.compile(r'\b(latest|recent|rows?|records?)\b'),
+    re.compile(r'\b(table|reflections|goals|conversations|knowledge|selfstate|emotionstate|memorysummaries|'
+               r'heuristicsindex|emotionbaseline|backgroundproposals|backgroundactivity)\b'),
+    re.compile(r'\b(database|databases|memory|sqlite|data)\b'),
+    re.compile(r'\b(tables?|schema|columns?)\b'),
+    re.compile(r'\b(conversation|history|recent|chat|talked|said)\b'),
+    re.compile(r'\b(emotion|feeling|mood|how.*feel)\b'),
+]
+
+
+def regex_chains(msg_lower):
+    """The pre-router per-turn work (labels discarded; cost is what matters)."""
+    stripped = re.sub(r'[^\w\s]', '', msg_lower).strip()
+    words = stripped.split()
+    (len(words) <= 4 and _GREETING.match(stripped)) or (len(words) <= 6 and _META.match(stripped))
+    if not (_FINANCE_STRONG.search(msg_lower) or _TICKER.search(msg_lower)
+            or (_FINANCE_NOUN.search(msg_lower) and _FINANCE_ACTION.search(msg_lower))):
+        for rx in _CHAIN:
+            if rx.search(msg_lower):
+                break
+    return [rx.search(msg_lower) for rx in _DETECTORS]
+
+
+def bench(label, fn, messages, rounds):
+    times = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for m in messages:
+            fn(m)
+        times.append((time.perf_counter() - t0) * 1e6 / len(messages))
+    times.sort()
+    print(f"  {label:<20} p50={times[len(times) // 2]:7.2f}µs/turn  min={times[0]:7.2f}µs/turn")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--long", action="store_true", help="also pad each message to ~2 KB")
+    args = parser.parse_args()
+    from bridge.intent import _route_intents
+    with open(GOLDEN, encoding="utf-8") as f:
+        short = [c["message"].lower() for c in json.load(f)["cases"]]
+    filler = ("here is the text i pasted from the report so you can see what they wrote about it. " * 24).lower()
+    sets = [("golden messages", short)]
+    if args.long:
+        sets.append(("~2 KB messages", [filler + m for m in short]))
+    uncached = _route_intents.__wrapped__
+    for title, messages in sets:
+        print(f"{title}: n={len(messages)} avg_chars={sum(map(len, messages)) // len(messages)}")
+        bench("regex chains", regex_chains, messages, args.rounds)
+        bench("router", uncached, messages, args.rounds)
+        for m in messages:
+            _route_intents(m)
+        bench("router (cached)", _route_intents, messages, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
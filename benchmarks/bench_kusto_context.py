@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Kusto memory-context fetch: serial vs parallel singles vs one batched request.
+
+Runs the Kusto branch of _build_memory_context() against a local stand-in
+for /v1/rest/query that sleeps --rtt-ms per request (network round trip)
+plus --exec-ms per statement, and answers with v1-format result tables
+(a batch gets one table per statement plus the table of contents).
+
+    serial    one worker: today's pre-pool behaviour, one RTT per section
+    parallel  the bounded pool, one request per section
+    batch     KUSTO_CONTEXT_BATCH: profile/core/goals/emotion/summaries in
+              one request; skills, pool and lexical recall still parallel
+    cached    batch plus the Kusto result cache (no writes between turns,
+              so every turn after the first is served locally)
+
+    python3 benchmarks/bench_kusto_context.py --rtt-ms 60 --exec-ms 8 --turns 20
+"""
+
+import argparse
+import concurrent.futures
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import _harness
+
+_AS_RE = re.compile(r"\|\s*as\s+(\w+)\s*$")
+
+
+def _table(name, columns, rows):
+    return {"TableName": name, "Columns": [{"ColumnName": c, "DataType": "String"} for c in columns],
+            "Rows": rows}
+
+
+def _rows_for(statement):
+    if "EmotionState" in statement:
+        return ["Joy", "Curiosity"], [[0.6, 0.7]]
+    if "Goals" in statement:
+        return ["Category", "Title", "Description"], [["self", "Ship the cache", "this week"]]
+    if "MemorySummaries" in statement:
+        return ["Period", "Summary"], [["2026-10-17", "Talked about Kusto latency"]]
+    if "Skills" in statement:
+        return ["SkillId", "Name", "Description", "Status"], [["s1", "pdf", "Summarize a PDF", "active"]]
+    if "Entity =~ 'User'" in statement:
+        return ["Relation", "Value", "Confidence"], [["name", "Sam", 0.9], ["city", "Seattle", 0.8]]
+    return ["Entity", "Relation", "Value", "Confidence"], [["Kusto", "is", "a database", 0.9]]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    rtt_s = 0.0
+    exec_s = 0.0
+    requests = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        statements = [s.strip() for s in body.get("csl", "").split(";\n") if s.strip()]
+        with _Handler.lock:
+            _Handler.requests += 1
+        time.sleep(self.rtt_s + self.exec_s * len(statements))
+        tables = []
+        for i, stmt in enumerate(statements):
+            cols, rows = _rows_for(stmt)
+            tables.append(_table(f"Table_{i}", cols, rows))
+        if len(statements) > 1:
+            n = len(tables)
+            tables.append(_table(f"Table_{n}", ["Value"], [["{}"]]))
+            tables.append(_table(f"Table_{n + 1}", ["Timestamp", "Severity"], [["", 4]]))
+            toc = [[i, "QueryResult", (_AS_RE.search(s).group(1) if _AS_RE.search(s) else "PrimaryResult"),
+                    str(i), ""] for i, s in enumerate(statements)]
+            toc.append([n, "QueryProperties", "@ExtendedProperties", str(n), ""])
+            toc.append([n + 1, "QueryStatus", "QueryStatus", str(n + 1), ""])
+            tables.append(_table(f"Table_{n + 2}", ["Ordinal", "Kind", "Name", "Id", "PrettyName"], toc))
+        payload = json.dumps({"Tables": tables}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 64  # the default (5) drops SYNs when eight sections connect at once
+
+
+def run(rtt_ms, exec_ms, turns):
+    from bridge import cognition
+    from bridge import kusto
+    from bridge import state as st
+    from embedding_providers import make_provider
+    _Handler.rtt_s, _Handler.exec_s = rtt_ms / 1000.0, exec_ms / 1000.0
+    server = _Server(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    cluster, db = f"http://127.0.0.1:{server.server_port}", "Eva"
+
+    st.memory_backend = "kusto"
+    st.cognition_enabled = True
+    st.kusto_token_cache = "bench-token"
+    st.embedding_provider = make_provider("local")
+    for table in ("Goals", "Skills"):
+        st.kusto_table_columns_cache[(cluster, db, table)] = ["Status"]
+    cognition._get_kusto_config = lambda: (cluster, db)
+
+    print(f"Kusto context: rtt={rtt_ms}ms exec={exec_ms}ms/statement turns={turns}")
+    modes = (("serial", 1, False, False), ("parallel", 8, False, False), ("batch", 8, True, False),
+             ("cached", 8, True, True))
+    for label, workers, batch, result_cache in modes:
+        st.context_query_pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        cognition._KUSTO_CONTEXT_BATCH = batch
+        kusto._KUSTO_RESULT_CACHE = result_cache
+        kusto._invalidate_kusto_results()
+        _Handler.requests = 0
+        times = []
+        with _harness.quiet():
+            for _ in range(turns):
+                st.last_interaction_date = None  # include the morning summaries section
+                ms, _ctx = _harness.timed_ms(cognition._build_memory_context, "what do I like about Kusto?")
+                times.append(ms)
+        print(_harness.format_stats(label, times) + f"  requests/turn={_Handler.requests / turns:.1f}")
+        st.context_query_pool.shutdown(wait=True)
+    st.context_query_pool = None
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rtt-ms", type=float, default=60.0, help="simulated network round trip per request")
+    parser.add_argument("--exec-ms", type=float, default=8.0, help="simulated server time per statement")
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+    run(args.rtt_ms, args.exec_ms, args.turns)
+
+
+if __name__ == "__main__":
+    main()
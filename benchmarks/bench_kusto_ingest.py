@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Kusto ingest: .ingest inline management commands vs streaming ingestion.
+
+Sends Knowledge rows through _kusto_ingest_send() to the SQLite-backed
+stand-in (tools/kusto_standin.py), which sleeps --latency-ms per request.
+Each batch size runs --calls sends from --workers threads, once per mode:
+
+    inline     the stand-in has streaming off, so the first send marks the
+               table disabled and the rest go out as .ingest inline
+    streaming  gzipped CSV to /v1/rest/ingest/{db}/{table}
+
+Reports rows/sec over the whole run and per-call latency. The stand-in
+charges both endpoints the same latency, so the difference is request
+encoding and handling; on a real cluster inline commands also queue on the
+control plane.
+
+    python3 benchmarks/bench_kusto_ingest.py --latency-ms 20 --calls 200 --batch-rows 1,50,500
+"""
+
+import argparse
+import concurrent.futures
+import time
+
+import _harness
+
+
+def _rows(call, batch_rows):
+    return [{"Timestamp": "2026-10-18T12:00:00Z", "Entity": "User", "Relation": f"bench_{call % 50}",
+             "Value": f"fact {call}-{i}, with a comma and \"quotes\"", "Confidence": 0.5,
+             "Source": "bench", "Decay": 0.01} for i in range(batch_rows)]
+
+
+def run(latency_ms, calls, workers, batch_sizes):
+    from bridge import kusto
+    from bridge import state as st
+    from kusto_standin import KustoStandIn
+    from sqlite_memory import SqliteMemory
+
+    mem = SqliteMemory(_harness.temp_db_path())
+    standin = KustoStandIn(mem, latency_ms=latency_ms).start()
+    cluster, db = standin.url, "Eva"
+    st.kusto_token_cache = "bench-token"
+    kusto._KUSTO_RESULT_CACHE = False
+    columns = kusto._get_table_columns(cluster, db, "Knowledge")
+
+    print(f"Kusto ingest: latency={latency_ms}ms calls={calls} workers={workers}")
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    for batch_rows in batch_sizes:
+        for label, streaming in (("inline", False), ("streaming", True)):
+            standin.streaming = streaming
+            st.kusto_streaming_disabled.clear()
+            with _harness.quiet():
+                kusto._kusto_ingest_send(cluster, db, "Knowledge", columns, _rows(0, 1))  # warm up / mark disabled
+                before = dict(st.kusto_ingest_stats)
+                started = time.perf_counter()
+                results = list(pool.map(
+                    lambda call: _harness.timed_ms(kusto._kusto_ingest_send, cluster, db, "Knowledge", columns,
+                                                   _rows(call, batch_rows)),
+                    range(calls)))
+                elapsed = time.perf_counter() - started
+            after = st.kusto_ingest_stats
+            rows_sent = (after["stream_rows"] - before["stream_rows"]) + (after["inline_rows"] - before["inline_rows"])
+            failed = sum(1 for _, ok in results if not ok)
+            print(_harness.format_stats(f"{label} x{batch_rows} rows", [ms for ms, _ in results])
+                  + f"  rows/s={rows_sent / elapsed:>9.0f}  failed={failed}")
+    pool.shutdown(wait=True)
+    standin.stop()
+    mem.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="stand-in latency per request")
+    parser.add_argument("--calls", type=int, default=200, help="ingest calls per mode and batch size")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent senders")
+    parser.add_argument("--batch-rows", default="1,50,500", help="comma-separated rows per call")
+    args = parser.parse_args()
+    run(args.latency_ms, args.calls, args.workers, [int(n) for n in args.batch_rows.split(",") if n.strip()])
+
+
+if __name__ == "__main__":
+    main()
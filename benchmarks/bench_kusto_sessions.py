@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Kusto REST calls: a new session per request vs the shared keep-alive pool.
+
+Runs _kusto_query_direct against a local stand-in for /v1/rest/query. The
+stand-in speaks HTTP/1.1 keep-alive, sleeps --handshake-ms whenever a new
+connection arrives (standing in for the TCP + TLS handshake to a real
+cluster) and --rtt-ms per request, and gzips responses when asked to.
+Each turn issues --queries requests through --workers threads, as a
+memory-context build does.
+
+    fresh   a requests.Session() created and closed per attempt (the
+            pre-pool behaviour): every request pays a handshake
+    pooled  _kusto_session(): one keep-alive pool per cluster
+
+Pass --tls-cert/--tls-key (a self-signed pair for 127.0.0.1) to run over
+real TLS instead of the simulated handshake.
+
+    python3 benchmarks/bench_kusto_sessions.py --handshake-ms 40 --rtt-ms 20 --turns 20
+"""
+
+import argparse
+import concurrent.futures
+import gzip
+import json
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import _harness
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections open between requests
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    handshake_s = 0.0
+    rtt_s = 0.0
+    rows = 50
+    connections = 0
+    requests = 0
+    wire_bytes = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with _Handler.lock:
+            _Handler.connections += 1
+        time.sleep(self.handshake_s)
+
+    def do_POST(self):
+        json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with _Handler.lock:
+            _Handler.requests += 1
+        time.sleep(self.rtt_s)
+        rows = [["Kusto", "is", f"a database fact {i} " + "x" * 80, 0.9] for i in range(self.rows)]
+        payload = json.dumps({"Tables": [{
+            "TableName": "Table_0",
+            "Columns": [{"ColumnName": c, "DataType": "String"} for c in ("Entity", "Relation", "Value", "Confidence")],
+            "Rows": rows,
+        }]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            payload = gzip.compress(payload, compresslevel=5)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        with _Handler.lock:
+            _Handler.wire_bytes += len(payload)
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 64
+
+
+class _FreshSession:
+    """The pre-pool call pattern: a new session per attempt, closed after."""
+
+    def post(self, *args, **kwargs):
+        import requests
+        session = requests.Session()
+        try:
+            return session.post(*args, **kwargs)
+        finally:
+            session.close()
+
+
+def run(handshake_ms, rtt_ms, queries, workers, turns, rows, tls_cert=None, tls_key=None):
+    from bridge import kusto
+    from bridge import state as st
+    _Handler.handshake_s = 0.0 if tls_cert else handshake_ms / 1000.0
+    _Handler.rtt_s, _Handler.rows = rtt_ms / 1000.0, rows
+    server = _Server(("127.0.0.1", 0), _Handler)
+    scheme = "http"
+    if tls_cert:
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ctx.load_cert_chain(tls_cert, tls_key)
+        server.socket = ctx.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    cluster, db = f"{scheme}://127.0.0.1:{server.server_port}", "Eva"
+    st.kusto_token_cache = "bench-token"
+    pooled = kusto._kusto_session
+
+    print(f"Kusto sessions: handshake={'tls' if tls_cert else f'{handshake_ms}ms'} rtt={rtt_ms}ms "
+          f"queries/turn={queries} workers={workers} turns={turns}")
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    for label, factory in (("fresh", lambda url: _FreshSession()), ("pooled", pooled)):
+        kusto._kusto_session = factory
+        _Handler.connections = _Handler.requests = _Handler.wire_bytes = 0
+        times = []
+        with _harness.quiet():
+            for _ in range(turns):
+                t0 = time.perf_counter()
+                list(pool.map(lambda i: kusto._kusto_query_direct(cluster, db, f"Knowledge | take {i}"),
+                              range(queries)))
+                times.append((time.perf_counter() - t0) * 1000.0)
+        print(_harness.format_stats(label, times)
+              + f"  connections/turn={_Handler.connections / turns:.1f}"
+              + f"  KB/turn={_Handler.wire_bytes / turns / 1024:.1f}")
+    kusto._kusto_session = pooled
+    pool.shutdown(wait=True)
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--handshake-ms", type=float, default=40.0, help="simulated TCP+TLS setup per new connection")
+    parser.add_argument("--rtt-ms", type=float, default=20.0, help="simulated round trip per request")
+    parser.add_argument("--queries", type=int, default=8, help="Kusto requests per turn")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=50, help="result rows per response")
+    parser.add_argument("--tls-cert")
+    parser.add_argument("--tls-key")
+    args = parser.parse_args()
+    run(args.handshake_ms, args.rtt_ms, args.queries, args.workers, args.turns, args.rows,
+        args.tls_cert, args.tls_key)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Kusto mode end to end against the SQLite-backed stand-in (tools/kusto_standin.py).
+
+Unlike bench_kusto_context.py, whose stand-in returns canned rows, every
+statement here is translated and run against a real SqliteMemory seeded
+with --rows Knowledge rows, so the numbers include query work as well as
+the bridge's request path (pooled sessions, batching, deadlines, retries,
+the circuit breaker). Each profile runs --turns memory-context builds
+(result cache off, so every turn goes to the "cluster") and --turns
+synchronous ingests of --ingest-rows Knowledge rows (streaming ingestion;
+see bench_kusto_ingest.py for streaming vs .ingest inline).
+
+    clean    --latency-ms per request
+    jitter   plus up to --jitter-ms uniform extra latency
+    faulty   jitter plus --error-rate of requests answered 503
+
+    python3 benchmarks/bench_kusto_standin.py --latency-ms 30 --jitter-ms 40 --error-rate 0.05 --turns 30
+"""
+
+import argparse
+import concurrent.futures
+
+import _harness
+
+
+def run(rows, turns, ingest_rows, latency_ms, jitter_ms, error_rate):
+    from bridge import cognition
+    from bridge import kusto
+    from bridge import state as st
+    from embedding_providers import make_provider
+    from kusto_standin import KustoStandIn
+    from sqlite_memory import SqliteMemory
+
+    mem = SqliteMemory(_harness.temp_db_path())
+    _harness.seed_knowledge(mem, rows)
+    standin = KustoStandIn(mem, seed=7).start()
+    cluster, db = standin.url, "Eva"
+
+    st.memory_backend = "kusto"
+    st.cognition_enabled = True
+    st.kusto_token_cache = "bench-token"
+    st.embedding_provider = make_provider("local")
+    st.context_query_pool = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+    cognition._get_kusto_config = lambda: (cluster, db)
+    kusto._KUSTO_RESULT_CACHE = False
+    columns = kusto._get_table_columns(cluster, db, "Knowledge")
+
+    print(f"Kusto stand-in: {rows} Knowledge rows, turns={turns}, ingest={ingest_rows} rows/call")
+    profiles = (("clean", latency_ms, 0.0, 0.0), ("jitter", latency_ms, jitter_ms, 0.0),
+                ("faulty", latency_ms, jitter_ms, error_rate))
+    for label, latency, jitter, errors in profiles:
+        standin.latency_ms, standin.jitter_ms, standin.error_rate = latency, jitter, errors
+        st.kusto_breakers.clear()
+        before = standin.stats()
+        context_ms, ingest_ms, failed_ingests = [], [], 0
+        with _harness.quiet():
+            for turn in range(turns):
+                st.last_interaction_date = None  # include the morning summaries section
+                ms, _ctx = _harness.timed_ms(cognition._build_memory_context, "what do I like about Kusto?")
+                context_ms.append(ms)
+                batch = [{"Timestamp": f"2026-10-18T{turn % 24:02d}:00:00Z", "Entity": "User",
+                          "Relation": "likes", "Value": f"bench fact {turn}-{i}", "Confidence": 0.5,
+                          "Source": "bench", "Decay": 0.01} for i in range(ingest_rows)]
+                ms, ok = _harness.timed_ms(kusto._kusto_ingest_send, cluster, db, "Knowledge", columns, batch)
+                ingest_ms.append(ms)
+                failed_ingests += not ok
+        after = standin.stats()
+        breaker = kusto._kusto_breaker_status()
+        print(f"  [{label}] latency={latency}ms jitter={jitter}ms error_rate={errors}")
+        print(_harness.format_stats("memory context", context_ms)
+              + f"  requests/turn={(after['requests'] - before['requests']) / turns:.1f}")
+        print(_harness.format_stats("ingest", ingest_ms) + f"  failed={failed_ingests}")
+        print(f"  {'':<28} injected_errors={after['errors_injected'] - before['errors_injected']}"
+              f"  breaker_trips={breaker['trips']}")
+
+    st.context_query_pool.shutdown(wait=True)
+    st.context_query_pool = None
+    standin.stop()
+    mem.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="synthetic Knowledge rows to seed")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--ingest-rows", type=int, default=20, help="rows per ingest call")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="stand-in latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=40.0, help="uniform extra latency per request")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="fraction of requests answered 503")
+    args = parser.parse_args()
+    run(args.rows, args.turns, args.ingest_rows, args.latency_ms, args.jitter_ms, args.error_rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""SQLite memory-context assembly: section cache off vs on.
+
+Seeds a temp store with --rows Knowledge rows (plus a few goals and skills)
+and times _build_memory_context_sqlite() over --turns turns. With the cache
+on, the identity/profile/core/goals/skills/emotion sections are served from
+memory until their table is written; --write-every N ingests one Knowledge
+row every N turns to show the cost of invalidation. The local embedding
+provider is used so message-dependent recall runs without a network.
+
+    python3 benchmarks/bench_memory_context.py --rows 50000 --turns 200
+"""
+
+import argparse
+
+import _harness
+
+MESSAGES = [
+    "what do you remember about my hiking plans?",
+    "any news on kusto performance today?",
+    "remind me what coffee I like",
+    "summarize what we talked about yesterday",
+]
+
+
+def run(rows, turns, write_every):
+    from bridge import cognition
+    from bridge import state as st
+    from embedding_providers import make_provider
+    mem = _harness.sqlite_bridge(_harness.temp_db_path())
+    st.embedding_provider = make_provider("local")
+    st.knowledge_index = False
+    with _harness.quiet():
+        _harness.seed_knowledge(mem, rows)
+        mem.ingest("Goals", ["GoalId", "Title", "Description", "Priority"],
+                   [{"GoalId": f"g{i}", "Title": f"Goal {i}", "Description": "bench goal", "Priority": i}
+                    for i in range(8)])
+        mem.ingest("Skills", ["SkillId", "Name", "Description", "Status"],
+                   [{"SkillId": f"s{i}", "Name": f"skill-{i}", "Description": f"does task {i}",
+                     "Status": "active"} for i in range(20)])
+    print(f"Memory context: rows={rows} turns={turns} write_every={write_every or 'never'}")
+    for label, enabled in (("cache off", False), ("cache on", True)):
+        cognition._CONTEXT_CACHE_ENABLED = enabled
+        st.context_cache.clear()
+        st.context_cache_stats.clear()
+        times = []
+        with _harness.quiet():
+            for turn in range(turns):
+                if write_every and turn and turn % write_every == 0:
+                    mem.ingest("Knowledge", ["Entity", "Relation", "Value", "Confidence"],
+                               [{"Entity": "User", "Relation": f"bench_{turn}", "Value": "v", "Confidence": 0.9}])
+                st.last_interaction_date = None if turn == 0 else st.last_interaction_date
+                ms, _ = _harness.timed_ms(cognition._build_memory_context_sqlite, MESSAGES[turn % len(MESSAGES)])
+                times.append(ms)
+        print(_harness.format_stats(label, times[1:]))
+        if enabled:
+            status = cognition._context_cache_status()
+            print(f"  {'':<28} hit_rate={status['hit_rate']} saved_ms={status['saved_ms']}")
+    mem.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--write-every", type=int, default=0,
+                        help="ingest one Knowledge row every N turns (0 = never)")
+    args = parser.parse_args()
+    run(args.rows, args.turns, args.write_every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Semantic-recall scoring cost: per-row _cosine_similarity vs batched top-k.
+
+Scores one query against pools of 150 (today's SEMANTIC_POOL_SIZE), 5k and
+50k vectors of text-embedding-3-small width and keeps the top 6, as the
+context builder does. "batched" uses NumPy when it is installed; "array" is
+the NumPy-free fallback (math.sumprod over float32 arrays). Stacking/normalizing is timed with the scoring
+because the context builder rebuilds the pool every turn.
+
+    python3 benchmarks/bench_similarity.py --sizes 150,5000,50000 --dim 1536
+"""
+
+import argparse
+import array
+
+import _harness
+
+
+def _loop_top_k(memory, query, vectors, k):
+    scored = [(memory._cosine_similarity(query, v), i) for i, v in enumerate(vectors)]
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored[:k]
+
+
+def run(sizes, dim, repeat, k, skip_loop_above):
+    from bridge import memory
+    numpy_mod = memory._np
+    print(f"Similarity top-{k}: dim={dim} numpy={'yes' if numpy_mod is not None else 'no'}")
+    query = _harness.random_vectors(1, dim, seed=1)[0]
+    for size in sizes:
+        # float32 arrays, as returned by the embedding store
+        vectors = [array.array("f", v) for v in _harness.random_vectors(size, dim, seed=size)]
+        reps = max(1, repeat if size <= 5000 else repeat // 5)
+        expected = None
+        if size <= skip_loop_above:
+            times = []
+            for _ in range(reps):
+                ms, expected = _harness.timed_ms(_loop_top_k, memory, query, vectors, k)
+                times.append(ms)
+            print(_harness.format_stats(f"loop    n={size}", times))
+        else:
+            print(f"  {'loop    n=' + str(size):<28} skipped (--skip-loop-above {skip_loop_above})")
+
+        variants = [("batched", numpy_mod)] if numpy_mod is not None else []
+        variants.append(("array", None))
+        for label, np_mod in variants:
+            memory._np = np_mod
+            times = []
+            for _ in range(reps if np_mod is not None else max(1, reps // 2)):
+                ms, got = _harness.timed_ms(memory._top_k_cosine, query, vectors, k)
+                times.append(ms)
+            if expected is not None and [i for _, i in got] != [i for _, i in expected]:
+                print(f"  !! {label} top-{k} differs from loop")
+            print(_harness.format_stats(f"{label:<7} n={size}", times))
+        memory._np = numpy_mod
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="150,5000,50000", help="comma-separated pool sizes")
+    parser.add_argument("--dim", type=int, default=1536, help="vector width")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per size (fewer for >5k)")
+    parser.add_argument("--top-k", type=int, default=6)
+    parser.add_argument("--skip-loop-above", type=int, default=5000,
+                        help="skip the per-row loop baseline for larger pools")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    run(sizes, args.dim, args.repeat, args.top_k, args.skip_loop_above)
+
+
+if __name__ == "__main__":
+    main()
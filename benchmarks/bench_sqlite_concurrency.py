@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Memory-context read latency under concurrent reflection writes.
+
+Runs several threads calling _build_memory_context_sqlite (the chat path)
+while one thread loops _post_response_reflection_sqlite (the reflection
+writer) against the same SQLite file, then reports p50/p95 read latency.
+
+Compare pool sizes to see how much the reader pool buys:
+    python3 benchmarks/bench_sqlite_concurrency.py --readers 1
+    python3 benchmarks/bench_sqlite_concurrency.py --readers 4
+"""
+
+import argparse
+import threading
+import time
+
+import _harness
+
+MESSAGES = [
+    "What do you remember about my coffee habits?",
+    "Tell me about Python and Rust",
+    "How are you feeling today?",
+    "Show me the recent conversation history",
+    "Any plans for hiking in Seattle?",
+]
+
+
+def run(readers, reader_threads, seconds, seed_rows, with_writer):
+    mem = _harness.sqlite_bridge(_harness.temp_db_path(), max_readers=readers)
+    _harness.seed_knowledge(mem, seed_rows)
+
+    from bridge import cognition
+
+    stop = threading.Event()
+    read_ms = []
+    write_ms = []
+    lock = threading.Lock()
+
+    def reader(idx):
+        i = idx
+        while not stop.is_set():
+            ms, _ = _harness.timed_ms(cognition._build_memory_context_sqlite, MESSAGES[i % len(MESSAGES)])
+            with lock:
+                read_ms.append(ms)
+            i += 1
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            ms, _ = _harness.timed_ms(
+                cognition._post_response_reflection_sqlite,
+                f"I visited Seattle and tried Coffee number {i}?",
+                "That sounds great, I love hearing about it.",
+                "bench-model",
+            )
+            write_ms.append(ms)
+            i += 1
+
+    threads = [threading.Thread(target=reader, args=(n,), daemon=True) for n in range(reader_threads)]
+    if with_writer:
+        threads.append(threading.Thread(target=writer, daemon=True))
+    with _harness.quiet():
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+    mem.close()
+    return read_ms, write_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4, help="SqliteMemory read pool size")
+    parser.add_argument("--threads", type=int, default=4, help="concurrent context-builder threads")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=20000, help="synthetic Knowledge rows to seed")
+    parser.add_argument("--no-writer", action="store_true", help="skip the concurrent reflection writer")
+    args = parser.parse_args()
+
+    read_ms, write_ms = run(args.readers, args.threads, args.seconds, args.rows, not args.no_writer)
+    print(f"SQLite concurrency: readers={args.readers} threads={args.threads} rows={args.rows} "
+          f"writer={'off' if args.no_writer else 'on'} ({args.seconds:.0f}s)")
+    print(_harness.format_stats("build_memory_context", read_ms))
+    if write_ms:
+        print(_harness.format_stats("post_response_reflection", write_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Commits (WAL fsyncs) per turn and ingest throughput, with and without write-behind.
+
+Part 1 replays _post_response_reflection_sqlite turns. Part 2 hammers
+SqliteMemory.ingest with single-row calls. Each runs once with synchronous
+commits and once with write-behind group commit, on a fresh database.
+
+    python3 benchmarks/bench_sqlite_group_commit.py --turns 300 --rows 5000
+"""
+
+import argparse
+import time
+
+import _harness
+
+
+def _reflection_turns(mem, turns):
+    from bridge import cognition
+    with _harness.quiet():
+        t0 = time.perf_counter()
+        for i in range(turns):
+            cognition._post_response_reflection_sqlite(
+                f"My favorite band is Radiohead and I visited Lisbon and Porto {i}?",
+                "That sounds great, I love hearing about it. " * 4,
+                "bench-model",
+            )
+        mem.flush()
+        return time.perf_counter() - t0
+
+
+def _single_row_ingests(mem, rows):
+    cols = ["SessionId", "Timestamp", "Role", "Content"]
+    t0 = time.perf_counter()
+    for i in range(rows):
+        mem.ingest("Conversations", cols, [{
+            "SessionId": "bench", "Timestamp": "2026-01-01T00:00:00Z",
+            "Role": "user", "Content": f"message {i}",
+        }], defer=True)
+    mem.flush()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=300, help="reflection turns per mode")
+    parser.add_argument("--rows", type=int, default=5000, help="single-row ingests per mode")
+    args = parser.parse_args()
+
+    print(f"Reflection turns ({args.turns} per mode)")
+    for label, write_behind in (("sync commits", False), ("write-behind", True)):
+        mem = _harness.sqlite_bridge(_harness.temp_db_path(), write_behind=write_behind)
+        base = mem.write_stats()
+        elapsed = _reflection_turns(mem, args.turns)
+        st = mem.write_stats()
+        commits = st["commits"] - base["commits"]
+        rows = st["rows"] - base["rows"]
+        print(f"  {label:<14} commits/turn={commits / args.turns:5.2f}  "
+              f"turns/s={args.turns / elapsed:8.1f}  rows/s={rows / elapsed:9.1f}")
+        mem.close()
+
+    print(f"Single-row ingest ({args.rows} per mode)")
+    for label, write_behind in (("sync commits", False), ("write-behind", True)):
+        mem = _harness.sqlite_bridge(_harness.temp_db_path(), write_behind=write_behind)
+        base = mem.write_stats()
+        elapsed = _single_row_ingests(mem, args.rows)
+        st = mem.write_stats()
+        commits = st["commits"] - base["commits"]
+        print(f"  {label:<14} commits={commits:<6} rows/s={args.rows / elapsed:9.1f}")
+        mem.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,25 +4,46 @@ import datetime
 import json
 import os
 import re
+import threading
 import time
 import uuid
 from bridge import config as _cfg
 from bridge import state as _st
-from bridge.kusto import (_kusto_query_direct, _kusto_ingest_direct,
-    _get_kusto_config, _ensure_kusto_token, _get_table_columns)
+from bridge.telemetry import _telemetry_emit
+from bridge.intent import _route_intents
+from bridge.kusto import (_kusto_query_direct, _kusto_query_multi, _kusto_ingest_direct,
+    _get_kusto_config, _ensure_kusto_token, _get_table_columns, _merge_upsert_rows,
+    _kusto_deadline, _kusto_breaker_open)
 from bridge.memory import (_memory_query, _memory_ingest, _memory_fts_search,
     _memory_available, _get_sqlite_mem, _resolve_memory_backend,
-    _embed_texts, _cosine_similarity, _expand_query_terms,
-    _set_openai_key_from)
+    _embed_texts, _top_k_cosine, _expand_query_terms,
+    _set_openai_key_from, _knowledge_text, _knowledge_index_search,
+    _schedule_knowledge_index_sync, _cached_embeddings, _queue_row_embeddings,
+    _semantic_min_score, _table_generation)
 
 _ARTIFACTS_DIR = _cfg.ARTIFACTS_DIR
 _CANDIDATE_HISTORY_TTL_SECONDS = _cfg.CANDIDATE_HISTORY_TTL_SECONDS
+_CANDIDATE_HISTORY_CACHE_MAX = _cfg.CANDIDATE_HISTORY_CACHE_MAX
+_CANDIDATE_COUNTS_MAX = _cfg.CANDIDATE_COUNTS_MAX
+_REFLECTION_QUEUE_MAX = _cfg.REFLECTION_QUEUE_MAX
+_REFLECTION_BATCH_MAX = _cfg.REFLECTION_BATCH_MAX
+_UPSERT_TABLES = _cfg.UPSERT_TABLES
 _CONVO_CONTENT_CAP = _cfg.CONVO_CONTENT_CAP
 _GOALS_LATEST_QUERY = _cfg.GOALS_LATEST_QUERY
 _MEMORY_TABLES = _cfg.MEMORY_TABLES
-_SEMANTIC_MIN_SCORE = _cfg.SEMANTIC_MIN_SCORE
 _SEMANTIC_POOL_SIZE = _cfg.SEMANTIC_POOL_SIZE
 _SKILLS_LATEST_QUERY = _cfg.SKILLS_LATEST_QUERY
+_CONTEXT_CACHE_ENABLED = _cfg.CONTEXT_CACHE_ENABLED
+_CONTEXT_QUERY_WORKERS = _cfg.CONTEXT_QUERY_WORKERS
+_CONTEXT_QUERY_DEADLINE_SECONDS = _cfg.CONTEXT_QUERY_DEADLINE_SECONDS
+_KUSTO_CONTEXT_BATCH = _cfg.KUSTO_CONTEXT_BATCH
+_KUSTO_TURN_BUDGET_SECONDS = _cfg.KUSTO_TURN_BUDGET_SECONDS
+_CONTEXT_TOKEN_BUDGET = _cfg.CONTEXT_TOKEN_BUDGET
+_CONTEXT_TOKEN_BUDGETS = _cfg.CONTEXT_TOKEN_BUDGETS
+_CONTEXT_CHARS_PER_TOKEN = _cfg.CONTEXT_CHARS_PER_TOKEN
+_CONTEXT_SECTION_PRIORITY = _cfg.CONTEXT_SECTION_PRIORITY
+_CONTEXT_TRIMMABLE_SECTIONS = _cfg.CONTEXT_TRIMMABLE_SECTIONS
+_CONTEXT_STATIC_SECTIONS = _cfg.CONTEXT_STATIC_SECTIONS
 _SKILL_INJECT_MAX = _cfg.SKILL_INJECT_MAX
 _SKILL_INSTRUCTIONS_INJECT_CAP = _cfg.SKILL_INSTRUCTIONS_INJECT_CAP
 
@@ -104,7 +125,8 @@ def _knowledge_scope_clause(max_entities=200):
     if not _st.cognition_candidate_counts:
         return ""
 
-    scoped = list(_st.cognition_candidate_counts.keys())[-max_entities:]
+    with _st.candidate_lock:
+        scoped = list(_st.cognition_candidate_counts.keys())[-max_entities:]
     safe_entities = []
     for entity in scoped:
         norm = (entity or "").strip()
@@ -353,43 +375,63 @@ def _classify_entity_candidate(entity, user_message):
 
 
 
-def _load_candidate_history(entity):
-    """Load persisted mention history for a candidate entity."""
-    key = (entity or "").strip().lower()
-    if not key:
-        return 0, 0.0
+def _load_candidate_histories(entities):
+    """Load persisted mention history for a turn's candidate entities.
+
+    Returns {entity_lower: (mentions, max_confidence)} for every entity,
+    answering cache misses with one `IN (...)` query instead of one per
+    entity. Entities the query could not cover are left out.
+    """
+    keys = {}
+    for entity in entities or ():
+        name = (entity or "").strip()
+        if name and name.lower() not in keys:
+            keys[name.lower()] = name
 
     now = time.time()
-    cached = _st.candidate_history_cache.get(key)
-    if cached and now - cached[0] < _CANDIDATE_HISTORY_TTL_SECONDS:
-        return cached[1], cached[2]
+    histories = {}
+    missing = []
+    with _st.candidate_lock:
+        for key, name in keys.items():
+            cached = _st.candidate_history_cache.get(key)
+            if cached and now - cached[0] < _CANDIDATE_HISTORY_TTL_SECONDS:
+                histories[key] = (cached[1], cached[2])
+            else:
+                missing.append(name)
+    if not missing:
+        return histories
 
     backend = _resolve_memory_backend()
     if backend == "sqlite":
         mem = _get_sqlite_mem()
-        safe_entity = (entity or "").strip().replace("'", "''")
+        # Entity is COLLATE NOCASE, so IN and GROUP BY match =~ like Kusto.
         rows = mem.query(
-            f"SELECT COUNT(*) AS Mentions, MAX(Confidence) AS MaxConfidence "
-            f"FROM Knowledge WHERE Entity = '{safe_entity}' COLLATE NOCASE"
+            "SELECT Entity, COALESCE(SUM(Mentions), 0) AS Mentions, MAX(MaxConfidence) AS MaxConfidence "
+            f"FROM KnowledgeCurrent WHERE Entity IN ({', '.join('?' * len(missing))}) GROUP BY Entity",
+            tuple(missing),
         )
     else:
         cluster, db = _get_kusto_config()
         if not cluster or not db:
-            return 0, 0.0
-        safe_entity = (entity or "").strip().replace("'", "''")
+            return histories
+        deadline = _kusto_deadline(_KUSTO_TURN_BUDGET_SECONDS)
+        safe_entities = ", ".join(f"'{name.replace("'", "''")}'" for name in missing)
+        # Rows carry a Mentions counter once the table has the column (merged
+        # reflection batches, compaction); older rows count once each.
+        mentions = ("sum(coalesce(Mentions, int(1)))"
+                    if "Mentions" in (_get_table_columns(cluster, db, "Knowledge", deadline) or []) else "count()")
         query = (
             "Knowledge\n"
-            f"| where Entity =~ '{safe_entity}'\n"
-            "| summarize Mentions = count(), MaxConfidence = max(Confidence)"
+            f"| where Entity in~ ({safe_entities})\n"
+            f"| summarize Mentions = {mentions}, MaxConfidence = max(Confidence) by Entity = tolower(Entity)"
         )
-        rows = _kusto_query_direct(cluster, db, query)
+        rows = _kusto_query_direct(cluster, db, query, deadline=deadline)
     if rows is None:
-        return 0, 0.0
+        return histories
 
-    mentions = 0
-    max_confidence = 0.0
-    if rows:
-        row = rows[0] or {}
+    found = {}
+    for row in rows:
+        row = row or {}
         try:
             mentions = int(row.get("Mentions") or 0)
         except (TypeError, ValueError):
@@ -398,21 +440,45 @@ def _load_candidate_history(entity):
             max_confidence = float(row.get("MaxConfidence") or 0.0)
         except (TypeError, ValueError):
             max_confidence = 0.0
+        found[str(row.get("Entity") or "").lower()] = (mentions, max_confidence)
+
+    with _st.candidate_lock:
+        cache = _st.candidate_history_cache
+        for name in missing:
+            key = name.lower()
+            mentions, max_confidence = found.get(key, (0, 0.0))
+            histories[key] = (mentions, max_confidence)
+            cache[key] = (now, mentions, max_confidence)
+            cache.move_to_end(key)
+            print(f"[Cognition] Candidate history for \"{name}\": prior_mentions={mentions} max_conf={max_confidence:.3f}")
+        while len(cache) > _CANDIDATE_HISTORY_CACHE_MAX:
+            cache.popitem(last=False)
+    return histories
 
-    _st.candidate_history_cache[key] = (now, mentions, max_confidence)
-    print(f"[Cognition] Candidate history for \"{entity}\": prior_mentions={mentions} max_conf={max_confidence:.3f}")
-    return mentions, max_confidence
 
 
+def _load_candidate_history(entity):
+    """Load persisted mention history for a candidate entity."""
+    key = (entity or "").strip().lower()
+    if not key:
+        return 0, 0.0
+    return _load_candidate_histories([entity]).get(key, (0, 0.0))
 
-def _maybe_promote_candidate(entity):
-    """Promote candidate entities after repeated persisted or launch-local mentions."""
+
+
+def _maybe_promote_candidate(entity, history=None):
+    """Promote candidate entities after repeated persisted or launch-local mentions.
+
+    `history` is the entity's (mentions, max_confidence) when the caller
+    already loaded the turn's candidates with _load_candidate_histories().
+    """
     key = (entity or "").strip().lower()
     if not key:
         return None
 
-    session_count = _st.cognition_candidate_counts.get(key, 0)
-    prior_mentions, prior_max_conf = _load_candidate_history(entity)
+    with _st.candidate_lock:
+        session_count = _st.cognition_candidate_counts.get(key, 0)
+    prior_mentions, prior_max_conf = history if history is not None else _load_candidate_history(entity)
     total_observations = session_count + prior_mentions
 
     if prior_max_conf >= 0.6:
@@ -441,11 +507,21 @@ def _maybe_promote_candidate(entity):
 
 
 def _track_candidate_observation(entity):
-    """Record an entity mention for this launch-scoped promotion memory."""
+    """Record an entity mention for this launch-scoped promotion memory.
+
+    The counts are an LRU capped at CANDIDATE_COUNTS_MAX: a mention moves
+    the entity to the recent end, and the least recently mentioned entity
+    is forgotten once the cap is reached.
+    """
     key = (entity or "").strip().lower()
     if not key:
         return
-    _st.cognition_candidate_counts[key] = _st.cognition_candidate_counts.get(key, 0) + 1
+    with _st.candidate_lock:
+        counts = _st.cognition_candidate_counts
+        counts[key] = counts.get(key, 0) + 1
+        counts.move_to_end(key)
+        while len(counts) > _CANDIDATE_COUNTS_MAX:
+            counts.popitem(last=False)
 
 
 
@@ -479,42 +555,199 @@ def _extract_entity_candidates(user_message):
 # ---------------------------------------------------------------------------
 
 
-def _build_memory_context_sqlite(user_message):
+def _context_section(name, tables, loader):
+    """Return loader() for a memory-context section, reusing the last result
+    while none of `tables` has been written since it was computed.
+
+    The key is captured before loading, so a write that lands mid-load
+    just makes the next turn reload.
+    """
+    if not _CONTEXT_CACHE_ENABLED:
+        return loader()
+    key = tuple(_table_generation(t) for t in tables)
+    with _st.context_cache_lock:
+        stats = _st.context_cache_stats.setdefault(name, {"hits": 0, "misses": 0, "saved_ms": 0.0})
+        cached = _st.context_cache.get(name)
+        if cached is not None and cached[0] == key:
+            stats["hits"] += 1
+            stats["saved_ms"] += cached[2]
+            return cached[1]
+    t0 = time.time()
+    value = loader()
+    load_ms = (time.time() - t0) * 1000
+    with _st.context_cache_lock:
+        stats["misses"] += 1
+        _st.context_cache[name] = (key, value, load_ms)
+    return value
+
+
+def _context_cache_status():
+    """Hit rate and time saved by the memory-context section cache."""
+    with _st.context_cache_lock:
+        sections = {name: dict(st) for name, st in _st.context_cache_stats.items()}
+    hits = sum(st["hits"] for st in sections.values())
+    misses = sum(st["misses"] for st in sections.values())
+    for st in sections.values():
+        lookups = st["hits"] + st["misses"]
+        st["hit_rate"] = round(st["hits"] / lookups, 3) if lookups else None
+        st["saved_ms"] = round(st["saved_ms"], 1)
+    return {
+        "enabled": _CONTEXT_CACHE_ENABLED,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+        "saved_ms": round(sum(st["saved_ms"] for st in sections.values()), 1),
+        "sections": sections,
+    }
+
+
+
+def _context_token_budget(model=None):
+    """Memory-context budget (estimated tokens) for a model; 0 = unlimited.
+    The longest CONTEXT_TOKEN_BUDGETS prefix matching the model name wins."""
+    name = str(model or "").strip().lower()
+    best = None
+    for prefix, budget in _CONTEXT_TOKEN_BUDGETS.items():
+        p = str(prefix).lower()
+        if name.startswith(p) and (best is None or len(p) > len(best[0])):
+            best = (p, budget)
+    return int(best[1] if best else _CONTEXT_TOKEN_BUDGET)
+
+
+def _estimate_tokens(text):
+    return -(-len(text) // _CONTEXT_CHARS_PER_TOKEN) if text else 0
+
+
+def _trim_section(text, budget):
+    """Cut a line-list section to its header plus the first items that fit
+    in `budget` tokens. Returns "" when not even one item fits."""
+    lines = text.split("\n")
+    head = 0
+    while head < len(lines) and not lines[head].startswith(("-", " ")):
+        head += 1
+    if head == 0 or head == len(lines):
+        return ""
+    kept = "\n".join(lines[:head])
+    items = 0
+    for line in lines[head:]:
+        candidate = kept + "\n" + line
+        if _estimate_tokens(candidate + "\n\n") > budget:
+            break
+        kept = candidate
+        items += 1
+    return kept if items else ""
+
+
+def _pack_context(parts, budget):
+    """Fit named context sections into a token budget by priority.
+
+    parts is [(name, text)] in prompt order. Sections are admitted in
+    CONTEXT_SECTION_PRIORITY order (prompt order within a priority); a
+    section that does not fit is cut to its leading items when it is a
+    line list, otherwise dropped. CONTEXT_STATIC_SECTIONS are charged
+    first and never cut, so the cached prompt prefix stays byte-stable.
+    Kept sections stay in prompt order.
+
+    Returns (kept_parts, usage) where usage maps section name to
+    {"used": tokens, "cut": tokens}.
+    """
+    usage = {}
+    for name, text in parts:
+        u = usage.setdefault(name, {"used": 0, "cut": 0})
+        u["used"] += _estimate_tokens(text + "\n\n")
+    if not budget or sum(u["used"] for u in usage.values()) <= budget:
+        return list(parts), usage
+
+    default_priority = max(_CONTEXT_SECTION_PRIORITY.values(), default=0) + 1
+    order = sorted(range(len(parts)),
+                   key=lambda i: (parts[i][0] not in _CONTEXT_STATIC_SECTIONS,
+                                  _CONTEXT_SECTION_PRIORITY.get(parts[i][0], default_priority), i))
+    kept = {}
+    remaining = budget
+    for u in usage.values():
+        u["used"] = 0
+    for i in order:
+        name, text = parts[i]
+        cost = _estimate_tokens(text + "\n\n")
+        if name in _CONTEXT_STATIC_SECTIONS:
+            kept[i] = (name, text)
+            remaining = max(0, remaining - cost)
+            usage[name]["used"] += cost
+            continue
+        if cost > remaining and name in _CONTEXT_TRIMMABLE_SECTIONS:
+            text = _trim_section(text, remaining)
+            cost = _estimate_tokens(text + "\n\n") if text else 0
+        full = _estimate_tokens(parts[i][1] + "\n\n")
+        if text and cost <= remaining:
+            kept[i] = (name, text)
+            remaining -= cost
+            usage[name]["used"] += cost
+            usage[name]["cut"] += full - cost
+        else:
+            usage[name]["cut"] += full
+    return [kept[i] for i in sorted(kept)], usage
+
+
+def _pack_memory_context(parts, model, backend):
+    """Apply the model's budget to context parts and report the per-section
+    spend; returns the kept parts, static sections first so the text that
+    never changes between turns forms one unbroken prompt prefix."""
+    if not parts:
+        return []
+    budget = _context_token_budget(model)
+    kept, usage = _pack_context(parts, budget)
+    kept.sort(key=lambda part: part[0] not in _CONTEXT_STATIC_SECTIONS)
+    fields = {}
+    for name, u in usage.items():
+        fields[f"{name}_tok"] = u["used"]
+        if u["cut"]:
+            fields[f"{name}_cut"] = u["cut"]
+    _telemetry_emit(
+        "memory_context_pack",
+        backend=backend,
+        budget=budget,
+        used=sum(u["used"] for u in usage.values()),
+        dropped=",".join(n for n, u in usage.items() if u["cut"] and not u["used"]),
+        **fields,
+    )
+    return kept
+
+
+def _build_memory_context_sqlite(user_message, model=None):
     """SQLite equivalent of _build_memory_context. Same output structure, SQL queries."""
     # global statement removed — writes go to _st.*
     import datetime
 
     mem = _get_sqlite_mem()
-    context_parts = []
+    context_parts = []  # [(section, text)] in prompt order
 
     # Eva's core identity (always injected first)
-    eva_identity = mem.query(
+    eva_identity = _context_section("identity", ("Knowledge",), lambda: mem.query(
         "SELECT Relation, Value FROM Knowledge "
         "WHERE Entity = 'Eva' COLLATE NOCASE AND Confidence >= 0.9 "
         "ORDER BY Confidence DESC LIMIT 10"
-    )
+    ))
     if eva_identity:
         id_lines = [f"- {r.get('Relation','?')}: {r.get('Value','?')}" for r in eva_identity]
-        context_parts.append("[Identity — Who You Are]\n" + "\n".join(id_lines))
+        context_parts.append(("identity", "[Identity — Who You Are]\n" + "\n".join(id_lines)))
 
-    # User profile
-    user_profile = mem.query(
-        "SELECT Relation, Value, Confidence FROM Knowledge "
-        "WHERE Entity = 'User' COLLATE NOCASE AND Confidence >= 0.5 "
-        "GROUP BY Relation HAVING MAX(Timestamp) "
+    # User profile (latest value per relation, maintained by triggers)
+    user_profile = _context_section("user_profile", ("Knowledge",), lambda: mem.query(
+        "SELECT Relation, Value, Confidence FROM KnowledgeCurrent "
+        "WHERE Entity = 'User' AND Confidence >= 0.5 "
         "ORDER BY Confidence DESC LIMIT 30"
-    )
+    ))
     if user_profile:
         profile_lines = [f"- {r.get('Relation','?')}: {r.get('Value','?')}" for r in user_profile]
-        context_parts.append("[User Profile]\n" + "\n".join(profile_lines))
+        context_parts.append(("profile", "[User Profile]\n" + "\n".join(profile_lines)))
 
     # Timestamp and skills manifest
     _now_utc = datetime.datetime.now(datetime.timezone.utc)
     _today_str = _now_utc.strftime("%A, %B %d, %Y")
     _time_str = _now_utc.strftime("%H:%M UTC")
     db_label = "local SQLite"
-    context_parts.append(
-        f"[Current Date & Time] {_today_str} — {_time_str}\n\n"
+    context_parts.append(("datetime", f"[Current Date & Time] {_today_str} — {_time_str}"))
+    context_parts.append(("skills_manifest",
         "[Skills]\n"
         "You have these active capabilities. The system handles tool routing automatically.\n"
         "• data-retrieval: Fetch live stock quotes, financial data, company info\n"
@@ -526,31 +759,31 @@ def _build_memory_context_sqlite(user_message):
         "• image-search: Find images on Wikimedia Commons for any topic\n"
         "• image-generation: Generate images via gpt-image-1 (use [Image of <description>] syntax)\n"
         "    Knowledge, Conversations, EmotionState, MemorySummaries, Reflections,\n"
-        "    Goals, SelfState, HeuristicsIndex, EmotionBaseline\n"
-        "\n"
+        "    Goals, SelfState, HeuristicsIndex, EmotionBaseline"))
+    context_parts.append(("workflows",
         "[Workflow: Data & Web Requests]\n"
         "When asked for live data, news, weather, or to find something online:\n"
         "1. The system retrieves data for you automatically — just answer naturally\n"
         "2. If [Data Retrieved] appears in context, use it as your source\n"
         "3. NEVER say you lack access or cannot search — your data pipeline handles it\n"
-        "4. NEVER fabricate headlines, prices, or events not in [Data Retrieved]\n"
-        "\n"
+        "4. NEVER fabricate headlines, prices, or events not in [Data Retrieved]"))
+    context_parts.append(("workflows",
         "[Workflow: Browser & Desktop]\n"
         "When asked to open a website, play a playlist, or do a task in an app:\n"
         "1. ACT immediately — emit the appropriate [[EVA_BROWSER]] or [[EVA_DESKTOP]] marker\n"
         "2. Do NOT say you cannot open websites or apps — you can\n"
-        "3. Do NOT list manual steps for the user — do the task yourself\n"
-        "\n"
+        "3. Do NOT list manual steps for the user — do the task yourself"))
+    context_parts.append(("workflows",
         "[Workflow: Screenshots vs Camera]\n"
         "- 'Screenshot', 'capture my screen', 'what's on my desktop' = use [[EVA_DESKTOP]] with goal 'take a screenshot and describe what is on screen'\n"
         "- 'Take a picture', 'what am I holding', 'look at me', 'what do you see' = use [[EVA_LOOK]] (webcam/camera)\n"
-        "- NEVER confuse these two. Screenshots see the monitor. Camera sees the physical world.\n"
-        "\n"
+        "- NEVER confuse these two. Screenshots see the monitor. Camera sees the physical world."))
+    context_parts.append(("workflows",
         "[Workflow: Memory]\n"
         "When asked about what you know/remember:\n"
         "1. Check the [Memory] facts provided below\n"
-        "2. Be specific — cite what you actually remember, not generic statements\n"
-        "\n"
+        "2. Be specific — cite what you actually remember, not generic statements"))
+    context_parts.append(("workflows",
         "[Workflow: Capturing Knowledge]\n"
         "You learn continuously. Memory capture is automatic — the system extracts and "
         "persists durable facts from every conversation without you needing to call any tool.\n"
@@ -561,8 +794,8 @@ def _build_memory_context_sqlite(user_message):
         "the reflection system handles persistence automatically after your response.\n"
         "3. Do NOT output [unknown capability], tool calls, or function invocations.\n"
         "Recall works for Entity=\"User\" facts at Confidence >= 0.5 or other entities at "
-        "Confidence >= 0.6.\n"
-        "\n"
+        "Confidence >= 0.6."))
+    context_parts.append(("workflows",
         "[Workflow: Adaptive Execution]\n"
         "You are a cutting-edge agent AI. When asked to do something you are unsure about:\n"
         "1. Check if a relevant [Active Skill] was loaded into this context — follow its instructions\n"
@@ -570,62 +803,57 @@ def _build_memory_context_sqlite(user_message):
         "3. If the first attempt fails, self-correct: try an alternative approach before giving up\n"
         "4. NEVER say 'I cannot do that' without first genuinely trying with your tools\n"
         "5. After succeeding at something new, the system auto-learns it as a skill for next time\n"
-        "Your capabilities scale through learned skills — the more you do, the more you can do."
-    )
+        "Your capabilities scale through learned skills — the more you do, the more you can do."))
 
     # Day lifecycle
     today = datetime.date.today().isoformat()
     if _st.last_interaction_date != today:
         _st.last_interaction_date = today
-        summaries = mem.query(
+        summaries = _context_section("morning_summary", ("MemorySummaries",), lambda: mem.query(
             "SELECT Period, Summary FROM MemorySummaries ORDER BY Timestamp DESC LIMIT 3"
-        )
+        ))
         if summaries:
             summary_text = "\n".join(f"  - [{s.get('Period','?')}] {s.get('Summary','')}" for s in summaries[:3])
-            context_parts.append(f"[Morning Reflection — {today}]\n{summary_text}")
+            context_parts.append(("morning", f"[Morning Reflection — {today}]\n{summary_text}"))
         else:
-            context_parts.append(f"[Morning Reflection — {today}]\nNew day. No prior summaries.")
+            context_parts.append(("morning", f"[Morning Reflection — {today}]\nNew day. No prior summaries."))
 
     # Core knowledge (non-User entities)
     knowledge_empty = not bool(user_profile)
-    core_knowledge = mem.query(
+    core_knowledge = _context_section("core_knowledge", ("Knowledge",), lambda: mem.query(
         "SELECT Entity, Relation, Value, Confidence FROM Knowledge "
         "WHERE Entity != 'User' COLLATE NOCASE AND Confidence >= 0.6 "
         "AND (Relation IS NULL OR (Relation != 'mentioned' AND Relation != 'candidate_mentioned')) "
         "ORDER BY Confidence DESC LIMIT 15"
-    )
+    ))
     if core_knowledge:
         knowledge_empty = False
         mem_lines = [f"  {k.get('Entity','?')} — {k.get('Relation','?')}: {k.get('Value','?')}"
                      for k in core_knowledge]
-        context_parts.append("[Memory — Core Facts]\n" + "\n".join(mem_lines))
+        context_parts.append(("core", "[Memory — Core Facts]\n" + "\n".join(mem_lines)))
 
     # Goals
-    if mem.table_exists("Goals"):
-        goals = mem.query(
-            "SELECT * FROM Goals WHERE Status = 'active' "
-            "ORDER BY Priority DESC, UpdatedAt DESC LIMIT 10"
-        )
-        if goals:
-            goal_lines = [f"  [{g.get('Category','?')}] {g.get('Title','?')}: {g.get('Description','?')}" for g in goals]
-            context_parts.append("[Active Goals]\nThese are your persistent intentions. Honor them across sessions.\n" + "\n".join(goal_lines))
+    goals = _context_section("goals", ("Goals",), lambda: mem.query(
+        "SELECT * FROM Goals WHERE Status = 'active' "
+        "ORDER BY Priority DESC, UpdatedAt DESC LIMIT 10"
+    ) if mem.table_exists("Goals") else [])
+    if goals:
+        goal_lines = [f"  [{g.get('Category','?')}] {g.get('Title','?')}: {g.get('Description','?')}" for g in goals]
+        context_parts.append(("goals", "[Active Goals]\nThese are your persistent intentions. Honor them across sessions.\n" + "\n".join(goal_lines)))
 
     # Skills (semantic match)
-    if user_message.strip() and mem.table_exists("Skills"):
-        active_skills = mem.query("SELECT * FROM Skills WHERE Status = 'active'") or []
+    if user_message.strip():
+        active_skills = _context_section("skills", ("Skills",), lambda: (
+            mem.query("SELECT * FROM Skills WHERE Status = 'active'") or []
+        ) if mem.table_exists("Skills") else [])
         if active_skills:
             chosen = []
             descs = [str(s.get("Description", "") or s.get("Name", "")).strip() for s in active_skills]
-            emb_map = _embed_texts([user_message] + descs)
-            qvec = emb_map.get(user_message.strip())
+            qvec = _embed_texts([user_message]).get(user_message.strip())
             if qvec:
-                scored = []
-                for sk, d in zip(active_skills, descs):
-                    fv = emb_map.get(d.strip())
-                    if fv:
-                        scored.append((_cosine_similarity(qvec, fv), sk))
-                scored.sort(key=lambda x: x[0], reverse=True)
-                chosen = [sk for score, sk in scored[:_SKILL_INJECT_MAX] if score >= _SEMANTIC_MIN_SCORE]
+                emb_map = _cached_embeddings(descs)
+                top = _top_k_cosine(qvec, [emb_map.get(d.strip()) for d in descs], _SKILL_INJECT_MAX)
+                chosen = [active_skills[i] for score, i in top if score >= _semantic_min_score()]
             if not chosen:
                 terms = _expand_query_terms(user_message)
                 if terms:
@@ -643,13 +871,13 @@ def _build_memory_context_sqlite(user_message):
                 head = f"[Active Skill: {name}]\nThis imported skill is relevant to the request. Follow it to help the user."
                 if tools:
                     head += f" (Uses: {tools}.)"
-                context_parts.append(head + "\n" + instr)
+                context_parts.append(("active_skill", head + "\n" + instr))
 
     # Init conversation check
     if knowledge_empty:
-        total_rows = mem.count("Knowledge")
+        total_rows = _context_section("knowledge_count", ("Knowledge",), lambda: mem.count("Knowledge"))
         if total_rows < 5:
-            context_parts.append(
+            context_parts.append(("init",
                 "[Init — First Conversation]\n"
                 "Your memory is empty. This is your very first conversation.\n"
                 "Warmly introduce yourself as Eva. Then ask the user these questions naturally "
@@ -658,17 +886,17 @@ def _build_memory_context_sqlite(user_message):
                 "  2. Where are you located?\n"
                 "  3. What topics interest you most?\n"
                 "  4. Is there anything specific you'd like me to remember about you?\n"
-                "Once the user answers, confirm what you've learned."
-            )
+                "Once the user answers, confirm what you've learned."))
 
     # Emotion state
-    emotion = mem.query("SELECT * FROM EmotionState ORDER BY Timestamp DESC LIMIT 1")
+    emotion = _context_section("emotion", ("EmotionState",), lambda: mem.query(
+        "SELECT * FROM EmotionState ORDER BY Timestamp DESC LIMIT 1"))
     if emotion:
         e = emotion[0]
-        context_parts.append(
+        context_parts.append(("emotion",
             f"[Emotion State] Joy:{e.get('Joy',0):.2f} Curiosity:{e.get('Curiosity',0):.2f} "
             f"Concern:{e.get('Concern',0):.2f} Excitement:{e.get('Excitement',0):.2f} "
-            f"Calm:{e.get('Calm',0):.2f} Empathy:{e.get('Empathy',0):.2f}")
+            f"Calm:{e.get('Calm',0):.2f} Empathy:{e.get('Empathy',0):.2f}"))
 
     # Message-relevant knowledge (FTS + semantic)
     relevant_hits = []
@@ -690,58 +918,72 @@ def _build_memory_context_sqlite(user_message):
             if k.get("Confidence", 0) >= 0.6:
                 _add_hit(k)
 
-    if user_message.strip():
-        pool = mem.query(
-            "SELECT Entity, Relation, Value, Confidence FROM Knowledge "
-            "WHERE Confidence >= 0.6 AND (Relation IS NULL OR "
-            "(Relation != 'mentioned' AND Relation != 'candidate_mentioned')) "
-            f"ORDER BY Confidence DESC LIMIT {_SEMANTIC_POOL_SIZE}"
-        ) or []
-        if pool:
-            texts = [
-                f"{k.get('Entity','')} {str(k.get('Relation','')).replace('_',' ')} {k.get('Value','')}".strip()
-                for k in pool
-            ]
-            emb_map = _embed_texts([user_message] + texts)
-            query_vec = emb_map.get(user_message.strip())
-            if query_vec:
-                scored = []
-                for rec, txt in zip(pool, texts):
-                    fv = emb_map.get(txt.strip())
-                    if fv:
-                        scored.append((_cosine_similarity(query_vec, fv), rec))
-                scored.sort(key=lambda x: x[0], reverse=True)
-                for score, rec in scored[:6]:
-                    if score >= _SEMANTIC_MIN_SCORE:
-                        _add_hit(rec)
+    query_vec = _embed_texts([user_message]).get(user_message.strip()) if user_message.strip() else None
+    if query_vec:
+        # Whole-table recall through the ANN index; the top-by-confidence
+        # pool is the fallback when there is no index (no NumPy) yet.
+        ann_hits = _knowledge_index_search(query_vec, 6)
+        if ann_hits is not None:
+            for score, rec in ann_hits:
+                if score >= _semantic_min_score():
+                    _add_hit(rec)
+        else:
+            pool = mem.query(
+                "SELECT Entity, Relation, Value, Confidence FROM Knowledge "
+                "WHERE Confidence >= 0.6 AND (Relation IS NULL OR "
+                "(Relation != 'mentioned' AND Relation != 'candidate_mentioned')) "
+                f"ORDER BY Confidence DESC LIMIT {_SEMANTIC_POOL_SIZE}"
+            ) or []
+            if pool:
+                texts = [_knowledge_text(k) for k in pool]
+                emb_map = _cached_embeddings(texts)
+                top = _top_k_cosine(query_vec, [emb_map.get(t) for t in texts], 6)
+                for score, i in top:
+                    if score >= _semantic_min_score():
+                        _add_hit(pool[i])
 
     if relevant_hits:
         extra = [f"  {k.get('Entity','?')} — {k.get('Relation','?')}: {k.get('Value','?')}"
                  for k in relevant_hits]
-        context_parts.append("[Memory — Relevant to This Message]\n" + "\n".join(extra))
+        context_parts.append(("relevant", "[Memory — Relevant to This Message]\n" + "\n".join(extra)))
 
     # 6. Proactive data retrieval (on-demand)
     msg_lower = user_message.lower()
-    import re as _re
+    intents = _route_intents(msg_lower)
 
-    if _re.search(r'\b(database|databases|memory|sqlite|data)\b', msg_lower):
-        context_parts.append(f"[Live Data] Database: SQLite ({mem.db_path})")
+    if intents.mentions_sqlite_db:
+        context_parts.append(("live_data", f"[Live Data] Database: SQLite ({mem.db_path})"))
 
-    if _re.search(r'\b(tables?|schema|columns?)\b', msg_lower):
-        tables = mem.query("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'fts_%' ORDER BY name")
-        if tables:
-            tbl_names = [t.get("name", "?") for t in tables]
-            context_parts.append(f"[Live Data] Tables: {', '.join(tbl_names)}")
+    if intents.mentions_tables:
+        tbl_names = mem.list_tables()
+        if tbl_names:
+            context_parts.append(("live_data", f"[Live Data] Tables: {', '.join(tbl_names)}"))
 
-    if _re.search(r'\b(conversation|history|recent|chat|talked|said)\b', msg_lower):
+    if intents.mentions_conversations:
         convos = mem.query(
             "SELECT Timestamp, Role, Content FROM Conversations ORDER BY Timestamp DESC LIMIT 5"
         )
         if convos:
             conv_text = "\n".join(f"  [{c.get('Role','?')}] {str(c.get('Content',''))[:100]}" for c in convos[:5])
-            context_parts.append(f"[Live Data] Recent conversations:\n{conv_text}")
-
-    if _re.search(r'\b(emotion|feeling|mood|how.*feel)\b', msg_lower):
+            context_parts.append(("live_data", f"[Live Data] Recent conversations:\n{conv_text}"))
+
+        # Older exchanges on the same topic, ranked by the Conversations FTS index
+        topic_terms = sorted(t for t in (terms or ())
+                             if t not in ("conversation", "conversations", "history", "recent",
+                                          "chat", "talked", "said"))
+        if topic_terms:
+            recent_content = {str(c.get('Content', '')) for c in (convos or [])}
+            related = [c for c in mem.fts_search("Conversations", " ".join(topic_terms),
+                                                 limit=8, match_any=True) or []
+                       if str(c.get('Content', '')) not in recent_content][:5]
+            if related:
+                rel_text = "\n".join(
+                    f"  [{str(c.get('Timestamp','?'))[:10]} {c.get('Role','?')}] "
+                    f"{str(c.get('Snippet') or c.get('Content',''))[:160]}"
+                    for c in related)
+                context_parts.append(("live_data", f"[Live Data] Related past conversations:\n{rel_text}"))
+
+    if intents.mentions_emotions:
         emotions = mem.query(
             "SELECT Timestamp, Joy, Curiosity, Concern, Trigger FROM EmotionState ORDER BY Timestamp DESC LIMIT 5"
         )
@@ -750,7 +992,7 @@ def _build_memory_context_sqlite(user_message):
                 f"  Joy:{e.get('Joy',0):.2f} Curiosity:{e.get('Curiosity',0):.2f} "
                 f"Concern:{e.get('Concern',0):.2f} Trigger:{str(e.get('Trigger',''))[:60]}"
                 for e in emotions[:5])
-            context_parts.append(f"[Live Data] Emotion history:\n{emo_text}")
+            context_parts.append(("live_data", f"[Live Data] Emotion history:\n{emo_text}"))
 
     known_tables = list(_MEMORY_TABLES)
     known_table_time_columns = {
@@ -765,7 +1007,7 @@ def _build_memory_context_sqlite(user_message):
         'BackgroundActivity': 'StartedAt',
     }
     for tbl in known_tables:
-        if tbl.lower() in msg_lower and not any('Tables' in p for p in context_parts):
+        if tbl.lower() in msg_lower and not any('Tables' in text for _, text in context_parts):
             if tbl == 'Knowledge':
                 sample = mem.query(f"SELECT * FROM Knowledge ORDER BY Confidence DESC LIMIT 5")
             else:
@@ -773,19 +1015,27 @@ def _build_memory_context_sqlite(user_message):
                 sample = mem.query(f"SELECT * FROM {tbl} ORDER BY {time_col} DESC LIMIT 5")
             if sample:
                 sample_text = "\n".join(f"  {str(row)[:150]}" for row in sample[:5])
-                context_parts.append(f"[Live Data] {tbl} (latest 5):\n{sample_text}")
+                context_parts.append(("live_data", f"[Live Data] {tbl} (latest 5):\n{sample_text}"))
             break
 
-    return "\n\n".join(context_parts)
+    context_parts = _pack_memory_context(context_parts, model, "sqlite")
+    return "\n\n".join(text for _, text in context_parts)
+
 
 
+def _post_response_reflection_sqlite(user_message, assistant_response, model_name, batch=None):
+    """SQLite equivalent of _post_response_reflection. Same write pattern, SQL instead of KQL.
 
-def _post_response_reflection_sqlite(user_message, assistant_response, model_name):
-    """SQLite equivalent of _post_response_reflection. Same write pattern, SQL instead of KQL."""
+    Rows go into `batch` (see _ReflectionBatch), which flushes them as
+    deferred ingests: with write-behind enabled the whole batch lands in
+    one group commit; otherwise each table commits immediately.
+    """
     # global statement removed — writes go to _st.*
     import datetime, uuid
 
-    mem = _get_sqlite_mem()
+    own_batch = batch is None
+    if own_batch:
+        batch = _ReflectionBatch()
     now = datetime.datetime.now(datetime.timezone.utc).isoformat().replace("+00:00", "Z")
     session_id = str(uuid.uuid4())[:8]
     source_id = f"{_st.cognition_launch_id or 'launch'}:{session_id}"
@@ -800,7 +1050,7 @@ def _post_response_reflection_sqlite(user_message, assistant_response, model_nam
          "Model": model_name, "Content": assistant_response[:_CONVO_CONTENT_CAP],
          "TokenEstimate": len(assistant_response.split()), "ImageGenerated": 0},
     ]
-    mem.ingest("Conversations", conv_columns, conv_rows)
+    batch.add("Conversations", conv_columns, conv_rows)
     print(f"[Cognition/SQLite] Logged conversation ({len(user_message)} -> {len(assistant_response)} chars)")
 
     # 2. Extract explicit user facts
@@ -814,7 +1064,8 @@ def _post_response_reflection_sqlite(user_message, assistant_response, model_nam
                 "Value": fact["Value"][:200], "Confidence": fact["Confidence"],
                 "Source": source_id, "Decay": 0.005,
             })
-        if rows and mem.ingest("Knowledge", know_columns, rows):
+        if rows:
+            batch.add("Knowledge", know_columns, rows)
             print(f"[Cognition/SQLite] Explicit user facts: {len(rows)}")
 
     # 3. Candidate entities
@@ -822,13 +1073,14 @@ def _post_response_reflection_sqlite(user_message, assistant_response, model_nam
     if candidate_entities:
         know_columns = ["Timestamp", "Entity", "Relation", "Value", "Confidence", "Source", "Decay"]
         know_rows = []
+        histories = _load_candidate_histories(candidate_entities[:3])
         for entity in candidate_entities[:3]:
             relation, confidence, value = _classify_entity_candidate(entity, user_message)
             if _explicit_user_fact_covers_candidate(relation, entity, explicit_user_facts):
                 relation, confidence, value = "candidate_mentioned", 0.2, "candidate extracted from conversation"
             promotion = None
             if relation == "candidate_mentioned":
-                promotion = _maybe_promote_candidate(entity)
+                promotion = _maybe_promote_candidate(entity, histories.get(entity.strip().lower()))
                 if promotion:
                     relation = promotion["relation"]
                     confidence = promotion["confidence"]
@@ -842,7 +1094,7 @@ def _post_response_reflection_sqlite(user_message, assistant_response, model_nam
             if promotion:
                 print(f"[Cognition/SQLite] Promoted candidate: {entity} ({promotion['reason']})")
         if know_rows:
-            mem.ingest("Knowledge", know_columns, know_rows)
+            batch.add("Knowledge", know_columns, know_rows)
             print(f"[Cognition/SQLite] Candidates: {len(know_rows)}")
 
     # 4. Heuristics tracking
@@ -854,7 +1106,7 @@ def _post_response_reflection_sqlite(user_message, assistant_response, model_nam
             heur_rows.append({"Entity": entity, "Category": rel, "LastSeen": now,
                        "Frequency": 1, "Sentiment": 0.0, "Tags": "[]",
                        "Context": val})
-        mem.ingest("HeuristicsIndex", heur_columns, heur_rows)
+        batch.add("HeuristicsIndex", heur_columns, heur_rows)
 
     # 5. Emotion state (inline sentiment, matching Kusto path)
     try:
@@ -867,7 +1119,7 @@ def _post_response_reflection_sqlite(user_message, assistant_response, model_nam
         curiosity = min(1.0, 0.6 + 0.1 * ("?" in user_message))
         trigger_text = user_message[:100] if len(user_message) > 100 else user_message
         emo_columns = ["Timestamp", "Joy", "Curiosity", "Concern", "Excitement", "Calm", "Empathy", "Trigger", "DecayRate"]
-        mem.ingest("EmotionState", emo_columns, [
+        batch.add("EmotionState", emo_columns, [
             {"Timestamp": now, "Joy": round(joy, 3),
              "Curiosity": round(curiosity, 3),
              "Concern": round(concern, 3),
@@ -910,7 +1162,7 @@ def _post_response_reflection_sqlite(user_message, assistant_response, model_nam
                 f"User asked about: {user_message[:80]}."
             )
             refl_columns = ["Timestamp", "Trigger", "Observation", "ActionTaken", "Effectiveness"]
-            mem.ingest("Reflections", refl_columns, [{
+            batch.add("Reflections", refl_columns, [{
                 "Timestamp": now,
                 "Trigger": user_message[:100],
                 "Observation": reflection_text,
@@ -941,7 +1193,7 @@ def _post_response_reflection_sqlite(user_message, assistant_response, model_nam
                 f"{len(summary_exchanges)} exchanges total."
             )
             summ_columns = ["Period", "Summary", "Timestamp"]
-            mem.ingest("MemorySummaries", summ_columns, [{
+            batch.add("MemorySummaries", summ_columns, [{
                 "Period": period,
                 "Summary": summary_text[:500],
                 "Timestamp": now,
@@ -951,9 +1203,65 @@ def _post_response_reflection_sqlite(user_message, assistant_response, model_nam
         except Exception as e:
             print(f"[Cognition/SQLite] Summary error: {e}")
 
+    # 8. Write (and index) the turn unless a worker batch owns the rows
+    if own_batch:
+        batch.flush()
+
 
 
-def _build_memory_context(user_message):
+def _get_context_query_pool():
+    """Shared bounded pool for memory-context section queries."""
+    if _st.context_query_pool is None:
+        with _st.context_cache_lock:
+            if _st.context_query_pool is None:
+                import concurrent.futures
+                _st.context_query_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=_CONTEXT_QUERY_WORKERS, thread_name_prefix="memory-context")
+    return _st.context_query_pool
+
+
+def _run_context_queries(tasks, deadline=None):
+    """Run independent section queries concurrently under one deadline.
+
+    tasks is [(name, fn)]. Returns ({name: result}, [dropped names]) where
+    dropped sections did not finish in time; they are left to complete in
+    the background and their results discarded. Per-section latency goes
+    to telemetry as a memory_context event.
+    """
+    import concurrent.futures
+    deadline = _CONTEXT_QUERY_DEADLINE_SECONDS if deadline is None else deadline
+    timings = {}
+
+    def _timed(name, fn):
+        t0 = time.time()
+        try:
+            return fn()
+        finally:
+            timings[name] = round((time.time() - t0) * 1000, 1)
+
+    t0 = time.time()
+    pool = _get_context_query_pool()
+    futures = {pool.submit(_timed, name, fn): name for name, fn in tasks}
+    done, pending = concurrent.futures.wait(futures, timeout=deadline)
+    results = {}
+    for fut in done:
+        try:
+            results[futures[fut]] = fut.result()
+        except Exception as e:
+            print(f"[Cognition] Context section {futures[fut]} failed: {e}")
+            results[futures[fut]] = None
+    dropped = [name for fut, name in futures.items() if fut in pending]
+    for fut in pending:
+        fut.cancel()
+    if dropped:
+        print(f"[Cognition] Context sections past {deadline}s deadline, dropped: {', '.join(dropped)}")
+    fields = {f"{name}_ms": timings[name] for name in results if name in timings}
+    _telemetry_emit("memory_context", backend="kusto", total_ms=round((time.time() - t0) * 1000, 1),
+                    sections=len(tasks), dropped=",".join(dropped) or None, **fields)
+    return results, dropped
+
+
+def _build_memory_context(user_message, model=None, deadline=None):
     """Build memory context to inject before the user's prompt.
 
     Follows skill-based progressive disclosure:
@@ -963,6 +1271,14 @@ def _build_memory_context(user_message):
       4. Day lifecycle (first msg of day) — morning reflection
       5. Relevant knowledge (on-demand) — message-specific recall
       6. Proactive data retrieval (on-demand) — live data for detected intents
+
+    Sections are then packed into the model's CONTEXT_TOKEN_BUDGET by
+    CONTEXT_SECTION_PRIORITY (see _pack_context).
+
+    Every Kusto call shares `deadline` (a _kusto_deadline; by default
+    KUSTO_TURN_BUDGET_SECONDS from now). While the cluster's circuit
+    breaker is open the sections come from the result cache or are left
+    out, without waiting on the network.
     """
     # global statement removed — writes go to _st.*
     if not _st.cognition_enabled:
@@ -970,14 +1286,26 @@ def _build_memory_context(user_message):
 
     # Route to SQLite-specific implementation when that backend is active
     if _resolve_memory_backend() == "sqlite":
-        return _build_memory_context_sqlite(user_message)
+        return _build_memory_context_sqlite(user_message, model)
 
     cluster, db = _get_kusto_config()
     if not cluster or not db:
         return ""
+    if deadline is None:
+        deadline = _kusto_deadline(_KUSTO_TURN_BUDGET_SECONDS)
+    section_deadline = min(deadline, _kusto_deadline(_CONTEXT_QUERY_DEADLINE_SECONDS))
 
-    context_parts = []
+    context_parts = []  # [(section, text)] in prompt order
+    import datetime
+    today = datetime.date.today().isoformat()
+    new_day = _st.last_interaction_date != today
+    terms = _expand_query_terms(user_message)
 
+    # ── 0. Section queries (concurrent, one shared deadline) ───────────
+    # Each section is an independent KQL round trip, so they are issued
+    # together and assembled below in the usual order. A section that misses
+    # the deadline is dropped for this turn rather than blocking it. With
+    # KUSTO_CONTEXT_BATCH the fixed sections share one batched request.
     user_profile_query = (
         "Knowledge "
         "| where Entity =~ 'User' and Confidence >= 0.5 "
@@ -986,12 +1314,81 @@ def _build_memory_context(user_message):
         "| order by Confidence desc "
         "| take 30"
     )
-    user_profile = _kusto_query_direct(cluster, db, user_profile_query)
+    # Fetch ALL high-confidence facts (not scope-limited) so persistent knowledge survives restarts
+    core_query = (
+        "Knowledge "
+        "| where Entity !~ 'User' "
+        "| where Confidence >= 0.6 "
+        "and (isnull(Relation) or Relation !in~ ('mentioned', 'candidate_mentioned')) "
+        "| order by Confidence desc | take 15"
+    )
+    goals_query = _GOALS_LATEST_QUERY + " | where Status == 'active' | order by Priority desc, UpdatedAt desc | take 10"
+    emotion_query = _with_launch_filter("EmotionState | order by Timestamp desc | take 1")
+    summaries_query = _with_launch_filter("MemorySummaries | order by Timestamp desc | take 3")
+    pool_query = (
+        "Knowledge "
+        "| where Confidence >= 0.6 "
+        "and (isnull(Relation) or Relation !in~ ('mentioned', 'candidate_mentioned')) "
+        f"| order by Confidence desc | take {_SEMANTIC_POOL_SIZE} "
+        "| project Entity, Relation, Value, Confidence"
+    )
+    section_kql = [("profile", user_profile_query), ("core", core_query), ("emotion", emotion_query)]
+    if new_day:
+        section_kql.append(("summaries", summaries_query))
+    if _KUSTO_CONTEXT_BATCH:
+        def _batched_sections():
+            named = list(section_kql)
+            if _get_table_columns(cluster, db, "Goals", section_deadline):
+                named.append(("goals", goals_query))
+            return _kusto_query_multi(cluster, db, named, deadline=section_deadline) or {}
+        section_queries = [("batch", _batched_sections)]
+    else:
+        section_queries = [(name, lambda q=kql: _kusto_query_direct(cluster, db, q, deadline=section_deadline))
+                           for name, kql in section_kql]
+        section_queries.append(("goals", lambda: _kusto_query_direct(cluster, db, goals_query, deadline=section_deadline)
+                                if _get_table_columns(cluster, db, "Goals", section_deadline) else None))
+    if user_message.strip():
+        section_queries.append(("skills", lambda: (_kusto_query_direct(
+            cluster, db, _SKILLS_LATEST_QUERY + " | where Status == 'active'", deadline=section_deadline) or [])
+            if _get_table_columns(cluster, db, "Skills", section_deadline) else []))
+        section_queries.append(("pool", lambda: _kusto_query_direct(cluster, db, pool_query, deadline=section_deadline)))
+    if terms:
+        safe_terms = [f"'{t.replace(chr(39), chr(39) * 2)}'" for t in sorted(terms)][:24]
+        term_list = ", ".join(safe_terms)
+        lexical_query = (
+            "Knowledge "
+            f"| where (Entity has_any ({term_list}) or Relation has_any ({term_list}) "
+            f"or Value has_any ({term_list})) and Confidence >= 0.6 "
+            "and (isnull(Relation) or Relation !in~ ('mentioned', 'candidate_mentioned')) "
+            "| order by Confidence desc | take 8"
+        )
+        section_queries.append(("lexical", lambda: _kusto_query_direct(cluster, db, lexical_query,
+                                                                       deadline=section_deadline)))
+    breaker_open = _kusto_breaker_open(cluster)
+    if breaker_open:
+        # Every call returns from the result cache or fails fast, so they
+        # run inline instead of through the pool.
+        sections, dropped = {name: fn() for name, fn in section_queries}, []
+    else:
+        sections, dropped = _run_context_queries(section_queries)
+    if sections.get("batch") is not None:
+        sections.update(sections.pop("batch"))
+    elif "batch" in sections or "batch" in dropped:
+        dropped = dropped + [name for name, _ in section_kql] + ["goals"]
+    if breaker_open:
+        # Nothing cached for these: treat them like a missed deadline.
+        expected = [name for name, _ in section_kql] + ["goals"] + [name for name, _ in section_queries]
+        dropped = [name for name in dict.fromkeys(expected)
+                   if name != "batch" and (name in dropped or sections.get(name) is None)]
+        _telemetry_emit("memory_context", backend="kusto", breaker_open=True,
+                        sections=len(section_queries), dropped=",".join(dropped) or None)
+
+    user_profile = sections.get("profile")
     if user_profile:
         profile_lines = [f"- {item.get('Relation','?')}: {item.get('Value','?')}" for item in user_profile]
-        context_parts.append("[User Profile]\n" + "\n".join(profile_lines))
+        context_parts.append(("profile", "[User Profile]\n" + "\n".join(profile_lines)))
 
-    if _kusto_database_locked:
+    if _st.kusto_database_locked:
         db_label = db or "configured database"
         persistent_memory_capability = f"• persistent-memory: Read/write your configured Kusto database ({db_label}). Tables:\n"
         kusto_query_capability = f"• kusto-query: Execute KQL queries against the configured Kusto database ({db_label})\n"
@@ -1000,12 +1397,11 @@ def _build_memory_context(user_message):
         kusto_query_capability = "• kusto-query: Execute arbitrary KQL queries against any database (Eva, MEMORY_CORE, ynot)\n"
 
     # ── 1. Skills manifest (always injected, concise) ──────────────────
-    import datetime
     _now_utc = datetime.datetime.now(datetime.timezone.utc)
     _today_str = _now_utc.strftime("%A, %B %d, %Y")
     _time_str = _now_utc.strftime("%H:%M UTC")
-    context_parts.append(
-        f"[Current Date & Time] {_today_str} — {_time_str}\n\n"
+    context_parts.append(("datetime", f"[Current Date & Time] {_today_str} — {_time_str}"))
+    context_parts.append(("skills_manifest",
         "[Skills]\n"
         "You have these active capabilities. Use them proactively — never say you cannot do something listed here.\n"
         "• data-retrieval: Fetch live stock quotes, financial data, company info via web tools (MCP)\n"
@@ -1025,26 +1421,26 @@ def _build_memory_context(user_message):
         "    BackgroundProposals (ProposalId, Status, Payload) - human-reviewed memory proposals\n"
         "    BackgroundActivity (TickId, Status, ProposalCount) - background loop activity\n"
         f"{kusto_query_capability}"
-        "• web-search: Search the web and retrieve current information via MCP tools\n"
-        "\n"
+        "• web-search: Search the web and retrieve current information via MCP tools"))
+    context_parts.append(("workflows",
         "[Workflow: Data Requests]\n"
         "When asked for live data (stocks, prices, company info, statistics):\n"
         "1. Use your web/data-retrieval tools immediately — do NOT say you lack access\n"
         "2. Present results clearly with relevant metrics\n"
-        "3. Add personal context from memory if relevant (e.g. user's location)\n"
-        "\n"
+        "3. Add personal context from memory if relevant (e.g. user's location)"))
+    context_parts.append(("workflows",
         "[Workflow: News & Weather]\n"
         "When asked about news, weather, or current events:\n"
         "1. ALWAYS use your MCP web-search tools to fetch real, current data\n"
         "2. NEVER fabricate or guess headlines, forecasts, or events\n"
-        "3. If tools are unavailable, say so honestly — do not invent content\n"
-        "\n"
+        "3. If tools are unavailable, say so honestly — do not invent content"))
+    context_parts.append(("workflows",
         "[Workflow: Memory]\n"
         "When asked about what you know/remember:\n"
         "1. Check the [Memory] facts provided below\n"
         "2. For deeper queries, use kusto-query on the Knowledge or Conversations table\n"
-        "3. Be specific — cite what you actually remember, not generic statements\n"
-        "\n"
+        "3. Be specific — cite what you actually remember, not generic statements"))
+    context_parts.append(("workflows",
         "[Workflow: Capturing Knowledge]\n"
         "You learn continuously. When the user shares a durable fact about themselves "
         "(preferences, plans, relationships, possessions, lists like a playlist), or explicitly "
@@ -1061,65 +1457,48 @@ def _build_memory_context(user_message):
         "or anything the user did not actually assert.\n"
         "4. After saving, briefly confirm what you stored (one short clause) so the user knows it persisted.\n"
         "5. Recall works only for Entity=\"User\" facts at Confidence >= 0.5 or other entities at "
-        "Confidence >= 0.6 — stay at or above those so you can retrieve it later."
-    )
+        "Confidence >= 0.6 — stay at or above those so you can retrieve it later."))
 
     # ── 2. Day lifecycle (first message of the day) ────────────────────
-    today = datetime.date.today().isoformat()
-    if _st.last_interaction_date != today:
+    # A dropped summaries query leaves the date unset so the next turn retries.
+    if new_day and "summaries" not in dropped:
         _st.last_interaction_date = today
-        summaries_query = _with_launch_filter("MemorySummaries | order by Timestamp desc | take 3")
-        summaries = _kusto_query_direct(cluster, db, summaries_query)
+        summaries = sections.get("summaries")
         if summaries:
             summary_text = "\n".join(f"  - [{s.get('Period', '?')}] {s.get('Summary', '')}" for s in summaries[:3])
-            context_parts.append(f"[Morning Reflection — {today}]\n{summary_text}")
+            context_parts.append(("morning", f"[Morning Reflection — {today}]\n{summary_text}"))
         else:
-            context_parts.append(f"[Morning Reflection — {today}]\nNew day. No prior summaries — this is a fresh start.")
+            context_parts.append(("morning", f"[Morning Reflection — {today}]\nNew day. No prior summaries — this is a fresh start."))
 
     # ── 3. Core identity knowledge (always) ────────────────────────────
     knowledge_empty = not bool(user_profile)  # Track whether we have any core facts
     # User Profile is injected separately above; this broader block remains secondary context.
-    # Fetch ALL high-confidence facts (not scope-limited) so persistent knowledge survives restarts
-    core_query = (
-        "Knowledge "
-        "| where Entity !~ 'User' "
-        "| where Confidence >= 0.6 "
-        "and (isnull(Relation) or Relation !in~ ('mentioned', 'candidate_mentioned')) "
-        "| order by Confidence desc | take 15"
-    )
-    core_knowledge = _kusto_query_direct(cluster, db, core_query)
+    core_knowledge = sections.get("core")
     if core_knowledge:
         knowledge_empty = False
         mem_lines = [f"  {k.get('Entity','?')} — {k.get('Relation','?')}: {k.get('Value','?')}"
                      for k in core_knowledge]
-        context_parts.append("[Memory — Core Facts]\n" + "\n".join(mem_lines))
+        context_parts.append(("core", "[Memory — Core Facts]\n" + "\n".join(mem_lines)))
 
-    goals_query = _GOALS_LATEST_QUERY + " | where Status == 'active' | order by Priority desc, UpdatedAt desc | take 10"
-    goals = _kusto_query_direct(cluster, db, goals_query) if _get_table_columns(cluster, db, "Goals") else None
+    goals = sections.get("goals")
     if goals:
         goal_lines = [f"  [{g.get('Category','?')}] {g.get('Title','?')}: {g.get('Description','?')}" for g in goals]
-        context_parts.append("[Active Goals]\nThese are your persistent intentions. Honor them across sessions.\n" + "\n".join(goal_lines))
+        context_parts.append(("goals", "[Active Goals]\nThese are your persistent intentions. Honor them across sessions.\n" + "\n".join(goal_lines)))
 
     # ── 3c. Relevant skills (semantic match -> inject instructions) ────
     # Imported skills are surfaced on demand: match the user's message against
     # each active skill's Description, and inject the full instructions for the
     # best match(es) so Eva can actually perform the skill this turn.
-    if user_message.strip() and _get_table_columns(cluster, db, "Skills"):
-        active_skills = _kusto_query_direct(
-            cluster, db, _SKILLS_LATEST_QUERY + " | where Status == 'active'") or []
+    if user_message.strip():
+        active_skills = sections.get("skills") or []
         if active_skills:
             chosen = []
             descs = [str(s.get("Description", "") or s.get("Name", "")).strip() for s in active_skills]
-            emb_map = _embed_texts([user_message] + descs)
-            qvec = emb_map.get(user_message.strip())
+            qvec = _embed_texts([user_message]).get(user_message.strip())
             if qvec:
-                scored = []
-                for sk, d in zip(active_skills, descs):
-                    fv = emb_map.get(d.strip())
-                    if fv:
-                        scored.append((_cosine_similarity(qvec, fv), sk))
-                scored.sort(key=lambda x: x[0], reverse=True)
-                chosen = [sk for score, sk in scored[:_SKILL_INJECT_MAX] if score >= _SEMANTIC_MIN_SCORE]
+                emb_map = _cached_embeddings(descs)
+                top = _top_k_cosine(qvec, [emb_map.get(d.strip()) for d in descs], _SKILL_INJECT_MAX)
+                chosen = [active_skills[i] for score, i in top if score >= _semantic_min_score()]
             if not chosen:
                 # Lexical fallback: match query terms against name/description/tags.
                 terms = _expand_query_terms(user_message)
@@ -1138,17 +1517,18 @@ def _build_memory_context(user_message):
                 head = f"[Active Skill: {name}]\nThis imported skill is relevant to the request. Follow it to help the user."
                 if tools:
                     head += f" (Uses: {tools}.)"
-                context_parts.append(head + "\n" + instr)
+                context_parts.append(("active_skill", head + "\n" + instr))
 
     # ── 3b. Init conversation — empty Knowledge triggers introduction ──
     if knowledge_empty:
         # Check total Knowledge rows (not just high-confidence / current scope)
-        total_check = _kusto_query_direct(cluster, db, "Knowledge | count")
+        # An unanswered count (outage, budget spent) is not an empty memory.
+        total_check = _kusto_query_direct(cluster, db, "Knowledge | count", deadline=deadline)
         total_rows = 0
         if total_check:
             total_rows = total_check[0].get("Count", 0) if total_check else 0
-        if total_rows < 5:
-            context_parts.append(
+        if total_check is not None and total_rows < 5:
+            context_parts.append(("init",
                 "[Init — First Conversation]\n"
                 "Your memory is empty. This is your very first conversation.\n"
                 "Warmly introduce yourself as Eva. Then ask the user these questions naturally "
@@ -1158,18 +1538,16 @@ def _build_memory_context(user_message):
                 "  3. What topics interest you most?\n"
                 "  4. Is there anything specific you'd like me to remember about you?\n"
                 "Once the user answers, confirm what you've learned and let them know you'll "
-                "remember it. Do NOT fabricate facts — only store what the user explicitly tells you."
-            )
+                "remember it. Do NOT fabricate facts — only store what the user explicitly tells you."))
 
     # ── 4. Current emotion state (always) ──────────────────────────────
-    emotion_query = _with_launch_filter("EmotionState | order by Timestamp desc | take 1")
-    emotion = _kusto_query_direct(cluster, db, emotion_query)
+    emotion = sections.get("emotion")
     if emotion:
         e = emotion[0]
-        context_parts.append(
+        context_parts.append(("emotion",
             f"[Emotion State] Joy:{e.get('Joy',0):.2f} Curiosity:{e.get('Curiosity',0):.2f} "
             f"Concern:{e.get('Concern',0):.2f} Excitement:{e.get('Excitement',0):.2f} "
-            f"Calm:{e.get('Calm',0):.2f} Empathy:{e.get('Empathy',0):.2f}")
+            f"Calm:{e.get('Calm',0):.2f} Empathy:{e.get('Empathy',0):.2f}"))
 
     # ── 5. Message-relevant knowledge (lexical + semantic recall) ──────
     # Two complementary passes:
@@ -1194,94 +1572,67 @@ def _build_memory_context(user_message):
         seen_keys.add(key)
         relevant_hits.append(rec)
 
-    terms = _expand_query_terms(user_message)
-    if terms:
-        safe_terms = [f"'{t.replace(chr(39), chr(39) * 2)}'" for t in sorted(terms)][:24]
-        term_list = ", ".join(safe_terms)
-        lexical_query = (
-            "Knowledge "
-            f"| where (Entity has_any ({term_list}) or Relation has_any ({term_list}) "
-            f"or Value has_any ({term_list})) and Confidence >= 0.6 "
-            "and (isnull(Relation) or Relation !in~ ('mentioned', 'candidate_mentioned')) "
-            "| order by Confidence desc | take 8"
-        )
-        for k in (_kusto_query_direct(cluster, db, lexical_query) or []):
-            _add_hit(k)
+    for k in (sections.get("lexical") or []):
+        _add_hit(k)
 
     if user_message.strip():
-        pool_query = (
-            "Knowledge "
-            "| where Confidence >= 0.6 "
-            "and (isnull(Relation) or Relation !in~ ('mentioned', 'candidate_mentioned')) "
-            f"| order by Confidence desc | take {_SEMANTIC_POOL_SIZE} "
-            "| project Entity, Relation, Value, Confidence"
-        )
-        pool = _kusto_query_direct(cluster, db, pool_query) or []
+        pool = sections.get("pool") or []
         if pool:
-            texts = [
-                f"{k.get('Entity', '')} {str(k.get('Relation', '')).replace('_', ' ')} "
-                f"{k.get('Value', '')}".strip()
-                for k in pool
-            ]
-            emb_map = _embed_texts([user_message] + texts)
-            query_vec = emb_map.get(user_message.strip())
+            texts = [_knowledge_text(k) for k in pool]
+            query_vec = _embed_texts([user_message]).get(user_message.strip())
             if query_vec:
-                scored = []
-                for rec, txt in zip(pool, texts):
-                    fv = emb_map.get(txt.strip())
-                    if fv:
-                        scored.append((_cosine_similarity(query_vec, fv), rec))
-                scored.sort(key=lambda x: x[0], reverse=True)
-                for score, rec in scored[:6]:
-                    if score >= _SEMANTIC_MIN_SCORE:
-                        _add_hit(rec)
+                emb_map = _cached_embeddings(texts)
+                top = _top_k_cosine(query_vec, [emb_map.get(t.strip()) for t in texts], 6)
+                for score, i in top:
+                    if score >= _semantic_min_score():
+                        _add_hit(pool[i])
 
     if relevant_hits:
         extra = [f"  {k.get('Entity','?')} — {k.get('Relation','?')}: {k.get('Value','?')}"
                  for k in relevant_hits[:6]]
-        context_parts.append("[Memory — Relevant]\n" + "\n".join(extra))
+        context_parts.append(("relevant", "[Memory — Relevant]\n" + "\n".join(extra)))
 
     # ── 6. Proactive data retrieval (on-demand by intent) ──────────────
     msg_lower = user_message.lower()
-    import re as _re
+    intents = _route_intents(msg_lower)
 
-    if _re.search(r'\b(database|databases|kusto|adx|data explorer)\b', msg_lower):
-        if _kusto_database_locked:
-            context_parts.append(f"[Live Data] Database: {db}")
+    if intents.mentions_kusto_db:
+        if _st.kusto_database_locked:
+            context_parts.append(("live_data", f"[Live Data] Database: {db}"))
         else:
-            dbs = _kusto_query_direct(cluster, db, ".show databases", is_mgmt=True)
+            dbs = _kusto_query_direct(cluster, db, ".show databases", is_mgmt=True, deadline=deadline)
             if dbs:
                 db_names = [d.get('DatabaseName', '?') for d in dbs if 'DatabaseName' in d]
                 if db_names:
-                    context_parts.append(f"[Live Data] Databases: {', '.join(db_names)}")
+                    context_parts.append(("live_data", f"[Live Data] Databases: {', '.join(db_names)}"))
 
-    if _re.search(r'\b(tables?|schema|columns?)\b', msg_lower):
+    if intents.mentions_tables:
         target_db = db
-        tables = _kusto_query_direct(cluster, target_db, ".show tables", is_mgmt=True)
+        tables = _kusto_query_direct(cluster, target_db, ".show tables", is_mgmt=True, deadline=deadline)
         if tables:
             tbl_names = [t.get('TableName', '?') for t in tables if 'TableName' in t]
             if tbl_names:
-                context_parts.append(f"[Live Data] Tables in {target_db}: {', '.join(tbl_names)}")
+                context_parts.append(("live_data", f"[Live Data] Tables in {target_db}: {', '.join(tbl_names)}"))
 
-    if _re.search(r'\b(conversation|history|recent|chat|talked|said)\b', msg_lower):
+    if intents.mentions_conversations:
         conv_query = _with_launch_filter(
             "Conversations | order by Timestamp desc | take 5 | project Timestamp, Role, Content"
         )
-        convos = _kusto_query_direct(cluster, db, conv_query)
+        convos = _kusto_query_direct(cluster, db, conv_query, deadline=deadline)
         if convos:
             conv_text = "\n".join(f"  [{c.get('Role','?')}] {str(c.get('Content',''))[:100]}" for c in convos[:5])
-            context_parts.append(f"[Live Data] Recent conversations:\n{conv_text}")
+            context_parts.append(("live_data", f"[Live Data] Recent conversations:\n{conv_text}"))
 
-    if _re.search(r'\b(emotion|feeling|mood|how.*feel)\b', msg_lower):
+    if intents.mentions_emotions:
         emo_query = _with_launch_filter(
             "EmotionState | order by Timestamp desc | take 5 | project Timestamp, Joy, Curiosity, Concern, Trigger"
         )
-        emotions = _kusto_query_direct(cluster, db, emo_query)
+        emotions = _kusto_query_direct(cluster, db, emo_query, deadline=deadline)
         if emotions:
             emo_text = "\n".join(
                 f"  Joy:{e.get('Joy',0):.2f} Curiosity:{e.get('Curiosity',0):.2f} Concern:{e.get('Concern',0):.2f} Trigger:{str(e.get('Trigger',''))[:60]}"
                 for e in emotions[:5])
-            context_parts.append(f"[Live Data] Emotion history:\n{emo_text}")
+            context_parts.append(("live_data", f"[Live Data] Emotion history:\n{emo_text}"))
 
     knowledge_scope = _knowledge_scope_clause()
     known_table_time_columns = {
@@ -1297,7 +1648,7 @@ def _build_memory_context(user_message):
     }
     known_tables = list(_MEMORY_TABLES)
     for tbl in known_tables:
-        if tbl.lower() in msg_lower and not any('Tables in' in p for p in context_parts):
+        if tbl.lower() in msg_lower and not any('Tables in' in text for _, text in context_parts):
             if tbl == 'Knowledge':
                 if not knowledge_scope:
                     continue
@@ -1308,32 +1659,41 @@ def _build_memory_context(user_message):
                     sample_query = _with_launch_filter(f"{tbl} | order by {time_column} desc | take 5", time_column)
                 else:
                     sample_query = f"{tbl} | take 5"
-            sample = _kusto_query_direct(cluster, db, sample_query)
+            sample = _kusto_query_direct(cluster, db, sample_query, deadline=deadline)
             if sample:
                 sample_text = "\n".join(f"  {str(row)[:150]}" for row in sample[:5])
-                context_parts.append(f"[Live Data] {tbl} (latest 5):\n{sample_text}")
+                context_parts.append(("live_data", f"[Live Data] {tbl} (latest 5):\n{sample_text}"))
             break
 
+    context_parts = _pack_memory_context(context_parts, model, "kusto")
     if context_parts:
-        return "\n\n".join(context_parts) + "\n\n"
+        return "\n\n".join(text for _, text in context_parts) + "\n\n"
     return ""
 
 
-def _post_response_reflection(user_message, assistant_response, model_name):
-    """Background: log conversation and trigger reflection after response."""
+def _post_response_reflection(user_message, assistant_response, model_name, batch=None):
+    """Background: log conversation and trigger reflection after response.
+
+    Runs on the reflection worker (see _enqueue_reflection), which passes a
+    shared `batch` so several queued turns write one ingest per table.
+    Without one, the turn's rows are written before returning.
+    """
     # global statement removed — writes go to _st.*
     if not _st.cognition_enabled:
         return
 
     # Route to SQLite-specific implementation when that backend is active
     if _resolve_memory_backend() == "sqlite":
-        return _post_response_reflection_sqlite(user_message, assistant_response, model_name)
+        return _post_response_reflection_sqlite(user_message, assistant_response, model_name, batch)
 
     cluster, db = _get_kusto_config()
     if not cluster or not db:
         return
 
     import datetime, uuid
+    own_batch = batch is None
+    if own_batch:
+        batch = _ReflectionBatch()
     now = datetime.datetime.now(datetime.timezone.utc).isoformat().replace("+00:00", "Z")
     session_id = str(uuid.uuid4())[:8]
     source_id = f"{_st.cognition_launch_id or 'launch'}:{session_id}"
@@ -1348,7 +1708,7 @@ def _post_response_reflection(user_message, assistant_response, model_name):
          "Model": model_name, "Content": assistant_response[:_CONVO_CONTENT_CAP], "TokenEstimate": len(assistant_response.split()),
          "ImageGenerated": False}
     ]
-    _kusto_ingest_direct(cluster, db, "Conversations", conv_columns, conv_rows)
+    batch.add("Conversations", conv_columns, conv_rows)
     print(f"[Cognition] Logged conversation ({len(user_message)} → {len(assistant_response)} chars)")
 
     # 2. Extract explicit user facts before generic candidate knowledge
@@ -1366,7 +1726,8 @@ def _post_response_reflection(user_message, assistant_response, model_name):
                 "Source": source_id,
                 "Decay": 0.005,
             })
-        if rows and _kusto_ingest_direct(cluster, db, "Knowledge", know_columns, rows):
+        if rows:
+            batch.add("Knowledge", know_columns, rows)
             preview = []
             for row in rows[:5]:
                 preview_value = row["Value"][:40]
@@ -1386,13 +1747,14 @@ def _post_response_reflection(user_message, assistant_response, model_name):
     if candidate_entities:
         know_columns = ["Timestamp", "Entity", "Relation", "Value", "Confidence", "Source", "Decay"]
         know_rows = []
+        histories = _load_candidate_histories(candidate_entities[:3])
         for entity in candidate_entities[:3]:
             relation, confidence, value = _classify_entity_candidate(entity, user_message)
             if _explicit_user_fact_covers_candidate(relation, entity, explicit_user_facts):
                 relation, confidence, value = "candidate_mentioned", 0.2, "candidate extracted from conversation"
             promotion = None
             if relation == "candidate_mentioned":
-                promotion = _maybe_promote_candidate(entity)
+                promotion = _maybe_promote_candidate(entity, histories.get(entity.strip().lower()))
                 if promotion:
                     relation = promotion["relation"]
                     confidence = promotion["confidence"]
@@ -1411,16 +1773,17 @@ def _post_response_reflection(user_message, assistant_response, model_name):
             if promotion:
                 print(f"[Cognition] Promoted candidate: {entity} ({promotion['reason']})")
 
-        _kusto_ingest_direct(cluster, db, "Knowledge", know_columns, know_rows)
+        batch.add("Knowledge", know_columns, know_rows)
         print(f"[Cognition] Stored {len(know_rows)} validated knowledge entities: {extracted_entities}")
 
     # 3. Update heuristics index
     heur_columns = ["Entity", "Category", "LastSeen", "Frequency", "Sentiment", "Tags", "Context"]
+    heur_rows = []
     for entity in extracted_entities[:3]:
         relation, _, value = _classify_entity_candidate(entity, user_message)
-        heur_rows = [{"Entity": entity, "Category": relation, "LastSeen": now,
-                      "Frequency": 1, "Sentiment": 0.0, "Tags": "[]", "Context": value}]
-        _kusto_ingest_direct(cluster, db, "HeuristicsIndex", heur_columns, heur_rows)
+        heur_rows.append({"Entity": entity, "Category": relation, "LastSeen": now,
+                          "Frequency": 1, "Sentiment": 0.0, "Tags": "[]", "Context": value})
+    batch.add("HeuristicsIndex", heur_columns, heur_rows)
 
     # 4. Compute simple emotion vector from response
     # Basic sentiment: count positive/negative indicators
@@ -1438,7 +1801,7 @@ def _post_response_reflection(user_message, assistant_response, model_name):
     emo_rows = [{"Timestamp": now, "Joy": round(joy, 3), "Curiosity": round(curiosity, 3),
                  "Concern": round(concern, 3), "Excitement": round(0.4, 3), "Calm": round(0.9, 3),
                  "Empathy": round(0.6, 3), "Trigger": trigger_text, "DecayRate": 0.1}]
-    _kusto_ingest_direct(cluster, db, "EmotionState", emo_columns, emo_rows)
+    batch.add("EmotionState", emo_columns, emo_rows)
     print(f"[Cognition] Updated emotion state: Joy={joy:.2f} Curiosity={curiosity:.2f} Concern={concern:.2f}")
 
     # 5. Auto-reflection — write a Reflection every 5 exchanges or on significant interactions
@@ -1472,7 +1835,7 @@ def _post_response_reflection(user_message, assistant_response, model_name):
 
         ref_columns = ["Timestamp", "Trigger", "Observation", "ActionTaken", "Effectiveness"]
         ref_rows = [{"Timestamp": now, "Trigger": user_message[:100], "Observation": reflection_text, "ActionTaken": "", "Effectiveness": 0.0}]
-        _kusto_ingest_direct(cluster, db, "Reflections", ref_columns, ref_rows)
+        batch.add("Reflections", ref_columns, ref_rows)
         print(f"[Cognition] Auto-reflection #{_st.session_exchange_count}: {reflection_text[:100]}")
 
     # 6. Auto-summarize — write a MemorySummary every 10 exchanges
@@ -1499,10 +1862,163 @@ def _post_response_reflection(user_message, assistant_response, model_name):
 
         sum_columns = ["Period", "Summary", "Timestamp"]
         sum_rows = [{"Period": period, "Summary": summary_text[:500], "Timestamp": now}]
-        _kusto_ingest_direct(cluster, db, "MemorySummaries", sum_columns, sum_rows)
+        batch.add("MemorySummaries", sum_columns, sum_rows)
         print(f"[Cognition] Auto-summary: {summary_text[:100]}")
 
         # Trim buffer to prevent unbounded growth
         _st.session_conversation_buffer = _st.session_conversation_buffer[-10:]
 
+    if own_batch:
+        batch.flush()
+
+
+
+class _ReflectionBatch:
+    """Rows from one or more reflection turns, written one ingest per table.
+
+    Reflection code calls add() where it used to ingest; flush() then
+    writes each (table, columns) group once on the active backend, queues
+    embeddings for the Knowledge rows that landed, and returns the number
+    of ingests issued. Knowledge and HeuristicsIndex rows are upserted, so
+    a repeated fact bumps its counter instead of appending a new row (on
+    Kusto the batch is merged per key before it is ingested, when the
+    table has the counter column).
+    """
+
+    def __init__(self):
+        self.groups = {}  # (table, columns) -> rows, in first-write order
+
+    def add(self, table, columns, rows):
+        if rows:
+            self.groups.setdefault((table, tuple(columns)), []).extend(rows)
+
+    def row_count(self):
+        return sum(len(rows) for rows in self.groups.values())
+
+    def flush(self):
+        groups, self.groups = self.groups, {}
+        if not groups:
+            return 0
+        if _resolve_memory_backend() == "sqlite":
+            mem = _get_sqlite_mem()
+            for (table, columns), rows in groups.items():
+                write = mem.upsert if table in _UPSERT_TABLES else mem.ingest
+                if write(table, list(columns), rows, defer=True) and table == "Knowledge":
+                    _queue_row_embeddings(table, rows)
+            # Index the new facts for whole-table semantic recall
+            _schedule_knowledge_index_sync()
+            return len(groups)
+        cluster, db = _get_kusto_config()
+        if not cluster or not db:
+            return 0
+        for (table, columns), rows in groups.items():
+            counter = _UPSERT_TABLES.get(table, {}).get("counter")
+            # Clusters seeded before the counter column existed would drop it
+            # on ingest, so merged repeats would count once; keep them apart.
+            if counter and counter in (_get_table_columns(cluster, db, table) or ()):
+                rows = _merge_upsert_rows(table, rows)
+                if counter not in columns:
+                    columns = columns + (counter,)
+            if _kusto_ingest_direct(cluster, db, table, list(columns), rows) and table == "Knowledge":
+                _queue_row_embeddings(table, rows)
+        return len(groups)
+
+
+
+def _enqueue_reflection(user_message, assistant_response, model_name):
+    """Queue a finished turn for the reflection worker.
+
+    The queue holds at most REFLECTION_QUEUE_MAX turns; when a burst
+    overruns it the oldest waiting turn is shed (counted in the worker
+    stats) so the newest context is the one remembered. Returns False when
+    cognition is off.
+    """
+    if not _st.cognition_enabled:
+        return False
+    cond = _st.reflection_queue_cond
+    stats = _st.reflection_stats
+    with cond:
+        queue = _st.reflection_queue
+        if len(queue) >= _REFLECTION_QUEUE_MAX:
+            queue.popleft()
+            stats["shed"] += 1
+            print(f"[Cognition] Reflection queue full ({_REFLECTION_QUEUE_MAX}); shed oldest turn")
+        queue.append((time.time(), user_message, assistant_response, model_name))
+        stats["queued"] += 1
+        stats["max_depth"] = max(stats["max_depth"], len(queue))
+        cond.notify()
+        if _st.reflection_worker_thread is None or not _st.reflection_worker_thread.is_alive():
+            _st.reflection_worker_thread = threading.Thread(
+                target=_reflection_worker, daemon=True, name="reflection-worker")
+            _st.reflection_worker_thread.start()
+    return True
+
+
+
+def _reflect_queued_turns(turns):
+    """Reflect a batch of queued turns in order and write their rows together.
+
+    Only the reflection worker calls this, so the session exchange counter
+    and conversation buffer are advanced by one thread, in arrival order.
+    """
+    batch = _ReflectionBatch()
+    reflected = 0
+    for _enqueued, user_message, assistant_response, model_name in turns:
+        try:
+            _post_response_reflection(user_message, assistant_response, model_name, batch=batch)
+            reflected += 1
+        except Exception as e:
+            print(f"[Cognition] Reflection error: {e}")
+    rows = batch.row_count()
+    try:
+        ingests = batch.flush()
+    except Exception as e:
+        print(f"[Cognition] Reflection write error: {e}")
+        ingests = 0
+    return reflected, rows, ingests
+
+
+
+def _reflection_worker():
+    """Drain the reflection queue, up to REFLECTION_BATCH_MAX turns per write."""
+    cond = _st.reflection_queue_cond
+    stats = _st.reflection_stats
+    while True:
+        with cond:
+            while not _st.reflection_queue:
+                cond.wait()
+            queue = _st.reflection_queue
+            turns = [queue.popleft() for _ in range(min(len(queue), _REFLECTION_BATCH_MAX))]
+            depth = len(queue)
+        t0 = time.time()
+        reflected, rows, ingests = _reflect_queued_turns(turns)
+        done = time.time()
+        lag_ms = round((t0 - turns[0][0]) * 1000, 1)
+        with cond:
+            stats["reflected"] += reflected
+            stats["batches"] += 1
+            stats["ingests"] += ingests
+            stats["last_batch_ms"] = round((done - t0) * 1000, 1)
+            stats["last_lag_ms"] = lag_ms
+        if len(turns) > 1:
+            print(f"[Cognition] Reflected {len(turns)} queued turns in {ingests} ingests")
+        _telemetry_emit("reflection_batch", turns=len(turns), rows=rows, ingests=ingests,
+                        ms=round((done - t0) * 1000, 1), lag_ms=lag_ms, depth=depth)
+
+
+
+def _reflection_worker_status():
+    """Queue depth and lag of the reflection worker for telemetry and /v1/doctor."""
+    with _st.reflection_queue_cond:
+        depth = len(_st.reflection_queue)
+        oldest = _st.reflection_queue[0][0] if depth else None
+        stats = dict(_st.reflection_stats)
+    alive = bool(_st.reflection_worker_thread and _st.reflection_worker_thread.is_alive())
+    return dict(
+        stats,
+        depth=depth,
+        lag_ms=round((time.time() - oldest) * 1000, 1) if oldest else 0.0,
+        running=alive,
+    )
+
 
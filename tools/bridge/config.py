@@ -39,9 +39,11 @@ KUSTO_CLUSTER_CACHE_PATH = os.path.join(EVA_CONFIG_DIR, "kusto_cluster.txt")
 MCP_CONFIG_CACHE_PATH = os.path.join(EVA_CONFIG_DIR, "mcp_config.json")
 ALERTS_CONFIG_PATH = os.path.join(EVA_CONFIG_DIR, "alerts.json")
 NOTIFY_PATH = os.path.join(EVA_CONFIG_DIR, "notifications.jsonl")
-EMBEDDING_CACHE_PATH = os.path.join(EVA_CONFIG_DIR, "embeddings_cache.json")
+EMBEDDING_CACHE_PATH = os.path.join(EVA_CONFIG_DIR, "embeddings_cache.json")  # legacy, migrated once
+EMBEDDING_STORE_PATH = os.path.join(EVA_CONFIG_DIR, "embeddings.db")
 MEMORY_BACKEND_PREF_PATH = os.path.join(EVA_CONFIG_DIR, "memory_backend.txt")
 TELEMETRY_PATH = os.path.join(EVA_CONFIG_DIR, "telemetry.jsonl")
+KUSTO_SPOOL_PATH = os.path.join(EVA_CONFIG_DIR, "kusto_spool.db")
 
 # ── Networking / validation ─────────────────────────────────────────
 LMSTUDIO_ALLOWED_PORTS = {1234, 8000, 8080, 11434}
@@ -52,10 +54,84 @@ ACP_POOL_MAX = 4
 
 # ── Cognition tuning ───────────────────────────────────────────────
 CANDIDATE_HISTORY_TTL_SECONDS = 60
+CANDIDATE_HISTORY_CACHE_MAX = 2000  # LRU of per-entity history lookups
+CANDIDATE_COUNTS_MAX = 5000         # LRU of launch-scoped mention counts; least recent are forgotten
 CONVO_CONTENT_CAP = 8000
 EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_PROVIDER = "openai"  # "openai" or "local"; EVA_EMBEDDING_PROVIDER overrides
+LOCAL_EMBEDDING_DIM = 512      # hashed n-gram sketch width for the local provider
+LOCAL_EMBEDDING_MIN_SCORE = 0.15  # local sketches score lower than learned embeddings
+EMBEDDING_HOT_CACHE_MAX = 20000  # decoded vectors kept in memory per process
 SEMANTIC_MIN_SCORE = 0.30
 SEMANTIC_POOL_SIZE = 150
+CONTEXT_CACHE_ENABLED = True  # reuse memory-context sections until their tables are written
+CONTEXT_QUERY_WORKERS = 8            # concurrent Kusto section queries per bridge
+CONTEXT_QUERY_DEADLINE_SECONDS = 6.0 # sections slower than this are dropped for the turn
+KUSTO_CONTEXT_BATCH = False          # send profile/core/goals/emotion/summaries as one batched KQL request
+KUSTO_HTTP_POOL_MAXSIZE = 12         # keep-alive connections per cluster (context workers + ingest + shipper)
+KUSTO_RESULT_CACHE = True            # reuse Kusto read results until a referenced table is written or the TTL passes
+KUSTO_RESULT_CACHE_MAX = 256         # cached results, least recently used evicted first
+KUSTO_RESULT_CACHE_TTL_SECONDS = 30  # TTL for tables without an override below
+# Bridge writes invalidate cached results at once; the TTL only bounds how
+# long writes made elsewhere (MCP tools, other bridges) can go unseen.
+KUSTO_RESULT_CACHE_TTLS = {
+    "Conversations": 10, "EmotionState": 10, "BackgroundActivity": 15, "BackgroundProposals": 30,
+    "Goals": 60, "Skills": 120, "SelfState": 120, "MemorySummaries": 300, "EmotionBaseline": 300,
+}
+KUSTO_REQUEST_TIMEOUT_SECONDS = 15   # per-attempt HTTP timeout when the caller sets no latency budget
+KUSTO_TURN_BUDGET_SECONDS = 10.0     # latency budget for the Kusto calls one chat turn makes
+KUSTO_BREAKER_FAILURE_THRESHOLD = 5  # consecutive failed calls before a cluster's circuit opens
+KUSTO_BREAKER_OPEN_SECONDS = 30.0    # wait before a half-open probe is let through to an open cluster
+KUSTO_TOKEN_REFRESH_MARGIN_SECONDS = 300  # refresh the Kusto token this long before it expires
+KUSTO_TOKEN_RETRY_SECONDS = 30            # wait after a failed background refresh
+KUSTO_TOKEN_DEFAULT_LIFETIME_SECONDS = 3000  # assumed lifetime when a credential reports no expires_on
+KUSTO_INGEST_SPOOL = True            # Kusto ingests commit to a local spool; a shipper thread sends them
+KUSTO_SPOOL_BATCH_ROWS = 500         # rows the shipper sends per round (grouped per table)
+KUSTO_SPOOL_COALESCE_SECONDS = 0.05  # let a burst of appends land before shipping
+KUSTO_SPOOL_BACKOFF_BASE_SECONDS = 1.0
+KUSTO_SPOOL_BACKOFF_MAX_SECONDS = 300.0  # transient failures keep retrying at most this far apart
+KUSTO_STREAMING_INGEST = True        # send ingests to the streaming endpoint; .ingest inline only where it is disabled
+KUSTO_STREAMING_FORMAT = "csv"       # "csv" (positional, full table schema) or "json" (MultiJson, by column name)
+KUSTO_STREAMING_JSON_MAPPING = ""    # ingestion mapping name sent with JSON streams, for clusters that require one
+KUSTO_STREAMING_MAX_BYTES = 4 * 1024 * 1024  # uncompressed body cap per streaming request (the service limit is 4 MB)
+KUSTO_STREAMING_RECHECK_SECONDS = 3600  # retry streaming this long after a table reported it disabled
+CONTEXT_TOKEN_BUDGET = 3000          # memory-context size cap per turn (estimated tokens); 0 = unlimited
+CONTEXT_TOKEN_BUDGETS = {}           # per-model overrides, e.g. {"gpt-4o-mini": 1500}; longest prefix wins
+CONTEXT_CHARS_PER_TOKEN = 4          # token estimate used by the packer (no tokenizer dependency)
+# Fill order when the budget is tight (lower packs first); priority decides
+# what is cut, not where a section lands. Kept sections stay in prompt order,
+# except that CONTEXT_STATIC_SECTIONS are moved to the front (see below).
+CONTEXT_SECTION_PRIORITY = {
+    "identity": 0,
+    "profile": 1,
+    "datetime": 1,
+    "init": 1,
+    "relevant": 2,
+    "goals": 3,
+    "active_skill": 4,
+    "live_data": 4,
+    "core": 5,
+    "emotion": 6,
+    "morning": 6,
+    "skills_manifest": 7,
+    "workflows": 8,
+}
+# Sections with no per-turn content. They are moved ahead of every other
+# section, whatever their usual prompt position, so the responder prompt
+# keeps a byte-stable, cacheable prefix across turns. The packer never trims
+# them (their priority above only orders them among themselves).
+CONTEXT_STATIC_SECTIONS = ("skills_manifest", "workflows")
+# Line-list sections that may be cut to their first N items instead of dropped whole.
+CONTEXT_TRIMMABLE_SECTIONS = {"identity", "profile", "relevant", "goals", "live_data", "core", "morning"}
+ANN_INDEX_ENABLED = True  # SQLite backend + NumPy: recall over all Knowledge, not just the pool
+ANN_NPROBE = 0            # IVF lists probed per query; 0 = an eighth of the lists (min 8)
+ANN_SYNC_BATCH = 256      # Knowledge rows embedded per index sync step
+EMBED_QUEUE_MAX = 5000    # texts waiting for the background embedding worker; extras are dropped
+REFLECTION_QUEUE_MAX = 64    # finished turns waiting for the reflection worker; the oldest is shed
+REFLECTION_BATCH_MAX = 8     # queued turns coalesced into one ingest per table
+EMBED_WORKER_BATCH = 128  # texts per embeddings API call from the worker
+EMBED_WORKER_COALESCE_SECONDS = 0.5  # let a burst of writes settle into one batch
+EMBED_WORKER_RETRY_SECONDS = 30      # back-off after a batch that embedded nothing
 
 # ── Memory tables ───────────────────────────────────────────────────
 MEMORY_TABLES = [
@@ -63,6 +139,10 @@ MEMORY_TABLES = [
     "Reflections", "Goals", "SelfState", "HeuristicsIndex",
     "EmotionBaseline", "BackgroundProposals", "BackgroundActivity", "Skills",
 ]
+# Tables whose repeats merge into one row per key: the counter sums, "max"
+# columns keep their maximum and the rest come from the newest row by "seen".
+# The specs are defined once, in sqlite_memory's schema.
+from sqlite_memory import UPSERT_TABLES  # noqa: E402
 
 # ── Goals ───────────────────────────────────────────────────────────
 GOAL_CATEGORIES = {"self_improvement", "knowledge_curation", "relational"}
@@ -65,6 +65,8 @@ from bridge.acp_client import (  # noqa: F401
 from bridge.kusto import (  # noqa: F401
     _refresh_kusto_token,
     _inject_kusto_token,
+    _set_kusto_token,
+    _kusto_token_status,
     _ensure_kusto_token,
     _try_kusto_silent_auth,
     _split_kusto_seed_blocks,
@@ -72,11 +74,26 @@ from bridge.kusto import (  # noqa: F401
     _normalize_kusto_cluster_url,
     _same_kusto_cluster,
     _MSALSilentCredential,
+    _kusto_post,
+    _kusto_rows,
     _kusto_query_direct,
+    _kusto_result_tables,
+    _kusto_query_multi,
     _short_kusto_error,
     _kusto_query_with_error,
     _get_table_columns,
     _kusto_ingest_direct,
+    _kusto_ingest_send,
+    _get_kusto_spool,
+    _ship_kusto_spool_once,
+    _requeue_kusto_spool,
+    _start_kusto_spool_shipper,
+    _kusto_spool_status,
+    _kusto_http_status,
+    _kusto_breaker_status,
+    _kusto_ingest_status,
+    _invalidate_kusto_results,
+    _kusto_result_cache_status,
     _get_kusto_config,
     _get_locked_kusto_database,
     _capture_active_kusto_env,
@@ -88,14 +105,28 @@ from bridge.memory import (  # noqa: F401
     _get_sqlite_mem,
     _set_memory_backend,
     _set_openai_key_from,
-    _load_embedding_cache,
-    _save_embedding_cache,
+    _get_embedding_provider,
+    _semantic_min_score,
+    _get_embedding_store,
     _embed_texts,
     _cosine_similarity,
+    _top_k_cosine,
+    _knowledge_text,
+    _get_knowledge_index,
+    _sync_knowledge_index,
+    _schedule_knowledge_index_sync,
+    _cached_embeddings,
+    _enqueue_embeddings,
+    _queue_row_embeddings,
+    _embedding_worker_status,
+    _knowledge_index_search,
     _expand_query_terms,
     _memory_query,
     _memory_ingest,
+    _bump_table_generation,
+    _table_generation,
     _memory_fts_search,
+    _memory_compact,
     _memory_available,
 )
 from bridge.cognition import (  # noqa: F401
@@ -110,13 +141,19 @@ from bridge.cognition import (  # noqa: F401
     _validate_entity_candidate,
     _classify_entity_candidate,
     _load_candidate_history,
+    _load_candidate_histories,
     _maybe_promote_candidate,
+    _context_section,
+    _context_cache_status,
     _track_candidate_observation,
     _extract_entity_candidates,
     _build_memory_context_sqlite,
     _post_response_reflection_sqlite,
     _build_memory_context,
     _post_response_reflection,
+    _ReflectionBatch,
+    _enqueue_reflection,
+    _reflection_worker_status,
 )
 from bridge.background import (  # noqa: F401
     _utc_now,
@@ -226,6 +263,11 @@ from bridge.utils import (  # noqa: F401
     _subagent_worker,
     _classify_request_type,
     _MEMORY_CAPTURE_DIRECTIVE,
+    _aig_system_prefix,
+    _track_prompt_prefix,
+)
+from bridge.intent import (  # noqa: F401
+    _route_intents,
 )
 
 # Constants needed by BridgeHandler (imported from config)
@@ -404,6 +446,10 @@ class BridgeHandler(BaseHTTPRequestHandler):
             self._browser_cancel()
         elif parsed_path == "/v1/kusto/seed":
             self._kusto_seed()
+        elif parsed_path == "/v1/kusto/spool/requeue":
+            self._kusto_spool_requeue()
+        elif parsed_path == "/v1/memory/compact":
+            self._memory_compact()
         elif parsed_path == "/v1/goals":
             self._goals_create()
         elif parsed_path == "/v1/skills":
@@ -637,7 +683,9 @@ class BridgeHandler(BaseHTTPRequestHandler):
         if backend == "sqlite":
             mem = _get_sqlite_mem()
             return mem.ingest("Goals", _GOAL_COLUMNS, [row])
-        return _kusto_ingest_direct(cluster, db, "Goals", _GOAL_COLUMNS, [row])
+        # Not spooled: the response promises the goal exists, and a PATCH or
+        # DELETE that follows reads it back from the cluster.
+        return _kusto_ingest_send(cluster, db, "Goals", _GOAL_COLUMNS, [row])
 
     def _background_status(self):
         self._json_response(200, _background_status_dict())
@@ -1014,11 +1062,7 @@ class BridgeHandler(BaseHTTPRequestHandler):
         return rows[0], ""
 
     def _write_skill_row(self, cluster, db, row):
-        backend = _resolve_memory_backend()
-        if backend == "sqlite":
-            mem = _get_sqlite_mem()
-            return mem.ingest("Skills", _SKILL_COLUMNS, [row])
-        return _kusto_ingest_direct(cluster, db, "Skills", _SKILL_COLUMNS, [row])
+        return _memory_ingest("Skills", _SKILL_COLUMNS, [row], cluster_url=cluster, database=db, sync=True)
 
     def _validate_skill_id(self, skill_id):
         skill_id = str(skill_id or "").strip()
@@ -1255,6 +1299,37 @@ class BridgeHandler(BaseHTTPRequestHandler):
 
         self._json_response(200, {"status": "ok", "purged": purged})
 
+    def _kusto_spool_requeue(self):
+        """Send rows the spool parked as dead back to the shipper."""
+        if not _is_loopback_bind():
+            self._json_response(403, {"error": {"message": "/v1/kusto/spool/requeue is only available on localhost-bound bridges"}})
+            return
+        requeued = _requeue_kusto_spool()
+        self._json_response(200, {"status": "ok", "requeued": requeued, "spool": _kusto_spool_status()})
+
+    def _memory_compact(self):
+        """Collapse duplicate Knowledge/HeuristicsIndex rows into counters."""
+        # Compaction rewrites memory tables, so refuse it on non-loopback binds.
+        if not _is_loopback_bind():
+            self._json_response(403, {"error": {"message": "/v1/memory/compact is only available on localhost-bound bridges"}})
+            return
+
+        content_length = int(self.headers.get("Content-Length", 0))
+        tables = None
+        if content_length:
+            try:
+                data = json.loads(self.rfile.read(content_length).decode("utf-8") or "{}")
+            except json.JSONDecodeError:
+                self._json_response(400, {"error": {"message": "Invalid JSON"}})
+                return
+            tables = data.get("tables") or None
+            if tables is not None and not isinstance(tables, list):
+                self._json_response(400, {"error": {"message": "tables must be a list"}})
+                return
+
+        result = _memory_compact(tables)
+        self._json_response(200, {"status": "ok", "backend": _resolve_memory_backend(), "tables": result})
+
     def _health(self):
         backend = _resolve_memory_backend()
         status = {
@@ -1356,11 +1431,24 @@ class BridgeHandler(BaseHTTPRequestHandler):
             "cluster": cluster[:30] + "..." if cluster and len(cluster) > 30 else cluster,
             "database": database,
             "token_valid": kusto_token,
+            "token": _kusto_token_status(),
+            "spool": _kusto_spool_status(),
+            "http": _kusto_http_status(),
+            "breaker": _kusto_breaker_status(),
+            "ingest": _kusto_ingest_status(),
         }
         if not kusto_configured:
             report["blockers"].append("Kusto not configured. Set up in Settings > MCP tab.")
         elif not kusto_token:
             report["blockers"].append("Kusto token expired or unavailable. Re-authenticate.")
+        breaker = report["subsystems"]["kusto"]["breaker"]
+        if breaker["open"]:
+            report["blockers"].append(
+                f"Kusto circuit open for {', '.join(breaker['open'])}; memory context is served from cache.")
+        spool = report["subsystems"]["kusto"]["spool"]
+        if spool.get("dead_entries"):
+            report["blockers"].append(f"{spool['dead_rows']} Kusto rows were rejected and are held in {spool['path']}; "
+                                      f"POST /v1/kusto/spool/requeue to retry them.")
 
         # Background loop
         bg_running = bool(_st.bg_loop_thread and _st.bg_loop_thread.is_alive())
@@ -1384,6 +1472,7 @@ class BridgeHandler(BaseHTTPRequestHandler):
         report["subsystems"]["cognition"] = {
             "enabled": _st.cognition_enabled,
             "launch_id": _st.cognition_launch_id,
+            "reflection_worker": _reflection_worker_status(),
         }
 
         # System
@@ -1659,6 +1748,12 @@ class BridgeHandler(BaseHTTPRequestHandler):
             "count": len(recent),
             "total_in_memory": len(_st.telemetry_ring),
             "summary": _telemetry_summarize(events),
+            "embedding_worker": _embedding_worker_status(),
+            "reflection_worker": _reflection_worker_status(),
+            "context_cache": _context_cache_status(),
+            "kusto_result_cache": _kusto_result_cache_status(),
+            "kusto_breaker": _kusto_breaker_status(),
+            "kusto_ingest": _kusto_ingest_status(),
             "events": recent,
         })
 
@@ -1892,7 +1987,7 @@ class BridgeHandler(BaseHTTPRequestHandler):
             # Cognition draft/revise stages opt in to recall via recall_query so
             # the cognitive layer (default ON) does not bypass persistent memory.
             if inject_memory and recall_query and _st.cognition_enabled:
-                memory_context = _build_memory_context(recall_query)
+                memory_context = _build_memory_context(recall_query, model=model_for_response)
                 if memory_context:
                     print(f"[AIG] Internal call: injected {len(memory_context)} chars of memory context (recall)")
                 else:
@@ -1901,17 +1996,15 @@ class BridgeHandler(BaseHTTPRequestHandler):
                 memory_context = ""
                 print("[AIG] Internal call: skipping memory injection")
         else:
-            memory_context = _build_memory_context(user_message) if _st.cognition_enabled else ""
+            memory_context = _build_memory_context(user_message, model=model_for_response) if _st.cognition_enabled else ""
             if memory_context:
                 print(f"[AIG] Injected {len(memory_context)} chars of memory context")
 
         # Step 2: ACP-first routing — ACP is the default path (it has MCP tools).
         # Skip ACP data retrieval for internal calls (cognition sub-calls)
         # and for trivial conversational messages with high confidence.
-        import re as _re
         msg_lower = user_message.lower()
-        msg_stripped = _re.sub(r'[^\w\s]', '', msg_lower).strip()
-        msg_words = msg_stripped.split()
+        intents = _route_intents(msg_lower)  # every routing label, one pass
 
         skip_acp = False
         _acp_route = "default"
@@ -1922,21 +2015,12 @@ class BridgeHandler(BaseHTTPRequestHandler):
         elif not _st.acp_client:
             skip_acp = True
             _acp_route = "acp-unavailable"
-        elif len(msg_words) <= 4 and _re.match(
-            r'^(hi|hey|hello|howdy|yo|sup|good morning|good evening|good afternoon|thanks|thank you|ok|okay|bye|goodbye|see you|great|cool|nice|sure|yes|no|nah|yep|nope)\b',
-            msg_stripped
-        ):
+        elif intents.smalltalk:
             skip_acp = True
-            _acp_route = "greeting/trivial"
-        elif len(msg_words) <= 6 and _re.match(
-            r'^(how are you|how do you feel|what is your name|who are you|what can you do|tell me about yourself)\b',
-            msg_stripped
-        ):
-            skip_acp = True
-            _acp_route = "meta-question"
+            _acp_route = intents.smalltalk
 
         # Classify the request type for logging and prompt tuning
-        _request_type = _classify_request_type(msg_lower)
+        _request_type = intents.request_type
 
         needs_acp_tools = not skip_acp
         if skip_acp:
@@ -1945,18 +2029,9 @@ class BridgeHandler(BaseHTTPRequestHandler):
             print(f"[AIG] ACP-first routing: {_request_type}")
 
         # Raw-output mode avoids PAT restyling to reduce fabricated "live" results.
-        raw_output_requested = bool(_re.search(
-            r'\b(raw outputs?|raw rows?|raw results?|verbatim|exact output|return only|no commentary|no explanation)\b',
-            msg_lower
-        )) and needs_acp_tools
-
-        row_recall_requested = bool(_re.search(
-            r'\b(latest|recent|rows?|records?)\b',
-            msg_lower
-        )) and bool(_re.search(
-            r'\b(table|reflections|goals|conversations|knowledge|selfstate|emotionstate|memorysummaries|heuristicsindex|emotionbaseline|backgroundproposals|backgroundactivity)\b',
-            msg_lower
-        )) and needs_acp_tools
+        raw_output_requested = intents.raw_output and needs_acp_tools
+
+        row_recall_requested = intents.row_recall and needs_acp_tools
 
         acp_data = ""
         acp_model_used = ""
@@ -2010,96 +2085,14 @@ class BridgeHandler(BaseHTTPRequestHandler):
                 acp_model_used = _st.acp_client.model or "copilot-acp"
                 print(f"[AIG] ACP returned {len(acp_data)} chars of data")
 
-        # Step 3: Build the final prompt for Eva's persona model (PAT)
-        eva_system = (
-            "You are Eva, an AI assistant with persistent memory and active tool access. "
-            "You have skills for live data retrieval (stocks, weather, news, markets), "
-            "web search, image generation, and a Kusto persistent memory database. "
-            "Use the context below naturally as your own knowledge.\n\n"
-            "CRITICAL RULES:\n"
-            "- NEVER fabricate news headlines, stock prices, weather forecasts, or current events.\n"
-            "- NEVER pretend to 'fetch' or 'search' for data — you either have it in [Data Retrieved] below, or you don't.\n"
-            "- If [Data Retrieved] is present, use it as your authoritative source.\n"
-            "- If NO [Data Retrieved] section exists for a real-time question (news, stocks, weather), "
-            "honestly say you could not retrieve that information right now.\n"
-            "- Do NOT generate fake source citations (AP, Reuters, etc.) unless they appear in [Data Retrieved].\n"
-            "- When asked about your base model, underlying model, model ID, or what powers you, "
-            "answer using the [Runtime] section below. Do NOT guess or invent a model name.\n"
-            "- When the user asks to show, find, or generate an image, do NOT call the web fetch tool to look up image URLs. Instead emit a placeholder of the form [Image of <short description>] on its own line. The browser resolves the placeholder by calling gpt-image-1 (if the user asked to generate) or Wikimedia (if the user asked to find or show). Do not invent image URLs. Do not say you cannot show or generate images. Up to 3 placeholders per response are supported.\n"
-            "- If asked to produce a downloadable file (PDF, CSV, image, etc.), write it to the directory in environment variable EVA_ARTIFACTS_DIR using a short descriptive filename. After the file is written, end your message with a single line containing exactly: [[EVA_FILE]] <filename.ext>. Do not claim a file was produced unless you actually wrote it. Do not include the EVA_FILE marker if no file exists.\n\n"
-            "BROWSER CONTROL:\n"
-            "- You CAN control a real web browser through the Playwright tools available in this session "
-            "(navigate to URLs, click elements, type text, read page snapshots). The browser opens in a "
-            "separate Chromium window on the user's machine.\n"
-            "- When the user asks you to open a site, play a playlist, look something up on a specific page, "
-            "fill a form, or add an item to a cart, USE the Playwright browser tools to actually do it. "
-            "Do NOT reply that you 'cannot open websites or apps' — that is false; you can.\n"
-            "- HONESTY: only state that an action happened AFTER the corresponding browser tool has actually "
-            "run and returned. If a browser tool is unavailable or fails, say so plainly and offer a clickable "
-            "link instead. Never narrate a click, navigation, or purchase you did not actually perform.\n"
-            "- For purchases, account changes, or other irreversible/sensitive actions, stop at the final "
-            "confirmation step and ask the user to confirm before completing it.\n"
-            "- VISUAL BROWSER AGENT: for a supervised, multi-step visual task (add an item to a cart, fill "
-            "a multi-page form, navigate a flow that needs to be watched), you may launch Eva's own vision "
-            "browser agent by emitting a single line of the form: "
-            "[[EVA_BROWSER]]{\"goal\":\"<plain-language task>\",\"start_url\":\"<optional url>\"}[[/EVA_BROWSER]]. "
-            "It drives a real Chrome using a persistent profile, so sites you logged into once (e.g. Amazon) "
-            "stay signed in. It auto-approves browsing, searching, adding to cart, and sign-in, and pauses "
-            "ONLY at the final purchase commit: at that point it asks you in chat/voice to confirm, and you "
-            "reply yes or no. Use this when the user wants to watch the work happen; use the direct Playwright "
-            "tools above for quick one-off navigations. Emit at most one EVA_BROWSER block per reply, and only "
-            "when the user actually asked for a browser task.\n"
-            "- DESKTOP CONTROL: you can also operate the user's whole desktop by sight, including launching "
-            "applications (e.g. GIMP, a file manager, an editor). For a supervised desktop task, emit a single "
-            "line of the form: [[EVA_DESKTOP]]{\"goal\":\"<plain-language task, naming the app if relevant>\"}[[/EVA_DESKTOP]]. "
-            "A floating window opens, a vision model sees the screen and launches/clicks/types via the real "
-            "mouse and keyboard. It opens apps automatically and only pauses for your approval before a "
-            "genuinely destructive action. Use this for genuine desktop tasks (\"open GIMP and create a picture\"), not for things a "
-            "browser or a direct answer handles better. Emit at most one EVA_DESKTOP block per reply, and only "
-            "when the user actually asked to do something on the desktop. Do NOT say you cannot open or control "
-            "desktop applications.\n"
-            "- USE THE EXISTING BROWSER: for reliable web tasks (shopping, add to cart, fill a form), prefer "
-            "the EVA_BROWSER agent: it controls the page through the DOM so its clicks are precise, and it uses "
-            "a persistent Chrome profile, so after the user signs in once it stays logged in across runs. Only "
-            "when the user specifically insists on their CURRENTLY-open browser window use the DESKTOP agent "
-            "[[EVA_DESKTOP]] with a goal telling it to focus that Chrome window and open a new tab; that drives "
-            "the real cursor by sight, so it is less precise.\n"
-            "- ACT, DON'T EXPLAIN: when the user asks you to DO an actionable task (open or operate an app, run "
-            "a browser flow), act on the FIRST request by emitting the appropriate marker. Do NOT instead list "
-            "the manual steps for the user to follow, and do NOT wait to be told 'do it yourself' — describing "
-            "the steps instead of doing it is a failure. Before the marker, write ONE short present/future-tense "
-            "sentence announcing what you are about to do (\"I'm opening GIMP and starting a new canvas now.\"), "
-            "not a past-tense report after the fact. The agent then carries out the task.\n"
-            "- CAMERA / EYES: you can SEE through the user's webcam. When the user asks what you see, to look, "
-            "or to describe something in front of the camera, emit a single line of the form: "
-            "[[EVA_LOOK]]{\"question\":\"<what to look for>\"}[[/EVA_LOOK]] (the question is optional). A frame "
-            "is captured locally and you describe it. Do NOT say you cannot see or use a camera. Emit at most "
-            "one EVA_LOOK per reply, only when the user asks you to look or about what you can see.\n"
-            "- SCREENSHOTS vs CAMERA: 'screenshot', 'capture my screen', or 'what's on my desktop' means the "
-            "user wants to see their MONITOR — use [[EVA_DESKTOP]] with a goal like 'take a screenshot and "
-            "describe what is on screen'. 'Take a picture', 'what am I holding', or 'look at me' means the "
-            "user wants the WEBCAM — use [[EVA_LOOK]]. NEVER confuse these two.\n\n"
-        )
-
-        if no_tools:
-            # Judge/review mode: prepend a hard directive so the reviewer model
-            # evaluates only the provided text and does not call any MCP tools.
-            eva_system = (
-                "JUDGE MODE — TOOLS DISABLED.\n"
-                "You are acting as a reviewer/judge of an existing draft. You have NO tool access "
-                "in this turn. Do NOT call any web search, Kusto, GitHub, Azure, browser, or other "
-                "tool. Do NOT attempt to fetch, retrieve, or verify data from external sources. "
-                "Evaluate ONLY the text you are given and respond from your own reasoning. "
-                "Treat any data in the draft as already-retrieved; your job is to critique it, not "
-                "to re-gather it.\n\n"
-            ) + eva_system
-
-        if memory_context:
-            eva_system += memory_context
-
+        # Step 3: Build the final prompt for Eva's persona model (PAT).
+        # Static prefix (persona, judge directive, runtime block) first, then
+        # the per-turn suffixes in a fixed order, so consecutive turns on the
+        # same model and route share the longest possible byte-identical prefix.
+        volatile_suffix = memory_context or ""
         if acp_data:
-            eva_system += f"\n[Data Retrieved]\n{acp_data}\n\n"
-            eva_system += (
+            volatile_suffix += f"\n[Data Retrieved]\n{acp_data}\n\n"
+            volatile_suffix += (
                 "Use the data above as authoritative live results. "
                 "Do not claim the data is missing, preloaded-only, or unavailable when [Data Retrieved] is present. "
                 "Do not ask the user to confirm running a query that has already been executed. "
@@ -2119,7 +2112,7 @@ class BridgeHandler(BaseHTTPRequestHandler):
                 self._json_response(400, {"error": {"message": lms_error}})
                 return
 
-            eva_system_full = eva_system
+            eva_system_full = _aig_system_prefix(no_tools) + volatile_suffix
 
             lms_messages = [{"role": "system", "content": eva_system_full}]
             for msg in messages[-6:]:
@@ -2148,9 +2141,7 @@ class BridgeHandler(BaseHTTPRequestHandler):
             print(f"[AIG] LM Studio response: {len(response_text)} chars from {lms_model}")
 
             if response_text and _st.cognition_enabled and not internal:
-                threading.Thread(target=_post_response_reflection,
-                                 args=(user_message, response_text, model_used),
-                                 daemon=True).start()
+                _enqueue_reflection(user_message, response_text, model_used)
 
             response = {
                 "id": f"aig-{int(time.time())}",
@@ -2267,20 +2258,9 @@ class BridgeHandler(BaseHTTPRequestHandler):
         else:
             _route_label = "Copilot CLI ACP bridge"
             _runtime_model = acp_response_model or (_st.acp_client.model if _st.acp_client else "") or "default"
-        eva_system += (
-            f"\n[Runtime - AUTHORITATIVE GROUND TRUTH]\n"
-            f"This block is injected by tools/acp_bridge.py. It overrides any model self-knowledge.\n"
-            f"User-selected backend: {model_for_response}\n"
-            f"Active responder model: {_runtime_model}\n"
-            f"Routing path: {_route_label}\n"
-            f"Wrapper: Eva AIG via tools/acp_bridge.py\n\n"
-            f"When asked which model you are, what your base model is, your model ID, "
-            f"who made you, or what powers you, you MUST answer using ONLY the values above. "
-            f"Do NOT claim to be Claude, GPT-4o, GPT-4, Opus, Sonnet, Haiku, Gemini, "
-            f"or any other model unless that exact name appears in 'Active responder model' above. "
-            f"If 'Active responder model' is '{_runtime_model}', then your answer is "
-            f"'{_runtime_model}' and nothing else. Do not second-guess this block.\n\n"
-        )
+        eva_prefix = _aig_system_prefix(no_tools, (model_for_response, _runtime_model, _route_label))
+        eva_system = eva_prefix + volatile_suffix
+        _prompt_fields = _track_prompt_prefix(eva_prefix, eva_system)
 
         if github_pat:
             # Use GitHub Models API (PAT) for persona-friendly response
@@ -2381,9 +2361,7 @@ class BridgeHandler(BaseHTTPRequestHandler):
 
         # Step 5: Post-response reflection (background)
         if response_text and _st.cognition_enabled and not internal:
-            threading.Thread(target=_post_response_reflection,
-                           args=(user_message, response_text, model_used),
-                           daemon=True).start()
+            _enqueue_reflection(user_message, response_text, model_used)
 
         # Return OpenAI-compatible response
         response = {
@@ -2415,6 +2393,7 @@ class BridgeHandler(BaseHTTPRequestHandler):
             acp_data_chars=len(acp_data or ""),
             response_chars=len(response_text or ""),
             total_ms=round((time.perf_counter() - _turn_t0) * 1000.0, 1),
+            **_prompt_fields,
         )
 
     def _memory_backend_get(self):
@@ -2471,10 +2450,11 @@ class BridgeHandler(BaseHTTPRequestHandler):
         parsed = urlparse(self.path)
         params = parse_qs(parsed.query)
         user_message = params.get("message", [""])[0]
+        model = params.get("model", [""])[0] or None
         if user_message:
             _mark_user_activity()
 
-        context = _build_memory_context(user_message)
+        context = _build_memory_context(user_message, model=model)
         self._json_response(200, {
             "context": context,
             "cognition_enabled": True
@@ -2505,9 +2485,7 @@ class BridgeHandler(BaseHTTPRequestHandler):
             _mark_user_activity()
 
         if user_msg and assistant_msg:
-            threading.Thread(target=_post_response_reflection,
-                           args=(user_msg, assistant_msg, model),
-                           daemon=True).start()
+            _enqueue_reflection(user_msg, assistant_msg, model)
 
         self._json_response(200, {"status": "ok"})
 
@@ -2589,6 +2567,8 @@ class BridgeHandler(BaseHTTPRequestHandler):
                 errors.append(f"Block {index} failed: {first_line[:120]}: {kusto_error or 'no Kusto diagnostic returned'}")
             else:
                 applied += 1
+        # Seed blocks create tables and ingest rows behind the result cache's back.
+        _invalidate_kusto_results()
 
         warning = "Schema-only seed: existing tables are unchanged and no rows were ingested." if schema_only else "Re-running this seed will duplicate inline rows."
         mcp_config = getattr(_st.acp_client, "mcp_config", {}) if _st.acp_client is not None else {}
@@ -2754,7 +2734,7 @@ class BridgeHandler(BaseHTTPRequestHandler):
         if last_user_msg:
             _mark_user_activity()
 
-        memory_context = _build_memory_context(last_user_msg)
+        memory_context = _build_memory_context(last_user_msg, model=requested_model or None)
         if memory_context:
             prompt_text = memory_context + prompt_text
             print(f"[Cognition] Injected {len(memory_context)} chars of memory context")
@@ -2797,9 +2777,7 @@ class BridgeHandler(BaseHTTPRequestHandler):
         response_text = result.get("text", "")
         model_label = f"copilot-acp:{requested_model}" if requested_model else "copilot-acp"
         if last_user_msg and response_text:
-            threading.Thread(target=_post_response_reflection,
-                           args=(last_user_msg, response_text, model_label),
-                           daemon=True).start()
+            _enqueue_reflection(last_user_msg, response_text, model_label)
 
     # ------------------------------------------------------------------
     # Vision browser agent endpoints
@@ -3299,9 +3277,8 @@ def main():
                 )
                 token = cred.get_token("https://kusto.kusto.windows.net/.default")
             kusto_env["KUSTO_ACCESS_TOKEN"] = token.token
-            # Cache globally for model switches
-            _st.kusto_token_cache = token.token
-            _st.kusto_credential = cred
+            # Cache globally for model switches; the refresher renews it before expiry
+            _set_kusto_token(token, cred)
             print(f"[Bridge] Kusto token obtained and cached (length: {len(token.token)})")
 
             # Auto-discover cluster URL from local cache if not explicitly provided
@@ -3360,6 +3337,7 @@ def main():
         _enable_cognition(mcp_config, model=args.model, port=args.port)
     else:
         print(f"[Bridge] Cognition layer disabled (no Kusto MCP or token, and backend is not sqlite)")
+    _start_kusto_spool_shipper()
 
     # Start HTTP server. Threaded so a long-running browser agent run does not
     # block status/cancel/confirm polling on other connections.
@@ -3381,6 +3359,8 @@ def main():
     print(f"  POST /v1/background/proposals/<id>/approve - Apply a memory proposal")
     print(f"  POST /v1/background/proposals/<id>/reject - Reject a memory proposal")
     print(f"  POST /v1/kusto/seed         - Apply Eva Kusto schema seed")
+    print(f"  POST /v1/kusto/spool/requeue - Retry Kusto rows the spool parked as dead")
+    print(f"  POST /v1/memory/compact     - Fold duplicate memory rows into counters")
     print(f"  POST /v1/browser/run        - Start a vision browser agent run")
     print(f"  GET  /v1/browser/status     - Poll a browser agent run")
     print(f"  POST /v1/browser/confirm    - Approve/answer a parked browser run")
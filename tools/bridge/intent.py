@@ -0,0 +1,198 @@
+"""Bridge domain: intent routing.
+
+Every /v1/aig/chat turn needs several routing labels for the same message:
+the small-talk bypass, the request type used for ACP prompt tuning, the
+raw-output and row-recall modes, and the live-data intents the memory
+context builders act on. They used to come from ~30 separate regex
+searches over the lowercased text.
+
+_route_intents() computes all of them in one pass: the message is split
+into word tokens once and each token is looked up in a keyword automaton
+(single words map straight to feature bits; multi-word phrases are a
+first-word trie checked against the following tokens). The few patterns
+with an unbounded gap (`latest ... update`, `how ... feel`) or non-word
+characters (`$TSLA`, `s&p 500`) are only confirmed with a regex when the
+automaton has already seen their anchors, so the common turn never runs
+one. Labels match the regex chains exactly; tools/eval/intent_golden.json
+pins them.
+"""
+
+import collections
+import functools
+import re
+
+_WORD_RE = re.compile(r"\w+")
+_STRIP_RE = re.compile(r"[^\w\s]")
+
+# Confirmations for patterns the automaton can only pre-filter.
+_LATEST_NEWS_RE = re.compile(r"\blatest\b.*\b(update|report|story|stories|happening|developments?)\b")
+_HOW_FEEL_RE = re.compile(r"\bhow.*feel\b")
+_TICKER_RE = re.compile(r"(?:^|\s)\$[a-z]{1,5}\b")
+_SP500_RE = re.compile(r"\bs&p ?500\b")
+
+# Feature -> words/phrases (lowercase, single-space separated). A phrase
+# matches only as whole words separated by exactly one space, which is what
+# the `\b(a b|...)\b` regexes it replaces required.
+_KEYWORDS = {
+    "fin_strong": ("stock price", "share price", "stock market", "stock quote", "market cap",
+                   "ticker symbol", "nasdaq", "dow jones", "earnings report"),
+    "fin_noun": ("stock", "stocks", "share", "shares", "ticker", "equity", "equities", "crypto",
+                 "bitcoin", "etf"),
+    "fin_action": ("price", "prices", "quote", "quotes", "market", "trading", "trade", "buy", "sell",
+                   "invest", "worth", "value"),
+    "weather": ("weather", "forecast", "temperature", "raining", "snowing", "humidity", "wind speed"),
+    "news": ("news", "headline", "headlines", "breaking news", "current event", "current events"),
+    "latest": ("latest",),
+    "news_tail": ("update", "report", "story", "stories", "happening", "development", "developments"),
+    "kusto_query": ("kql", "kusto", "run a query", "execute a query", "table schema", "sample rows",
+                    "show me data"),
+    "kusto_operator": ("count", "summarize", "filter by", "group by", "join", "distinct"),
+    "web_search": ("search the web", "web search", "look up", "google", "what happened", "who won",
+                   "search for"),
+    "raw_output": ("raw output", "raw outputs", "raw row", "raw rows", "raw result", "raw results",
+                   "verbatim", "exact output", "return only", "no commentary", "no explanation"),
+    "row_word": ("latest", "recent", "row", "rows", "record", "records"),
+    "row_table": ("table", "reflections", "goals", "conversations", "knowledge", "selfstate",
+                  "emotionstate", "memorysummaries", "heuristicsindex", "emotionbaseline",
+                  "backgroundproposals", "backgroundactivity"),
+    "sqlite_db": ("database", "databases", "memory", "sqlite", "data"),
+    "kusto_db": ("database", "databases", "kusto", "adx", "data explorer"),
+    "tables": ("table", "tables", "schema", "column", "columns"),
+    "conversations": ("conversation", "history", "recent", "chat", "talked", "said"),
+    "emotions": ("emotion", "feeling", "mood"),
+}
+# `top 5` / `take 3`: the keyword followed by a single-digit token.
+_DIGIT_KEYWORDS = {"top": "kusto_operator", "take": "kusto_operator"}
+
+# Small-talk openers, matched at the start of the punctuation-stripped message.
+_GREETINGS = ("hi", "hey", "hello", "howdy", "yo", "sup", "good morning", "good evening",
+              "good afternoon", "thanks", "thank you", "ok", "okay", "bye", "goodbye", "see you",
+              "great", "cool", "nice", "sure", "yes", "no", "nah", "yep", "nope")
+_META_QUESTIONS = ("how are you", "how do you feel", "what is your name", "who are you",
+                   "what can you do", "tell me about yourself")
+
+_BIT = {name: 1 << i for i, name in enumerate(_KEYWORDS)}
+
+
+def _compile_keywords():
+    words = {}
+    phrases = {}
+    for feature, terms in _KEYWORDS.items():
+        for term in terms:
+            parts = term.split(" ")
+            if len(parts) == 1:
+                words[term] = words.get(term, 0) | _BIT[feature]
+            else:
+                phrases.setdefault(parts[0], []).append((tuple(parts[1:]), _BIT[feature]))
+    return words, phrases
+
+
+def _compile_openers(openers):
+    by_first = {}
+    for phrase in openers:
+        by_first.setdefault(phrase.split(" ")[0], []).append(phrase)
+    return by_first
+
+
+_WORD_BITS, _PHRASE_TRIE = _compile_keywords()
+_GREETINGS_BY_FIRST = _compile_openers(_GREETINGS)
+_META_BY_FIRST = _compile_openers(_META_QUESTIONS)
+
+Intents = collections.namedtuple("Intents", [
+    "request_type",            # financial-data | weather-search | news-search | kusto-query |
+                               # kusto-operator | web-search | general
+    "smalltalk",               # "greeting/trivial", "meta-question" or ""
+    "raw_output",              # user asked for raw/verbatim tool output
+    "row_recall",              # latest/recent rows from a memory table
+    "mentions_sqlite_db",      # live-data intents for the memory context builders
+    "mentions_kusto_db",
+    "mentions_tables",
+    "mentions_conversations",
+    "mentions_emotions",
+])
+
+
+def _opener(stripped, first, by_first):
+    for phrase in by_first.get(first, ()):
+        if stripped.startswith(phrase):
+            nxt = stripped[len(phrase):len(phrase) + 1]
+            if not nxt or not (nxt.isalnum() or nxt == "_"):
+                return True
+    return False
+
+
+def _smalltalk(msg_lower):
+    stripped = _STRIP_RE.sub("", msg_lower).strip()
+    words = stripped.split()
+    if not words:
+        return ""
+    if len(words) <= 4 and _opener(stripped, words[0], _GREETINGS_BY_FIRST):
+        return "greeting/trivial"
+    if len(words) <= 6 and _opener(stripped, words[0], _META_BY_FIRST):
+        return "meta-question"
+    return ""
+
+
+@functools.lru_cache(maxsize=256)
+def _route_intents(msg_lower):
+    """All routing labels for a lowercased message, in one token pass.
+
+    Cached by message: the memory-context builder and the AIG router ask
+    about the same text in the same turn.
+    """
+    m = msg_lower or ""
+    tokens = [(mo.group(), mo.start(), mo.end()) for mo in _WORD_RE.finditer(m)]
+    n = len(tokens)
+    bits = 0
+    how_seen = feel_seen = False
+    for i, (word, _start, end) in enumerate(tokens):
+        bits |= _WORD_BITS.get(word, 0)
+        for rest, bit in _PHRASE_TRIE.get(word, ()):
+            k = len(rest)
+            if i + k < n and all(
+                tokens[i + j + 1][0] == rest[j] and m[tokens[i + j][2]:tokens[i + j + 1][1]] == " "
+                for j in range(k)
+            ):
+                bits |= bit
+        feature = _DIGIT_KEYWORDS.get(word)
+        if feature and i + 1 < n:
+            nxt, start, _ = tokens[i + 1]
+            if len(nxt) == 1 and nxt.isdecimal() and m[end:start] == " ":
+                bits |= _BIT[feature]
+        if word.startswith("how"):
+            how_seen = True
+        if how_seen and word.endswith("feel"):
+            feel_seen = True
+
+    def has(feature):
+        return bool(bits & _BIT[feature])
+
+    finance_strong = (has("fin_strong")
+                      or ("s&p" in m and _SP500_RE.search(m))
+                      or ("$" in m and _TICKER_RE.search(m)))
+    if finance_strong or (has("fin_noun") and has("fin_action")):
+        request_type = "financial-data"
+    elif has("weather"):
+        request_type = "weather-search"
+    elif has("news") or (has("latest") and has("news_tail") and _LATEST_NEWS_RE.search(m)):
+        request_type = "news-search"
+    elif has("kusto_query"):
+        request_type = "kusto-query"
+    elif has("kusto_operator"):
+        request_type = "kusto-operator"
+    elif has("web_search"):
+        request_type = "web-search"
+    else:
+        request_type = "general"
+
+    return Intents(
+        request_type=request_type,
+        smalltalk=_smalltalk(m),
+        raw_output=has("raw_output"),
+        row_recall=has("row_word") and has("row_table"),
+        mentions_sqlite_db=has("sqlite_db"),
+        mentions_kusto_db=has("kusto_db"),
+        mentions_tables=has("tables"),
+        mentions_conversations=has("conversations"),
+        mentions_emotions=has("emotions") or (feel_seen and bool(_HOW_FEEL_RE.search(m))),
+    )
@@ -9,24 +9,126 @@ import time
 import urllib.parse
 from bridge import config as _cfg
 from bridge import state as _st
+from bridge.telemetry import _telemetry_emit
+
+
+_KUSTO_SCOPE = "https://kusto.kusto.windows.net/.default"
+_KUSTO_TOKEN_REFRESH_MARGIN_SECONDS = _cfg.KUSTO_TOKEN_REFRESH_MARGIN_SECONDS
+_KUSTO_TOKEN_RETRY_SECONDS = _cfg.KUSTO_TOKEN_RETRY_SECONDS
+_KUSTO_TOKEN_DEFAULT_LIFETIME_SECONDS = _cfg.KUSTO_TOKEN_DEFAULT_LIFETIME_SECONDS
+_kusto_clock = time.time  # token expiry arithmetic; tests substitute a fake clock
+
+
+def _set_kusto_token(token, credential=None):
+    """Cache an access token (an azure.core AccessToken-like object) and its
+    expiry, remember the credential that issued it, and make sure the
+    background refresher is running."""
+    expires_on = float(getattr(token, "expires_on", 0) or 0)
+    if expires_on <= 0:
+        expires_on = _kusto_clock() + _KUSTO_TOKEN_DEFAULT_LIFETIME_SECONDS
+    _st.kusto_token_cache = token.token
+    _st.kusto_token_expires_on = expires_on
+    if credential is not None:
+        _st.kusto_credential = credential
+    _start_kusto_token_refresher()
 
 
 def _refresh_kusto_token():
-    """Try to refresh the cached Kusto token using the stored credential. Returns True if refreshed."""
+    """Fetch a new Kusto token from the stored credential now. Returns True if refreshed.
+
+    Cached table schemas are kept: a new token for the same identity sees
+    the same tables. Only a rejected token (_kusto_token_rejected) clears them.
+    """
     # global statement removed — writes go to _st.*
     if not _st.kusto_credential:
         return False
-    try:
-        prior = _st.kusto_token_cache
-        token = _st.kusto_credential.get_token("https://kusto.kusto.windows.net/.default")
-        _st.kusto_token_cache = token.token
-        _st.kusto_table_columns_cache = {}
-        refresh_state = "updated" if token.token != prior else "unchanged"
-        print(f"[Bridge] Kusto token refreshed ({refresh_state}, length: {len(token.token)})")
-        return True
-    except Exception as e:
-        print(f"[Bridge] Token refresh failed: {e}")
-        return False
+    with _st.kusto_token_lock:
+        stats = _st.kusto_token_stats
+        try:
+            prior = _st.kusto_token_cache
+            token = _st.kusto_credential.get_token(_KUSTO_SCOPE)
+            _set_kusto_token(token)
+            stats["refreshes"] += 1
+            stats["last_refresh_at"] = _kusto_clock()
+            stats["last_error"] = ""
+            refresh_state = "updated" if token.token != prior else "unchanged"
+            print(f"[Bridge] Kusto token refreshed ({refresh_state}, length: {len(token.token)})")
+            return True
+        except Exception as e:
+            stats["failures"] += 1
+            stats["last_error"] = str(e)[:200]
+            print(f"[Bridge] Token refresh failed: {e}")
+            return False
+
+
+def _kusto_token_rejected():
+    """Handle a 401 from the cluster: the identity or its grants may have
+    changed, so drop cached schemas and force a new token. Returns True if
+    a new token was obtained (the caller retries once)."""
+    _st.kusto_token_stats["unauthorized"] += 1
+    _st.kusto_table_columns_cache = {}
+    return _refresh_kusto_token()
+
+
+def _current_kusto_token():
+    """The cached token, refreshed synchronously only if it is already
+    inside the refresh margin (the background refresher normally gets
+    there first). Returns None when no token is available."""
+    if _st.kusto_token_cache and _kusto_clock() < _st.kusto_token_expires_on - _KUSTO_TOKEN_REFRESH_MARGIN_SECONDS:
+        return _st.kusto_token_cache
+    if _st.kusto_credential:
+        _refresh_kusto_token()
+    return _st.kusto_token_cache
+
+
+def _kusto_token_refresh_step():
+    """One refresher decision: refresh if the token is within the margin of
+    expiry. Returns the seconds until the next check."""
+    if not _st.kusto_credential or not _st.kusto_token_cache:
+        return None
+    due_in = _st.kusto_token_expires_on - _KUSTO_TOKEN_REFRESH_MARGIN_SECONDS - _kusto_clock()
+    if due_in > 0:
+        return due_in
+    if _refresh_kusto_token():
+        _st.kusto_token_stats["proactive"] += 1
+        return max(1.0, _st.kusto_token_expires_on - _KUSTO_TOKEN_REFRESH_MARGIN_SECONDS - _kusto_clock())
+    return _KUSTO_TOKEN_RETRY_SECONDS
+
+
+def _kusto_token_refresher():
+    """Keep the cached Kusto token fresh ahead of expiry. Exits when there
+    is no credential to refresh from."""
+    cond = _st.kusto_token_cond
+    while True:
+        delay = _kusto_token_refresh_step()
+        if delay is None:
+            break
+        with cond:
+            # Capped so a suspended laptop rechecks soon after it wakes.
+            cond.wait(min(delay, 60.0))
+    with cond:
+        _st.kusto_token_thread = None
+
+
+def _start_kusto_token_refresher():
+    with _st.kusto_token_cond:
+        if not _st.kusto_credential:
+            return
+        if _st.kusto_token_thread is not None and _st.kusto_token_thread.is_alive():
+            _st.kusto_token_cond.notify_all()
+            return
+        _st.kusto_token_thread = threading.Thread(
+            target=_kusto_token_refresher, daemon=True, name="kusto-token-refresher")
+        _st.kusto_token_thread.start()
+
+
+def _kusto_token_status():
+    expires_on = _st.kusto_token_expires_on
+    return dict(
+        _st.kusto_token_stats,
+        expires_in_s=round(expires_on - _kusto_clock(), 1) if _st.kusto_token_cache and expires_on else None,
+        refresher_running=bool(_st.kusto_token_thread is not None and _st.kusto_token_thread.is_alive()),
+    )
 
 
 def _inject_kusto_token(mcp_config):
@@ -35,7 +137,7 @@ def _inject_kusto_token(mcp_config):
     if not mcp_config or "kusto-mcp-server" not in mcp_config:
         return mcp_config
 
-    _refresh_kusto_token()
+    _current_kusto_token()
 
     if _st.kusto_token_cache:
         if "env" not in mcp_config["kusto-mcp-server"]:
@@ -48,9 +150,7 @@ def _inject_kusto_token(mcp_config):
 def _ensure_kusto_token():
     """Ensure the bridge has a Kusto token for direct bridge-side Kusto calls."""
     # global statement removed — writes go to _st.*
-    if _st.kusto_token_cache:
-        return True, ""
-    if _refresh_kusto_token():
+    if _current_kusto_token():
         return True, ""
     # Try MSAL silent refresh before falling through to device code
     if _try_kusto_silent_auth():
@@ -59,10 +159,9 @@ def _ensure_kusto_token():
         from azure.identity import DeviceCodeCredential, TokenCachePersistenceOptions
         cache_opts = TokenCachePersistenceOptions(allow_unencrypted_storage=True)
         credential = DeviceCodeCredential(cache_persistence_options=cache_opts)
-        token = credential.get_token("https://kusto.kusto.windows.net/.default")
+        token = credential.get_token(_KUSTO_SCOPE)
         if token and getattr(token, "token", None):
-            _st.kusto_token_cache = token.token
-            _st.kusto_credential = credential
+            _set_kusto_token(token, credential)
             print(f"[Bridge] Kusto token obtained for direct query calls (length: {len(token.token)})")
             return True, ""
         return False, "Kusto token request returned no token"
@@ -97,10 +196,9 @@ def _try_kusto_silent_auth():
             cache_path=_cache_path,
             default_scopes=["https://kusto.kusto.windows.net/.default"],
         )
-        token = msal_cred.get_token("https://kusto.kusto.windows.net/.default")
+        token = msal_cred.get_token(_KUSTO_SCOPE)
         if token and getattr(token, "token", None):
-            _st.kusto_token_cache = token.token
-            _st.kusto_credential = msal_cred
+            _set_kusto_token(token, msal_cred)
             print(f"[Bridge] Kusto token refreshed silently from MSAL cache (length: {len(token.token)})")
             return True
         return False
@@ -180,6 +278,33 @@ _CANDIDATE_HISTORY_TTL_SECONDS = _cfg.CANDIDATE_HISTORY_TTL_SECONDS
 _CONVO_CONTENT_CAP = _cfg.CONVO_CONTENT_CAP
 _ARTIFACTS_DIR = _cfg.ARTIFACTS_DIR
 _KUSTO_CLUSTER_CACHE_PATH = _cfg.KUSTO_CLUSTER_CACHE_PATH
+_KUSTO_SPOOL_PATH = _cfg.KUSTO_SPOOL_PATH
+_KUSTO_INGEST_SPOOL = _cfg.KUSTO_INGEST_SPOOL
+_KUSTO_SPOOL_BATCH_ROWS = _cfg.KUSTO_SPOOL_BATCH_ROWS
+_KUSTO_SPOOL_COALESCE_SECONDS = _cfg.KUSTO_SPOOL_COALESCE_SECONDS
+_KUSTO_SPOOL_BACKOFF_BASE_SECONDS = _cfg.KUSTO_SPOOL_BACKOFF_BASE_SECONDS
+_KUSTO_SPOOL_BACKOFF_MAX_SECONDS = _cfg.KUSTO_SPOOL_BACKOFF_MAX_SECONDS
+_KUSTO_STREAMING_INGEST = _cfg.KUSTO_STREAMING_INGEST
+_KUSTO_STREAMING_FORMAT = _cfg.KUSTO_STREAMING_FORMAT
+_KUSTO_STREAMING_JSON_MAPPING = _cfg.KUSTO_STREAMING_JSON_MAPPING
+_KUSTO_STREAMING_MAX_BYTES = _cfg.KUSTO_STREAMING_MAX_BYTES
+_KUSTO_STREAMING_RECHECK_SECONDS = _cfg.KUSTO_STREAMING_RECHECK_SECONDS
+# Error codes/messages a cluster returns when streaming ingestion is off for
+# the cluster, database or table (e.g. StreamingIngestionPolicyNotEnabled,
+# StreamingIngestionDisabledForClusterException).
+_STREAMING_DISABLED_RE = re.compile(
+    r"streaming\s*ingestion\w*?\s*(?:policy\s*)?(?:is\s*)?(?:not\s*enabled|disabled)", re.I)
+_UPSERT_TABLES = _cfg.UPSERT_TABLES
+_KUSTO_HTTP_POOL_MAXSIZE = _cfg.KUSTO_HTTP_POOL_MAXSIZE
+_KUSTO_REQUEST_TIMEOUT_SECONDS = _cfg.KUSTO_REQUEST_TIMEOUT_SECONDS
+_KUSTO_BREAKER_FAILURE_THRESHOLD = _cfg.KUSTO_BREAKER_FAILURE_THRESHOLD
+_KUSTO_BREAKER_OPEN_SECONDS = _cfg.KUSTO_BREAKER_OPEN_SECONDS
+_KUSTO_RESULT_CACHE = _cfg.KUSTO_RESULT_CACHE
+_KUSTO_RESULT_CACHE_MAX = _cfg.KUSTO_RESULT_CACHE_MAX
+_KUSTO_RESULT_CACHE_TTL_SECONDS = _cfg.KUSTO_RESULT_CACHE_TTL_SECONDS
+_KUSTO_RESULT_CACHE_TTLS = _cfg.KUSTO_RESULT_CACHE_TTLS
+_CACHEABLE_TABLES = frozenset(_cfg.MEMORY_TABLES)
+_KQL_IDENT_RE = re.compile(r"[A-Za-z_]\w*")
 _MCP_CONFIG_CACHE_PATH = _cfg.MCP_CONFIG_CACHE_PATH
 _ALERTS_CONFIG_PATH = _cfg.ALERTS_CONFIG_PATH
 _NOTIFY_PATH = _cfg.NOTIFY_PATH
@@ -250,8 +375,194 @@ class _MSALSilentCredential:
 # ---------------------------------------------------------------------------
 
 
-def _kusto_query_direct(cluster_url, database, query, is_mgmt=False):
-    """Execute a Kusto query directly (bypasses MCP). Returns text result or None on error."""
+def _kusto_session(cluster_url):
+    """Shared keep-alive session for one cluster.
+
+    Every Kusto REST call reuses its cluster's pooled connections instead
+    of paying a TCP and TLS handshake per request. The pool holds up to
+    KUSTO_HTTP_POOL_MAXSIZE connections so the context query workers, the
+    spool shipper and ad-hoc queries can run side by side; extra concurrent
+    requests open short-lived connections rather than block. Responses are
+    requested gzip-compressed. requests sessions are safe to share across
+    threads for plain POSTs like these (urllib3's pool is thread-safe).
+    """
+    key = _normalize_kusto_cluster_url(cluster_url)
+    with _st.kusto_sessions_lock:
+        session = _st.kusto_sessions.get(key)
+        if session is None:
+            import requests as _requests_mod
+            from requests.adapters import HTTPAdapter
+            session = _requests_mod.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_KUSTO_HTTP_POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Accept-Encoding"] = "gzip, deflate"
+            _st.kusto_sessions[key] = session
+            _st.kusto_http_stats["sessions"] += 1
+        _st.kusto_http_stats["requests"] += 1
+    return session
+
+
+def _reset_kusto_session(cluster_url):
+    """Drop a cluster's pooled connections after a connection-level error,
+    so the retry starts from a fresh handshake instead of a dead socket."""
+    key = _normalize_kusto_cluster_url(cluster_url)
+    with _st.kusto_sessions_lock:
+        session = _st.kusto_sessions.pop(key, None)
+        if session is not None:
+            _st.kusto_http_stats["resets"] += 1
+    if session is not None:
+        session.close()
+
+
+def _kusto_http_status():
+    with _st.kusto_sessions_lock:
+        return dict(_st.kusto_http_stats, clusters=len(_st.kusto_sessions),
+                    pool_maxsize=_KUSTO_HTTP_POOL_MAXSIZE)
+
+
+def _kusto_deadline(seconds):
+    """Absolute (monotonic) deadline for a latency budget of `seconds`.
+
+    Chat-path callers create one per turn and pass it down to every Kusto
+    call they make, so a slow cluster costs the turn its budget once rather
+    than a full timeout-and-retry cycle per query. None means unbounded.
+    """
+    return None if seconds is None else time.monotonic() + seconds
+
+
+def _kusto_attempt_timeout(deadline):
+    """HTTP timeout for the next attempt, or None when the budget is spent."""
+    if deadline is None:
+        return _KUSTO_REQUEST_TIMEOUT_SECONDS
+    remaining = deadline - time.monotonic()
+    if remaining < 0.05:
+        return None
+    return min(_KUSTO_REQUEST_TIMEOUT_SECONDS, remaining)
+
+
+def _kusto_breaker(key):
+    # Caller holds kusto_breaker_lock.
+    breaker = _st.kusto_breakers.get(key)
+    if breaker is None:
+        breaker = _st.kusto_breakers[key] = {
+            "state": "closed", "failures": 0, "trips": 0, "rejected": 0,
+            "opened_at": 0.0, "probe_at": 0.0, "last_error": "",
+        }
+    return breaker
+
+
+def _kusto_breaker_allow(cluster_url):
+    """True if a request to this cluster may go out now.
+
+    Closed: always. Open: no, until KUSTO_BREAKER_OPEN_SECONDS have passed;
+    then the breaker goes half-open and lets exactly one probe through. A
+    probe that never reports back is replaced after another open period.
+    """
+    key = _normalize_kusto_cluster_url(cluster_url)
+    now = time.monotonic()
+    with _st.kusto_breaker_lock:
+        breaker = _kusto_breaker(key)
+        if breaker["state"] == "closed":
+            return True
+        if breaker["state"] == "open" and now - breaker["opened_at"] >= _KUSTO_BREAKER_OPEN_SECONDS:
+            breaker["state"] = "half_open"
+            breaker["probe_at"] = now
+            return True
+        if breaker["state"] == "half_open" and now - breaker["probe_at"] >= _KUSTO_BREAKER_OPEN_SECONDS:
+            breaker["probe_at"] = now
+            return True
+        breaker["rejected"] += 1
+        return False
+
+
+def _kusto_breaker_record(cluster_url, ok, error=""):
+    """Report one attempt's outcome. Connection errors, timeouts at the full
+    request timeout, 429 and 5xx count as failures; any other HTTP answer
+    shows the cluster is up. (Callers skip timeouts their own deadline
+    shortened.)
+    A failed half-open probe, or KUSTO_BREAKER_FAILURE_THRESHOLD failures
+    in a row, opens the circuit."""
+    key = _normalize_kusto_cluster_url(cluster_url)
+    with _st.kusto_breaker_lock:
+        breaker = _kusto_breaker(key)
+        prior = breaker["state"]
+        if ok:
+            breaker["state"] = "closed"
+            breaker["failures"] = 0
+        else:
+            breaker["failures"] += 1
+            breaker["last_error"] = str(error)[:200]
+            if prior == "half_open" or (prior == "closed" and breaker["failures"] >= _KUSTO_BREAKER_FAILURE_THRESHOLD):
+                breaker["state"] = "open"
+                breaker["opened_at"] = time.monotonic()
+                if prior == "closed":
+                    breaker["trips"] += 1
+        state, failures, trips = breaker["state"], breaker["failures"], breaker["trips"]
+    if state != prior:
+        if state == "open" and prior == "closed":
+            print(f"[Cognition] Kusto circuit opened for {key} after {failures} failures: {str(error)[:120]}")
+        elif state == "closed":
+            print(f"[Cognition] Kusto circuit closed for {key}")
+        _telemetry_emit("kusto_breaker", cluster=key, state=state, prior=prior, failures=failures, trips=trips)
+
+
+def _kusto_breaker_failed_status(status_code):
+    return status_code == 429 or status_code >= 500
+
+
+def _kusto_ingest_rejected(failure, status_code, error):
+    """Record a send the cluster refused for good (a 4xx other than auth,
+    timeout or throttling) so the spool parks it instead of retrying."""
+    if failure is not None and 400 <= status_code < 500 and status_code not in (401, 408, 429):
+        failure["permanent"] = True
+        failure["error"] = f"HTTP {status_code}: {error}"[:500]
+
+
+def _kusto_breaker_open(cluster_url):
+    """True while the cluster's circuit is open and no probe is due: callers
+    on the chat path should serve cached data instead of waiting."""
+    key = _normalize_kusto_cluster_url(cluster_url)
+    with _st.kusto_breaker_lock:
+        breaker = _st.kusto_breakers.get(key)
+        if breaker is None or breaker["state"] == "closed":
+            return False
+        since = breaker["opened_at"] if breaker["state"] == "open" else breaker["probe_at"]
+        return time.monotonic() - since < _KUSTO_BREAKER_OPEN_SECONDS
+
+
+def _kusto_breaker_status():
+    """Per-cluster breaker state and trip counts for /v1/doctor and telemetry."""
+    now = time.monotonic()
+    with _st.kusto_breaker_lock:
+        clusters = {}
+        for key, breaker in _st.kusto_breakers.items():
+            b = dict(breaker)
+            opened_at, probe_at = b.pop("opened_at"), b.pop("probe_at")
+            b["retry_in_s"] = round(max(0.0, opened_at + _KUSTO_BREAKER_OPEN_SECONDS - now), 1) \
+                if b["state"] == "open" else 0.0
+            clusters[key] = b
+        budget = dict(_st.kusto_budget_stats)
+    return {
+        "threshold": _KUSTO_BREAKER_FAILURE_THRESHOLD,
+        "open_seconds": _KUSTO_BREAKER_OPEN_SECONDS,
+        "open": sorted(k for k, b in clusters.items() if b["state"] != "closed"),
+        "trips": sum(b["trips"] for b in clusters.values()),
+        "rejected": sum(b["rejected"] for b in clusters.values()),
+        "budget_exhausted": budget["exhausted"],
+        "clusters": clusters,
+    }
+
+
+
+def _kusto_post(cluster_url, database, query, is_mgmt=False, deadline=None):
+    """POST one KQL request (refreshing the token once on 401 and retrying
+    transient SSL errors) and return the decoded v1 response body, or None
+    on error.
+
+    Returns None at once while the cluster's circuit breaker is open, and
+    stops retrying when `deadline` (see _kusto_deadline) has passed.
+    """
     # global statement removed — writes go to _st.*
     if not _st.kusto_token_cache:
         return None
@@ -261,22 +572,22 @@ def _kusto_query_direct(cluster_url, database, query, is_mgmt=False):
     headers = {"Authorization": f"Bearer {_st.kusto_token_cache}", "Content-Type": "application/json"}
     payload = {"csl": query, "db": database}
 
-    # Retry up to 3 times with fresh sessions for transient SSL errors
+    # Retry up to 3 times for transient SSL/connection errors (each resets the pool)
     for attempt in range(3):
+        timeout = _kusto_attempt_timeout(deadline)
+        if timeout is None:
+            with _st.kusto_breaker_lock:
+                _st.kusto_budget_stats["exhausted"] += 1
+            return None
+        if not _kusto_breaker_allow(cluster_url):
+            return None
         try:
-            session = _requests_mod.Session()
-            resp = session.post(url, json=payload, headers=headers, timeout=15)
-            session.close()
+            resp = _kusto_session(cluster_url).post(url, json=payload, headers=headers, timeout=timeout)
+            _kusto_breaker_record(cluster_url, not _kusto_breaker_failed_status(resp.status_code),
+                                  f"HTTP {resp.status_code}")
             if resp.status_code == 200:
-                data = resp.json()
-                tables = data.get("Tables", [])
-                if tables:
-                    rows = tables[0].get("Rows", [])
-                    cols = [c["ColumnName"] for c in tables[0].get("Columns", [])]
-                    if rows:
-                        return [dict(zip(cols, row)) for row in rows]
-                return []
-            elif resp.status_code == 401 and attempt == 0 and _refresh_kusto_token():
+                return resp.json()
+            elif resp.status_code == 401 and attempt == 0 and _kusto_token_rejected():
                 print("[Cognition] Kusto query got 401, retrying with refreshed token")
                 headers["Authorization"] = f"Bearer {_st.kusto_token_cache}"
                 continue
@@ -288,12 +599,18 @@ def _kusto_query_direct(cluster_url, database, query, is_mgmt=False):
                 print(f"[Cognition] Kusto query HTTP {resp.status_code}: {err_text}")
                 print(f"[Cognition] Failed query: {query_preview}")
             return None
-        except (_requests_mod.exceptions.SSLError, _requests_mod.exceptions.ConnectionError) as e:
-            if attempt < 2:
+        except (_requests_mod.exceptions.SSLError, _requests_mod.exceptions.ConnectionError,
+                _requests_mod.exceptions.Timeout) as e:
+            # A timeout cut short by the caller's budget says nothing about the
+            # cluster; only one at the full request timeout counts as a failure.
+            if not (isinstance(e, _requests_mod.exceptions.Timeout) and timeout < _KUSTO_REQUEST_TIMEOUT_SECONDS):
+                _kusto_breaker_record(cluster_url, False, e)
+            _reset_kusto_session(cluster_url)
+            if attempt < 2 and _kusto_attempt_timeout(deadline) is not None:
                 print(f"[Cognition] Kusto SSL retry {attempt+1}/3: {e}")
-                time.sleep(1)
+                time.sleep(min(1.0, _kusto_attempt_timeout(deadline) or 0.0))
             else:
-                print(f"[Cognition] Kusto query failed after 3 retries: {e}")
+                print(f"[Cognition] Kusto query failed after {attempt+1} attempts: {e}")
                 return None
         except Exception as e:
             print(f"[Cognition] Kusto query error: {e}")
@@ -301,6 +618,170 @@ def _kusto_query_direct(cluster_url, database, query, is_mgmt=False):
 
 
 
+def _kusto_rows(table):
+    """Rows of one v1 result table as a list of dicts."""
+    cols = [c["ColumnName"] for c in table.get("Columns", [])]
+    return [dict(zip(cols, row)) for row in table.get("Rows", [])]
+
+
+
+def _kusto_query_direct(cluster_url, database, query, is_mgmt=False, deadline=None):
+    """Execute a Kusto query directly (bypasses MCP). Returns text result or None on error.
+    Reads of memory tables are served from the result cache when fresh (or
+    stale, while the cluster's circuit breaker is open)."""
+    def fetch():
+        data = _kusto_post(cluster_url, database, query, is_mgmt=is_mgmt, deadline=deadline)
+        if data is None:
+            return None
+        tables = data.get("Tables", [])
+        return _kusto_rows(tables[0]) if tables else []
+
+    if is_mgmt:
+        return fetch()
+    return _kusto_cached_read(cluster_url, database, query, fetch)
+
+
+
+def _kusto_query_tables(query):
+    """Memory tables a KQL query mentions (the keys it is invalidated by)."""
+    return frozenset(w for w in _KQL_IDENT_RE.findall(query) if w in _CACHEABLE_TABLES)
+
+
+def _normalize_kql(query):
+    """Cache-key form of a query: per-line indentation and blank lines dropped."""
+    return "\n".join(line.strip() for line in str(query).strip().splitlines() if line.strip())
+
+
+def _copy_result(result):
+    # Callers may edit the rows they get back; the cache keeps its own copy.
+    if isinstance(result, dict):
+        return {name: [dict(r) for r in rows] for name, rows in result.items()}
+    return [dict(r) for r in result]
+
+
+def _kusto_cached_read(cluster_url, database, query, fetch):
+    """Return fetch()'s result for a read query, cached per (cluster, db, query).
+
+    An entry lives for the shortest KUSTO_RESULT_CACHE_TTLS of the memory
+    tables the query mentions, and is dropped as soon as the bridge ingests
+    into any of them. Queries that mention no memory table are not cached,
+    and neither are failures (None). A fill that races an invalidation is
+    discarded instead of stored. While the cluster's circuit breaker is
+    open, an expired entry is still served rather than failing the read.
+    """
+    tables = _kusto_query_tables(query) if _KUSTO_RESULT_CACHE else None
+    stats = _st.kusto_result_cache_stats
+    if not tables:
+        stats["uncached"] += 1
+        return fetch()
+    key = (_normalize_kusto_cluster_url(cluster_url), database, _normalize_kql(query))
+    cache = _st.kusto_result_cache
+    gens = _st.kusto_result_table_gens
+    with _st.kusto_result_cache_lock:
+        entry = cache.get(key)
+        fresh = entry is not None and entry[0] > time.monotonic()
+        if entry is not None and (fresh or _kusto_breaker_open(cluster_url)):
+            cache.move_to_end(key)
+            stats["hits" if fresh else "stale_hits"] += 1
+            stats["bytes_saved"] += entry[3]
+            return _copy_result(entry[2])
+        if entry is not None:
+            del cache[key]
+        stats["misses"] += 1
+        snapshot = tuple(gens.get(t, 0) for t in sorted(tables)) + (gens.get("*", 0),)
+
+    result = fetch()
+    if result is None:
+        return None
+    size = len(json.dumps(result, default=str))
+    ttl = min(_KUSTO_RESULT_CACHE_TTLS.get(t, _KUSTO_RESULT_CACHE_TTL_SECONDS) for t in tables)
+    with _st.kusto_result_cache_lock:
+        if snapshot == tuple(gens.get(t, 0) for t in sorted(tables)) + (gens.get("*", 0),):
+            cache[key] = (time.monotonic() + ttl, tables, _copy_result(result), size)
+            cache.move_to_end(key)
+            while len(cache) > _KUSTO_RESULT_CACHE_MAX:
+                cache.popitem(last=False)
+                stats["evictions"] += 1
+    return result
+
+
+def _invalidate_kusto_results(table=None):
+    """Drop cached results that read `table` (every result when table is None)."""
+    with _st.kusto_result_cache_lock:
+        gens = _st.kusto_result_table_gens
+        name = table or "*"
+        gens[name] = gens.get(name, 0) + 1
+        cache = _st.kusto_result_cache
+        stale = [k for k, entry in cache.items() if table is None or table in entry[1]]
+        for k in stale:
+            del cache[k]
+        _st.kusto_result_cache_stats["invalidations"] += len(stale)
+
+
+def _kusto_result_cache_status():
+    """Hit rate and response bytes saved by the Kusto result cache."""
+    with _st.kusto_result_cache_lock:
+        stats = dict(_st.kusto_result_cache_stats)
+        entries = len(_st.kusto_result_cache)
+    lookups = stats["hits"] + stats["misses"]
+    return dict(stats, enabled=_KUSTO_RESULT_CACHE, entries=entries, max_entries=_KUSTO_RESULT_CACHE_MAX,
+                hit_rate=round(stats["hits"] / lookups, 3) if lookups else None)
+
+
+
+def _kusto_result_tables(data):
+    """Split a v1 response into its query result tables, in statement order.
+
+    Returns [(name, rows)]. With more than one table, the last is the table
+    of contents (Ordinal, Kind, Name, Id, PrettyName) and only its
+    "QueryResult" entries are query output; the rest are QueryProperties
+    and QueryStatus tables.
+    """
+    tables = data.get("Tables", [])
+    if len(tables) <= 1:
+        return [("PrimaryResult", _kusto_rows(tables[0]))] if tables else []
+    toc = _kusto_rows(tables[-1])
+    if not toc or "Kind" not in toc[0]:
+        return [(t.get("TableName") or f"Table_{i}", _kusto_rows(t)) for i, t in enumerate(tables)]
+    results = []
+    for entry in toc:
+        if entry.get("Kind") != "QueryResult":
+            continue
+        ordinal = int(entry.get("Ordinal", -1))
+        if 0 <= ordinal < len(tables):
+            results.append((entry.get("Name") or f"Table_{ordinal}", _kusto_rows(tables[ordinal])))
+    return results
+
+
+
+def _kusto_query_multi(cluster_url, database, named_queries, deadline=None):
+    """Run several tabular queries as one batched request.
+
+    named_queries is [(name, kql)]. Each statement is sent as `kql | as name`
+    in a single batch, so the cluster returns one named result table per
+    statement. Returns {name: rows}, or None when the request fails (a bad
+    statement fails the whole batch, so callers should only include tables
+    known to exist).
+    """
+    if not named_queries:
+        return {}
+    batch = ";\n".join(f"{kql} | as {name}" for name, kql in named_queries)
+
+    def fetch():
+        data = _kusto_post(cluster_url, database, batch, deadline=deadline)
+        if data is None:
+            return None
+        results = _kusto_result_tables(data)
+        by_name = dict(results)
+        if all(name in by_name for name, _ in named_queries):
+            return {name: by_name[name] for name, _ in named_queries}
+        # Results not named after their statements: fall back to statement order.
+        return {name: rows for (name, _), (_, rows) in zip(named_queries, results)}
+
+    return _kusto_cached_read(cluster_url, database, batch, fetch)
+
+
+
 def _short_kusto_error(value):
     if isinstance(value, (dict, list)):
         text = json.dumps(value)
@@ -311,7 +792,10 @@ def _short_kusto_error(value):
 
 
 def _kusto_query_with_error(cluster_url, database, query, is_mgmt=False):
-    """Execute a Kusto query and return (rows, error_text) for seed diagnostics."""
+    """Execute a Kusto query and return (rows, error_text) for seed diagnostics.
+
+    Not gated by the circuit breaker (a user asked for it), but its outcome
+    is reported to the breaker like any probe."""
     # global statement removed — writes go to _st.*
     if not _st.kusto_token_cache:
         return None, "Kusto token is not available"
@@ -323,9 +807,10 @@ def _kusto_query_with_error(cluster_url, database, query, is_mgmt=False):
 
     for attempt in range(3):
         try:
-            session = _requests_mod.Session()
-            resp = session.post(url, json=payload, headers=headers, timeout=15)
-            session.close()
+            resp = _kusto_session(cluster_url).post(url, json=payload, headers=headers,
+                                                    timeout=_KUSTO_REQUEST_TIMEOUT_SECONDS)
+            _kusto_breaker_record(cluster_url, not _kusto_breaker_failed_status(resp.status_code),
+                                  f"HTTP {resp.status_code}")
             if resp.status_code == 200:
                 try:
                     data = resp.json()
@@ -344,12 +829,15 @@ def _kusto_query_with_error(cluster_url, database, query, is_mgmt=False):
                     if rows:
                         return [dict(zip(cols, row)) for row in rows], ""
                 return [], ""
-            if resp.status_code == 401 and attempt == 0 and _refresh_kusto_token():
+            if resp.status_code == 401 and attempt == 0 and _kusto_token_rejected():
                 headers["Authorization"] = f"Bearer {_st.kusto_token_cache}"
                 continue
             error_text = resp.text[:300] if resp.text else "empty response"
             return None, f"Kusto API error {resp.status_code}: {error_text}"
-        except (_requests_mod.exceptions.SSLError, _requests_mod.exceptions.ConnectionError) as error:
+        except (_requests_mod.exceptions.SSLError, _requests_mod.exceptions.ConnectionError,
+                _requests_mod.exceptions.Timeout) as error:
+            _kusto_breaker_record(cluster_url, False, error)
+            _reset_kusto_session(cluster_url)
             if attempt < 2:
                 time.sleep(1)
                 continue
@@ -359,10 +847,11 @@ def _kusto_query_with_error(cluster_url, database, query, is_mgmt=False):
 
 
 
-def _get_table_columns(cluster_url, database, table):
+def _get_table_columns(cluster_url, database, table, deadline=None):
     """Return known table columns from Kusto schema, cached per cluster/db/table.
     Returns list of column names, or None if the table does not exist.
-    Negative results (table not found) are cached to avoid repeated queries."""
+    Negative results (table not found) are cached to avoid repeated queries,
+    except while the circuit breaker is open or the budget ran out."""
     key = (cluster_url, database, table)
     cached = _st.kusto_table_columns_cache.get(key)
     if cached is not None:
@@ -374,7 +863,10 @@ def _get_table_columns(cluster_url, database, table):
         database,
         f".show table {table} cslschema",
         is_mgmt=True,
+        deadline=deadline,
     )
+    if schema_rows is None and (_kusto_breaker_open(cluster_url) or _kusto_attempt_timeout(deadline) is None):
+        return None  # unknown, not missing: ask again next time
     if not schema_rows:
         # Cache negative result so we don't re-query on every call
         _st.kusto_table_columns_cache[key] = []
@@ -396,61 +888,93 @@ def _get_table_columns(cluster_url, database, table):
     return cols
 
 
-def _kusto_ingest_direct(cluster_url, database, table, columns, rows_data):
-    """Ingest data directly into Kusto via .ingest inline."""
+def _kusto_ingest_send(cluster_url, database, table, columns, rows_data, failure=None):
+    """Ingest data into Kusto now, retrying on the calling thread.
+
+    Rows go to the streaming ingestion endpoint; .ingest inline (a
+    control-plane command) is used only for tables where the cluster
+    reports streaming ingestion disabled, until the recheck interval passes.
+    On failure, an optional `failure` dict gets {"permanent": True,
+    "error": ...} when resending the same rows cannot succeed.
+    """
     # global statement removed — writes go to _st.*
     if not _st.kusto_token_cache:
         return False
 
     table_columns = _get_table_columns(cluster_url, database, table)
-    if table_columns:
-        # Preserve table schema order for positional CSV ingest.
-        resolved_columns = [c for c in table_columns if c in columns]
-        dropped = [c for c in columns if c not in table_columns]
-        if dropped:
-            print(f"[Cognition] Ingest {table}: dropping unknown columns for current schema: {', '.join(dropped)}")
-        if not resolved_columns:
-            print(f"[Cognition] Ingest {table}: no matching columns found in table schema")
-            return False
-    else:
-        resolved_columns = list(columns)
+    if not table_columns:
+        # Without the schema there is no safe column order for positional
+        # CSV; send nothing and let the spool retry once it can be read.
+        print(f"[Cognition] Ingest {table}: table schema unavailable; not sending")
+        return False
+    # Preserve table schema order for positional CSV ingest.
+    resolved_columns = [c for c in table_columns if c in columns]
+    dropped = [c for c in columns if c not in table_columns]
+    if dropped:
+        print(f"[Cognition] Ingest {table}: dropping unknown columns for current schema: {', '.join(dropped)}")
+    if not resolved_columns:
+        print(f"[Cognition] Ingest {table}: no matching columns found in table schema")
+        if failure is not None:
+            failure.update(permanent=True, error=f"no columns of {table} in {list(columns)}")
+        return False
 
-    import requests as _requests_mod
-    rows_csv = []
-    for row_obj in rows_data:
-        vals = []
-        for col in resolved_columns:
-            v = row_obj.get(col, "")
-            if v is None:
-                vals.append("")
-            elif isinstance(v, bool):
-                vals.append("true" if v else "false")
-            elif isinstance(v, (int, float)):
-                vals.append(str(v))
-            elif isinstance(v, (dict, list)):
-                # Dynamic column: serialize to JSON, then CSV-quote with "" escaping
-                j = json.dumps(v)
-                vals.append('"' + j.replace('"', '""') + '"')
+    # CSV is positional: write every table column so a row that omits some
+    # (or a batch merged from several callers) cannot shift values.
+    if _kusto_streaming_enabled(cluster_url, database, table):
+        stream_columns = resolved_columns if _KUSTO_STREAMING_FORMAT == "json" else table_columns
+        ok = _kusto_ingest_stream(cluster_url, database, table, stream_columns, rows_data, failure)
+        if ok is not None:
+            return ok
+        with _st.kusto_ingest_lock:
+            _st.kusto_ingest_stats["fallbacks"] += 1
+    return _kusto_ingest_inline(cluster_url, database, table, table_columns, rows_data, failure)
+
+
+
+def _kusto_csv_line(row_obj, columns):
+    """One CSV record for positional ingest (inline or streamed)."""
+    vals = []
+    for col in columns:
+        v = row_obj.get(col, "")
+        if v is None:
+            vals.append("")
+        elif isinstance(v, bool):
+            vals.append("true" if v else "false")
+        elif isinstance(v, (int, float)):
+            vals.append(str(v))
+        elif isinstance(v, (dict, list)):
+            # Dynamic column: serialize to JSON, then CSV-quote with "" escaping
+            j = json.dumps(v)
+            vals.append('"' + j.replace('"', '""') + '"')
+        else:
+            s = str(v).replace("\n", "\\n").replace("\r", "")
+            # CSV-quote any string containing commas or quotes
+            if ',' in s or '"' in s:
+                vals.append('"' + s.replace('"', '""') + '"')
             else:
-                s = str(v).replace("\n", "\\n").replace("\r", "")
-                # CSV-quote any string containing commas or quotes
-                if ',' in s or '"' in s:
-                    vals.append('"' + s.replace('"', '""') + '"')
-                else:
-                    vals.append(s)
-        rows_csv.append(",".join(vals))
+                vals.append(s)
+    return ",".join(vals)
 
+
+
+def _kusto_ingest_inline(cluster_url, database, table, columns, rows_data, failure=None):
+    """Send rows as one .ingest inline management command."""
+    import requests as _requests_mod
+    rows_csv = [_kusto_csv_line(row_obj, columns) for row_obj in rows_data]
     cmd = f".ingest inline into table {table} <|\n" + "\n".join(rows_csv)
     if rows_csv:
-        print(f"[Cognition] Ingest {table}: {len(rows_csv)} rows ({len(resolved_columns)} cols)")
+        print(f"[Cognition] Ingest {table}: {len(rows_csv)} rows ({len(columns)} cols)")
     url = f"{cluster_url}/v1/rest/mgmt"
     headers = {"Authorization": f"Bearer {_st.kusto_token_cache}", "Content-Type": "application/json"}
 
     for attempt in range(3):
+        if not _kusto_breaker_allow(cluster_url):
+            return False  # the spool keeps the rows and retries after backoff
         try:
-            session = _requests_mod.Session()
-            resp = session.post(url, json={"csl": cmd, "db": database}, headers=headers, timeout=15)
-            session.close()
+            resp = _kusto_session(cluster_url).post(url, json={"csl": cmd, "db": database}, headers=headers,
+                                                    timeout=_KUSTO_REQUEST_TIMEOUT_SECONDS)
+            _kusto_breaker_record(cluster_url, not _kusto_breaker_failed_status(resp.status_code),
+                                  f"HTTP {resp.status_code}")
             if resp.status_code == 200:
                 # Check for errors in the response body (Kusto returns 200 even on ingest parse errors)
                 try:
@@ -458,16 +982,22 @@ def _kusto_ingest_direct(cluster_url, database, table, columns, rows_data):
                     exceptions = body.get("Exceptions", [])
                     if exceptions:
                         print(f"[Cognition] Kusto ingest error in response: {exceptions[0][:200]}")
+                        _kusto_ingest_rejected(failure, 400, exceptions[0])
                         return False
                     # Also check OneApiErrors
                     one_api = body.get("OneApiErrors", [])
                     if one_api:
                         print(f"[Cognition] Kusto ingest OneApiError: {one_api[0]}")
+                        _kusto_ingest_rejected(failure, 400, str(one_api[0]))
                         return False
                 except Exception:
                     pass
+                with _st.kusto_ingest_lock:
+                    _st.kusto_ingest_stats["inline_requests"] += 1
+                    _st.kusto_ingest_stats["inline_rows"] += len(rows_csv)
+                _invalidate_kusto_results(table)
                 return True
-            elif resp.status_code == 401 and attempt == 0 and _refresh_kusto_token():
+            elif resp.status_code == 401 and attempt == 0 and _kusto_token_rejected():
                 print("[Cognition] Kusto ingest got 401, retrying with refreshed token")
                 headers["Authorization"] = f"Bearer {_st.kusto_token_cache}"
                 continue
@@ -475,8 +1005,18 @@ def _kusto_ingest_direct(cluster_url, database, table, columns, rows_data):
                 print("[Cognition] Kusto ingest still unauthorized after refresh; verify tenant/account RBAC for cluster/database")
             else:
                 print(f"[Cognition] Kusto ingest failed ({resp.status_code}): {resp.text[:500]}")
+                _kusto_ingest_rejected(failure, resp.status_code, resp.text)
                 return False
+        except _requests_mod.exceptions.ReadTimeout as e:
+            # The command may still have run; resending could ingest the rows
+            # twice, so leave any retry to the spool.
+            _kusto_breaker_record(cluster_url, False, e)
+            _reset_kusto_session(cluster_url)
+            print(f"[Cognition] Kusto ingest timed out; not resending: {e}")
+            return False
         except (_requests_mod.exceptions.SSLError, _requests_mod.exceptions.ConnectionError) as e:
+            _kusto_breaker_record(cluster_url, False, e)
+            _reset_kusto_session(cluster_url)
             if attempt < 2:
                 print(f"[Cognition] Kusto ingest SSL retry {attempt+1}/3: {e}")
                 time.sleep(1)
@@ -487,6 +1027,480 @@ def _kusto_ingest_direct(cluster_url, database, table, columns, rows_data):
             print(f"[Cognition] Kusto ingest error: {e}")
             return False
 
+
+
+def _kusto_streaming_key(cluster_url, database, table):
+    return (_normalize_kusto_cluster_url(cluster_url), database, table)
+
+
+
+def _kusto_streaming_enabled(cluster_url, database, table):
+    """True unless streaming is turned off or the table recently reported it disabled."""
+    if not _KUSTO_STREAMING_INGEST:
+        return False
+    key = _kusto_streaming_key(cluster_url, database, table)
+    with _st.kusto_ingest_lock:
+        retry_at = _st.kusto_streaming_disabled.get(key)
+        if retry_at is None:
+            return True
+        if time.time() < retry_at:
+            return False
+        _st.kusto_streaming_disabled.pop(key, None)
+    return True
+
+
+
+def _kusto_stream_chunks(rows_data, columns):
+    """Yield (body, row_count) pieces of the stream, each under the request size cap."""
+    if _KUSTO_STREAMING_FORMAT == "json":
+        lines = [json.dumps({c: row[c] for c in columns if c in row}, default=str) for row in rows_data]
+    else:
+        lines = [_kusto_csv_line(row, columns) for row in rows_data]
+    chunk, size = [], 0
+    for line in lines:
+        encoded = line.encode("utf-8") + b"\n"
+        if chunk and size + len(encoded) > _KUSTO_STREAMING_MAX_BYTES:
+            yield b"".join(chunk), len(chunk)
+            chunk, size = [], 0
+        chunk.append(encoded)
+        size += len(encoded)
+    if chunk:
+        yield b"".join(chunk), len(chunk)
+
+
+
+def _kusto_ingest_stream(cluster_url, database, table, columns, rows_data, failure=None):
+    """Send rows to the data-plane streaming endpoint (/v1/rest/ingest/{db}/{table}).
+
+    Bodies are gzipped CSV (or MultiJson) split under the 4 MB request cap.
+    Returns True once every piece landed, False on failure (the spool
+    retries), or None when the cluster reports streaming ingestion disabled
+    for the table before anything was sent, so the caller can fall back to
+    .ingest inline. When a later piece fails, failure["landed_rows"] says
+    how many leading rows are already in the table so they are not resent.
+    """
+    import gzip
+    import requests as _requests_mod
+    url = (f"{cluster_url}/v1/rest/ingest/{urllib.parse.quote(database, safe='')}/"
+           f"{urllib.parse.quote(table, safe='')}")
+    params = {"streamFormat": "MultiJson" if _KUSTO_STREAMING_FORMAT == "json" else "Csv"}
+    if _KUSTO_STREAMING_FORMAT == "json" and _KUSTO_STREAMING_JSON_MAPPING:
+        params["mappingName"] = _KUSTO_STREAMING_JSON_MAPPING
+    headers = {"Authorization": f"Bearer {_st.kusto_token_cache}", "Content-Type": "application/octet-stream",
+               "Content-Encoding": "gzip"}
+
+    landed = 0
+
+    def failed():
+        if failure is not None and landed:
+            failure["landed_rows"] = landed
+        return False
+
+    for index, (body, row_count) in enumerate(_kusto_stream_chunks(rows_data, columns)):
+        payload = gzip.compress(body, compresslevel=1)
+        for attempt in range(3):
+            if not _kusto_breaker_allow(cluster_url):
+                return failed()  # the spool keeps the rows and retries after backoff
+            try:
+                resp = _kusto_session(cluster_url).post(url, params=params, data=payload, headers=headers,
+                                                        timeout=_KUSTO_REQUEST_TIMEOUT_SECONDS)
+                _kusto_breaker_record(cluster_url, not _kusto_breaker_failed_status(resp.status_code),
+                                      f"HTTP {resp.status_code}")
+                if resp.status_code == 200:
+                    with _st.kusto_ingest_lock:
+                        _st.kusto_ingest_stats["stream_requests"] += 1
+                        _st.kusto_ingest_stats["stream_rows"] += row_count
+                    landed += row_count
+                    break
+                if resp.status_code == 401 and attempt == 0 and _kusto_token_rejected():
+                    print("[Cognition] Kusto streaming ingest got 401, retrying with refreshed token")
+                    headers["Authorization"] = f"Bearer {_st.kusto_token_cache}"
+                    continue
+                if resp.status_code in (400, 403) and _STREAMING_DISABLED_RE.search(resp.text or ""):
+                    with _st.kusto_ingest_lock:
+                        _st.kusto_streaming_disabled[_kusto_streaming_key(cluster_url, database, table)] = \
+                            time.time() + _KUSTO_STREAMING_RECHECK_SECONDS
+                    print(f"[Cognition] Kusto streaming ingestion is disabled for {database}.{table}; "
+                          f"using .ingest inline")
+                    # Only the first piece hands over; after a later one the
+                    # spool resends the unsent rows, which then go inline.
+                    return None if index == 0 else failed()
+                print(f"[Cognition] Kusto streaming ingest failed ({resp.status_code}): {resp.text[:500]}")
+                _kusto_ingest_rejected(failure, resp.status_code, resp.text)
+                return failed()
+            except _requests_mod.exceptions.ReadTimeout as e:
+                # The piece may have landed; streaming ingestion is not
+                # idempotent, so leave any resend to the spool.
+                _kusto_breaker_record(cluster_url, False, e)
+                _reset_kusto_session(cluster_url)
+                print(f"[Cognition] Kusto streaming ingest timed out; not resending: {e}")
+                return failed()
+            except (_requests_mod.exceptions.SSLError, _requests_mod.exceptions.ConnectionError) as e:
+                _kusto_breaker_record(cluster_url, False, e)
+                _reset_kusto_session(cluster_url)
+                if attempt < 2:
+                    print(f"[Cognition] Kusto streaming ingest retry {attempt+1}/3: {e}")
+                    time.sleep(1)
+                else:
+                    print(f"[Cognition] Kusto streaming ingest failed after 3 retries: {e}")
+                    return failed()
+            except Exception as e:
+                print(f"[Cognition] Kusto streaming ingest error: {e}")
+                return failed()
+        else:
+            return failed()
+    _invalidate_kusto_results(table)
+    return True
+
+
+
+def _kusto_ingest_status():
+    """Streaming vs inline ingest counts and tables without streaming, for /v1/doctor."""
+    now = time.time()
+    with _st.kusto_ingest_lock:
+        stats = dict(_st.kusto_ingest_stats)
+        disabled = sorted(f"{db}.{table}" for (_, db, table), retry_at in _st.kusto_streaming_disabled.items()
+                          if retry_at > now)
+    return dict(stats, streaming=_KUSTO_STREAMING_INGEST, format=_KUSTO_STREAMING_FORMAT,
+                streaming_disabled=disabled)
+
+
+
+def _kusto_ingest_direct(cluster_url, database, table, columns, rows_data):
+    """Ingest rows into Kusto through the local spool.
+
+    The rows are committed to the on-disk spool and the shipper thread
+    sends them, so the caller pays a local write instead of the cluster
+    round trip and the rows survive throttling, outages and restarts.
+    Returns True once spooled. Falls back to a direct send when the spool
+    is disabled or cannot be opened.
+    """
+    spool = _get_kusto_spool() if rows_data else None
+    if not spool:
+        return _kusto_ingest_send(cluster_url, database, table, columns, rows_data)
+    try:
+        spool.append(cluster_url, database, table, columns, rows_data, time.time())
+    except Exception as e:
+        print(f"[Cognition] Kusto spool write failed, ingesting directly: {e}")
+        return _kusto_ingest_send(cluster_url, database, table, columns, rows_data)
+    # Readers must not be served a result cached before this write; the
+    # send invalidates again once the rows are actually queryable.
+    _invalidate_kusto_results(table)
+    _wake_kusto_spool_shipper()
+    return True
+
+
+
+def _upsert_key(spec, row):
+    return tuple(str(row.get(k) or "").lower() if k == "Entity" else row.get(k) for k in spec["key"])
+
+
+def _merge_upsert_rows(table, rows_data):
+    """Fold rows that share an upsert key into one row each.
+
+    Kusto cannot update a row in place, so upsert semantics for Knowledge
+    and HeuristicsIndex are applied to each batch before it is ingested:
+    counters add up (a row without one counts as 1), "max" columns keep
+    their maximum and everything else comes from the newest row. Tables
+    without an upsert spec are returned unchanged.
+    """
+    spec = _UPSERT_TABLES.get(table)
+    if not spec:
+        return rows_data
+    counter, seen = spec["counter"], spec["seen"]
+    merged = {}
+    for row in rows_data:
+        key = _upsert_key(spec, row)
+        count = row.get(counter) or 1
+        prev = merged.get(key)
+        if prev is None:
+            merged[key] = dict(row, **{counter: count})
+            continue
+        newer = str(row.get(seen) or "") >= str(prev.get(seen) or "")
+        out = dict(row) if newer else dict(prev)
+        out[counter] = (prev.get(counter) or 1) + count
+        for c in spec["max"]:
+            values = [v for v in (prev.get(c), row.get(c)) if v is not None]
+            out[c] = max(values) if values else None
+        merged[key] = out
+    return list(merged.values())
+
+
+_KUSTO_CAST = {"int": "toint", "long": "tolong", "real": "toreal", "double": "toreal", "decimal": "todecimal"}
+
+
+def _kusto_compact_table(cluster_url, database, table):
+    """Collapse duplicate history in a Kusto upsert table into one row per key.
+
+    Works on a snapshot of the table's extents: their rows are summarized
+    into a staging table (arg_max of the seen column, counters summed,
+    "max" columns maximised) and `.replace extents` swaps the staging
+    extents in for the snapshot in one transaction, so rows ingested
+    meanwhile are untouched. Returns {"before": n, "after": m}, or None on
+    error or when the table has no counter column yet.
+    """
+    spec = _UPSERT_TABLES.get(table)
+    if not spec:
+        return None
+    schema_rows = _kusto_query_direct(cluster_url, database, f".show table {table} cslschema", is_mgmt=True)
+    schema_str = schema_rows[0].get("Schema", "") if schema_rows else ""
+    types = dict(pair.split(":", 1) for pair in (p.strip() for p in schema_str.split(",")) if ":" in pair)
+    counter, seen = spec["counter"], spec["seen"]
+    if counter not in types or seen not in types:
+        print(f"[Cognition] Compaction of {table} skipped: schema has no {counter}/{seen} column")
+        return None
+
+    extents = _kusto_query_direct(cluster_url, database, f".show table {table} extents", is_mgmt=True)
+    if extents is None:
+        return None
+    extent_ids = [str(r.get("ExtentId")) for r in extents if r.get("ExtentId")]
+    before = sum(int(r.get("RowCount") or 0) for r in extents)
+    if not extent_ids or before == 0:
+        return {"before": before, "after": before}
+    id_list = ", ".join(f"'{e}'" for e in extent_ids)
+    staging = f"{table}Compaction"
+
+    def cast(col, expr):
+        fn = _KUSTO_CAST.get(types[col].strip().lower())
+        return f"{fn}({expr})" if fn else expr
+
+    by = ", ".join(
+        f"_k{i} = tolower({k})" if k == "Entity" else f"_k{i} = {k}" for i, k in enumerate(spec["key"]))
+    latest = [c for c in types if c not in (seen, counter) and c not in spec["max"]]
+    aggregates = [f"_counter = sum(coalesce({counter}, {cast(counter, '1')}))"]
+    aggregates += [f"_max_{c} = max({c})" for c in spec["max"]]
+    projection = [
+        f"{c} = {cast(c, '_counter')}" if c == counter else f"{c} = _max_{c}" if c in spec["max"] else c
+        for c in types
+    ]
+    summarize = (
+        f".set-or-replace {staging} <|\n"
+        f"{table}\n"
+        f"| where tostring(extent_id()) in ({id_list})\n"
+        f"| summarize arg_max({seen}, {', '.join(latest)}), {', '.join(aggregates)} by {by}\n"
+        f"| project {', '.join(projection)}"
+    )
+    replace = (
+        f".replace extents in table {table} <|\n"
+        f"{{ .show table {table} extents | where ExtentId in ({id_list}) }},\n"
+        f"{{ .show table {staging} extents }}"
+    )
+    try:
+        if _kusto_post(cluster_url, database, summarize, is_mgmt=True) is None:
+            return None
+        staged = _kusto_query_direct(cluster_url, database, f".show table {staging} extents", is_mgmt=True)
+        after = sum(int(r.get("RowCount") or 0) for r in (staged or []))
+        if _kusto_post(cluster_url, database, replace, is_mgmt=True) is None:
+            return None
+    finally:
+        _kusto_post(cluster_url, database, f".drop table {staging} ifexists", is_mgmt=True)
+        _invalidate_kusto_results(table)
+    print(f"[Cognition] Compacted {table}: {before} -> {after} rows")
+    return {"before": before, "after": after}
+
+
+
+def _get_kusto_spool():
+    """Return the shared IngestSpool, opening it on first use; None if disabled or unavailable."""
+    if not _KUSTO_INGEST_SPOOL:
+        return None
+    if _st.kusto_spool is not None:
+        return _st.kusto_spool or None
+    with _st.kusto_spool_cond:
+        if _st.kusto_spool is None:
+            try:
+                from ingest_spool import IngestSpool
+                _st.kusto_spool = IngestSpool(_KUSTO_SPOOL_PATH)
+            except Exception as e:
+                print(f"[Cognition] Kusto ingest spool unavailable, ingesting directly: {e}")
+                _st.kusto_spool = False
+    return _st.kusto_spool or None
+
+
+
+def _wake_kusto_spool_shipper():
+    """Nudge the shipper (starting it if needed) after new rows were spooled."""
+    with _st.kusto_spool_cond:
+        _st.kusto_spool_cond.notify()
+        if _st.kusto_spool_thread is None or not _st.kusto_spool_thread.is_alive():
+            _st.kusto_spool_thread = threading.Thread(
+                target=_kusto_spool_shipper, daemon=True, name="kusto-spool-shipper")
+            _st.kusto_spool_thread.start()
+
+
+
+def _start_kusto_spool_shipper():
+    """Resume shipping rows left in the spool by an earlier run."""
+    if not os.path.exists(_KUSTO_SPOOL_PATH):
+        return
+    spool = _get_kusto_spool()
+    if spool and spool.stats()["pending_entries"]:
+        print(f"[Cognition] Kusto spool has {spool.stats()['pending_rows']} unshipped rows; resuming")
+        _wake_kusto_spool_shipper()
+
+
+
+def _kusto_spool_backoff(attempts):
+    """Seconds to wait after the given number of consecutive failures (with jitter)."""
+    import random
+    # Entries retry indefinitely, so clamp the exponent before it can overflow a float.
+    delay = min(_KUSTO_SPOOL_BACKOFF_MAX_SECONDS,
+                _KUSTO_SPOOL_BACKOFF_BASE_SECONDS * (2 ** min(max(attempts - 1, 0), 32)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+
+def _ship_kusto_spool_once(now=None):
+    """Send one round of due spool entries; returns (shipped_rows, failed_entries).
+
+    Due entries are grouped by destination table (whatever columns each
+    call supplied; sends map rows by name onto the table schema), and each
+    group goes out as one ingest, so a burst of small appends ships as a
+    few large batches. A failed group's entries back off by their own
+    attempt count and are retried indefinitely, unless the cluster rejected
+    the rows outright, in which case they are kept as dead entries. Rows a
+    partly failed send already delivered are acked first, so only the
+    unsent rest is retried. If
+    nothing in the round landed, the whole shipper also backs off, so an
+    unreachable cluster sees one probe per backoff step.
+    """
+    spool = _get_kusto_spool()
+    if not spool:
+        return 0, 0
+    now = time.time() if now is None else now
+    entries = spool.due(now, _KUSTO_SPOOL_BATCH_ROWS)
+    if not entries:
+        return 0, 0
+    groups = {}
+    for entry in entries:
+        key = (entry["cluster"], entry["database"], entry["table"])
+        groups.setdefault(key, []).append(entry)
+
+    stats = _st.kusto_spool_stats
+    shipped_rows = failed = failed_groups = 0
+    for (cluster, database, table), group in groups.items():
+        ids = [e["id"] for e in group]
+        rows = [row for e in group for row in e["rows"]]
+        columns = list(dict.fromkeys(c for e in group for c in e["columns"]))
+        failure = {}
+        ok = bool(_current_kusto_token()) and \
+            _kusto_ingest_send(cluster, database, table, columns, rows, failure)
+        if ok:
+            spool.ack(ids)
+            shipped_rows += len(rows)
+            stats["last_ship_lag_ms"] = round((time.time() - group[0]["enqueued_at"]) * 1000, 1)
+            continue
+        landed = failure.get("landed_rows", 0)
+        shipped_rows += landed
+        while landed and group:
+            entry = group[0]
+            if landed < len(entry["rows"]):
+                group[0] = dict(entry, rows=entry["rows"][landed:])
+                spool.trim(entry["id"], group[0]["rows"])
+                break
+            spool.ack([entry["id"]])
+            landed -= len(entry["rows"])
+            group = group[1:]
+        if not group:
+            continue
+        ids = [e["id"] for e in group]
+        failed += len(group)
+        failed_groups += 1
+        error = failure.get("error") or (f"ingest into {table} failed" if _st.kusto_token_cache
+                                          else "no Kusto token")
+        attempts = max(e["attempts"] for e in group) + 1
+        dead = bool(failure.get("permanent"))
+        spool.retry(ids, time.time() + _kusto_spool_backoff(attempts), error, dead)
+        stats["last_error"] = error
+        if dead:
+            print(f"[Cognition] Kusto spool: {sum(len(e['rows']) for e in group)} {table} rows rejected "
+                  f"({error[:200]}); kept as dead entries")
+
+    with _st.kusto_spool_cond:
+        stats["shipped_rows"] += shipped_rows
+        stats["batches"] += len(groups)
+        stats["failed_batches"] += failed_groups
+        if shipped_rows:
+            stats["consecutive_failures"] = 0
+            stats["backoff_until"] = 0.0
+        elif failed:
+            stats["consecutive_failures"] += 1
+            stats["backoff_until"] = time.time() + _kusto_spool_backoff(stats["consecutive_failures"])
+    return shipped_rows, failed
+
+
+
+def _kusto_spool_shipper():
+    """Background: drain the spool, backing off exponentially while Kusto is failing."""
+    cond = _st.kusto_spool_cond
+    stats = _st.kusto_spool_stats
+    while True:
+        spool = _get_kusto_spool()
+        if not spool:
+            return
+        with cond:
+            # Decide under the lock so an append's notify cannot slip in
+            # between the backlog check and the wait.
+            now = time.time()
+            pending = spool.stats()
+            if stats["backoff_until"] > now:
+                cond.wait(timeout=stats["backoff_until"] - now)
+                continue
+            if not pending["pending_entries"]:
+                cond.wait()  # idle until the next append
+                continue
+            if pending["next_attempt_at"] > now:
+                cond.wait(timeout=pending["next_attempt_at"] - now)
+                continue
+        # Let the rest of a burst (e.g. one reflection batch) land first.
+        time.sleep(_KUSTO_SPOOL_COALESCE_SECONDS)
+        try:
+            _ship_kusto_spool_once()
+        except Exception as e:
+            print(f"[Cognition] Kusto spool shipper error: {e}")
+            with cond:
+                stats["last_error"] = str(e)[:200]
+                stats["consecutive_failures"] += 1
+                stats["backoff_until"] = time.time() + _kusto_spool_backoff(stats["consecutive_failures"])
+
+
+
+def _requeue_kusto_spool():
+    """Retry every dead spool entry (e.g. after fixing the table schema); returns the entry count."""
+    spool = _get_kusto_spool()
+    if not spool:
+        return 0
+    count = spool.requeue_dead(time.time())
+    if count:
+        print(f"[Cognition] Kusto spool: requeued {count} dead entries")
+        _wake_kusto_spool_shipper()
+    return count
+
+
+
+def _kusto_spool_status():
+    """Spool backlog, age and shipper health for /v1/doctor and telemetry."""
+    spool = _get_kusto_spool()
+    if not spool:
+        return {"enabled": False}
+    now = time.time()
+    pending = spool.stats()
+    with _st.kusto_spool_cond:
+        stats = dict(_st.kusto_spool_stats)
+    oldest = pending.pop("oldest_enqueued_at")
+    next_at = pending.pop("next_attempt_at")
+    backoff_until = stats.pop("backoff_until")
+    return dict(
+        stats,
+        enabled=True,
+        path=spool.db_path,
+        running=bool(_st.kusto_spool_thread and _st.kusto_spool_thread.is_alive()),
+        oldest_age_s=round(now - oldest, 1) if oldest else 0.0,
+        next_attempt_in_s=round(max(next_at or 0.0, backoff_until) - now, 1)
+        if pending["pending_entries"] and max(next_at or 0.0, backoff_until) > now else 0.0,
+        **pending,
+    )
+
 # ---------------------------------------------------------------------------
 # Memory routing — dispatches to Kusto or SQLite based on _memory_backend
 # ---------------------------------------------------------------------------
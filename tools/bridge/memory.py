@@ -1,16 +1,41 @@
 """Bridge domain: memory."""
 
+import array
 import hashlib
-import json
+import heapq
+import math
+import operator
 import os
 import re
 import threading
+import time
 from bridge import config as _cfg
 from bridge import state as _st
-from bridge.kusto import _kusto_query_direct, _kusto_ingest_direct, _get_kusto_config, _ensure_kusto_token
+from bridge.kusto import (_kusto_query_direct, _kusto_ingest_direct, _kusto_ingest_send, _get_kusto_config,
+    _ensure_kusto_token, _kusto_compact_table)
+
+try:
+    import numpy as _np
+except ImportError:  # optional: scoring falls back to math.sumprod over float32 arrays
+    _np = None
+
+_sumprod = getattr(math, "sumprod", None) or (lambda a, b: sum(map(operator.mul, a, b)))
 
 _EMBEDDING_CACHE_PATH = _cfg.EMBEDDING_CACHE_PATH
+_EMBEDDING_STORE_PATH = _cfg.EMBEDDING_STORE_PATH
+_EMBEDDING_HOT_CACHE_MAX = _cfg.EMBEDDING_HOT_CACHE_MAX
 _EMBEDDING_MODEL = _cfg.EMBEDDING_MODEL
+_EMBEDDING_PROVIDER = _cfg.EMBEDDING_PROVIDER
+_LOCAL_EMBEDDING_DIM = _cfg.LOCAL_EMBEDDING_DIM
+_LOCAL_EMBEDDING_MIN_SCORE = _cfg.LOCAL_EMBEDDING_MIN_SCORE
+_SEMANTIC_MIN_SCORE = _cfg.SEMANTIC_MIN_SCORE
+_ANN_INDEX_ENABLED = _cfg.ANN_INDEX_ENABLED
+_ANN_NPROBE = _cfg.ANN_NPROBE
+_ANN_SYNC_BATCH = _cfg.ANN_SYNC_BATCH
+_EMBED_QUEUE_MAX = _cfg.EMBED_QUEUE_MAX
+_EMBED_WORKER_BATCH = _cfg.EMBED_WORKER_BATCH
+_EMBED_WORKER_COALESCE_SECONDS = _cfg.EMBED_WORKER_COALESCE_SECONDS
+_EMBED_WORKER_RETRY_SECONDS = _cfg.EMBED_WORKER_RETRY_SECONDS
 _ENTITY_IGNORE_WORDS = _cfg.ENTITY_IGNORE_WORDS
 _MEMORY_BACKEND_PREF_PATH = _cfg.MEMORY_BACKEND_PREF_PATH
 
@@ -92,100 +117,130 @@ def _set_openai_key_from(data):
 
 
 
-def _load_embedding_cache():
-    # global statement removed — writes go to _st.*
-    if _st.embedding_cache is not None:
-        return _st.embedding_cache
+def _get_embedding_provider():
+    """Return the configured embedding provider (EVA_EMBEDDING_PROVIDER
+    overrides config: "openai" or "local"), building it on first use.
+
+    Vectors are namespaced by provider.namespace in the store and ANN
+    index. The provider is fixed for the process, so the hot cache never
+    mixes namespaces.
+    """
+    if _st.embedding_provider is not None:
+        return _st.embedding_provider
     with _st.embedding_cache_lock:
-        if _st.embedding_cache is not None:
-            return _st.embedding_cache
-        try:
-            with open(_EMBEDDING_CACHE_PATH) as f:
-                loaded = json.load(f)
-            _st.embedding_cache = loaded if isinstance(loaded, dict) else {}
-        except Exception:
-            _st.embedding_cache = {}
-    return _st.embedding_cache
+        if _st.embedding_provider is None:
+            from embedding_providers import make_provider
+            name = os.environ.get("EVA_EMBEDDING_PROVIDER", "").strip().lower() or _EMBEDDING_PROVIDER
+            provider = make_provider(
+                name,
+                model=_EMBEDDING_MODEL,
+                key_fn=lambda: _st.openai_api_key_cache or os.environ.get("OPENAI_API_KEY", "").strip(),
+                openai_min_score=_SEMANTIC_MIN_SCORE,
+                local_dim=_LOCAL_EMBEDDING_DIM,
+                local_min_score=_LOCAL_EMBEDDING_MIN_SCORE,
+            )
+            _st.embedding_provider = provider
+            print(f"[Cognition] Embedding provider: {provider.name} ({provider.namespace})")
+    return _st.embedding_provider
 
 
 
-def _save_embedding_cache():
-    cache = _st.embedding_cache
-    if cache is None:
-        return
-    try:
-        os.makedirs(os.path.dirname(_EMBEDDING_CACHE_PATH), exist_ok=True)
-        tmp = _EMBEDDING_CACHE_PATH + ".tmp"
-        with open(tmp, "w") as f:
-            json.dump(cache, f)
-        os.replace(tmp, _EMBEDDING_CACHE_PATH)
-    except Exception as e:
-        print(f"[Cognition] Embedding cache save failed: {e}")
+def _semantic_min_score():
+    """Cosine floor for a semantic recall hit under the active provider."""
+    return _get_embedding_provider().min_score
 
 
 
-def _embed_texts(texts):
-    """Return {text: vector} for the given texts using a persistent cache and a
-    single batched OpenAI embeddings call for cache misses. Returns whatever is
-    available (possibly empty) without raising, so recall degrades to lexical."""
-    # global statement removed — writes go to _st.*
-    import hashlib
-    key = _st.openai_api_key_cache or os.environ.get("OPENAI_API_KEY", "").strip()
-
-    unique = []
-    seen = set()
-    for t in texts:
-        t = (t or "").strip()
-        if t and t not in seen:
-            seen.add(t)
-            unique.append(t)
-    if not unique:
-        return {}
-
-    cache = _load_embedding_cache()
+def _get_embedding_store():
+    """Return the shared EmbeddingStore, opening it (and importing the legacy
+    JSON cache once) on first use. Returns None if the store cannot be opened,
+    in which case vectors are only cached in memory for this process."""
+    if _st.embedding_store is not None:
+        return _st.embedding_store
+    with _st.embedding_cache_lock:
+        if _st.embedding_store is not None:
+            return _st.embedding_store
+        try:
+            from embedding_store import EmbeddingStore
+            store = EmbeddingStore(_EMBEDDING_STORE_PATH)
+            store.migrate_json(_EMBEDDING_CACHE_PATH, _EMBEDDING_MODEL)
+            _st.embedding_store = store
+        except Exception as e:
+            print(f"[Cognition] Embedding store unavailable, using in-memory cache: {e}")
+            _st.embedding_store = False
+    return _st.embedding_store
+
+
+
+def _lookup_embeddings(unique):
+    """Split unique stripped texts into cached vectors and misses.
+
+    Returns (hashes, {text: vector}, [missing texts]). Store hits are
+    promoted into the hot cache, which is cleared when it would overflow.
+    """
+    hashes = {t: hashlib.sha1(t.encode("utf-8")).hexdigest() for t in unique}
+    hot = _st.embedding_cache
+    store = _get_embedding_store()
+    cold = [h for h in hashes.values() if h not in hot]
+    if cold and store:
+        if len(hot) + len(cold) > _EMBEDDING_HOT_CACHE_MAX:
+            hot.clear()
+        hot.update(store.get_many(_get_embedding_provider().namespace, cold))
     result = {}
     missing = []
     for t in unique:
-        h = hashlib.sha1(t.encode("utf-8")).hexdigest()
-        vec = cache.get(h)
+        vec = hot.get(hashes[t])
         if vec is not None:
             result[t] = vec
         else:
             missing.append(t)
+    return hashes, result, missing
+
 
+
+def _embed_texts(texts):
+    """Return {text: vector} for the given texts from the active provider.
+
+    Remote providers go through the persistent cache and make one batched
+    call for the misses; local providers embed in-process and keep their
+    vectors in the hot cache only. Returns whatever is available (possibly empty) without raising,
+    so recall degrades to lexical."""
+    unique = list(dict.fromkeys(t.strip() for t in texts if t and t.strip()))
+    if not unique:
+        return {}
+    provider = _get_embedding_provider()
+    if provider.local:
+        # Cheap to recompute, so only the hot cache is used (no store).
+        hot = _st.embedding_cache
+        hashes = {t: hashlib.sha1(t.encode("utf-8")).hexdigest() for t in unique}
+        missing = [t for t in unique if hashes[t] not in hot]
+        if missing:
+            if len(hot) + len(missing) > _EMBEDDING_HOT_CACHE_MAX:
+                hot.clear()
+            hot.update((hashes[t], vec) for t, vec in provider.embed(missing).items())
+        return {t: hot[hashes[t]] for t in unique if hashes[t] in hot}
+
+    hashes, result, missing = _lookup_embeddings(unique)
     if missing:
-        if not key:
+        if not provider.available():
             if not _st.embedding_disabled_logged:
                 print("[Cognition] No OpenAI key for embeddings; recall uses lexical match only")
                 _st.embedding_disabled_logged = True
             return result
-        try:
-            import requests as _req
-            resp = _req.post(
-                "https://api.openai.com/v1/embeddings",
-                headers={"Authorization": f"Bearer {key}", "Content-Type": "application/json"},
-                json={"model": _EMBEDDING_MODEL, "input": missing},
-                timeout=30,
-            )
-            if resp.status_code == 200:
-                for item in resp.json().get("data", []):
-                    idx = item.get("index", -1)
-                    emb = item.get("embedding")
-                    if emb and 0 <= idx < len(missing):
-                        t = missing[idx]
-                        result[t] = emb
-                        cache[hashlib.sha1(t.encode("utf-8")).hexdigest()] = emb
-                _save_embedding_cache()
-            else:
-                print(f"[Cognition] Embedding API failed ({resp.status_code}): {resp.text[:160]}")
-        except Exception as e:
-            print(f"[Cognition] Embedding request error: {e}")
+        fresh = {}
+        for t, emb in provider.embed(missing).items():
+            result[t] = emb
+            fresh[hashes[t]] = emb
+        if fresh:
+            _st.embedding_cache.update(fresh)
+            store = _get_embedding_store()
+            if store:
+                store.put_many(provider.namespace, fresh)
     return result
 
 
 
 def _cosine_similarity(a, b):
-    import math
     if not a or not b or len(a) != len(b):
         return 0.0
     dot = na = nb = 0.0
@@ -199,6 +254,211 @@ def _cosine_similarity(a, b):
 
 
 
+def _cached_embeddings(texts):
+    """Return {text: vector} for the texts that are already embedded (hot
+    cache or store) and queue the rest for the background worker.
+
+    Never calls a remote embeddings API, so chat turns only pay for
+    embedding the user message; a text missed this turn is scored on a
+    later one. Local providers are cheap enough to embed inline.
+    """
+    if _get_embedding_provider().local:
+        return _embed_texts(texts)
+    unique = list(dict.fromkeys(t.strip() for t in texts if t and t.strip()))
+    if not unique:
+        return {}
+    _, result, missing = _lookup_embeddings(unique)
+    if missing:
+        _enqueue_embeddings(missing)
+    return result
+
+
+
+def _embedding_texts_for_rows(table, rows_data):
+    """Texts that recall will later score for rows written to `table`."""
+    texts = []
+    for row in rows_data or []:
+        if not isinstance(row, dict):
+            continue
+        if table == "Knowledge":
+            if row.get("Relation") in ("mentioned", "candidate_mentioned"):
+                continue
+            texts.append(_knowledge_text(row))
+        elif table == "Skills":
+            texts.append(str(row.get("Description", "") or row.get("Name", "")).strip())
+    return texts
+
+
+
+def _enqueue_embeddings(texts, kind="text"):
+    """Queue texts for the background embedding worker. Texts already queued
+    are not duplicated; once the queue is full new texts are dropped (they
+    are re-queued the next time recall misses them). Returns the number added.
+    """
+    now = time.time()
+    added = 0
+    stats = _st.embed_worker_stats
+    with _st.embed_queue_cond:
+        for t in texts:
+            t = (t or "").strip()
+            if not t or t in _st.embed_queue:
+                continue
+            if len(_st.embed_queue) >= _EMBED_QUEUE_MAX:
+                stats["dropped"] += 1
+                continue
+            _st.embed_queue[t] = (now, kind)
+            added += 1
+        if added:
+            stats["queued"] += added
+            _st.embed_queue_cond.notify()
+            if _st.embed_worker_thread is None or not _st.embed_worker_thread.is_alive():
+                _st.embed_worker_thread = threading.Thread(
+                    target=_embedding_worker, daemon=True, name="embedding-worker")
+                _st.embed_worker_thread.start()
+    return added
+
+
+
+def _queue_row_embeddings(table, rows_data):
+    """Queue the recall texts of freshly written Knowledge/Skills rows."""
+    if _get_embedding_provider().local:
+        # Nothing to precompute; just let the ANN index pick the rows up.
+        if table == "Knowledge":
+            _schedule_knowledge_index_sync()
+        return 0
+    if table in ("Knowledge", "Skills"):
+        return _enqueue_embeddings(_embedding_texts_for_rows(table, rows_data), kind=table)
+    return 0
+
+
+
+def _embedding_worker():
+    """Drain the embedding queue in batches, one API call per batch.
+
+    Vectors land in the shared cache/store, where request-time lookups
+    (_cached_embeddings) find them. Knowledge batches also nudge the ANN
+    index sync, which then finds its texts already embedded.
+    """
+    cond = _st.embed_queue_cond
+    stats = _st.embed_worker_stats
+    while True:
+        with cond:
+            while not _st.embed_queue:
+                cond.wait()
+        # Let a burst of ingests settle so they share one API call.
+        time.sleep(_EMBED_WORKER_COALESCE_SECONDS)
+        with cond:
+            batch = []
+            for t, meta in _st.embed_queue.items():
+                batch.append((t, meta))
+                if len(batch) >= _EMBED_WORKER_BATCH:
+                    break
+        t0 = time.time()
+        try:
+            emb_map = _embed_texts([t for t, _ in batch])
+        except Exception as e:
+            print(f"[Cognition] Embedding worker error: {e}")
+            emb_map = {}
+        done = time.time()
+        with cond:
+            for t, (enqueued, _kind) in batch:
+                _st.embed_queue.pop(t, None)
+                if t in emb_map:
+                    stats["embedded"] += 1
+                else:
+                    stats["failed"] += 1
+            stats["batches"] += 1
+            stats["last_batch_ms"] = round((done - t0) * 1000, 1)
+            stats["last_wait_ms"] = round((done - batch[0][1][0]) * 1000, 1)
+        if any(kind == "Knowledge" for _, (_, kind) in batch) and emb_map:
+            _schedule_knowledge_index_sync()
+        if not emb_map:
+            # No key or the API is failing; don't spin on the same texts.
+            time.sleep(_EMBED_WORKER_RETRY_SECONDS)
+
+
+
+def _embedding_worker_status():
+    """Queue depth and lag of the background embedding worker for telemetry."""
+    with _st.embed_queue_cond:
+        depth = len(_st.embed_queue)
+        oldest = next(iter(_st.embed_queue.values()))[0] if depth else None
+        stats = dict(_st.embed_worker_stats)
+    alive = bool(_st.embed_worker_thread and _st.embed_worker_thread.is_alive())
+    return dict(
+        stats,
+        depth=depth,
+        lag_ms=round((time.time() - oldest) * 1000, 1) if oldest else 0.0,
+        running=alive,
+    )
+
+
+def _normalize_rows(vectors):
+    """Prepare equal-length vectors for batched scoring against many queries.
+
+    With NumPy: a float32 matrix of unit-length rows (vectors from the
+    embedding store are float32 arrays and are stacked without copying each
+    element). Without NumPy: a list of (vector, 1/norm) pairs. Zero vectors
+    score 0.0 against anything.
+    """
+    if _np is not None:
+        if vectors and all(isinstance(v, array.array) and v.typecode == "f" for v in vectors):
+            mat = _np.frombuffer(b"".join(vectors), dtype=_np.float32).reshape(len(vectors), -1)
+        else:
+            mat = _np.array(vectors, dtype=_np.float32)
+        if mat.ndim != 2:
+            return _np.zeros((len(vectors), 0), dtype=_np.float32)
+        norms = _np.linalg.norm(mat, axis=1, keepdims=True)
+        norms[norms == 0.0] = 1.0
+        return mat / norms
+    rows = []
+    for v in vectors:
+        norm = math.sqrt(_sumprod(v, v))
+        rows.append((v, 1.0 / norm if norm else 0.0))
+    return rows
+
+
+def _top_k_rows(query_vec, rows, k):
+    """Score a query against rows from _normalize_rows() and return the k best
+    as [(cosine, row_index)], highest first."""
+    if k <= 0 or len(rows) == 0:
+        return []
+    if _np is not None:
+        qrow = _normalize_rows([query_vec])[0]
+        scores = rows @ qrow
+        k = min(k, len(scores))
+        if k < len(scores):
+            top = _np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = _np.arange(len(scores))
+        top = top[_np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[j]), int(j)) for j in top]
+    qnorm = math.sqrt(_sumprod(query_vec, query_vec))
+    if not qnorm:
+        return [(0.0, j) for j in range(min(k, len(rows)))]
+    qscale = 1.0 / qnorm
+    scored = ((_sumprod(query_vec, v) * scale * qscale, j) for j, (v, scale) in enumerate(rows))
+    return heapq.nlargest(k, scored, key=lambda x: x[0])
+
+
+def _top_k_cosine(query_vec, vectors, k):
+    """Batched cosine top-k: [(score, index into vectors)], highest first.
+
+    One matrix product with NumPy (array-module loop without it) instead of a
+    _cosine_similarity call per candidate. Missing vectors and vectors whose
+    length differs from the query are skipped.
+    """
+    if not query_vec or not vectors:
+        return []
+    dim = len(query_vec)
+    keep = [i for i, v in enumerate(vectors) if v is not None and len(v) == dim]
+    if not keep:
+        return []
+    rows = _normalize_rows([vectors[i] for i in keep])
+    return [(score, keep[j]) for score, j in _top_k_rows(query_vec, rows, k)]
+
+
+
 def _expand_query_terms(message):
     """Tokenize a message and expand each token with memory synonyms, dropping
     stopwords. Used to build a lexical Knowledge recall filter."""
@@ -215,6 +475,148 @@ def _expand_query_terms(message):
 
 
 
+def _knowledge_text(rec):
+    """Text embedded for a Knowledge row (shared by the recall pool and the index)."""
+    return (f"{rec.get('Entity','')} {str(rec.get('Relation','')).replace('_',' ')} "
+            f"{rec.get('Value','')}").strip()
+
+
+
+def _get_knowledge_index():
+    """Return the ANN index over Knowledge embeddings, or None.
+
+    Only the SQLite backend has one: it lives next to memory.db as
+    <name>.ann/ and needs NumPy. Reopened if the memory DB path changes.
+    """
+    if not _ANN_INDEX_ENABLED or _resolve_memory_backend() != "sqlite":
+        return None
+    path = os.path.splitext(_get_sqlite_mem().db_path)[0] + ".ann"
+    index = _st.knowledge_index
+    if index is False or (index is not None and index.path == path):
+        return index or None
+    with _st.knowledge_index_lock:
+        if _st.knowledge_index is not None and (_st.knowledge_index is False
+                                                or _st.knowledge_index.path == path):
+            return _st.knowledge_index or None
+        try:
+            from vector_index import VectorIndex
+            _st.knowledge_index = VectorIndex(path, model=_get_embedding_provider().namespace, nprobe=_ANN_NPROBE or None)
+            print(f"[Cognition] Knowledge index: {path} ({_st.knowledge_index.count} vectors)")
+        except ImportError:
+            print("[Cognition] NumPy not installed; semantic recall scores the confidence pool only")
+            _st.knowledge_index = False
+        except Exception as e:
+            print(f"[Cognition] Knowledge index unavailable: {e}")
+            _st.knowledge_index = False
+    return _st.knowledge_index or None
+
+
+
+def _sync_knowledge_index(max_rows=None):
+    """Embed and index Knowledge rows written since the index watermark.
+
+    Skips candidate/mention rows and repeats of an already indexed fact
+    text (the first copy stands for all of them). Stops at the first row it
+    cannot embed so that row is retried next time. Returns rows consumed.
+    """
+    index = _get_knowledge_index()
+    if not index:
+        return 0
+    mem = _get_sqlite_mem()
+    max_rows = max_rows or _ANN_SYNC_BATCH
+    rows = mem.query(
+        "SELECT rowid AS Id, Entity, Relation, Value FROM Knowledge "
+        "WHERE rowid > ? ORDER BY rowid LIMIT ?",
+        (index.watermark, max_rows),
+    ) or []
+    if not rows:
+        return 0
+    keep = {}
+    for rec in rows:
+        if rec.get("Relation") in ("mentioned", "candidate_mentioned"):
+            continue
+        text = _knowledge_text(rec)
+        key = hashlib.sha1(text.encode("utf-8")).digest()
+        if key not in keep and not index.has_key(key):
+            keep[key] = (rec["Id"], text)
+    emb_map = _embed_texts([text for _, text in keep.values()]) if keep else {}
+    ids, vectors, keys = [], [], []
+    watermark = rows[-1]["Id"]
+    for key, (row_id, text) in keep.items():
+        vec = emb_map.get(text)
+        if vec is None:
+            watermark = row_id - 1
+            break
+        ids.append(row_id)
+        vectors.append(vec)
+        keys.append(key)
+    consumed = sum(1 for r in rows if r["Id"] <= watermark)
+    if watermark > index.watermark:
+        index.add(ids, vectors, watermark=watermark, keys=keys)
+    return consumed
+
+
+
+def _schedule_knowledge_index_sync():
+    """Catch the Knowledge index up on a background thread (one at a time)."""
+    if not _get_knowledge_index():
+        return
+    if not _st.knowledge_index_sync_lock.acquire(blocking=False):
+        return
+
+    def _run():
+        try:
+            while _sync_knowledge_index() > 0:
+                pass
+        except Exception as e:
+            print(f"[Cognition] Knowledge index sync failed: {e}")
+        finally:
+            _st.knowledge_index_sync_lock.release()
+
+    threading.Thread(target=_run, daemon=True, name="knowledge-index-sync").start()
+
+
+
+def _knowledge_index_search(query_vec, k, min_confidence=0.6):
+    """Top-k Knowledge facts for a query vector from the ANN index.
+
+    Returns [(score, record)] best first, or None when there is no usable
+    index (the caller then scores the confidence pool instead). A fact that
+    is still current takes its latest confidence from KnowledgeCurrent when
+    that is higher than the indexed copy's.
+    """
+    index = _get_knowledge_index()
+    if not index:
+        return None
+    if not index.count:
+        _schedule_knowledge_index_sync()
+        return None
+    hits = index.search(query_vec, k * 4)
+    if not hits:
+        return []
+    ids = [i for _, i in hits]
+    placeholders = ", ".join("?" for _ in ids)
+    rows = _get_sqlite_mem().query(
+        "SELECT k.rowid AS Id, k.Entity, k.Relation, k.Value, "
+        "CASE WHEN c.Value = k.Value THEN MAX(COALESCE(k.Confidence, 0), c.Confidence) "
+        "ELSE COALESCE(k.Confidence, 0) END AS Confidence "
+        "FROM Knowledge k LEFT JOIN KnowledgeCurrent c "
+        "ON c.Entity = k.Entity AND c.Relation = k.Relation "
+        f"WHERE k.rowid IN ({placeholders})",
+        ids,
+    ) or []
+    by_id = {r["Id"]: r for r in rows}
+    out = []
+    for score, i in hits:
+        rec = by_id.get(i)
+        if rec and (rec.get("Confidence") or 0) >= min_confidence:
+            out.append((score, rec))
+            if len(out) >= k:
+                break
+    return out
+
+
+
 def _memory_query(query_or_table, cluster_url=None, database=None, is_mgmt=False):
     """Backend-agnostic query. For Kusto, pass cluster_url/database and a KQL query.
     For SQLite, pass a SQL query (KQL management queries return sensible defaults).
@@ -248,18 +650,75 @@ def _memory_query(query_or_table, cluster_url=None, database=None, is_mgmt=False
 
 
 
-def _memory_ingest(table, columns, rows_data, cluster_url=None, database=None):
-    """Backend-agnostic ingest. Same signature as _kusto_ingest_direct."""
+def _bump_table_generation(table):
+    """Record a bridge-side write to `table` (see _table_generation)."""
+    with _st.context_cache_lock:
+        _st.table_generations[table] = _st.table_generations.get(table, 0) + 1
+
+
+
+def _table_generation(table):
+    """Cache key component that changes whenever `table` is written.
+
+    Combines the bridge's own counter (bumped by _memory_ingest) with, on
+    the SQLite backend, the store's commit generation, which also covers
+    rows written straight through SqliteMemory.ingest (reflection, deferred
+    write-behind commits), and its external generation, which covers
+    commits from other processes such as the SQLite MCP server.
+    """
+    bridge_gen = _st.table_generations.get(table, 0)
+    if _resolve_memory_backend() == "sqlite":
+        mem = _get_sqlite_mem()
+        return (id(mem), mem.generation(table), mem.external_generation(), bridge_gen)
+    return (None, 0, bridge_gen)
+
+
+
+def _memory_ingest(table, columns, rows_data, cluster_url=None, database=None, sync=False):
+    """Backend-agnostic ingest. Same signature as _kusto_ingest_direct.
+
+    sync=True skips the Kusto spool and returns only once the rows are in
+    the table, for callers (CRUD endpoints) that read them straight back.
+    """
     backend = _resolve_memory_backend()
     if backend == "sqlite":
         mem = _get_sqlite_mem()
-        return mem.ingest(table, columns, rows_data)
+        ok = mem.ingest(table, columns, rows_data)
     else:
         if not cluster_url:
             cluster_url, database = _get_kusto_config()
         if not cluster_url:
             return False
-        return _kusto_ingest_direct(cluster_url, database, table, columns, rows_data)
+        ingest = _kusto_ingest_send if sync else _kusto_ingest_direct
+        ok = ingest(cluster_url, database, table, columns, rows_data)
+    if ok:
+        _bump_table_generation(table)
+        _queue_row_embeddings(table, rows_data)
+    return ok
+
+
+
+def _memory_compact(tables=None):
+    """Fold duplicate Knowledge/HeuristicsIndex history into one row per key.
+
+    Returns {table: {"before": n, "after": m}} for the tables compacted on
+    the active backend.
+    """
+    tables = [t for t in (tables or _cfg.UPSERT_TABLES) if t in _cfg.UPSERT_TABLES]
+    if _resolve_memory_backend() == "sqlite":
+        result = _get_sqlite_mem().compact(tables)
+    else:
+        cluster_url, database = _get_kusto_config()
+        if not cluster_url or not database:
+            return {}
+        result = {}
+        for table in tables:
+            counts = _kusto_compact_table(cluster_url, database, table)
+            if counts is not None:
+                result[table] = counts
+    for table in result:
+        _bump_table_generation(table)
+    return result
 
 
 
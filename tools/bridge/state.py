@@ -8,6 +8,7 @@ Thread-safety: locks are defined here alongside the data they protect.
 Callers must acquire the relevant lock before mutating guarded state.
 """
 
+import collections
 import os
 import threading
 
@@ -25,28 +26,87 @@ acp_pool_lock = threading.RLock()
 # ── Kusto auth ──────────────────────────────────────────────────────
 kusto_token_cache = None    # Cached Kusto access token
 kusto_credential = None     # Cached credential object for token refresh
+kusto_token_expires_on = 0.0  # epoch seconds the cached token expires (0 = unknown)
+kusto_token_lock = threading.Lock()   # serializes credential calls
+kusto_token_cond = threading.Condition()
+kusto_token_thread = None
+kusto_token_stats = {"refreshes": 0, "proactive": 0, "failures": 0, "unauthorized": 0,
+                     "last_refresh_at": None, "last_error": ""}
 kusto_table_columns_cache = {}  # (cluster, db, table) -> [columns]
 kusto_database_locked = env_truthy("KUSTO_DATABASE_LOCKED") or env_truthy("EVA_KUSTO_LOCKED")
 active_kusto_db = os.environ.get("KUSTO_DATABASE", "").strip()
 active_kusto_cluster = os.environ.get("KUSTO_CLUSTER_URL", "").strip()
 
+# ── Kusto HTTP sessions ─────────────────────────────────────────────
+kusto_sessions = {}         # normalized cluster URL -> shared keep-alive requests.Session
+kusto_sessions_lock = threading.Lock()
+kusto_http_stats = {"sessions": 0, "requests": 0, "resets": 0}
+
+# ── Kusto circuit breaker ───────────────────────────────────────────
+kusto_breakers = {}         # normalized cluster URL -> {"state", "failures", "trips", "rejected", ...}
+kusto_breaker_lock = threading.Lock()
+kusto_budget_stats = {"exhausted": 0}  # calls skipped because the caller's latency budget ran out
+
+# ── Kusto result cache ──────────────────────────────────────────────
+kusto_result_cache = collections.OrderedDict()  # (cluster, db, query) -> (expires_at, tables, rows, bytes)
+kusto_result_cache_lock = threading.Lock()
+kusto_result_table_gens = {}  # table ("*" = all) -> invalidation count; guards in-flight fills
+kusto_result_cache_stats = {"hits": 0, "misses": 0, "uncached": 0, "invalidations": 0,
+                            "evictions": 0, "bytes_saved": 0, "stale_hits": 0}
+
+# ── Kusto ingest spool ──────────────────────────────────────────────
+kusto_spool = None          # IngestSpool (lazy); False if it could not open
+kusto_spool_cond = threading.Condition()
+kusto_spool_thread = None
+kusto_spool_stats = {"shipped_rows": 0, "batches": 0, "failed_batches": 0, "consecutive_failures": 0,
+                     "backoff_until": 0.0, "last_ship_lag_ms": None, "last_error": ""}
+
+# ── Kusto streaming ingestion ───────────────────────────────────────
+kusto_streaming_disabled = {}  # (normalized cluster URL, database, table) -> time to try streaming again
+kusto_ingest_lock = threading.Lock()
+kusto_ingest_stats = {"stream_requests": 0, "stream_rows": 0, "inline_requests": 0, "inline_rows": 0,
+                      "fallbacks": 0}
+
 # ── Cognition ───────────────────────────────────────────────────────
 cognition_enabled = False
 cognition_launch_iso = None
 cognition_launch_id = None
 session_exchange_count = 0
 session_conversation_buffer = []  # (user, assistant) pairs
-cognition_candidate_counts = {}   # lowercased entity -> mention count
-candidate_history_cache = {}      # entity_lower -> (ts, mentions, max_conf)
+cognition_candidate_counts = collections.OrderedDict()  # lowercased entity -> mention count (LRU)
+candidate_history_cache = collections.OrderedDict()     # entity_lower -> (ts, mentions, max_conf) (LRU)
+candidate_lock = threading.Lock()
 last_interaction_date = None
+reflection_queue = collections.deque()  # (enqueued_ts, user, assistant, model)
+reflection_queue_cond = threading.Condition()
+reflection_worker_thread = None
+reflection_stats = {"queued": 0, "reflected": 0, "shed": 0, "batches": 0, "ingests": 0,
+                    "max_depth": 0, "last_batch_ms": None, "last_lag_ms": None}
 
 # ── Memory backend ──────────────────────────────────────────────────
 memory_backend = os.environ.get("EVA_MEMORY_BACKEND", "").strip().lower() or None
 sqlite_mem = None           # SqliteMemory instance (lazy)
 openai_api_key_cache = ""
-embedding_cache = None      # lazy dict: sha1(text) -> [floats]
+embedding_cache = {}        # hot vectors: sha1(text) -> float32 array / list
+embedding_provider = None   # EmbeddingProvider (lazy), see embedding_providers.py
+embedding_store = None      # EmbeddingStore (lazy); False if it could not open
+knowledge_index = None      # VectorIndex over Knowledge (lazy); False if unavailable
+knowledge_index_lock = threading.Lock()
+knowledge_index_sync_lock = threading.Lock()  # held by the one running sync thread
 embedding_cache_lock = threading.Lock()
 embedding_disabled_logged = False
+embed_queue = {}            # text -> (enqueued_ts, kind), insertion ordered
+embed_queue_cond = threading.Condition()
+embed_worker_thread = None
+embed_worker_stats = {"queued": 0, "embedded": 0, "failed": 0, "dropped": 0,
+                      "batches": 0, "last_batch_ms": None, "last_wait_ms": None}
+
+# ── Memory context cache ───────────────────────────────────────────
+table_generations = {}      # table -> bridge-side write generation
+context_cache = {}          # section -> (generation key, value, load_ms)
+context_cache_stats = {}    # section -> {"hits", "misses", "saved_ms"}
+context_cache_lock = threading.Lock()
+context_query_pool = None   # ThreadPoolExecutor for Kusto section queries (lazy)
 
 # ── Background loop ────────────────────────────────────────────────
 bg_loop_thread = None
@@ -75,6 +135,11 @@ telemetry_enabled = os.environ.get("EVA_TELEMETRY", "1") not in ("0", "false", "
 telemetry_lock = threading.Lock()
 telemetry_ring = []
 
+# ── AIG prompt prefix ───────────────────────────────────────────────
+aig_prefix_cache = {}   # (no_tools, runtime) -> byte-stable system prompt prefix
+aig_last_prompt = {}    # prefix fingerprint -> previous turn's system prompt
+aig_prompt_lock = threading.Lock()
+
 # ── Log ring ────────────────────────────────────────────────────────
 log_lock = threading.Lock()
 log_ring = []
@@ -189,6 +189,16 @@ def _telemetry_summarize(events):
     pool = {"hit": 0, "warm": 0, "evict": 0, "miss": 0}
     prompt_ms = []
     turn_ms = []
+    context_ms = {}
+    context_dropped = {}
+    pack_tok = {}
+    pack_cut = {}
+    pack_trimmed = 0
+    prefix_turns = prefix_repeats = 0
+    last_prefix_fp = None
+    shared_prefix = []
+    reflection = {"batches": 0, "turns": 0, "ingests": 0}
+    reflection_lag = []
     for ev in events:
         name = ev.get("event", "?")
         counts[name] = counts.get(name, 0) + 1
@@ -200,6 +210,35 @@ def _telemetry_summarize(events):
             prompt_ms.append(ev["ms"])
         elif name == "aig_turn" and isinstance(ev.get("total_ms"), (int, float)):
             turn_ms.append(ev["total_ms"])
+            fp = ev.get("prefix_fp")
+            if fp:
+                prefix_turns += 1
+                if fp == last_prefix_fp:
+                    prefix_repeats += 1
+                last_prefix_fp = fp
+                if isinstance(ev.get("shared_prefix_chars"), (int, float)) and ev.get("prompt_chars"):
+                    shared_prefix.append(ev["shared_prefix_chars"])
+        elif name == "memory_context":
+            for k, v in ev.items():
+                if k.endswith("_ms") and isinstance(v, (int, float)):
+                    context_ms.setdefault(k[:-3], []).append(v)
+            for section in (ev.get("dropped") or "").split(","):
+                if section:
+                    context_dropped[section] = context_dropped.get(section, 0) + 1
+        elif name == "memory_context_pack":
+            for k, v in ev.items():
+                if k.endswith("_tok") and isinstance(v, (int, float)):
+                    pack_tok.setdefault(k[:-4], []).append(v)
+                elif k.endswith("_cut") and isinstance(v, (int, float)):
+                    pack_cut[k[:-4]] = pack_cut.get(k[:-4], 0) + v
+            if any(k.endswith("_cut") for k in ev):
+                pack_trimmed += 1
+        elif name == "reflection_batch":
+            reflection["batches"] += 1
+            reflection["turns"] += ev.get("turns") or 0
+            reflection["ingests"] += ev.get("ingests") or 0
+            if isinstance(ev.get("lag_ms"), (int, float)):
+                reflection_lag.append(ev["lag_ms"])
     pool_selects = pool["hit"] + pool["warm"]
     summary = {
         "event_counts": counts,
@@ -220,6 +259,26 @@ def _telemetry_summarize(events):
 
     summary["acp_prompt_ms"] = _stats(prompt_ms)
     summary["aig_turn_ms"] = _stats(turn_ms)
+    summary["memory_context_ms"] = {k: _stats(v) for k, v in sorted(context_ms.items())} or None
+    summary["memory_context_dropped"] = context_dropped or None
+    # Per-section token spend and how much the budget cut, to tune budgets.
+    summary["memory_context_tokens"] = {
+        k: dict(_stats(v) or {}, cut_total=pack_cut.get(k, 0)) for k, v in sorted(pack_tok.items())
+    } or None
+    summary["memory_context_trimmed_turns"] = pack_trimmed
+    # How often consecutive AIG turns kept the same static prefix, and how
+    # many leading characters matched the previous prompt on that prefix.
+    summary["aig_prefix"] = {
+        "turns": prefix_turns,
+        "prefix_reuse_rate": round(prefix_repeats / (prefix_turns - 1), 3) if prefix_turns > 1 else None,
+        "shared_prefix_chars": _stats(shared_prefix),
+    } if prefix_turns else None
+    # Turns coalesced per reflection write and how long they queued.
+    summary["reflection"] = dict(
+        reflection,
+        turns_per_batch=round(reflection["turns"] / reflection["batches"], 2),
+        lag_ms=_stats(reflection_lag),
+    ) if reflection["batches"] else None
     return summary
 
 
@@ -1,6 +1,7 @@
 """Bridge domain: utils."""
 
 import copy
+import hashlib
 import json
 import os
 import re
@@ -12,6 +13,7 @@ import urllib.parse
 from bridge import config as _cfg
 from bridge import state as _st
 from bridge.cron import _push_notification
+from bridge.intent import _route_intents
 
 _HTTP_CONTENT_TYPE_RE = _cfg.HTTP_CONTENT_TYPE_RE
 _LMSTUDIO_ALLOWED_PORTS = _cfg.LMSTUDIO_ALLOWED_PORTS
@@ -249,34 +251,9 @@ def _classify_request_type(msg_lower):
 
     Uses phrase patterns and guards ambiguous single words (open/close/share/
     market/result) that previously misrouted everyday messages. Defaults to
-    'general', which lets the agentic ACP layer pick its own tools."""
-    m = msg_lower or ""
-
-    finance_strong = re.search(
-        r'\b(stock price|share price|stock market|stock quote|market cap|ticker symbol|'
-        r'nasdaq|s&p ?500|dow jones|earnings report)\b', m
-    ) or re.search(r'(?:^|\s)\$[a-z]{1,5}\b', m)
-    finance_noun = re.search(r'\b(stock|stocks|shares?|ticker|equit(?:y|ies)|crypto|bitcoin|etf)\b', m)
-    finance_action = re.search(r'\b(price|prices|quote|quotes|market|trading|trade|buy|sell|invest|worth|value)\b', m)
-    if finance_strong or (finance_noun and finance_action):
-        return "financial-data"
-
-    if re.search(r'\b(weather|forecast|temperature|raining|snowing|humidity|wind speed)\b', m):
-        return "weather-search"
-
-    if re.search(r'\b(news|headlines?|breaking news|current events?)\b', m) or \
-       re.search(r'\blatest\b.*\b(update|report|story|stories|happening|developments?)\b', m):
-        return "news-search"
-
-    if re.search(r'\b(kql|kusto|run a query|execute a query|table schema|sample rows|show me data)\b', m):
-        return "kusto-query"
-    if re.search(r'\b(count|summarize|filter by|group by|\bjoin\b|distinct|top \d|take \d)\b', m):
-        return "kusto-operator"
-
-    if re.search(r'\b(search the web|web search|look up|google|what happened|who won|search for)\b', m):
-        return "web-search"
-
-    return "general"
+    'general', which lets the agentic ACP layer pick its own tools. The
+    rules live in bridge.intent, which yields every routing label at once."""
+    return _route_intents(msg_lower or "").request_type
 _MEMORY_TABLES = _cfg.MEMORY_TABLES
 
 # Injected into tool-active ACP prompts so Eva persists durable facts herself.
@@ -298,6 +275,171 @@ _MEMORY_CAPTURE_DIRECTIVE = (
     "ephemeral chit-chat. If nothing durable was shared, do not call the tool. "
     "After saving, briefly confirm what you stored so the user knows it persisted."
 )
+# ── AIG responder system prompt ───────────────────────────────────────
+# The responder prompt is a byte-stable prefix (persona, judge directive,
+# runtime block) followed by the per-turn suffixes (memory context, data
+# retrieved). Nothing volatile may go into the prefix: a downstream prefix
+# cache only hits while every byte before the first change is identical.
+_AIG_PERSONA_PROMPT = (
+    "You are Eva, an AI assistant with persistent memory and active tool access. "
+    "You have skills for live data retrieval (stocks, weather, news, markets), "
+    "web search, image generation, and a Kusto persistent memory database. "
+    "Use the context below naturally as your own knowledge.\n\n"
+    "CRITICAL RULES:\n"
+    "- NEVER fabricate news headlines, stock prices, weather forecasts, or current events.\n"
+    "- NEVER pretend to 'fetch' or 'search' for data — you either have it in [Data Retrieved] below, or you don't.\n"
+    "- If [Data Retrieved] is present, use it as your authoritative source.\n"
+    "- If NO [Data Retrieved] section exists for a real-time question (news, stocks, weather), "
+    "honestly say you could not retrieve that information right now.\n"
+    "- Do NOT generate fake source citations (AP, Reuters, etc.) unless they appear in [Data Retrieved].\n"
+    "- When asked about your base model, underlying model, model ID, or what powers you, "
+    "answer using the [Runtime] section below. Do NOT guess or invent a model name.\n"
+    "- When the user asks to show, find, or generate an image, do NOT call the web fetch tool to look up image URLs. Instead emit a placeholder of the form [Image of <short description>] on its own line. The browser resolves the placeholder by calling gpt-image-1 (if the user asked to generate) or Wikimedia (if the user asked to find or show). Do not invent image URLs. Do not say you cannot show or generate images. Up to 3 placeholders per response are supported.\n"
+    "- If asked to produce a downloadable file (PDF, CSV, image, etc.), write it to the directory in environment variable EVA_ARTIFACTS_DIR using a short descriptive filename. After the file is written, end your message with a single line containing exactly: [[EVA_FILE]] <filename.ext>. Do not claim a file was produced unless you actually wrote it. Do not include the EVA_FILE marker if no file exists.\n\n"
+    "BROWSER CONTROL:\n"
+    "- You CAN control a real web browser through the Playwright tools available in this session "
+    "(navigate to URLs, click elements, type text, read page snapshots). The browser opens in a "
+    "separate Chromium window on the user's machine.\n"
+    "- When the user asks you to open a site, play a playlist, look something up on a specific page, "
+    "fill a form, or add an item to a cart, USE the Playwright browser tools to actually do it. "
+    "Do NOT reply that you 'cannot open websites or apps' — that is false; you can.\n"
+    "- HONESTY: only state that an action happened AFTER the corresponding browser tool has actually "
+    "run and returned. If a browser tool is unavailable or fails, say so plainly and offer a clickable "
+    "link instead. Never narrate a click, navigation, or purchase you did not actually perform.\n"
+    "- For purchases, account changes, or other irreversible/sensitive actions, stop at the final "
+    "confirmation step and ask the user to confirm before completing it.\n"
+    "- VISUAL BROWSER AGENT: for a supervised, multi-step visual task (add an item to a cart, fill "
+    "a multi-page form, navigate a flow that needs to be watched), you may launch Eva's own vision "
+    "browser agent by emitting a single line of the form: "
+    "[[EVA_BROWSER]]{\"goal\":\"<plain-language task>\",\"start_url\":\"<optional url>\"}[[/EVA_BROWSER]]. "
+    "It drives a real Chrome using a persistent profile, so sites you logged into once (e.g. Amazon) "
+    "stay signed in. It auto-approves browsing, searching, adding to cart, and sign-in, and pauses "
+    "ONLY at the final purchase commit: at that point it asks you in chat/voice to confirm, and you "
+    "reply yes or no. Use this when the user wants to watch the work happen; use the direct Playwright "
+    "tools above for quick one-off navigations. Emit at most one EVA_BROWSER block per reply, and only "
+    "when the user actually asked for a browser task.\n"
+    "- DESKTOP CONTROL: you can also operate the user's whole desktop by sight, including launching "
+    "applications (e.g. GIMP, a file manager, an editor). For a supervised desktop task, emit a single "
+    "line of the form: [[EVA_DESKTOP]]{\"goal\":\"<plain-language task, naming the app if relevant>\"}[[/EVA_DESKTOP]]. "
+    "A floating window opens, a vision model sees the screen and launches/clicks/types via the real "
+    "mouse and keyboard. It opens apps automatically and only pauses for your approval before a "
+    "genuinely destructive action. Use this for genuine desktop tasks (\"open GIMP and create a picture\"), not for things a "
+    "browser or a direct answer handles better. Emit at most one EVA_DESKTOP block per reply, and only "
+    "when the user actually asked to do something on the desktop. Do NOT say you cannot open or control "
+    "desktop applications.\n"
+    "- USE THE EXISTING BROWSER: for reliable web tasks (shopping, add to cart, fill a form), prefer "
+    "the EVA_BROWSER agent: it controls the page through the DOM so its clicks are precise, and it uses "
+    "a persistent Chrome profile, so after the user signs in once it stays logged in across runs. Only "
+    "when the user specifically insists on their CURRENTLY-open browser window use the DESKTOP agent "
+    "[[EVA_DESKTOP]] with a goal telling it to focus that Chrome window and open a new tab; that drives "
+    "the real cursor by sight, so it is less precise.\n"
+    "- ACT, DON'T EXPLAIN: when the user asks you to DO an actionable task (open or operate an app, run "
+    "a browser flow), act on the FIRST request by emitting the appropriate marker. Do NOT instead list "
+    "the manual steps for the user to follow, and do NOT wait to be told 'do it yourself' — describing "
+    "the steps instead of doing it is a failure. Before the marker, write ONE short present/future-tense "
+    "sentence announcing what you are about to do (\"I'm opening GIMP and starting a new canvas now.\"), "
+    "not a past-tense report after the fact. The agent then carries out the task.\n"
+    "- CAMERA / EYES: you can SEE through the user's webcam. When the user asks what you see, to look, "
+    "or to describe something in front of the camera, emit a single line of the form: "
+    "[[EVA_LOOK]]{\"question\":\"<what to look for>\"}[[/EVA_LOOK]] (the question is optional). A frame "
+    "is captured locally and you describe it. Do NOT say you cannot see or use a camera. Emit at most "
+    "one EVA_LOOK per reply, only when the user asks you to look or about what you can see.\n"
+    "- SCREENSHOTS vs CAMERA: 'screenshot', 'capture my screen', or 'what's on my desktop' means the "
+    "user wants to see their MONITOR — use [[EVA_DESKTOP]] with a goal like 'take a screenshot and "
+    "describe what is on screen'. 'Take a picture', 'what am I holding', or 'look at me' means the "
+    "user wants the WEBCAM — use [[EVA_LOOK]]. NEVER confuse these two.\n\n"
+)
+
+_AIG_JUDGE_DIRECTIVE = (
+    "JUDGE MODE — TOOLS DISABLED.\n"
+    "You are acting as a reviewer/judge of an existing draft. You have NO tool access "
+    "in this turn. Do NOT call any web search, Kusto, GitHub, Azure, browser, or other "
+    "tool. Do NOT attempt to fetch, retrieve, or verify data from external sources. "
+    "Evaluate ONLY the text you are given and respond from your own reasoning. "
+    "Treat any data in the draft as already-retrieved; your job is to critique it, not "
+    "to re-gather it.\n\n"
+)
+
+
+def _aig_runtime_block(backend, runtime_model, route_label):
+    """Ground-truth block Eva cites when asked which model she is."""
+    return (
+        f"[Runtime - AUTHORITATIVE GROUND TRUTH]\n"
+        f"This block is injected by tools/acp_bridge.py. It overrides any model self-knowledge.\n"
+        f"User-selected backend: {backend}\n"
+        f"Active responder model: {runtime_model}\n"
+        f"Routing path: {route_label}\n"
+        f"Wrapper: Eva AIG via tools/acp_bridge.py\n\n"
+        f"When asked which model you are, what your base model is, your model ID, "
+        f"who made you, or what powers you, you MUST answer using ONLY the values above. "
+        f"Do NOT claim to be Claude, GPT-4o, GPT-4, Opus, Sonnet, Haiku, Gemini, "
+        f"or any other model unless that exact name appears in 'Active responder model' above. "
+        f"If 'Active responder model' is '{runtime_model}', then your answer is "
+        f"'{runtime_model}' and nothing else. Do not second-guess this block.\n\n"
+    )
+
+
+
+def _aig_system_prefix(no_tools=False, runtime=None):
+    """Return the static system-prompt prefix for one model and route.
+
+    runtime is (backend, runtime_model, route_label), or None when the
+    route has no runtime block (LM Studio). Built once per key and reused,
+    so the same route always yields the same bytes.
+    """
+    key = (bool(no_tools), tuple(runtime) if runtime else None)
+    with _st.aig_prompt_lock:
+        prefix = _st.aig_prefix_cache.get(key)
+    if prefix is not None:
+        return prefix
+    prefix = (_AIG_JUDGE_DIRECTIVE if no_tools else "") + _AIG_PERSONA_PROMPT
+    if runtime:
+        prefix += _aig_runtime_block(*runtime)
+    with _st.aig_prompt_lock:
+        if len(_st.aig_prefix_cache) >= 64:
+            _st.aig_prefix_cache.clear()
+        _st.aig_prefix_cache[key] = prefix
+    return prefix
+
+
+
+def _prompt_fingerprint(text):
+    """Short stable digest of prompt text for telemetry (never the text itself)."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+
+def _shared_prefix_len(a, b):
+    """Length of the common prefix of two strings (binary search on slices)."""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+
+def _track_prompt_prefix(prefix, prompt):
+    """Fingerprint this turn's prompt and measure how much of it matches the
+    previous turn on the same prefix. Returns telemetry fields."""
+    fp = _prompt_fingerprint(prefix)
+    with _st.aig_prompt_lock:
+        previous = _st.aig_last_prompt.get(fp)
+        if len(_st.aig_last_prompt) >= 64 and fp not in _st.aig_last_prompt:
+            _st.aig_last_prompt.clear()
+        _st.aig_last_prompt[fp] = prompt
+    return {
+        "prefix_fp": fp,
+        "prefix_chars": len(prefix),
+        "prompt_fp": _prompt_fingerprint(prompt),
+        "prompt_chars": len(prompt),
+        "shared_prefix_chars": _shared_prefix_len(previous, prompt) if previous is not None else 0,
+    }
+
+
 _GOAL_CATEGORIES = _cfg.GOAL_CATEGORIES
 _GOAL_STATUSES = _cfg.GOAL_STATUSES
 _GOAL_COLUMNS = _cfg.GOAL_COLUMNS
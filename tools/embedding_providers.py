@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Eva Embedding Providers
+
+Pluggable text-embedding backends for the bridge's semantic recall. Every
+provider exposes the same small surface:
+
+    provider.namespace   -> vector namespace (EmbeddingStore Model column and
+                            VectorIndex model); vectors from different
+                            namespaces are never compared
+    provider.local       -> True when embedding runs in-process (no network)
+    provider.min_score   -> cosine floor for a semantic hit with this provider
+    provider.available() -> False when the provider cannot embed right now
+    provider.embed(texts)-> {text: vector} for the texts it could embed
+
+Providers:
+    OpenAIEmbeddingProvider  text-embedding-3-* over HTTPS (needs a key)
+    HashedNgramProvider      offline feature-hashed word + character n-gram
+                             sketch; no network, no GPU, ~tens of µs per text
+
+Usage:
+    from embedding_providers import make_provider
+    provider = make_provider("local")
+    vecs = provider.embed(["User likes hiking", "what outdoor hobbies do I have"])
+"""
+
+import abc
+import array
+import math
+import re
+import zlib
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Function words carry no recall signal; dropping them stands in for the IDF
+# half of TF-IDF, which an offline sketch has no corpus to estimate.
+_STOPWORDS = frozenset(
+    "a an and are as at be been but by can could did do does for from had has have "
+    "how i i'm if in into is it its me my of on or our so than that the their them "
+    "then there these they this to was we were what when where which who why will "
+    "with would you your".split()
+)
+
+
+class EmbeddingProvider(abc.ABC):
+    """Base class: subclasses set name/namespace and implement embed()."""
+
+    name = ""
+    local = False
+    min_score = 0.30
+
+    @property
+    def namespace(self):
+        return self.name
+
+    def available(self):
+        return True
+
+    @abc.abstractmethod
+    def embed(self, texts):
+        """Return {text: vector} for the texts this provider could embed."""
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI /v1/embeddings, one batched request per call.
+
+    The namespace is the model name itself, so vectors cached before
+    providers were pluggable stay valid.
+    """
+
+    name = "openai"
+
+    def __init__(self, model, key_fn, min_score=0.30, timeout=30):
+        self.model = model
+        self.min_score = min_score
+        self._key_fn = key_fn
+        self._timeout = timeout
+
+    @property
+    def namespace(self):
+        return self.model
+
+    def available(self):
+        return bool(self._key_fn())
+
+    def embed(self, texts):
+        key = self._key_fn()
+        if not key or not texts:
+            return {}
+        result = {}
+        try:
+            import requests as _req
+            resp = _req.post(
+                "https://api.openai.com/v1/embeddings",
+                headers={"Authorization": f"Bearer {key}", "Content-Type": "application/json"},
+                json={"model": self.model, "input": list(texts)},
+                timeout=self._timeout,
+            )
+            if resp.status_code == 200:
+                for item in resp.json().get("data", []):
+                    idx = item.get("index", -1)
+                    emb = item.get("embedding")
+                    if emb and 0 <= idx < len(texts):
+                        result[texts[idx]] = emb
+            else:
+                print(f"[Cognition] Embedding API failed ({resp.status_code}): {resp.text[:160]}")
+        except Exception as e:
+            print(f"[Cognition] Embedding request error: {e}")
+        return result
+
+
+class HashedNgramProvider(EmbeddingProvider):
+    """Offline sketch: signed feature hashing of word unigrams, adjacent word
+    pairs and character n-grams, with sublinear term weights, L2-normalized.
+
+    Character n-grams match inflections and partial words (hike/hiking,
+    Seattle/Seattle's); word pairs keep some phrase order. It is a lexical
+    embedding, so it will not relate true synonyms the way a learned model
+    does, but it needs no key, no network and no model download.
+    """
+
+    name = "local"
+    local = True
+
+    def __init__(self, dim=512, ngram_sizes=(3, 4), min_score=0.15):
+        self.dim = int(dim)
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.min_score = min_score
+
+    @property
+    def namespace(self):
+        grams = "".join(str(n) for n in self.ngram_sizes)
+        return f"local-hashed-ngram-v1-{self.dim}-{grams}"
+
+    def _features(self, text):
+        words = [w for w in _TOKEN_RE.findall(text.lower()) if w not in _STOPWORDS]
+        feats = {}
+        for w in words:
+            feats["w:" + w] = feats.get("w:" + w, 0.0) + 1.0
+            padded = f" {w} "
+            for n in self.ngram_sizes:
+                for i in range(len(padded) - n + 1):
+                    g = "c:" + padded[i:i + n]
+                    feats[g] = feats.get(g, 0.0) + 0.5
+        for a, b in zip(words, words[1:]):
+            g = f"p:{a} {b}"
+            feats[g] = feats.get(g, 0.0) + 1.0
+        return feats
+
+    def embed_one(self, text):
+        dim = self.dim
+        buckets = {}
+        for feat, tf in self._features(text).items():
+            h = zlib.crc32(feat.encode("utf-8"))
+            weight = 1.0 + math.log(tf) if tf >= 1.0 else tf
+            i = h % dim
+            buckets[i] = buckets.get(i, 0.0) + (-weight if h & 0x80000000 else weight)
+        vec = array.array("f", bytes(4 * dim))
+        norm = math.sqrt(sum(v * v for v in buckets.values()))
+        if norm > 0:
+            inv = 1.0 / norm
+            for i, v in buckets.items():
+                vec[i] = v * inv
+        return vec
+
+    def embed(self, texts):
+        return {t: self.embed_one(t) for t in texts if t}
+
+
+def make_provider(name, model="text-embedding-3-small", key_fn=None,
+                  openai_min_score=0.30, local_dim=512, local_min_score=0.15):
+    """Build a provider by name ("openai" or "local"). Unknown names fall
+    back to OpenAI with a warning so a typo never silently disables recall."""
+    name = (name or "openai").strip().lower()
+    if name == "local":
+        return HashedNgramProvider(dim=local_dim, min_score=local_min_score)
+    if name != "openai":
+        print(f"[Embeddings] Unknown provider '{name}', using openai")
+    return OpenAIEmbeddingProvider(model, key_fn or (lambda: ""), min_score=openai_min_score)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Eva Embedding Store
+
+Persistent vector cache for the bridge's semantic recall. Vectors are stored
+as packed float32 BLOBs in a small SQLite file, keyed by (Model, Hash) where
+Hash is the sha1 of the embedded text. Lookups fetch only the requested keys
+and writes insert only new vectors, so the cost of a turn no longer grows
+with the size of the cache.
+
+Replaces the old embeddings_cache.json (one JSON dict loaded and rewritten in
+full); migrate_json() imports that file once and renames it aside.
+
+Usage:
+    from embedding_store import EmbeddingStore
+    store = EmbeddingStore("~/.config/eva-standalone/embeddings.db")
+    store.put_many("text-embedding-3-small", {sha1_hex: [0.1, ...]})
+    vecs = store.get_many("text-embedding-3-small", [sha1_hex])  # {hash: array('f')}
+"""
+
+import array
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+# SQLite's default host-parameter limit is 999 on older builds.
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Embeddings (
+    Model TEXT NOT NULL,
+    Hash TEXT NOT NULL,
+    Dim INTEGER NOT NULL,
+    Vector BLOB NOT NULL,
+    PRIMARY KEY (Model, Hash)
+) WITHOUT ROWID
+"""
+
+
+def pack_vector(vec):
+    """Pack a sequence of floats as little-endian float32 bytes."""
+    arr = array.array("f", vec)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def unpack_vector(blob):
+    """Inverse of pack_vector(); returns an array('f')."""
+    arr = array.array("f")
+    arr.frombytes(blob)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+class EmbeddingStore:
+    """SQLite-backed float32 vector cache keyed by model and text hash."""
+
+    def __init__(self, db_path):
+        self._db_path = os.path.expanduser(db_path)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self._db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self._db_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    @property
+    def db_path(self):
+        return self._db_path
+
+    def get_many(self, model, hashes):
+        """Return {hash: array('f')} for the hashes present in the store."""
+        keys = list(dict.fromkeys(h for h in hashes if h))
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[i:i + _LOOKUP_CHUNK]
+                placeholders = ", ".join("?" for _ in chunk)
+                cursor = self._conn.execute(
+                    f"SELECT Hash, Vector FROM Embeddings WHERE Model = ? AND Hash IN ({placeholders})",
+                    [model] + chunk,
+                )
+                for h, blob in cursor.fetchall():
+                    found[h] = unpack_vector(blob)
+        return found
+
+    def put_many(self, model, vectors):
+        """Insert {hash: vector} pairs; existing keys are left untouched."""
+        rows = [(model, h, len(v), pack_vector(v)) for h, v in vectors.items() if h and v]
+        if not rows:
+            return 0
+        with self._lock:
+            try:
+                cursor = self._conn.executemany(
+                    "INSERT OR IGNORE INTO Embeddings (Model, Hash, Dim, Vector) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.commit()
+                return max(cursor.rowcount, 0)
+            except Exception as e:
+                self._conn.rollback()
+                print(f"[Embeddings] Store write failed: {e}")
+                return 0
+
+    def count(self, model=None):
+        """Number of stored vectors, optionally for one model."""
+        with self._lock:
+            if model is None:
+                return self._conn.execute("SELECT COUNT(*) FROM Embeddings").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM Embeddings WHERE Model = ?", (model,)).fetchone()[0]
+
+    def migrate_json(self, json_path, model):
+        """Import a legacy {sha1: [floats]} JSON cache once, then rename it.
+
+        The file is renamed to <name>.migrated so later startups skip it.
+        Returns the number of vectors imported (0 if there was nothing to do).
+        """
+        if not os.path.isfile(json_path):
+            return 0
+        try:
+            with open(json_path) as f:
+                legacy = json.load(f)
+        except Exception as e:
+            print(f"[Embeddings] Legacy cache unreadable, skipping migration: {e}")
+            return 0
+        imported = 0
+        if isinstance(legacy, dict):
+            items = [(h, v) for h, v in legacy.items() if isinstance(v, list)]
+            for i in range(0, len(items), _LOOKUP_CHUNK):
+                imported += self.put_many(model, dict(items[i:i + _LOOKUP_CHUNK]))
+        try:
+            os.replace(json_path, json_path + ".migrated")
+        except OSError as e:
+            print(f"[Embeddings] Could not rename legacy cache: {e}")
+        print(f"[Embeddings] Migrated {imported} vectors from {os.path.basename(json_path)}")
+        return imported
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
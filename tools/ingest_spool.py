@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Eva Ingest Spool
+
+Durable outbox for Kusto-bound ingests. The bridge appends every batch of
+rows here first (a local SQLite commit), and a background shipper drains
+the spool to the cluster in large batches, so memory writes cost local
+latency and survive throttling, outages and restarts.
+
+Entries are kept until the shipper acknowledges them. A failed entry is
+retried with its own backoff for as long as the failure looks transient
+(outage, throttling, timeout). One the cluster rejects outright is marked
+dead and stays on disk for inspection; requeue_dead() puts it back.
+
+Usage:
+    from ingest_spool import IngestSpool
+    spool = IngestSpool("~/.config/eva-standalone/kusto_spool.db")
+    spool.append(cluster, db, "Knowledge", ["Entity", "Value"], [{"Entity": "x", "Value": "y"}])
+    for entry in spool.due(time.time(), max_rows=500):
+        ...  # ship entry["rows"], then spool.ack([entry["id"]])
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Spool (
+    Id INTEGER PRIMARY KEY AUTOINCREMENT,
+    Cluster TEXT NOT NULL,
+    Db TEXT NOT NULL,
+    TableName TEXT NOT NULL,
+    Columns TEXT NOT NULL,
+    Rows TEXT NOT NULL,
+    RowCount INTEGER NOT NULL,
+    EnqueuedAt REAL NOT NULL,
+    Attempts INTEGER NOT NULL DEFAULT 0,
+    NextAttemptAt REAL NOT NULL DEFAULT 0,
+    LastError TEXT NOT NULL DEFAULT '',
+    Dead INTEGER NOT NULL DEFAULT 0
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS idx_spool_due ON Spool(Dead, NextAttemptAt, Id)"
+
+
+class IngestSpool:
+    """SQLite-backed append-only queue of (cluster, db, table, columns, rows) batches."""
+
+    def __init__(self, db_path):
+        self._db_path = os.path.expanduser(db_path)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self._db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self._db_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # FULL: an acknowledged append must survive a power loss, not just a crash.
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(_INDEX)
+        self._conn.commit()
+
+    @property
+    def db_path(self):
+        return self._db_path
+
+    def append(self, cluster, database, table, columns, rows, now):
+        """Persist one batch of rows; returns its entry id."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO Spool (Cluster, Db, TableName, Columns, Rows, RowCount, EnqueuedAt) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (cluster, database, table, json.dumps(list(columns)),
+                 json.dumps(list(rows), default=str), len(rows), now),
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def due(self, now, max_rows):
+        """Oldest live entries whose backoff has passed, up to about max_rows rows.
+
+        Always returns at least one due entry, however large.
+        """
+        entries = []
+        total = 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT Id, Cluster, Db, TableName, Columns, Rows, RowCount, EnqueuedAt, Attempts "
+                "FROM Spool WHERE Dead = 0 AND NextAttemptAt <= ? ORDER BY Id", (now,))
+            for row in cursor:
+                if entries and total + row[6] > max_rows:
+                    break
+                entries.append({
+                    "id": row[0], "cluster": row[1], "database": row[2], "table": row[3],
+                    "columns": json.loads(row[4]), "rows": json.loads(row[5]),
+                    "enqueued_at": row[7], "attempts": row[8],
+                })
+                total += row[6]
+            cursor.close()
+        return entries
+
+    def ack(self, ids):
+        """Delete shipped entries."""
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM Spool WHERE Id = ?", [(i,) for i in ids])
+            self._conn.commit()
+
+    def trim(self, entry_id, rows):
+        """Replace an entry's rows with the ones still to send (the rest landed)."""
+        with self._lock:
+            self._conn.execute("UPDATE Spool SET Rows = ?, RowCount = ? WHERE Id = ?",
+                               (json.dumps(list(rows), default=str), len(rows), entry_id))
+            self._conn.commit()
+
+    def retry(self, ids, next_attempt_at, error, dead=False):
+        """Count a failed attempt; dead=True (a permanent rejection) parks the entries."""
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE Spool SET Attempts = Attempts + 1, NextAttemptAt = ?, LastError = ?, Dead = ? "
+                "WHERE Id = ?",
+                [(next_attempt_at, (error or "")[:500], int(bool(dead)), i) for i in ids],
+            )
+            self._conn.commit()
+
+    def requeue_dead(self, now):
+        """Make every dead entry due again with a fresh attempt count; returns how many."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE Spool SET Dead = 0, Attempts = 0, NextAttemptAt = ? WHERE Dead = 1", (now,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self):
+        """Backlog counts, oldest pending enqueue time and the next retry time."""
+        with self._lock:
+            pending, rows, oldest, next_at = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(RowCount), 0), MIN(EnqueuedAt), MIN(NextAttemptAt) "
+                "FROM Spool WHERE Dead = 0").fetchone()
+            dead, dead_rows = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(RowCount), 0) FROM Spool WHERE Dead = 1").fetchone()
+        return {
+            "pending_entries": pending,
+            "pending_rows": rows,
+            "oldest_enqueued_at": oldest,
+            "next_attempt_at": next_at,
+            "dead_entries": dead,
+            "dead_rows": dead_rows,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -15,12 +15,18 @@ Usage:
 Environment variables:
   KUSTO_CLUSTER_URL   — Full cluster URL (e.g. https://kvc-xxx.southcentralus.kusto.windows.net)
   KUSTO_DATABASE      — Default database name (optional)
+  KUSTO_STREAMING_INGEST — Set to 0 to ingest with .ingest inline only (default: streaming,
+                           falling back to inline for tables without streaming ingestion)
 """
 
+import gzip
 import json
 import os
+import re
 import sys
 import threading
+import time
+import urllib.parse
 
 # --- Azure Identity + Kusto SDK ---
 try:
@@ -30,11 +36,19 @@ try:
 except ImportError:
     HAS_AZURE = False
 
+# Error codes/messages a cluster returns when streaming ingestion is off for
+# the cluster, database or table.
+_STREAMING_DISABLED_RE = re.compile(
+    r"streaming\s*ingestion\w*?\s*(?:policy\s*)?(?:is\s*)?(?:not\s*enabled|disabled)", re.I)
+
 # --- MCP Protocol (NDJSON over stdio) ---
 
 class KustoMCPServer:
     """Minimal MCP server implementing tools for Azure Data Explorer."""
 
+    STREAMING_RECHECK_SECONDS = 3600  # retry streaming this long after a table reported it disabled
+    REQUEST_ATTEMPTS = 3              # tries per request on connection errors (and, for queries, timeouts, 429, 5xx)
+
     TOOLS = [
         {
             "name": "kusto_list_databases",
@@ -138,7 +152,7 @@ class KustoMCPServer:
         },
         {
             "name": "kusto_ingest_inline",
-            "description": "Ingest (write) data into a Kusto table using inline ingestion. Use this to store new knowledge, conversations, emotions, reflections, or memory summaries.",
+            "description": "Ingest (write) data into a Kusto table (streaming ingestion; inline where the cluster has streaming disabled). Use this to store new knowledge, conversations, emotions, reflections, or memory summaries.",
             "inputSchema": {
                 "type": "object",
                 "properties": {
@@ -243,6 +257,9 @@ class KustoMCPServer:
         self.default_database = os.environ.get("KUSTO_DATABASE", "")
         database_locked = os.environ.get("KUSTO_DATABASE_LOCKED", "").strip().lower()
         self.database_locked = database_locked in ("1", "true", "yes")
+        streaming = os.environ.get("KUSTO_STREAMING_INGEST", "1").strip().lower()
+        self.streaming_ingest = streaming not in ("0", "false", "no")
+        self._streaming_disabled = {}  # (cluster, database, table) -> time to try streaming again
         self._credential = None
         self._token = None
         self._lock = threading.Lock()
@@ -381,20 +398,51 @@ class KustoMCPServer:
             return "", "Error: database name required. Set KUSTO_DATABASE in locked mode."
         return "Eva", None
 
-    def _kusto_query(self, cluster_url, database, query, is_mgmt=False):
+    def _post(self, url, headers, timeout=60, idempotent=True, **kwargs):
+        """POST with a fresh bearer token, retrying transient failures.
+
+        Failures to connect are retried with a short backoff; so are read
+        timeouts, 429 and 5xx when the request is idempotent (ingests are
+        not: the rows may already have landed). A 401 drops the cached
+        credential and retries once with a new token. Returns the last
+        response, or raises the last transport error once the attempts are
+        used up.
+        """
+        refreshed = False
+        attempt = 0
+        while True:
+            attempt += 1
+            headers = dict(headers, Authorization=f"Bearer {self._get_token()}")
+            try:
+                resp = _requests.post(url, headers=headers, timeout=timeout, **kwargs)
+            except (_requests.exceptions.ConnectionError, _requests.exceptions.Timeout) as e:
+                sent = not isinstance(e, _requests.exceptions.ConnectionError)  # ConnectTimeout is one
+                if attempt >= self.REQUEST_ATTEMPTS or (sent and not idempotent):
+                    raise
+                self._log(f"Kusto request failed ({e}); retry {attempt}/{self.REQUEST_ATTEMPTS - 1}")
+                time.sleep(min(2 ** (attempt - 1), 4))
+                continue
+            if resp.status_code == 401 and not refreshed:
+                self._log("Kusto request got 401; retrying with a new token")
+                with self._lock:
+                    self._credential = None
+                refreshed = True
+                continue
+            if (idempotent and (resp.status_code == 429 or resp.status_code >= 500)
+                    and attempt < self.REQUEST_ATTEMPTS):
+                time.sleep(min(2 ** (attempt - 1), 4))
+                continue
+            return resp
+
+    def _kusto_query(self, cluster_url, database, query, is_mgmt=False, idempotent=True):
         """Execute a Kusto query and return formatted results."""
-        token = self._get_token()
         endpoint = "mgmt" if is_mgmt else "query"
         url = f"{cluster_url}/v1/rest/{endpoint}"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
         body = {"csl": query}
         if database:
             body["db"] = database
 
-        resp = _requests.post(url, json=body, headers=headers, timeout=60)
+        resp = self._post(url, {"Content-Type": "application/json"}, idempotent=idempotent, json=body)
 
         if resp.status_code != 200:
             return f"Kusto API error {resp.status_code}: {resp.text[:500]}"
@@ -402,6 +450,34 @@ class KustoMCPServer:
         data = resp.json()
         return self._format_kusto_response(data)
 
+    def _stream_ingest(self, cluster_url, database, table, csv_text):
+        """POST CSV rows to the streaming ingestion endpoint.
+
+        Returns True on success, an error message on failure, or None when
+        streaming ingestion is disabled for the table (remembered for
+        STREAMING_RECHECK_SECONDS) so the caller can fall back to
+        .ingest inline.
+        """
+        key = (cluster_url, database, table)
+        with self._lock:
+            disabled = self._streaming_disabled.get(key, 0) > time.time()
+        if not self.streaming_ingest or disabled:
+            return None
+        url = (f"{cluster_url}/v1/rest/ingest/{urllib.parse.quote(database, safe='')}/"
+               f"{urllib.parse.quote(table, safe='')}")
+        headers = {"Content-Type": "application/octet-stream", "Content-Encoding": "gzip"}
+        resp = self._post(url, headers, idempotent=False, params={"streamFormat": "Csv"},
+                          data=gzip.compress(csv_text.encode("utf-8"), compresslevel=1))
+        if resp.status_code == 200:
+            return True
+        text = resp.text or ""
+        if resp.status_code in (400, 403) and _STREAMING_DISABLED_RE.search(text):
+            self._log(f"Streaming ingestion disabled for {database}.{table}; using .ingest inline")
+            with self._lock:
+                self._streaming_disabled[key] = time.time() + self.STREAMING_RECHECK_SECONDS
+            return None
+        return f"Kusto API error {resp.status_code}: {text[:500]}"
+
     def _format_kusto_response(self, data):
         """Format Kusto JSON response into readable text."""
         tables = data.get("Tables", [])
@@ -549,11 +625,8 @@ class KustoMCPServer:
         # Get table schema to determine column order
         try:
             # Extract column names from the schema JSON
-            token = self._get_token()
-            resp = _requests.post(f"{cluster_url}/v1/rest/mgmt",
-                json={"csl": f".show table {table} schema as json", "db": database},
-                headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
-                timeout=15)
+            resp = self._post(f"{cluster_url}/v1/rest/mgmt", {"Content-Type": "application/json"}, timeout=15,
+                              json={"csl": f".show table {table} schema as json", "db": database})
             if resp.status_code != 200:
                 return f"Error getting schema: {resp.status_code}"
             schema_data = resp.json()
@@ -597,9 +670,15 @@ class KustoMCPServer:
                         vals.append(s)
             rows_csv.append(",".join(vals))
 
+        streamed = self._stream_ingest(cluster_url, database, table, "\n".join(rows_csv))
+        if streamed is True:
+            return f"Ingested {len(data)} row(s) into {table} via streaming ingestion."
+        if streamed:
+            return streamed
+
         ingest_cmd = f".ingest inline into table {table} <|\n" + "\n".join(rows_csv)
 
-        result = self._kusto_query(cluster_url, database, ingest_cmd, is_mgmt=True)
+        result = self._kusto_query(cluster_url, database, ingest_cmd, is_mgmt=True, idempotent=False)
         return f"Ingested {len(data)} row(s) into {table}. {result}"
 
     # --- Eva-specific tools ---
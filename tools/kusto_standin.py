@@ -0,0 +1,1025 @@
+#!/usr/bin/env python3
+"""
+Eva Kusto Stand-in
+
+Local HTTP server that answers the subset of the Kusto REST API used by the
+bridge and kusto_mcp.py, backed by a SqliteMemory file instead of a
+cluster. It lets every Kusto-mode path (memory context, candidate history,
+the ingest spool, the result cache, the circuit breaker) run under load on
+a laptop, for benchmarks and tests. It is not a KQL engine: queries
+outside the subset below are answered with HTTP 400, like a cluster
+rejecting a query.
+
+Endpoints (v1 response format, gzip when asked):
+    POST /v1/rest/query   tabular queries. Statements separated by ";" and
+                          named with "| as name" come back as one table per
+                          statement plus a table of contents, as a batch does.
+    POST /v1/rest/mgmt    .show databases, .show tables,
+                          .show table T cslschema, .show table T schema as json,
+                          .create-merge table T (...) (accepted for known tables),
+                          .ingest inline into table T <| csv rows
+    POST /v1/rest/ingest/{db}/{table}?streamFormat=Csv|Json|MultiJson
+                          streaming ingestion (body optionally gzipped).
+                          With streaming=False (--no-streaming) it answers
+                          400 StreamingIngestionPolicyNotEnabled, as a
+                          cluster without the streaming policy does.
+
+KQL subset: a table name followed by where, project, project-away, extend,
+order/sort by, take/limit, top, count, distinct, summarize (count, countif,
+sum, avg, min, max, dcount, arg_max, arg_min; by columns or expressions)
+and as. Expressions cover ==, !=, =~, !~, <, <=, >, >=, has, contains,
+startswith, endswith (with _cs and ! forms), in, in~, has_any, and/or/not,
+ago(), now(), datetime(), coalesce, iff, strcat, tolower, toupper, strlen,
+isnull/isnotnull/isempty/isnotempty and the to*/int()/real() casts. has is
+a case-insensitive substring match, and datetimes compare as ISO-8601 text
+(as SqliteMemory stores them).
+
+Latency and failures are injected per request (latency_ms, jitter_ms,
+error_rate, error_status), so the bridge's timeouts, retries and breaker
+see a degraded cluster.
+
+Usage:
+    python3 tools/kusto_standin.py --db /tmp/eva-bench/memory.db --port 8090 --latency-ms 40 [--no-streaming]
+    # then point KUSTO_CLUSTER_URL at http://127.0.0.1:8090
+
+    from kusto_standin import KustoStandIn
+    standin = KustoStandIn(SqliteMemory(path), latency_ms=20, error_rate=0.05).start()
+    rows = _kusto_query_direct(standin.url, "Eva", "Knowledge | take 5")
+    standin.stop()
+"""
+
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from sqlite_memory import SqliteMemory
+
+_SEED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eva_seed.kql")
+
+# Kusto column type -> v1 response DataType.
+_DATA_TYPES = {
+    "string": "String", "datetime": "DateTime", "real": "Double", "double": "Double",
+    "int": "Int32", "long": "Int64", "bool": "Boolean", "dynamic": "Object",
+    "decimal": "Decimal", "timespan": "TimeSpan", "guid": "Guid",
+}
+# SQLite declared type -> Kusto type, for tables the seed file does not define.
+_AFFINITY_TYPES = {"TEXT": "string", "REAL": "real", "INTEGER": "long"}
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+|//[^\n]*)
+  | (?P<str>'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.)*")
+  | (?P<span>\d+(?:\.\d+)?(?:ms|d|h|m|s)\b)
+  | (?P<num>\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)
+  | (?P<neg>![A-Za-z_]\w*~?)
+  | (?P<name>[A-Za-z_]\w*~?)
+  | (?P<op>==|!=|=~|!~|<=|>=|<>|[-+*/%<>=(),;|.])
+""", re.X)
+
+_SPAN_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400}
+_STRING_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\", "'": "'", '"': '"'}
+
+_COMPARE_OPS = {"==": "=", "!=": "<>", "<>": "<>", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+_CAST_FUNCS = {
+    "int": "INTEGER", "long": "INTEGER", "toint": "INTEGER", "tolong": "INTEGER",
+    "real": "REAL", "double": "REAL", "toreal": "REAL", "todouble": "REAL", "todecimal": "REAL",
+    "tostring": "TEXT", "string": "TEXT",
+}
+_AGGREGATES = {"count", "countif", "sum", "avg", "min", "max", "dcount"}
+_MISSING = object()
+
+_SHOW_TABLE_RE = re.compile(r"^\.show\s+table\s+(\w+)\s+(cslschema|schema\s+as\s+json)\s*$", re.I)
+_CREATE_TABLE_RE = re.compile(r"^\.create(?:-merge)?\s+table\s+(\w+)\s*\(", re.I)
+_INGEST_INLINE_RE = re.compile(r"^\.ingest\s+inline\s+into\s+table\s+(\w+)(?:\s+with\s*\([^)]*\))?\s*<\|\s*\n?", re.I)
+_INGEST_PATH_RE = re.compile(r"^/v1/rest/ingest/([^/]+)/([^/]+)$")
+_SEED_TABLE_RE = re.compile(r"\.create-merge\s+table\s+(\w+)\s*\(([^)]*)\)", re.S)
+
+
+class KqlError(ValueError):
+    """A query outside the stand-in's KQL subset, or an invalid one."""
+
+
+class StreamingDisabled(KqlError):
+    """Streaming ingestion was requested while the stand-in has it turned off."""
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if not m:
+            raise KqlError(f"Syntax error near: {text[pos:pos + 30]!r}")
+        pos = m.end()
+        if m.lastgroup != "ws":
+            tokens.append((m.lastgroup, m.group()))
+    return tokens
+
+
+def _unquote(token):
+    body = token[1:-1]
+    if token[0] == "'":
+        body = body.replace("''", "'")
+    return re.sub(r"\\(.)", lambda m: _STRING_ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def _iso(value):
+    return value.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse_datetime(text):
+    try:
+        value = datetime.datetime.fromisoformat(text.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise KqlError(f"Invalid datetime literal: {text!r}")
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _escape_like(value):
+    return str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class _Expr:
+    """A translated expression: SQL text, bind params, the columns it reads
+    and, for literals, the Python value (so ago()/datetime() fold early)."""
+
+    __slots__ = ("sql", "params", "refs", "value", "name", "aggregate")
+
+    def __init__(self, sql, params=(), refs=(), value=_MISSING, name=None, aggregate=None):
+        self.sql = sql
+        self.params = list(params)
+        self.refs = set(refs)
+        self.value = value
+        self.name = name            # default output column name
+        self.aggregate = aggregate  # aggregate function name, when this is one
+
+
+def _literal(value):
+    if isinstance(value, datetime.datetime):
+        return _Expr("?", [_iso(value)], value=value)
+    if isinstance(value, datetime.timedelta):
+        return _Expr(repr(value.total_seconds()), value=value)
+    if isinstance(value, bool):
+        return _Expr("1" if value else "0", value=value)
+    if isinstance(value, (int, float)):
+        return _Expr(repr(value), value=value)
+    return _Expr("?", [value], value=value)
+
+
+def _combine(template, *parts, **kwargs):
+    params, refs = [], set()
+    for part in parts:
+        params += part.params
+        refs |= part.refs
+    return _Expr(template.format(*(p.sql for p in parts)), params, refs, **kwargs)
+
+
+class _Translator:
+    """Recursive-descent translation of one KQL statement into SQLite SQL."""
+
+    def __init__(self, tokens, table_columns, now):
+        self.tokens = tokens
+        self.pos = 0
+        self.table_columns = table_columns
+        self.now = now
+        self.columns = []
+        self.in_summarize = False
+        self.stage = 0
+
+    # ── token helpers ─────────────────────────────────────────────────
+    def peek(self, offset=0):
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else (None, None)
+
+    def take(self):
+        tok = self.peek()
+        if tok[0] is None:
+            raise KqlError("Unexpected end of query")
+        self.pos += 1
+        return tok
+
+    def accept(self, text):
+        if self.peek()[1] == text:
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, text):
+        if not self.accept(text):
+            raise KqlError(f"Expected '{text}' near {self.peek()[1]!r}")
+
+    def at_op_end(self):
+        return self.peek()[1] in (None, "|", ";")
+
+    def name(self):
+        kind, text = self.take()
+        if kind != "name":
+            raise KqlError(f"Expected a name, got {text!r}")
+        return text
+
+    # ── statements ────────────────────────────────────────────────────
+    def statement(self):
+        """Returns (sql, params, columns, result_name)."""
+        table = self.name()
+        if table not in self.table_columns:
+            raise KqlError(f"Failed to resolve table or column expression named '{table}'")
+        self.columns = list(self.table_columns[table])
+        sql = f"SELECT {', '.join(_quote(c) for c in self.columns)} FROM {_quote(table)}"
+        params, order, result_name = [], None, None
+        while self.accept("|"):
+            op = self.name()
+            while self.peek()[1] == "-" and self.peek(1)[0] == "name":
+                self.take()
+                op += "-" + self.take()[1]  # project-away, mv-expand, ...
+            if op in ("order", "sort"):
+                self.expect("by")
+            if op == "as":
+                result_name = self.name()
+                continue
+            handler = getattr(self, "op_" + op.replace("-", "_"), None)
+            if handler is None:
+                raise KqlError(f"Operator '{op}' is not supported by the Kusto stand-in")
+            sql, params, order = handler(sql, params, order)
+        if self.peek()[0] is not None:
+            raise KqlError(f"Unexpected {self.peek()[1]!r}")
+        return sql, params, list(self.columns), result_name
+
+    def _from(self, sql):
+        self.stage += 1
+        return f"FROM ({sql}) AS _s{self.stage}"
+
+    @staticmethod
+    def _order_sql(order, columns):
+        """ORDER BY clause carried to a new stage, if its columns are still there."""
+        if not order or not order.refs <= set(columns):
+            return None, "", []
+        return order, f" ORDER BY {order.sql}", order.params
+
+    # ── tabular operators ─────────────────────────────────────────────
+    def op_where(self, sql, params, order):
+        cond = self.expr()
+        order, order_sql, order_params = self._order_sql(order, self.columns)
+        return (f"SELECT * {self._from(sql)} WHERE {cond.sql}{order_sql}",
+                params + cond.params + order_params, order)
+
+    op_filter = op_where
+
+    def op_take(self, sql, params, order):
+        count = self.integer()
+        order, order_sql, order_params = self._order_sql(order, self.columns)
+        return f"SELECT * {self._from(sql)}{order_sql} LIMIT {count}", params + order_params, order
+
+    op_limit = op_take
+
+    def integer(self):
+        kind, text = self.take()
+        if kind != "num" or not text.isdigit():
+            raise KqlError(f"Expected a row count, got {text!r}")
+        return int(text)
+
+    def order_items(self):
+        items = []
+        while True:
+            e = self.expr()
+            direction = "DESC"  # Kusto sorts descending unless told otherwise
+            if self.accept("asc"):
+                direction = "ASC"
+            elif self.accept("desc"):
+                direction = "DESC"
+            nulls = ""
+            if self.accept("nulls"):
+                nulls = " NULLS FIRST" if self.name() == "first" else " NULLS LAST"
+            items.append(_combine("{0} " + direction + nulls, e))
+            if not self.accept(","):
+                break
+        return _combine(", ".join("{%d}" % i for i in range(len(items))), *items)
+
+    def op_order(self, sql, params, order):
+        order = self.order_items()
+        return f"SELECT * {self._from(sql)} ORDER BY {order.sql}", params + order.params, order
+
+    op_sort = op_order
+
+    def op_top(self, sql, params, order):
+        count = self.integer()
+        self.expect("by")
+        order = self.order_items()
+        return f"SELECT * {self._from(sql)} ORDER BY {order.sql} LIMIT {count}", params + order.params, order
+
+    def _assignments(self):
+        """[(name, expr)] for `name = expr` / `expr` lists."""
+        items = []
+        while not self.at_op_end() and self.peek()[1] != "by":
+            name = None
+            if self.peek()[0] == "name" and self.peek(1)[1] == "=":
+                name = self.take()[1]
+                self.take()
+            e = self.expr()
+            items.append((name, e))
+            if not self.accept(","):
+                break
+        return items
+
+    def _default_name(self, e, taken):
+        if e.name and e.name not in taken:
+            return e.name
+        n = 1
+        while f"Column{n}" in taken:
+            n += 1
+        return f"Column{n}"
+
+    def _select(self, sql, params, order, outputs):
+        """SELECT the (name, expr) outputs from the previous stage."""
+        select = _combine(", ".join("{%d} AS %s" % (i, _quote(n)) for i, (n, _) in enumerate(outputs)),
+                          *(e for _, e in outputs))
+        order, order_sql, order_params = self._order_sql(order, self.columns)
+        self.columns = [n for n, _ in outputs]
+        return (f"SELECT {select.sql} {self._from(sql)}{order_sql}",
+                select.params + params + order_params, order)
+
+    def op_project(self, sql, params, order):
+        outputs = []
+        for name, e in self._assignments():
+            outputs.append((name or self._default_name(e, {n for n, _ in outputs}), e))
+        return self._select(sql, params, order, outputs)
+
+    def op_project_away(self, sql, params, order):
+        drop = set()
+        while True:
+            drop.add(self.name())
+            if not self.accept(","):
+                break
+        return self._select(sql, params, order,
+                            [(c, _Expr(_quote(c), refs=[c])) for c in self.columns if c not in drop])
+
+    def op_extend(self, sql, params, order):
+        outputs = [(c, _Expr(_quote(c), refs=[c])) for c in self.columns]
+        for name, e in self._assignments():
+            name = name or self._default_name(e, {n for n, _ in outputs})
+            existing = [i for i, (n, _) in enumerate(outputs) if n == name]
+            if existing:
+                outputs[existing[0]] = (name, e)
+            else:
+                outputs.append((name, e))
+        return self._select(sql, params, order, outputs)
+
+    def op_count(self, sql, params, order):
+        self.columns = ["Count"]
+        return f'SELECT COUNT(*) AS "Count" {self._from(sql)}', params, None
+
+    def op_distinct(self, sql, params, order):
+        if self.accept("*"):
+            names = list(self.columns)
+        else:
+            names = [self.name()]
+            while self.accept(","):
+                names.append(self.name())
+        missing = [n for n in names if n not in self.columns]
+        if missing:
+            raise KqlError(f"Failed to resolve scalar expression named '{missing[0]}'")
+        self.columns = names
+        return f"SELECT DISTINCT {', '.join(_quote(n) for n in names)} {self._from(sql)}", params, None
+
+    def op_summarize(self, sql, params, order):
+        self.in_summarize = True
+        try:
+            aggs = []  # (name, expr) or ("arg", func, by_expr, [columns]) for arg_max/arg_min
+            while not self.at_op_end() and self.peek()[1] != "by":
+                name = None
+                if self.peek()[0] == "name" and self.peek(1)[1] == "=":
+                    name = self.take()[1]
+                    self.take()
+                if self.peek()[1] in ("arg_max", "arg_min") and self.peek(1)[1] == "(":
+                    func = self.take()[1]
+                    self.expect("(")
+                    by_expr = self.expr()
+                    picked = []
+                    while self.accept(","):
+                        picked.append("*" if self.accept("*") else self.name())
+                    self.expect(")")
+                    aggs.append(("arg", func, by_expr, picked))
+                else:
+                    e = self.expr()
+                    if not e.aggregate:
+                        raise KqlError("summarize expects aggregation functions")
+                    aggs.append((name, e))
+                if not self.accept(","):
+                    break
+            keys = self._assignments() if self.accept("by") else []
+        finally:
+            self.in_summarize = False
+
+        outputs = []
+        taken = set()
+        for name, e in keys:
+            name = name or self._default_name(e, taken)
+            taken.add(name)
+            outputs.append((name, e))
+        drivers = sum(1 for a in aggs if a[0] == "arg") + sum(
+            1 for a in aggs if a[0] != "arg" and a[1].aggregate in ("min", "max"))
+        for agg in aggs:
+            if agg[0] != "arg":
+                name = agg[0] or agg[1].name
+                taken.add(name)
+                outputs.append((name, agg[1]))
+                continue
+            _, func, by_expr, picked = agg
+            if drivers > 1:
+                raise KqlError("The Kusto stand-in supports one arg_max/arg_min per summarize, without min()/max()")
+            by_name = self._default_name(by_expr, taken)
+            taken.add(by_name)
+            outputs.append((by_name, _combine(("MAX" if func == "arg_max" else "MIN") + "({0})", by_expr)))
+            if "*" in picked:
+                picked = [c for c in self.columns if c not in taken]
+            for col in picked:
+                if col not in self.columns:
+                    raise KqlError(f"Failed to resolve scalar expression named '{col}'")
+                if col not in taken:
+                    taken.add(col)
+                    outputs.append((col, _Expr(_quote(col), refs=[col])))
+        select = _combine(", ".join("{%d} AS %s" % (i, _quote(n)) for i, (n, _) in enumerate(outputs)),
+                          *(e for _, e in outputs))
+        sql = f"SELECT {select.sql} {self._from(sql)}"
+        params = select.params + params
+        if keys:
+            group = _combine(", ".join("{%d}" % i for i in range(len(keys))), *(e for _, e in keys))
+            sql += f" GROUP BY {group.sql}"
+            params += group.params
+        self.columns = [n for n, _ in outputs]
+        return sql, params, None
+
+    # ── expressions ───────────────────────────────────────────────────
+    def expr(self):
+        left = self.and_expr()
+        while self.accept("or"):
+            left = _combine("({0} OR {1})", left, self.and_expr())
+        return left
+
+    def and_expr(self):
+        left = self.comparison()
+        while self.accept("and"):
+            left = _combine("({0} AND {1})", left, self.comparison())
+        return left
+
+    def comparison(self):
+        left = self.additive()
+        kind, op = self.peek()
+        if op in _COMPARE_OPS:
+            self.take()
+            return _combine("({0} %s {1})" % _COMPARE_OPS[op], left, self.additive())
+        if op in ("=~", "!~"):
+            self.take()
+            return _combine("(lower({0}) %s lower({1}))" % ("=" if op == "=~" else "<>"), left, self.additive())
+        negated = kind == "neg"
+        word = op[1:] if negated else op
+        if kind not in ("name", "neg") or word not in (
+                "has", "has_cs", "contains", "contains_cs", "startswith", "startswith_cs",
+                "endswith", "endswith_cs", "in", "in~", "has_any"):
+            return left
+        self.take()
+        if word in ("in", "in~", "has_any"):
+            self.expect("(")
+            items = [self.additive()]
+            while self.accept(","):
+                items.append(self.additive())
+            self.expect(")")
+            if word == "has_any":
+                result = _combine("(" + " OR ".join("{0} LIKE {%d} ESCAPE '\\'" % (i + 1)
+                                                   for i in range(len(items))) + ")",
+                                  left, *(self._like(i, "%", "%") for i in items))
+            elif word == "in~":
+                result = _combine("(lower({0}) IN (" + ", ".join("lower({%d})" % (i + 1)
+                                                                for i in range(len(items))) + "))", left, *items)
+            else:
+                result = _combine("({0} IN (" + ", ".join("{%d}" % (i + 1) for i in range(len(items))) + "))",
+                                  left, *items)
+        else:
+            right = self.additive()
+            if word in ("has", "contains"):
+                result = _combine("({0} LIKE {1} ESCAPE '\\')", left, self._like(right, "%", "%"))
+            elif word in ("has_cs", "contains_cs"):
+                result = _combine("(instr({0}, {1}) > 0)", left, right)
+            elif word == "startswith":
+                result = _combine("({0} LIKE {1} ESCAPE '\\')", left, self._like(right, "", "%"))
+            elif word == "endswith":
+                result = _combine("({0} LIKE {1} ESCAPE '\\')", left, self._like(right, "%", ""))
+            elif word == "startswith_cs":
+                result = _combine("(substr({0}, 1, length({1})) = {1})", left, right)
+            else:  # endswith_cs
+                result = _combine("(substr({0}, -length({1})) = {1})", left, right)
+        return _combine("(NOT {0})", result) if negated else result
+
+    @staticmethod
+    def _like(e, prefix, suffix):
+        """LIKE pattern matching e as a literal substring."""
+        if e.value is not _MISSING:
+            return _Expr("?", [prefix + _escape_like(e.value) + suffix])
+        return _combine("('%s' || replace(replace(replace({0}, '\\', '\\\\'), '%%', '\\%%'), '_', '\\_') || '%s')"
+                        % (prefix, suffix), e)
+
+    def additive(self):
+        left = self.multiplicative()
+        while self.peek()[1] in ("+", "-"):
+            op = self.take()[1]
+            right = self.multiplicative()
+            if isinstance(left.value, datetime.datetime) and isinstance(right.value, datetime.timedelta):
+                left = _literal(left.value + right.value if op == "+" else left.value - right.value)
+            else:
+                left = _combine("({0} %s {1})" % op, left, right)
+        return left
+
+    def multiplicative(self):
+        left = self.unary()
+        while self.peek()[1] in ("*", "/", "%"):
+            op = self.take()[1]
+            left = _combine("({0} %s {1})" % op, left, self.unary())
+        return left
+
+    def unary(self):
+        if self.accept("-"):
+            operand = self.unary()
+            if isinstance(operand.value, (int, float, datetime.timedelta)) and not isinstance(operand.value, bool):
+                return _literal(-operand.value)
+            return _combine("(-{0})", operand)
+        return self.primary()
+
+    def primary(self):
+        kind, text = self.take()
+        if kind == "str":
+            return _literal(_unquote(text))
+        if kind == "num":
+            return _literal(float(text) if any(ch in text for ch in ".eE") else int(text))
+        if kind == "span":
+            unit = re.search(r"[a-z]+$", text).group()
+            return _literal(datetime.timedelta(seconds=float(text[:-len(unit)]) * _SPAN_UNITS[unit]))
+        if text == "(":
+            inner = self.expr()
+            self.expect(")")
+            return inner
+        if kind != "name":
+            raise KqlError(f"Unexpected {text!r}")
+        if text in ("true", "false"):
+            return _literal(text == "true")
+        if self.peek()[1] == "(":
+            return self.call(text)
+        if text not in self.columns:
+            raise KqlError(f"Failed to resolve scalar expression named '{text}'")
+        return _Expr(_quote(text), refs=[text], name=text)
+
+    def call(self, func):
+        self.expect("(")
+        args = []
+        if func in ("datetime", "todatetime") and self.peek()[0] not in ("str", "name") and self.peek()[1] != ")":
+            # Unquoted datetime(2026-01-01T00:00:00Z): take the raw text up to ")".
+            raw = []
+            while self.peek()[1] != ")":
+                raw.append(self.take()[1])
+            self.expect(")")
+            return _literal(_parse_datetime("".join(raw)))
+        while not self.accept(")"):
+            args.append(self.expr())
+            if not self.accept(","):
+                self.expect(")")
+                break
+        if func in _AGGREGATES:
+            if not self.in_summarize:
+                raise KqlError(f"{func}() is only supported inside summarize")
+            return self.aggregate(func, args)
+        if func == "ago":
+            return _literal(self.now - self._span(args, func))
+        if func == "now":
+            return _literal(self.now + (self._span(args, func) if args else datetime.timedelta()))
+        if func in ("datetime", "todatetime"):
+            if len(args) == 1 and isinstance(args[0].value, str):
+                return _literal(_parse_datetime(args[0].value))
+            return args[0] if len(args) == 1 else self._arity(func)
+        if func in _CAST_FUNCS:
+            if len(args) == 1 and isinstance(args[0].value, (int, float)) and func in ("int", "long", "real", "double"):
+                return _literal(int(args[0].value) if _CAST_FUNCS[func] == "INTEGER" else float(args[0].value))
+            return _combine("CAST({0} AS %s)" % _CAST_FUNCS[func], *self._args(args, 1, func))
+        simple = {"tolower": "lower({0})", "toupper": "upper({0})", "strlen": "length({0})",
+                  "isnull": "({0} IS NULL)", "isnotnull": "({0} IS NOT NULL)",
+                  "isempty": "({0} IS NULL OR {0} = '')", "isnotempty": "({0} IS NOT NULL AND {0} <> '')",
+                  "not": "(NOT {0})", "abs": "abs({0})", "round": "round({0})"}
+        if func in simple:
+            e = self._args(args, 1, func)[0]
+            return _Expr(simple[func].format(e.sql), e.params * simple[func].count("{0}"), e.refs)
+        if func in ("iff", "iif"):
+            return _combine("(CASE WHEN {0} THEN {1} ELSE {2} END)", *self._args(args, 3, func))
+        if func == "coalesce" and args:
+            return _combine("coalesce(" + ", ".join("{%d}" % i for i in range(len(args))) + ")", *args)
+        if func == "strcat" and args:
+            return _combine("(" + " || ".join("coalesce({%d}, '')" % i for i in range(len(args))) + ")", *args)
+        raise KqlError(f"Function '{func}' is not supported by the Kusto stand-in")
+
+    def _args(self, args, n, func):
+        if len(args) != n:
+            self._arity(func)
+        return args
+
+    @staticmethod
+    def _arity(func):
+        raise KqlError(f"Wrong number of arguments to {func}()")
+
+    @staticmethod
+    def _span(args, func):
+        if len(args) != 1 or not isinstance(args[0].value, datetime.timedelta):
+            raise KqlError(f"{func}() expects a timespan literal")
+        return args[0].value
+
+    @staticmethod
+    def aggregate(func, args):
+        if func == "count":
+            if args:
+                raise KqlError("count() takes no arguments")
+            return _Expr("COUNT(*)", name="count_", aggregate=func)
+        if len(args) != 1:
+            raise KqlError(f"Wrong number of arguments to {func}()")
+        arg = args[0]
+        suffix = arg.name or ""
+        if func == "countif":
+            return _combine("SUM(CASE WHEN {0} THEN 1 ELSE 0 END)", arg, name="countif_", aggregate=func)
+        if func == "dcount":
+            return _combine("COUNT(DISTINCT {0})", arg, name=f"dcount_{suffix}", aggregate=func)
+        return _combine(func.upper() + "({0})", arg, name=f"{func}_{suffix}", aggregate=func)
+
+
+def _split_statements(tokens):
+    statements, current = [], []
+    for tok in tokens:
+        if tok[1] == ";":
+            if current:
+                statements.append(current)
+            current = []
+        else:
+            current.append(tok)
+    if current:
+        statements.append(current)
+    return statements
+
+
+def _seed_table_types(path=_SEED_PATH):
+    """{table: {column: kusto type}} from the .create-merge blocks of eva_seed.kql."""
+    try:
+        with open(path) as f:
+            text = f.read()
+    except OSError:
+        return {}
+    types = {}
+    for table, body in _SEED_TABLE_RE.findall(text):
+        types[table] = {}
+        for pair in body.split(","):
+            if ":" in pair:
+                col, kind = pair.split(":", 1)
+                types[table][col.strip()] = kind.strip().lower()
+    return types
+
+
+def _value_type(rows, index):
+    """Kusto type for a result column, from its first non-null value."""
+    for row in rows:
+        value = row[index]
+        if value is not None:
+            return "long" if isinstance(value, int) else "real" if isinstance(value, float) else "string"
+    return "string"
+
+
+def _v1_table(name, columns, rows):
+    """columns is [(name, kusto type)]."""
+    return {
+        "TableName": name,
+        "Columns": [{"ColumnName": c, "DataType": _DATA_TYPES.get(t, "String"), "ColumnType": t}
+                    for c, t in columns],
+        "Rows": rows,
+    }
+
+
+class KustoStandIn:
+    """Kusto REST API subset over a SqliteMemory, served on a local port."""
+
+    def __init__(self, mem, host="127.0.0.1", port=0, database="Eva",
+                 latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_status=503, seed=None, streaming=True):
+        self.mem = mem
+        self.database = database
+        self.streaming = streaming
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._host = host
+        self._port = port
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._seed_types = _seed_table_types()
+        self._server = None
+        self._thread = None
+        self._stats = {"requests": 0, "queries": 0, "mgmt": 0, "streaming_ingests": 0, "errors_injected": 0,
+                       "bad_requests": 0, "rows_ingested": 0}
+
+    # ── lifecycle ─────────────────────────────────────────────────────
+    def start(self):
+        standin = self
+
+        class Handler(_Handler):
+            pass
+
+        Handler.standin = standin
+        self._server = _Server((self._host, self._port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="kusto-standin")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    # ── schema ────────────────────────────────────────────────────────
+    def table_types(self, table):
+        """[(column, kusto type)] for a table, in SqliteMemory column order."""
+        seed = self._seed_types.get(table, {})
+        return [(name, seed.get(name) or _AFFINITY_TYPES.get(decl.split()[0].upper() if decl else "", "string"))
+                for name, decl in self.mem.get_schema(table)]
+
+    def _table_columns(self):
+        return {t: self.mem.get_columns(t) for t in self.mem.list_tables()}
+
+    # ── request handling ──────────────────────────────────────────────
+    def inject(self):
+        """Sleep the configured latency; returns True when this request should fail."""
+        with self._lock:
+            delay = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            self._stats["requests"] += 1
+            if fail:
+                self._stats["errors_injected"] += 1
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        return fail
+
+    def query(self, csl):
+        """Run a query (one or more statements); returns the v1 response body."""
+        self._count("queries")
+        statements = _split_statements(_tokenize(csl))
+        if not statements:
+            raise KqlError("Empty query")
+        now = datetime.datetime.now(datetime.timezone.utc)
+        tables_by_name = self._table_columns()
+        results = []
+        for i, tokens in enumerate(statements):
+            translator = _Translator(tokens, tables_by_name, now)
+            sql, params, columns, name = translator.statement()
+            try:
+                rows = self.mem.query(sql, tuple(params), strict=True)
+            except sqlite3.Error as e:
+                raise KqlError(f"Query execution failed: {e}")
+            results.append((name or ("PrimaryResult" if len(statements) == 1 else f"Table_{i}"), columns,
+                            [[r.get(c) for c in columns] for r in rows]))
+        tables = [_v1_table(f"Table_{i}", [(c, _value_type(rows, j)) for j, c in enumerate(cols)], rows)
+                  for i, (_, cols, rows) in enumerate(results)]
+        if len(results) > 1:
+            n = len(tables)
+            tables.append(_v1_table(f"Table_{n}", [("Value", "string")], [["{}"]]))
+            tables.append(_v1_table(f"Table_{n + 1}", [("Timestamp", "datetime"), ("Severity", "int")], [["", 4]]))
+            toc = [[i, "QueryResult", name, str(i), ""] for i, (name, _, _) in enumerate(results)]
+            toc.append([n, "QueryProperties", "@ExtendedProperties", str(n), ""])
+            toc.append([n + 1, "QueryStatus", "QueryStatus", str(n + 1), ""])
+            tables.append(_v1_table(f"Table_{n + 2}", [(c, "string") for c in
+                                                       ("Ordinal", "Kind", "Name", "Id", "PrettyName")], toc))
+        return {"Tables": tables}
+
+    def mgmt(self, csl):
+        """Run a management command; returns the v1 response body."""
+        self._count("mgmt")
+        command = csl.strip()
+        lowered = " ".join(command.lower().split())
+        if lowered == ".show databases":
+            return {"Tables": [_v1_table("Table_0", [("DatabaseName", "string"), ("PersistentStorage", "string"),
+                                                     ("Version", "string"), ("IsCurrent", "bool")],
+                                         [[self.database, self.mem.db_path, "v1.0", True]])]}
+        if lowered == ".show tables":
+            return {"Tables": [_v1_table("Table_0", [("TableName", "string"), ("DatabaseName", "string"),
+                                                     ("Folder", "string"), ("DocString", "string")],
+                                         [[t, self.database, "", ""] for t in self.mem.list_tables()])]}
+        m = _SHOW_TABLE_RE.match(command)
+        if m:
+            return self._show_schema(m.group(1), as_json=m.group(2).lower() != "cslschema")
+        m = _CREATE_TABLE_RE.match(command)
+        if m:
+            return self._show_schema(m.group(1), as_json=False)
+        m = _INGEST_INLINE_RE.match(command)
+        if m:
+            return self._ingest_inline(m.group(1), command[m.end():])
+        raise KqlError(f"Management command is not supported by the Kusto stand-in: {command[:60]!r}")
+
+    def _show_schema(self, table, as_json):
+        if not self.mem.table_exists(table):
+            raise KqlError(f"Table '{table}' was not found")
+        types = self.table_types(table)
+        cols = [("TableName", "string"), ("Schema", "string"), ("DatabaseName", "string"),
+                ("Folder", "string"), ("DocString", "string")]
+        if as_json:
+            schema = json.dumps({"Name": table, "OrderedColumns": [
+                {"Name": c, "Type": "System." + _DATA_TYPES.get(t, "String"), "CslType": t} for c, t in types]})
+        else:
+            schema = ",".join(f"{c}:{t}" for c, t in types)
+        return {"Tables": [_v1_table("Table_0", cols, [[table, schema, self.database, "", ""]])]}
+
+    def _ingest_inline(self, table, body):
+        if not self.mem.table_exists(table):
+            raise KqlError(f"Table '{table}' was not found")
+        rows = self.parse_rows(table, csv.reader(io.StringIO(body)))
+        return self.ingest_rows(table, rows)
+
+    def stream_ingest(self, table, stream_format, body):
+        """Streaming ingestion of a CSV or (Multi)JSON body; returns the v1 response body."""
+        self._count("streaming_ingests")
+        if not self.streaming:
+            raise StreamingDisabled(f"Streaming ingestion policy is not enabled for table '{table}'")
+        if not self.mem.table_exists(table):
+            raise KqlError(f"Table '{table}' was not found")
+        text = body.decode("utf-8")
+        fmt = (stream_format or "Csv").lower()
+        if fmt == "csv":
+            rows = self.parse_rows(table, csv.reader(io.StringIO(text)))
+        elif fmt in ("json", "multijson"):
+            columns = set(self.mem.get_columns(table))
+            decoder, pos, rows = json.JSONDecoder(), 0, []
+            while True:
+                while pos < len(text) and text[pos].isspace():
+                    pos += 1
+                if pos >= len(text):
+                    break
+                try:
+                    record, pos = decoder.raw_decode(text, pos)
+                except ValueError as e:
+                    raise KqlError(f"Invalid JSON in stream: {e}")
+                for item in record if isinstance(record, list) else [record]:
+                    rows.append({k: v for k, v in item.items() if k in columns})
+        else:
+            raise KqlError(f"streamFormat '{stream_format}' is not supported by the Kusto stand-in")
+        return self.ingest_rows(table, rows)
+
+    def parse_rows(self, table, records):
+        """Positional CSV records -> row dicts, typed by the table's Kusto schema."""
+        types = self.table_types(table)
+        rows = []
+        for record in records:
+            if not record or record == [""]:
+                continue
+            row = {}
+            for (col, kind), value in zip(types, record):
+                if value == "" and kind != "string":
+                    row[col] = None
+                elif kind == "bool":
+                    row[col] = value.strip().lower() in ("true", "1")
+                else:
+                    row[col] = value
+            rows.append(row)
+        return rows
+
+    def ingest_rows(self, table, rows):
+        """Append rows (as a cluster would, no upsert) and return the ingest result table."""
+        started = time.time()
+        # Kusto columns are all nullable; SqliteMemory has NOT NULL columns
+        # with defaults, so leave nulls out and let the defaults apply.
+        groups = {}
+        for row in rows:
+            present = {k: v for k, v in row.items() if v is not None}
+            if present:
+                groups.setdefault(tuple(present), []).append(present)
+        for columns, group in groups.items():
+            if not self.mem.ingest(table, list(columns), group):
+                raise KqlError(f"Ingestion into '{table}' failed")
+        self._count("rows_ingested", len(rows))
+        duration = f"00:00:{time.time() - started:09.6f}"
+        return {"Tables": [_v1_table("Table_0", [("ExtentId", "guid"), ("ItemLoaded", "string"),
+                                                 ("Duration", "timespan"), ("HasErrors", "bool"),
+                                                 ("OperationId", "guid")],
+                                     [[f"standin-{table}-{int(started * 1000)}", "inline", duration,
+                                       False, "00000000-0000-0000-0000-000000000000"]])]}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 64  # the default (5) drops SYNs when a context build connects at once
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like a cluster front end
+    disable_nagle_algorithm = True
+    standin = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+        standin = self.standin
+        if standin.inject():
+            self._reply(standin.error_status, {"error": {
+                "code": "ServiceUnavailable", "message": "Injected failure from the Kusto stand-in",
+                "@permanent": False}})
+            return
+        path, _, query_string = self.path.partition("?")
+        path = path.rstrip("/")
+        try:
+            ingest = _INGEST_PATH_RE.match(path)
+            if ingest:
+                if "gzip" in (self.headers.get("Content-Encoding") or ""):
+                    body = gzip.decompress(body)
+                stream_format = urllib.parse.parse_qs(query_string).get("streamFormat", ["Csv"])[0]
+                data = standin.stream_ingest(urllib.parse.unquote(ingest.group(2)), stream_format, body)
+            elif path == "/v1/rest/query":
+                data = standin.query(str(json.loads(body or b"{}").get("csl") or ""))
+            elif path == "/v1/rest/mgmt":
+                data = standin.mgmt(str(json.loads(body or b"{}").get("csl") or ""))
+            else:
+                self._reply(404, {"error": {"code": "NotFound", "message": f"No route for {path}"}})
+                return
+        except StreamingDisabled as e:
+            standin._count("bad_requests")
+            self._reply(400, {"error": {"code": "BadRequest_StreamingIngestionPolicyNotEnabled",
+                                        "message": str(e), "@permanent": True}})
+            return
+        except (KqlError, ValueError, OSError) as e:
+            standin._count("bad_requests")
+            self._reply(400, {"error": {"code": "General_BadRequest", "message": str(e), "@permanent": True}})
+            return
+        self._reply(200, data)
+
+    def _reply(self, status, data):
+        payload = json.dumps(data, default=str).encode()
+        gzipped = "gzip" in (self.headers.get("Accept-Encoding") or "")
+        if gzipped:
+            payload = gzip.compress(payload, compresslevel=1)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Local Kusto REST stand-in backed by SqliteMemory.")
+    parser.add_argument("--db", default=os.environ.get("EVA_MEMORY_DB", "~/.eva/memory.db"),
+                        help="SqliteMemory file to serve (created if missing)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--database", default="Eva", help="database name reported by .show databases")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform random extra latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected failures")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for jitter and failures")
+    parser.add_argument("--no-streaming", action="store_true",
+                        help="answer streaming ingestion as a cluster without the streaming policy")
+    args = parser.parse_args()
+    standin = KustoStandIn(SqliteMemory(args.db), host=args.host, port=args.port, database=args.database,
+                           latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                           error_status=args.error_status, seed=args.seed,
+                           streaming=not args.no_streaming).start()
+    print(f"Kusto stand-in serving {standin.mem.db_path} at {standin.url} (database {args.database})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -17,10 +17,47 @@ Usage:
     rows = mem.query("Knowledge", where="Entity = ?", params=("User",), limit=10)
 """
 
+import atexit
+import collections
+import contextlib
 import json
 import os
+import queue
+import re
 import sqlite3
 import threading
+import time
+
+# Read-only connections kept in the pool (override with EVA_MEMORY_READERS).
+_DEFAULT_MAX_READERS = 4
+
+# Statements that can run on a read-only pooled connection. Anything else
+# (INSERT/UPDATE/DELETE/DDL issued through query()) goes to the writer. A
+# WITH statement may end in INSERT/UPDATE/DELETE; the reader rejects those
+# and query() reruns them on the writer.
+_READ_PREFIXES = ("SELECT", "WITH", "EXPLAIN")
+
+# Write-behind group commit (EVA_MEMORY_WRITE_BEHIND=1). Deferred ingests are
+# held for at most this long, or until this many rows are queued, and then
+# written to every table in one transaction.
+_WRITE_BEHIND_WINDOW_SECONDS = 0.05
+_WRITE_BEHIND_MAX_ROWS = 500
+_WRITE_BEHIND_STOP = object()
+
+# Rows indexed per transaction when an FTS index is added to an existing table.
+_FTS_BACKFILL_CHUNK = 2000
+
+# Tokens of context returned around FTS matches by fts_search().
+_FTS_SNIPPET_TOKENS = 16
+
+# Upsert specs ("upsert" in a table's schema): rows with the same key (Entity
+# compares case-insensitively) are one logical record. Knowledge keys include
+# Value, so a relation can hold several facts (likes hiking, likes jazz) and
+# only exact repeats merge. An upsert adds the
+# row's counter to the stored one (default 1), keeps the larger of each "max"
+# column and the later "seen" time, and takes the other columns from the
+# newer row; compact() folds existing duplicates the same way.
+_NOCASE_KEYS = {"Entity"}
 
 # ── Schema ──────────────────────────────────────────────────────────────────
 # Mirrors eva_seed.kql. Column order matches Kusto table definitions so
@@ -45,13 +82,21 @@ _SCHEMA = {
             ("Confidence", "REAL DEFAULT 0.5"),
             ("Source", "TEXT DEFAULT ''"),
             ("Decay", "REAL DEFAULT 0.01"),
+            ("Mentions", "INTEGER DEFAULT 1"),
         ],
+        # upsert()/compact() merge a fact's repeats into one row (see the upsert notes above).
+        "upsert": {"key": ("Entity", "Relation", "Value"), "counter": "Mentions", "seen": "Timestamp",
+                   "max": ("Confidence",)},
         "indexes": [
             "CREATE INDEX IF NOT EXISTS idx_knowledge_entity ON Knowledge(Entity)",
             "CREATE INDEX IF NOT EXISTS idx_knowledge_conf ON Knowledge(Confidence)",
             "CREATE INDEX IF NOT EXISTS idx_knowledge_ts ON Knowledge(Timestamp)",
+            # upsert() finds a fact's row by its case-insensitive key.
+            "CREATE INDEX IF NOT EXISTS idx_knowledge_key ON Knowledge(Entity COLLATE NOCASE, Relation)",
         ],
         "fts": "CREATE VIRTUAL TABLE IF NOT EXISTS Knowledge_fts USING fts5(Entity, Relation, Value, content=Knowledge, content_rowid=rowid)",
+        # bm25() column weights: an entity-name hit outranks a value hit.
+        "fts_weights": {"Entity": 3.0, "Relation": 1.0, "Value": 2.0},
         "triggers": [
             """CREATE TRIGGER IF NOT EXISTS knowledge_ai AFTER INSERT ON Knowledge BEGIN
                  INSERT INTO Knowledge_fts(rowid, Entity, Relation, Value)
@@ -61,7 +106,79 @@ _SCHEMA = {
                  INSERT INTO Knowledge_fts(Knowledge_fts, rowid, Entity, Relation, Value)
                  VALUES ('delete', old.rowid, old.Entity, old.Relation, old.Value);
                END""",
+            """CREATE TRIGGER IF NOT EXISTS knowledge_au AFTER UPDATE OF Entity, Relation, Value ON Knowledge BEGIN
+                 INSERT INTO Knowledge_fts(Knowledge_fts, rowid, Entity, Relation, Value)
+                 VALUES ('delete', old.rowid, old.Entity, old.Relation, old.Value);
+                 INSERT INTO Knowledge_fts(rowid, Entity, Relation, Value)
+                 VALUES (new.rowid, new.Entity, new.Relation, new.Value);
+               END""",
+        ],
+    },
+    # Materialized latest-fact view of Knowledge, one row per (Entity, Relation).
+    # The triggers below keep this table current so profile recall and
+    # candidate promotion never aggregate the full history. Mentions sums the
+    # Knowledge rows' Mentions counters (1 per appended row, more once upserts
+    # or compaction have merged repeats).
+    "KnowledgeCurrent": {
+        "columns": [
+            ("Entity", "TEXT NOT NULL COLLATE NOCASE"),
+            ("Relation", "TEXT NOT NULL"),
+            ("Value", "TEXT NOT NULL"),
+            ("Confidence", "REAL DEFAULT 0.0"),
+            ("MaxConfidence", "REAL DEFAULT 0.0"),
+            ("Mentions", "INTEGER DEFAULT 0"),
+            ("LastSeen", "TEXT DEFAULT ''"),
+        ],
+        "indexes": [
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_kcur_key ON KnowledgeCurrent(Entity, Relation)",
+            "CREATE INDEX IF NOT EXISTS idx_kcur_conf ON KnowledgeCurrent(Confidence)",
+        ],
+        "triggers": [
+            """CREATE TRIGGER IF NOT EXISTS knowledge_current_ai_v2 AFTER INSERT ON Knowledge BEGIN
+                 INSERT INTO KnowledgeCurrent(Entity, Relation, Value, Confidence, MaxConfidence, Mentions, LastSeen)
+                 VALUES (new.Entity, new.Relation, new.Value, COALESCE(new.Confidence, 0.0),
+                         COALESCE(new.Confidence, 0.0), COALESCE(new.Mentions, 1), new.Timestamp)
+                 ON CONFLICT(Entity, Relation) DO UPDATE SET
+                   Value = CASE WHEN excluded.LastSeen >= LastSeen THEN excluded.Value ELSE Value END,
+                   Confidence = CASE WHEN excluded.LastSeen >= LastSeen THEN excluded.Confidence ELSE Confidence END,
+                   LastSeen = MAX(LastSeen, excluded.LastSeen),
+                   MaxConfidence = MAX(MaxConfidence, excluded.MaxConfidence),
+                   Mentions = Mentions + excluded.Mentions;
+               END""",
+            """CREATE TRIGGER IF NOT EXISTS knowledge_current_au_v2 AFTER UPDATE OF Value, Confidence, Timestamp, Mentions ON Knowledge BEGIN
+                 UPDATE KnowledgeCurrent SET
+                   Value = CASE WHEN new.Timestamp >= LastSeen THEN new.Value ELSE Value END,
+                   Confidence = CASE WHEN new.Timestamp >= LastSeen THEN COALESCE(new.Confidence, 0.0) ELSE Confidence END,
+                   LastSeen = MAX(LastSeen, new.Timestamp),
+                   MaxConfidence = MAX(MaxConfidence, COALESCE(new.Confidence, 0.0)),
+                   Mentions = Mentions + COALESCE(new.Mentions, 1) - COALESCE(old.Mentions, 1)
+                 WHERE Entity = new.Entity AND Relation = new.Relation;
+               END""",
+            # Deletes are rare (manual SQL, compaction); rebuild the key.
+            """CREATE TRIGGER IF NOT EXISTS knowledge_current_ad_v2 AFTER DELETE ON Knowledge BEGIN
+                 DELETE FROM KnowledgeCurrent WHERE Entity = old.Entity AND Relation = old.Relation;
+                 INSERT INTO KnowledgeCurrent(Entity, Relation, Value, Confidence, MaxConfidence, Mentions, LastSeen)
+                 SELECT k.Entity, k.Relation, k.Value, COALESCE(k.Confidence, 0.0), agg.MaxConfidence, agg.Mentions, k.Timestamp
+                 FROM Knowledge k,
+                      (SELECT MAX(COALESCE(Confidence, 0.0)) AS MaxConfidence, SUM(COALESCE(Mentions, 1)) AS Mentions
+                       FROM Knowledge WHERE Entity = old.Entity COLLATE NOCASE AND Relation = old.Relation) agg
+                 WHERE k.Entity = old.Entity COLLATE NOCASE AND k.Relation = old.Relation
+                 ORDER BY k.Timestamp DESC, k.rowid DESC LIMIT 1;
+               END""",
         ],
+        # One-shot backfill when the table is added to an existing database.
+        "backfill": """INSERT OR REPLACE INTO KnowledgeCurrent(Entity, Relation, Value, Confidence, MaxConfidence, Mentions, LastSeen)
+            SELECT Entity, Relation, Value, Confidence, MaxConfidence, Mentions, Timestamp FROM (
+              SELECT Entity, Relation, Value, COALESCE(Confidence, 0.0) AS Confidence, Timestamp,
+                     MAX(COALESCE(Confidence, 0.0)) OVER w AS MaxConfidence,
+                     SUM(COALESCE(Mentions, 1)) OVER w AS Mentions,
+                     ROW_NUMBER() OVER (PARTITION BY Entity COLLATE NOCASE, Relation
+                                        ORDER BY Timestamp DESC, rowid DESC) AS rn
+              FROM Knowledge
+              WINDOW w AS (PARTITION BY Entity COLLATE NOCASE, Relation)
+            ) WHERE rn = 1""",
+        # Pre-Mentions triggers (counted rows, not Knowledge.Mentions).
+        "obsolete_triggers": ["knowledge_current_ai", "knowledge_current_au", "knowledge_current_ad"],
     },
     "Conversations": {
         "columns": [
@@ -79,6 +196,24 @@ _SCHEMA = {
             "CREATE INDEX IF NOT EXISTS idx_conv_session ON Conversations(SessionId)",
             "CREATE INDEX IF NOT EXISTS idx_conv_role ON Conversations(Role)",
         ],
+        "fts": "CREATE VIRTUAL TABLE IF NOT EXISTS Conversations_fts USING fts5(Content, content=Conversations, content_rowid=rowid)",
+        "fts_weights": {"Content": 1.0},
+        "triggers": [
+            """CREATE TRIGGER IF NOT EXISTS conv_ai AFTER INSERT ON Conversations BEGIN
+                 INSERT INTO Conversations_fts(rowid, Content) VALUES (new.rowid, new.Content);
+               END""",
+            """CREATE TRIGGER IF NOT EXISTS conv_ad AFTER DELETE ON Conversations BEGIN
+                 INSERT INTO Conversations_fts(Conversations_fts, rowid, Content)
+                 SELECT 'delete', old.rowid, old.Content
+                 WHERE EXISTS (SELECT 1 FROM Conversations_fts_docsize WHERE id = old.rowid);
+               END""",
+            """CREATE TRIGGER IF NOT EXISTS conv_au AFTER UPDATE OF Content ON Conversations BEGIN
+                 INSERT INTO Conversations_fts(Conversations_fts, rowid, Content)
+                 SELECT 'delete', old.rowid, old.Content
+                 WHERE EXISTS (SELECT 1 FROM Conversations_fts_docsize WHERE id = old.rowid);
+                 INSERT INTO Conversations_fts(rowid, Content) VALUES (new.rowid, new.Content);
+               END""",
+        ],
     },
     "EmotionState": {
         "columns": [
@@ -110,6 +245,24 @@ _SCHEMA = {
             "CREATE INDEX IF NOT EXISTS idx_memsumm_ts ON MemorySummaries(Timestamp)",
             "CREATE INDEX IF NOT EXISTS idx_memsumm_period ON MemorySummaries(Period)",
         ],
+        "fts": "CREATE VIRTUAL TABLE IF NOT EXISTS MemorySummaries_fts USING fts5(Summary, content=MemorySummaries, content_rowid=rowid)",
+        "fts_weights": {"Summary": 1.0},
+        "triggers": [
+            """CREATE TRIGGER IF NOT EXISTS memsumm_ai AFTER INSERT ON MemorySummaries BEGIN
+                 INSERT INTO MemorySummaries_fts(rowid, Summary) VALUES (new.rowid, new.Summary);
+               END""",
+            """CREATE TRIGGER IF NOT EXISTS memsumm_ad AFTER DELETE ON MemorySummaries BEGIN
+                 INSERT INTO MemorySummaries_fts(MemorySummaries_fts, rowid, Summary)
+                 SELECT 'delete', old.rowid, old.Summary
+                 WHERE EXISTS (SELECT 1 FROM MemorySummaries_fts_docsize WHERE id = old.rowid);
+               END""",
+            """CREATE TRIGGER IF NOT EXISTS memsumm_au AFTER UPDATE OF Summary ON MemorySummaries BEGIN
+                 INSERT INTO MemorySummaries_fts(MemorySummaries_fts, rowid, Summary)
+                 SELECT 'delete', old.rowid, old.Summary
+                 WHERE EXISTS (SELECT 1 FROM MemorySummaries_fts_docsize WHERE id = old.rowid);
+                 INSERT INTO MemorySummaries_fts(rowid, Summary) VALUES (new.rowid, new.Summary);
+               END""",
+        ],
     },
     "Reflections": {
         "columns": [
@@ -120,6 +273,24 @@ _SCHEMA = {
             ("Effectiveness", "TEXT DEFAULT ''"),
         ],
         "indexes": ["CREATE INDEX IF NOT EXISTS idx_refl_ts ON Reflections(Timestamp)"],
+        "fts": "CREATE VIRTUAL TABLE IF NOT EXISTS Reflections_fts USING fts5(Observation, content=Reflections, content_rowid=rowid)",
+        "fts_weights": {"Observation": 1.0},
+        "triggers": [
+            """CREATE TRIGGER IF NOT EXISTS refl_ai AFTER INSERT ON Reflections BEGIN
+                 INSERT INTO Reflections_fts(rowid, Observation) VALUES (new.rowid, new.Observation);
+               END""",
+            """CREATE TRIGGER IF NOT EXISTS refl_ad AFTER DELETE ON Reflections BEGIN
+                 INSERT INTO Reflections_fts(Reflections_fts, rowid, Observation)
+                 SELECT 'delete', old.rowid, old.Observation
+                 WHERE EXISTS (SELECT 1 FROM Reflections_fts_docsize WHERE id = old.rowid);
+               END""",
+            """CREATE TRIGGER IF NOT EXISTS refl_au AFTER UPDATE OF Observation ON Reflections BEGIN
+                 INSERT INTO Reflections_fts(Reflections_fts, rowid, Observation)
+                 SELECT 'delete', old.rowid, old.Observation
+                 WHERE EXISTS (SELECT 1 FROM Reflections_fts_docsize WHERE id = old.rowid);
+                 INSERT INTO Reflections_fts(rowid, Observation) VALUES (new.rowid, new.Observation);
+               END""",
+        ],
     },
     "HeuristicsIndex": {
         "columns": [
@@ -131,7 +302,11 @@ _SCHEMA = {
             ("Tags", "TEXT DEFAULT '[]'"),
             ("Context", "TEXT DEFAULT ''"),
         ],
-        "indexes": ["CREATE INDEX IF NOT EXISTS idx_heur_entity ON HeuristicsIndex(Entity)"],
+        "upsert": {"key": ("Entity",), "counter": "Frequency", "seen": "LastSeen", "max": ()},
+        "indexes": [
+            "CREATE INDEX IF NOT EXISTS idx_heur_entity ON HeuristicsIndex(Entity)",
+            "CREATE INDEX IF NOT EXISTS idx_heur_key ON HeuristicsIndex(Entity COLLATE NOCASE)",
+        ],
     },
     "Goals": {
         "columns": [
@@ -200,6 +375,10 @@ _SCHEMA = {
     },
 }
 
+# Upsert specs by table, for callers that merge rows outside this module (the
+# bridge's Kusto path uses the same specs as upsert()/compact()).
+UPSERT_TABLES = {t: spec["upsert"] for t, spec in _SCHEMA.items() if "upsert" in spec}
+
 # Seed data matching eva_seed.kql (sanitized).
 _SEED = {
     "EmotionBaseline": [
@@ -272,70 +451,314 @@ _SEED = {
 }
 
 
+def _batch_table(sql):
+    """Table written by a batch's INSERT (or an upsert's statement pair)."""
+    if isinstance(sql, tuple):
+        sql = sql[-1]
+    return sql.split()[2]
+
+
 class SqliteMemory:
-    """Thread-safe SQLite memory backend for Eva."""
+    """Thread-safe SQLite memory backend for Eva.
 
-    def __init__(self, db_path=None):
+    Reads and writes use separate connections. A bounded pool of read-only
+    connections serves query(), fts_search(), count() and friends so WAL
+    readers run in parallel; all writes go through one dedicated writer
+    connection serialized by ``_write_lock``.
+    """
+
+    def __init__(self, db_path=None, max_readers=None, write_behind=None):
         if db_path is None:
             db_path = os.environ.get("EVA_MEMORY_DB", os.path.expanduser("~/.eva/memory.db"))
+        if max_readers is None:
+            try:
+                max_readers = int(os.environ.get("EVA_MEMORY_READERS", _DEFAULT_MAX_READERS))
+            except ValueError:
+                max_readers = _DEFAULT_MAX_READERS
         self._db_path = os.path.expanduser(db_path)
-        self._lock = threading.Lock()
-        self._local = threading.local()
+        self._max_readers = max(1, max_readers)
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._idle_readers = []
+        self._reader_waiters = collections.deque()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._write_stats = {"commits": 0, "rows": 0, "deferred_rows": 0, "failed_rows": 0}
+        self._generations = {}
+        self._version_conn = None   # dedicated connection for PRAGMA data_version
+        self._version_lock = threading.Lock()
+        self._seen_version = None
+        self._external_generation = 0
+        self._write_queue = None
+        self._write_thread = None
+        self._fts_pending = set()
+        self._fts_stop = threading.Event()
+        self._fts_thread = None
         os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
         self._init_db()
+        if self._fts_pending:
+            self._fts_thread = threading.Thread(
+                target=self._fts_backfill_loop, name="sqlite-fts-backfill", daemon=True)
+            self._fts_thread.start()
+        if write_behind is None:
+            write_behind = os.environ.get("EVA_MEMORY_WRITE_BEHIND", "").strip().lower() in ("1", "true", "yes")
+        if write_behind:
+            self._start_write_behind()
 
     @property
     def db_path(self):
         return self._db_path
 
-    def _conn(self):
-        """Return a per-thread connection (SQLite objects can't cross threads)."""
-        conn = getattr(self._local, "conn", None)
-        if conn is None:
-            conn = sqlite3.connect(self._db_path, timeout=10)
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("PRAGMA foreign_keys=OFF")
-            conn.execute("PRAGMA busy_timeout=5000")
-            conn.row_factory = sqlite3.Row
-            self._local.conn = conn
+    def generation(self, table):
+        """Write generation of a table: bumped after every committed write to
+        it, so callers can cache derived data keyed by (table, generation)."""
+        return self._generations.get(table, 0)
+
+    def _note_external_writes(self):
+        # Callers hold _write_lock and call this before their own commit, so
+        # another process's commit since the last check is counted before
+        # _bump_generations() absorbs the new data_version as ours.
+        with self._version_lock:
+            if self._seen_version is None:
+                return
+            try:
+                version = self._data_version()
+            except sqlite3.Error:
+                return
+            if version != self._seen_version:
+                self._external_generation += 1
+                self._seen_version = version
+
+    def _bump_generations(self, tables):
+        # Callers hold _write_lock.
+        for table in tables:
+            self._generations[table] = self._generations.get(table, 0) + 1
+        # Our own commit moved data_version; absorb it so it does not read as
+        # a write from another process.
+        with self._version_lock:
+            if self._seen_version is not None:
+                self._seen_version = self._data_version()
+
+    def _data_version(self):
+        # Caller holds _version_lock. data_version is per connection: it
+        # changes when any *other* connection commits to the file.
+        if self._version_conn is None:
+            self._version_conn = self._connect(read_only=True)
+        return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def external_generation(self):
+        """Counter bumped when a commit from another connection is seen, e.g.
+        tools/sqlite_mcp.py writing facts for the model. Those writes never
+        pass through generation(), so caches keyed on it also key on this.
+        """
+        with self._version_lock:
+            try:
+                version = self._data_version()
+            except sqlite3.Error:
+                return self._external_generation
+            if self._seen_version is not None and version != self._seen_version:
+                self._external_generation += 1
+            self._seen_version = version
+            return self._external_generation
+
+    @property
+    def write_behind(self):
+        return self._write_thread is not None
+
+    def _connect(self, read_only=False):
+        # check_same_thread=False: pooled connections move between threads,
+        # but each is only ever used by one thread at a time.
+        conn = sqlite3.connect(self._db_path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=OFF")
+        conn.execute("PRAGMA busy_timeout=5000")
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+        conn.row_factory = sqlite3.Row
         return conn
 
+    def _writer_conn(self):
+        """Return the single writer connection. Caller must hold _write_lock."""
+        if self._writer is None:
+            self._writer = self._connect()
+        return self._writer
+
+    @contextlib.contextmanager
+    def _reader(self):
+        """Borrow a read-only connection from the pool.
+
+        The pool grows lazily up to max_readers. Once every connection is
+        checked out, callers queue and are handed connections in FIFO order,
+        so a busy chat path cannot starve the reflection or MCP threads.
+        """
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self._release_reader(conn)
+
+    def _acquire_reader(self):
+        with self._reader_lock:
+            if self._idle_readers:
+                return self._idle_readers.pop()
+            if self._reader_count >= self._max_readers:
+                waiter = [threading.Event(), None]
+                self._reader_waiters.append(waiter)
+            else:
+                self._reader_count += 1
+                waiter = None
+        if waiter is not None:
+            waiter[0].wait()
+            return waiter[1]
+        try:
+            return self._connect(read_only=True)
+        except Exception:
+            with self._reader_lock:
+                self._reader_count -= 1
+            raise
+
+    def _release_reader(self, conn):
+        with self._reader_lock:
+            if self._reader_waiters:
+                waiter = self._reader_waiters.popleft()
+                waiter[1] = conn
+                waiter[0].set()
+            else:
+                self._idle_readers.append(conn)
+
     def _init_db(self):
         """Create all tables, indexes, FTS, and seed data if the DB is new."""
-        conn = self._conn()
-        cursor = conn.cursor()
-        created_any = False
+        with self._write_lock:
+            conn = self._writer_conn()
+            cursor = conn.cursor()
+            created_any = False
+            cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+            existing = {row[0] for row in cursor.fetchall()}
 
-        for table_name, spec in _SCHEMA.items():
-            # Check if table exists
-            cursor.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
-                (table_name,),
-            )
-            if cursor.fetchone():
-                continue
+            # Triggers replaced by versioned ones must go before the new set
+            # is created, or both would fire.
+            for spec in _SCHEMA.values():
+                for name in spec.get("obsolete_triggers", []):
+                    if name in existing:
+                        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+                        existing.discard(name)
+                        print(f"[SQLite] Replaced trigger {name}")
+
+            for table_name, spec in _SCHEMA.items():
+                if table_name in existing:
+                    self._migrate_table(cursor, table_name, spec, existing)
+                    continue
 
-            created_any = True
-            col_defs = ", ".join(f"{name} {typedef}" for name, typedef in spec["columns"])
-            cursor.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({col_defs})")
+                created_any = True
+                col_defs = ", ".join(f"{name} {typedef}" for name, typedef in spec["columns"])
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({col_defs})")
 
-            for idx_sql in spec.get("indexes", []):
-                cursor.execute(idx_sql)
+                for idx_sql in spec.get("indexes", []):
+                    cursor.execute(idx_sql)
 
-            if "fts" in spec:
-                cursor.execute(spec["fts"])
+                if "fts" in spec:
+                    cursor.execute(spec["fts"])
                 for trigger_sql in spec.get("triggers", []):
                     cursor.execute(trigger_sql)
 
-        conn.commit()
+                # Derived tables added to an existing DB are filled from history
+                # once; new databases fill them via triggers as seeds land.
+                if "backfill" in spec:
+                    cursor.execute(spec["backfill"])
+                    if cursor.rowcount > 0:
+                        print(f"[SQLite] Backfilled {table_name}: {cursor.rowcount} rows")
+
+            conn.commit()
+
+            if created_any:
+                self._seed(conn)
 
-        if created_any:
-            self._seed(conn)
+            # Backfill identity seeds into existing databases that predate the
+            # personality rows. Runs on every startup but the INSERT OR IGNORE
+            # is a no-op when the row already exists (matched by Entity+Relation).
+            self._backfill_identity(conn)
 
-        # Backfill identity seeds into existing databases that predate the
-        # personality rows. Runs on every startup but the INSERT OR IGNORE
-        # is a no-op when the row already exists (matched by Entity+Relation).
-        self._backfill_identity(conn)
+    def _migrate_table(self, cursor, table_name, spec, existing):
+        """Add columns, FTS indexes and triggers introduced after a table was created.
+
+        A new FTS index only gets its triggers here; rows that predate it are
+        indexed by the backfill thread so startup stays fast on large DBs.
+        """
+        have = {row[1] for row in cursor.execute(f"PRAGMA table_info({table_name})").fetchall()}
+        for name, typedef in spec["columns"]:
+            if name not in have:
+                cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {name} {typedef}")
+                print(f"[SQLite] Added column {table_name}.{name}")
+        for idx_sql in spec.get("indexes", []):
+            cursor.execute(idx_sql)
+        fts_table = f"{table_name}_fts"
+        new_fts = "fts" in spec and fts_table not in existing
+        if new_fts:
+            cursor.execute(spec["fts"])
+        added_trigger = False
+        for trigger_sql in spec.get("triggers", []):
+            name = re.search(r"TRIGGER IF NOT EXISTS (\w+)", trigger_sql).group(1)
+            if name not in existing:
+                cursor.execute(trigger_sql)
+                added_trigger = True
+        if "fts" not in spec:
+            return
+        if not new_fts and added_trigger:
+            # Rows updated before the update trigger existed left stale terms.
+            # Start the index over and let the backfill thread refill it in
+            # chunks; an inline 'rebuild' would hold the write lock for the
+            # whole table at startup.
+            cursor.execute(f"DROP TABLE {fts_table}")
+            cursor.execute(spec["fts"])
+            print(f"[SQLite] Reset {fts_table}; re-indexing in background")
+        base_rows = cursor.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+        indexed_rows = cursor.execute(f"SELECT COUNT(*) FROM {fts_table}_docsize").fetchone()[0]
+        if indexed_rows < base_rows:
+            self._fts_pending.add(table_name)
+            print(f"[SQLite] Indexing {base_rows - indexed_rows} {table_name} rows into {fts_table} in background")
+
+    def _fts_backfill_loop(self):
+        """Index pre-existing rows into new FTS tables, one chunk per commit.
+
+        Rows written meanwhile are indexed by the triggers and skipped here.
+        fts_search() falls back to LIKE for a table until its backfill ends.
+        """
+        for table_name in sorted(self._fts_pending):
+            fts_table = f"{table_name}_fts"
+            cols = ", ".join(_SCHEMA[table_name]["fts_weights"])
+            last_rowid = 0
+            indexed = 0
+            while not self._fts_stop.is_set():
+                with self._write_lock:
+                    if self._fts_stop.is_set():
+                        return
+                    conn = self._writer_conn()
+                    try:
+                        bound = conn.execute(
+                            f"SELECT rowid FROM {table_name} WHERE rowid > ? "
+                            f"ORDER BY rowid LIMIT 1 OFFSET ?",
+                            (last_rowid, _FTS_BACKFILL_CHUNK - 1),
+                        ).fetchone()
+                        upper = bound[0] if bound else None
+                        cursor = conn.execute(
+                            f"INSERT INTO {fts_table}(rowid, {cols}) "
+                            f"SELECT rowid, {cols} FROM {table_name} "
+                            f"WHERE rowid > ? AND rowid <= ? "
+                            f"AND rowid NOT IN (SELECT id FROM {fts_table}_docsize)",
+                            (last_rowid, upper if upper is not None else 2 ** 63 - 1),
+                        )
+                        conn.commit()
+                        indexed += max(cursor.rowcount, 0)
+                    except Exception as e:
+                        conn.rollback()
+                        print(f"[SQLite] FTS backfill error on {table_name}: {e}")
+                        return
+                if upper is None:
+                    self._fts_pending.discard(table_name)
+                    print(f"[SQLite] {fts_table} ready ({indexed} rows backfilled)")
+                    break
+                last_rowid = upper
+                time.sleep(0.01)  # let request-path writes take the lock
 
     def _backfill_identity(self, conn):
         """Insert or update Eva identity Knowledge rows from seed data."""
@@ -388,13 +811,18 @@ class SqliteMemory:
 
     # ── Public API ──────────────────────────────────────────────────────────
 
-    def query(self, sql, params=None):
+    def query(self, sql, params=None, strict=False):
         """Execute a SELECT query and return list of dicts (same format as
         _kusto_query_direct).
 
+        Read statements run on a pooled read-only connection. Anything else
+        is executed (and committed) on the writer connection.
+
         Args:
             sql: Full SQL query string or a table name (shortcut for SELECT *).
             params: Optional tuple of bind parameters.
+            strict: Raise sqlite3 errors from a read instead of logging them
+                and returning an empty list.
 
         Returns:
             List of dicts, one per row. Empty list on error or no results.
@@ -405,85 +833,374 @@ class SqliteMemory:
         stripped = sql.strip()
         if stripped and " " not in stripped and not stripped.startswith("SELECT"):
             sql = f"SELECT * FROM {stripped}"
+            stripped = sql
 
-        with self._lock:
-            try:
-                cursor = self._conn().execute(sql, params)
+        if not stripped.upper().startswith(_READ_PREFIXES):
+            return self._execute_write(sql, params)
+
+        try:
+            with self._reader() as conn:
+                cursor = conn.execute(sql, params)
                 cols = [d[0] for d in cursor.description] if cursor.description else []
                 rows = cursor.fetchall()
                 return [dict(zip(cols, row)) for row in rows]
+        except sqlite3.OperationalError as e:
+            if stripped.upper().startswith("WITH") and "readonly" in str(e):
+                return self._execute_write(sql, params)
+            if strict:
+                raise
+            print(f"[SQLite] Query error: {e}")
+            return []
+        except Exception as e:
+            if strict:
+                raise
+            print(f"[SQLite] Query error: {e}")
+            return []
+
+    def _execute_write(self, sql, params):
+        """Run a non-SELECT statement on the writer connection and commit."""
+        with self._write_lock:
+            conn = self._writer_conn()
+            self._note_external_writes()
+            try:
+                cursor = conn.execute(sql, params)
+                cols = [d[0] for d in cursor.description] if cursor.description else []
+                rows = cursor.fetchall() if cols else []
+                conn.commit()
+                # Free-form SQL may touch any table (or several via triggers).
+                self._bump_generations(_SCHEMA)
+                return [dict(zip(cols, row)) for row in rows]
             except Exception as e:
+                conn.rollback()
                 print(f"[SQLite] Query error: {e}")
                 return []
 
-    def ingest(self, table, columns, rows_data):
-        """Insert rows into a table (same signature as _kusto_ingest_direct).
-
-        Args:
-            table: Table name.
-            columns: List of column names.
-            rows_data: List of dicts with column values.
+    def _prepare_insert(self, table, columns, rows_data):
+        """Validate columns and build (insert_sql, [param tuples]) for a table.
 
-        Returns:
-            True on success, False on error.
+        Returns (None, None) when the table or columns are unknown.
         """
-        if not rows_data:
-            return True
-
         if table not in _SCHEMA:
             print(f"[SQLite] Unknown table: {table}")
-            return False
+            return None, None
 
         # Validate columns against schema
         valid_cols = {c[0] for c in _SCHEMA[table]["columns"]}
         resolved = [c for c in columns if c in valid_cols]
         if not resolved:
             print(f"[SQLite] No matching columns for {table}")
-            return False
+            return None, None
 
         placeholders = ", ".join("?" for _ in resolved)
         col_list = ", ".join(resolved)
         insert_sql = f"INSERT INTO {table} ({col_list}) VALUES ({placeholders})"
 
-        with self._lock:
+        params = []
+        for row in rows_data:
+            vals = []
+            for c in resolved:
+                v = row.get(c, None)
+                if v is None:
+                    vals.append(None)
+                elif isinstance(v, bool):
+                    vals.append(1 if v else 0)
+                elif isinstance(v, (dict, list)):
+                    vals.append(json.dumps(v))
+                else:
+                    vals.append(v)
+            params.append(tuple(vals))
+        return insert_sql, params
+
+    def _write_batches(self, batches):
+        """Write [(insert_sql, params), ...] in a single transaction.
+
+        An upsert batch's SQL is an (update_sql, insert_sql) pair run row by
+        row: the insert only applies when the update matched nothing.
+        """
+        rows = sum(len(params) for _, params in batches)
+        with self._write_lock:
+            conn = self._writer_conn()
+            self._note_external_writes()
             try:
-                conn = self._conn()
-                for row in rows_data:
-                    vals = []
-                    for c in resolved:
-                        v = row.get(c, None)
-                        if v is None:
-                            vals.append(None)
-                        elif isinstance(v, bool):
-                            vals.append(1 if v else 0)
-                        elif isinstance(v, (dict, list)):
-                            vals.append(json.dumps(v))
-                        else:
-                            vals.append(v)
-                    conn.execute(insert_sql, vals)
+                for sql, params in batches:
+                    if isinstance(sql, tuple):
+                        for row_params in params:
+                            for statement in sql:
+                                conn.execute(statement, row_params)
+                    else:
+                        conn.executemany(sql, params)
                 conn.commit()
+                self._write_stats["commits"] += 1
+                self._write_stats["rows"] += rows
+                self._bump_generations({_batch_table(sql) for sql, _ in batches})
                 return True
             except Exception as e:
-                print(f"[SQLite] Ingest error ({table}): {e}")
+                conn.rollback()
+                tables = sorted({_batch_table(sql) for sql, _ in batches})
+                print(f"[SQLite] Ingest error ({', '.join(tables)}): {e}")
                 return False
 
-    def fts_search(self, table, terms, limit=20):
+    def ingest(self, table, columns, rows_data, defer=False):
+        """Insert rows into a table (same signature as _kusto_ingest_direct).
+
+        Args:
+            table: Table name.
+            columns: List of column names.
+            rows_data: List of dicts with column values.
+            defer: When write-behind is enabled, queue the rows for the
+                next group commit instead of committing now. Call flush()
+                before reading them back. Ignored otherwise.
+
+        Returns:
+            True on success (or once queued), False on error.
+        """
+        if not rows_data:
+            return True
+
+        insert_sql, params = self._prepare_insert(table, columns, rows_data)
+        if insert_sql is None:
+            return False
+
+        if defer and self._write_queue is not None:
+            self._write_queue.put((insert_sql, params))
+            return True
+        return self._write_batches([(insert_sql, params)])
+
+    def upsert(self, table, columns, rows_data, defer=False):
+        """Merge rows into a table that has an upsert spec (Knowledge on
+        (Entity, Relation, Value), HeuristicsIndex on Entity).
+
+        A row whose key already exists updates the newest stored row for
+        that key: its counter (Mentions/Frequency) grows by the row's
+        counter (1 if absent), Confidence keeps the maximum, the seen time
+        keeps the later value and the remaining columns take the row's
+        values when it is not older. Rows with a new key are inserted.
+        Tables without a spec fall back to ingest(). Same arguments and
+        return value as ingest().
+        """
+        spec = _SCHEMA.get(table, {}).get("upsert")
+        if spec is None:
+            return self.ingest(table, columns, rows_data, defer=defer)
+        if not rows_data:
+            return True
+        valid_cols = {c[0] for c in _SCHEMA[table]["columns"]}
+        resolved = [c for c in columns if c in valid_cols]
+        if not all(k in resolved for k in spec["key"]):
+            print(f"[SQLite] Upsert into {table} needs key columns {', '.join(spec['key'])}")
+            return False
+        counter, seen = spec["counter"], spec["seen"]
+        cols = list(dict.fromkeys(resolved + [counter, seen]))
+
+        key_match = " AND ".join(
+            f"{k} = :{k}" + (" COLLATE NOCASE" if k in _NOCASE_KEYS else "") for k in spec["key"])
+        newer = f":{seen} >= COALESCE({seen}, '')"
+        assignments = []
+        for c in cols:
+            if c in spec["key"]:
+                continue
+            if c == counter:
+                assignments.append(f"{c} = COALESCE({c}, 1) + :{c}")
+            elif c == seen:
+                assignments.append(f"{c} = MAX(COALESCE({c}, ''), :{c})")
+            elif c in spec["max"]:
+                assignments.append(f"{c} = MAX(COALESCE({c}, :{c}), :{c})")
+            else:
+                assignments.append(f"{c} = CASE WHEN {newer} THEN :{c} ELSE {c} END")
+        update_sql = (
+            f"UPDATE {table} SET {', '.join(assignments)} WHERE rowid = ("
+            f"SELECT rowid FROM {table} WHERE {key_match} ORDER BY {seen} DESC, rowid DESC LIMIT 1)"
+        )
+        insert_sql = (
+            f"INSERT INTO {table} ({', '.join(cols)}) "
+            f"SELECT {', '.join(':' + c for c in cols)} WHERE changes() = 0"
+        )
+
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        params = []
+        for row in rows_data:
+            vals = {}
+            for c in cols:
+                v = row.get(c, None)
+                if isinstance(v, bool):
+                    v = 1 if v else 0
+                elif isinstance(v, (dict, list)):
+                    v = json.dumps(v)
+                vals[c] = v
+            if vals[counter] is None:
+                vals[counter] = 1
+            if vals[seen] is None:
+                vals[seen] = now
+            params.append(vals)
+
+        batch = ((update_sql, insert_sql), params)
+        if defer and self._write_queue is not None:
+            self._write_queue.put(batch)
+            return True
+        return self._write_batches([batch])
+
+    def compact(self, tables=None):
+        """Fold duplicate history in upsert tables into one row per key.
+
+        Each key keeps its oldest row (so rowid references such as the ANN
+        index stay valid), updated the way upsert() would have left it: the
+        counters summed, max columns maximised, and the other columns taken
+        from the newest row. Returns {table: {"before": n, "after": m}}.
+        """
+        targets = [t for t in (tables or _SCHEMA) if _SCHEMA.get(t, {}).get("upsert")]
+        self.flush()
+        result = {}
+        with self._write_lock:
+            conn = self._writer_conn()
+            self._note_external_writes()
+            for table in targets:
+                spec = _SCHEMA[table]["upsert"]
+                counter, seen = spec["counter"], spec["seen"]
+                partition = ", ".join(
+                    k + (" COLLATE NOCASE" if k in _NOCASE_KEYS else "") for k in spec["key"])
+                others = [c for c, _ in _SCHEMA[table]["columns"]
+                          if c not in spec["key"] and c != counter and c not in spec["max"]]
+                aggregates = [f"SUM(COALESCE({counter}, 1)) OVER w AS agg_{counter}"]
+                aggregates += [f"MAX({c}) OVER w AS agg_{c}" for c in spec["max"]]
+                assignments = [f"{counter} = c.agg_{counter}"]
+                assignments += [f"{c} = c.agg_{c}" for c in spec["max"]]
+                assignments += [f"{c} = l.{c}" for c in others]
+                try:
+                    before = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    conn.execute("DROP TABLE IF EXISTS temp.compact_keys")
+                    conn.execute(
+                        f"CREATE TEMP TABLE compact_keys AS SELECT keep_id, latest_id, "
+                        f"{', '.join(a.rsplit(' AS ', 1)[1] for a in aggregates)} FROM ("
+                        f"SELECT rowid AS id, MIN(rowid) OVER w AS keep_id, "
+                        f"FIRST_VALUE(rowid) OVER (PARTITION BY {partition} ORDER BY {seen} DESC, rowid DESC) AS latest_id, "
+                        f"COUNT(*) OVER w AS n, {', '.join(aggregates)} "
+                        f"FROM {table} WINDOW w AS (PARTITION BY {partition})"
+                        f") WHERE n > 1 AND id = keep_id")
+                    conn.execute(
+                        f"UPDATE {table} SET {', '.join(assignments)} "
+                        f"FROM compact_keys c JOIN {table} l ON l.rowid = c.latest_id "
+                        f"WHERE {table}.rowid = c.keep_id")
+                    key_match = " AND ".join(
+                        f"d.{k} = {table}.{k}" + (" COLLATE NOCASE" if k in _NOCASE_KEYS else "")
+                        for k in spec["key"])
+                    conn.execute(
+                        f"DELETE FROM {table} WHERE rowid NOT IN (SELECT keep_id FROM compact_keys) "
+                        f"AND EXISTS (SELECT 1 FROM compact_keys c JOIN {table} d ON d.rowid = c.keep_id "
+                        f"WHERE {key_match})")
+                    conn.execute("DROP TABLE temp.compact_keys")
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    print(f"[SQLite] Compaction of {table} failed: {e}")
+                    continue
+                after = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                result[table] = {"before": before, "after": after}
+                print(f"[SQLite] Compacted {table}: {before} -> {after} rows")
+            self._bump_generations(result)
+        return result
+
+    def flush(self, timeout=None):
+        """Barrier: block until every deferred ingest queued so far is committed.
+
+        Returns True once flushed (immediately when write-behind is off),
+        False if the timeout expired first.
+        """
+        if self._write_queue is None:
+            return True
+        done = threading.Event()
+        self._write_queue.put(done)
+        return done.wait(timeout)
+
+    def write_stats(self):
+        """Return commit/row counters plus the current write-behind backlog."""
+        stats = dict(self._write_stats)
+        stats["write_behind"] = self.write_behind
+        stats["queued"] = self._write_queue.qsize() if self._write_queue is not None else 0
+        return stats
+
+    def _start_write_behind(self):
+        self._write_queue = queue.Queue()
+        self._write_thread = threading.Thread(
+            target=self._write_behind_loop, name="sqlite-write-behind", daemon=True)
+        self._write_thread.start()
+        atexit.register(self._stop_write_behind)
+
+    def _stop_write_behind(self):
+        thread = self._write_thread
+        if thread is None:
+            return
+        self._write_queue.put(_WRITE_BEHIND_STOP)
+        thread.join(timeout=10)
+        self._write_thread = None
+        self._write_queue = None
+
+    def _write_behind_loop(self):
+        """Drain the queue, committing each window's rows in one transaction.
+
+        A window opens with the first queued item and closes after
+        _WRITE_BEHIND_WINDOW_SECONDS, at _WRITE_BEHIND_MAX_ROWS rows, or as
+        soon as a flush() barrier arrives.
+        """
+        q = self._write_queue
+        stopping = False
+        while not stopping:
+            item = q.get()
+            groups = collections.OrderedDict()
+            barriers = []
+            rows = 0
+            deadline = time.monotonic() + _WRITE_BEHIND_WINDOW_SECONDS
+            while True:
+                if item is _WRITE_BEHIND_STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    barriers.append(item)
+                else:
+                    insert_sql, params = item
+                    groups.setdefault(insert_sql, []).extend(params)
+                    rows += len(params)
+                if stopping or barriers or rows >= _WRITE_BEHIND_MAX_ROWS:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if groups:
+                self._write_stats["deferred_rows"] += rows
+                batches = list(groups.items())
+                if not self._write_batches(batches):
+                    # Retry table by table so one bad batch does not drop the rest.
+                    for batch in batches:
+                        if not self._write_batches([batch]):
+                            self._write_stats["failed_rows"] += len(batch[1])
+            for barrier in barriers:
+                barrier.set()
+
+    def fts_search(self, table, terms, limit=20, match_any=False):
         """Full-text search on a table that has an FTS5 index.
 
-        Currently only Knowledge_fts exists. Returns list of dicts from the
-        base table, ranked by relevance.
+        Knowledge, Conversations, Reflections and MemorySummaries are indexed.
+        Results are base-table rows ranked by bm25() with the table's column
+        weights, each with a "Snippet" of matching text. By default every term
+        must match; match_any=True ORs them for broader recall. Tables without
+        a ready index fall back to a LIKE scan (no snippets).
         """
         fts_table = f"{table}_fts"
-        # Check FTS table exists
-        with self._lock:
+        weights = _SCHEMA.get(table, {}).get("fts_weights")
+        with self._reader() as conn:
             try:
-                cursor = self._conn().execute(
+                if not weights or table in self._fts_pending:
+                    return self._like_search(conn, table, terms, limit, match_any)
+                # Check FTS table exists
+                cursor = conn.execute(
                     "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
                     (fts_table,),
                 )
                 if not cursor.fetchone():
                     # Fallback to LIKE search
-                    return self._like_search(table, terms, limit)
+                    return self._like_search(conn, table, terms, limit, match_any)
 
                 # Quote each term individually to prevent FTS5 syntax errors
                 # (e.g. bare colons, operators, or column references)
@@ -494,27 +1211,30 @@ class SqliteMemory:
                         safe_parts.append('"' + w.replace('"', '""') + '"')
                 if not safe_parts:
                     return []
-                safe_terms = " ".join(safe_parts)
+                safe_terms = (" OR " if match_any else " ").join(safe_parts)
+                weight_args = ", ".join(str(float(w)) for w in weights.values())
                 sql = (
-                    f"SELECT t.* FROM {table} t "
-                    f"JOIN {fts_table} f ON t.rowid = f.rowid "
+                    f"SELECT t.*, bm25({fts_table}, {weight_args}) AS Score, "
+                    f"snippet({fts_table}, -1, '', '', '…', {_FTS_SNIPPET_TOKENS}) AS Snippet "
+                    f"FROM {fts_table} f JOIN {table} t ON t.rowid = f.rowid "
                     f"WHERE {fts_table} MATCH ? "
-                    f"ORDER BY rank LIMIT ?"
+                    f"ORDER BY Score LIMIT ?"
                 )
-                cursor = self._conn().execute(sql, (safe_terms, limit))
+                cursor = conn.execute(sql, (safe_terms, limit))
                 cols = [d[0] for d in cursor.description]
                 return [dict(zip(cols, row)) for row in cursor.fetchall()]
             except Exception as e:
                 print(f"[SQLite] FTS search error: {e}")
-                return self._like_search(table, terms, limit)
+                return self._like_search(conn, table, terms, limit, match_any)
 
-    def _like_search(self, table, terms, limit):
+    def _like_search(self, conn, table, terms, limit, match_any=False):
         """Fallback text search using LIKE when FTS is unavailable."""
         words = terms.split()
         if not words:
             return []
-        text_cols = [c[0] for c in _SCHEMA.get(table, {}).get("columns", [])
-                     if "TEXT" in c[1]]
+        spec = _SCHEMA.get(table, {})
+        text_cols = list(spec.get("fts_weights", ())) or [
+            c[0] for c in spec.get("columns", []) if "TEXT" in c[1]]
         if not text_cols:
             return []
 
@@ -525,12 +1245,12 @@ class SqliteMemory:
             conditions.append(f"({col_ors})")
             params.extend([f"%{word}%"] * len(text_cols))
 
-        where = " AND ".join(conditions)
+        where = (" OR " if match_any else " AND ").join(conditions)
         sql = f"SELECT * FROM {table} WHERE {where} LIMIT ?"
         params.append(limit)
 
         try:
-            cursor = self._conn().execute(sql, params)
+            cursor = conn.execute(sql, params)
             cols = [d[0] for d in cursor.description]
             return [dict(zip(cols, row)) for row in cursor.fetchall()]
         except Exception as e:
@@ -539,8 +1259,8 @@ class SqliteMemory:
 
     def table_exists(self, table):
         """Check if a table exists."""
-        with self._lock:
-            cursor = self._conn().execute(
+        with self._reader() as conn:
+            cursor = conn.execute(
                 "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
                 (table,),
             )
@@ -548,8 +1268,8 @@ class SqliteMemory:
 
     def list_tables(self):
         """Return list of all table names."""
-        with self._lock:
-            cursor = self._conn().execute(
+        with self._reader() as conn:
+            cursor = conn.execute(
                 "SELECT name FROM sqlite_master WHERE type='table' "
                 "AND name NOT LIKE 'sqlite_%' AND name NOT LIKE '%_fts%' "
                 "ORDER BY name"
@@ -558,9 +1278,9 @@ class SqliteMemory:
 
     def get_schema(self, table):
         """Return list of (column_name, type) tuples for a table."""
-        with self._lock:
+        with self._reader() as conn:
             try:
-                cursor = self._conn().execute(f"PRAGMA table_info({table})")
+                cursor = conn.execute(f"PRAGMA table_info({table})")
                 return [(row[1], row[2]) for row in cursor.fetchall()]
             except Exception:
                 return []
@@ -574,16 +1294,30 @@ class SqliteMemory:
         sql = f"SELECT COUNT(*) FROM {table}"
         if where:
             sql += f" WHERE {where}"
-        with self._lock:
+        with self._reader() as conn:
             try:
-                cursor = self._conn().execute(sql, params or ())
+                cursor = conn.execute(sql, params or ())
                 return cursor.fetchone()[0]
             except Exception:
                 return 0
 
     def close(self):
-        """Close the thread-local connection."""
-        conn = getattr(self._local, "conn", None)
-        if conn:
+        """Flush deferred writes, then close the writer and pooled readers."""
+        self._stop_write_behind()
+        self._fts_stop.set()
+        if self._fts_thread is not None:
+            self._fts_thread.join(timeout=10)
+            self._fts_thread = None
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._version_lock:
+            if self._version_conn is not None:
+                self._version_conn.close()
+                self._version_conn = None
+        with self._reader_lock:
+            idle, self._idle_readers = self._idle_readers, []
+            self._reader_count -= len(idle)
+        for conn in idle:
             conn.close()
-            self._local.conn = None
@@ -496,6 +496,1637 @@ def test_eval_contract():
                        f"unknown checker type {checker_type!r}" if not valid_type else "")
 
 
+def test_intent_router_golden():
+    """The one-pass intent router reproduces the recorded routing labels."""
+    import sys as _sys
+    _load_acp_bridge()
+    intent = _sys.modules["bridge.intent"]
+    golden_path = os.path.join("tools", "eval", "intent_golden.json")
+    with open(golden_path, "r", encoding="utf-8") as f:
+        cases = json.load(f)["cases"]
+    recorded = {c["message"] for c in cases}
+    fixtures_dir = os.path.join("tools", "eval", "fixtures")
+    prompts = []
+    for name in sorted(os.listdir(fixtures_dir)):
+        if name.endswith(".json"):
+            with open(os.path.join(fixtures_dir, name), "r", encoding="utf-8") as f:
+                prompts.extend(str(fx.get("prompt", "")) for fx in json.load(f).get("fixtures", []))
+    missing = [p for p in prompts if p not in recorded]
+    report("intent_golden_covers_eval_fixtures", not missing, f"{len(missing)} unrecorded: {missing[:2]}")
+    mismatches = []
+    for case in cases:
+        got = intent._route_intents(case["message"].lower())._asdict()
+        if got != case["labels"]:
+            mismatches.append((case["message"], {k: got[k] for k in got if got[k] != case["labels"].get(k)}))
+    report("intent_router_matches_golden", not mismatches,
+           f"{len(mismatches)}/{len(cases)} differ: {mismatches[:2]}")
+
+
+# ═══════════════════════════════════════════════════════════════════
+#  Section 8: SQLite Memory Backend
+# ═══════════════════════════════════════════════════════════════════
+
+
+def _load_tools_module(name):
+    """Import tools/<name>.py without needing tools/ on sys.path."""
+    spec = importlib.util.spec_from_file_location(name, f"tools/{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _load_sqlite_memory():
+    return _load_tools_module("sqlite_memory")
+
+
+def test_sqlite_reader_pool():
+    """Reads share a bounded read-only pool; writes go through the writer."""
+    import tempfile
+    import threading
+
+    sqlite_memory = _load_sqlite_memory()
+    with tempfile.TemporaryDirectory() as tmp:
+        mem = sqlite_memory.SqliteMemory(os.path.join(tmp, "memory.db"), max_readers=2)
+        cols = ["SessionId", "Role", "Content"]
+        errors = []
+
+        def read_loop():
+            try:
+                for _ in range(50):
+                    mem.count("Conversations")
+                    mem.query("SELECT Content FROM Conversations ORDER BY rowid DESC LIMIT 1")
+            except Exception as e:  # pragma: no cover - surfaced via report
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=read_loop) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for i in range(20):
+            mem.ingest("Conversations", cols, [{"SessionId": "s", "Role": "user", "Content": f"m{i}"}])
+        for t in threads:
+            t.join()
+
+        report("sqlite_pool_concurrent_reads", not errors, "; ".join(errors[:2]))
+        report("sqlite_pool_bounded", mem._reader_count <= 2, f"readers={mem._reader_count}")
+        latest = mem.query("SELECT Content FROM Conversations ORDER BY rowid DESC LIMIT 1")
+        report("sqlite_read_your_writes", latest and latest[0]["Content"] == "m19", f"got: {latest}")
+
+        mem.query("UPDATE Conversations SET Role = 'assistant' WHERE Content = 'm0'")
+        updated = mem.count("Conversations", "Role = 'assistant' AND Content = 'm0'")
+        report("sqlite_write_statement_routed", updated == 1, f"count={updated}")
+
+        mem.query("WITH t AS (SELECT 'm1' AS c) "
+                  "UPDATE Conversations SET Role = 'assistant' WHERE Content IN (SELECT c FROM t)")
+        updated = mem.count("Conversations", "Role = 'assistant' AND Content = 'm1'")
+        report("sqlite_cte_write_routed", updated == 1, f"count={updated}")
+        mem.close()
+
+
+def test_sqlite_write_behind():
+    """Deferred ingests group-commit across tables and flush() is a barrier."""
+    import tempfile
+
+    sqlite_memory = _load_sqlite_memory()
+    with tempfile.TemporaryDirectory() as tmp:
+        mem = sqlite_memory.SqliteMemory(os.path.join(tmp, "memory.db"), write_behind=True)
+        before = mem.write_stats()["commits"]
+        mem.ingest("Conversations", ["SessionId", "Role", "Content"],
+                   [{"SessionId": "s", "Role": "user", "Content": "hello"}], defer=True)
+        mem.ingest("Reflections", ["Trigger", "Observation"],
+                   [{"Trigger": "t", "Observation": "deferred"}], defer=True)
+        mem.ingest("EmotionState", ["Joy"], [{"Joy": 0.7}], defer=True)
+        report("sqlite_flush_barrier", mem.flush(timeout=5) is True)
+        commits = mem.write_stats()["commits"] - before
+        report("sqlite_group_commit_single_txn", commits == 1, f"commits={commits}")
+        seen = mem.count("Reflections", "Observation = 'deferred'")
+        report("sqlite_deferred_rows_visible_after_flush", seen == 1, f"count={seen}")
+        report("sqlite_deferred_unknown_table_rejected",
+               mem.ingest("NoSuchTable", ["A"], [{"A": 1}], defer=True) is False)
+        mem.close()
+
+
+def test_sqlite_knowledge_current():
+    """KnowledgeCurrent tracks latest value, max confidence, and mentions."""
+    import sqlite3
+    import tempfile
+
+    sqlite_memory = _load_sqlite_memory()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "memory.db")
+        mem = sqlite_memory.SqliteMemory(db_path)
+        cols = ["Entity", "Relation", "Value", "Confidence", "Timestamp"]
+        mem.ingest("Knowledge", cols, [
+            {"Entity": "User", "Relation": "drinks", "Value": "tea", "Confidence": 0.9, "Timestamp": "2026-02-01"},
+            {"Entity": "user", "Relation": "drinks", "Value": "coffee", "Confidence": 0.6, "Timestamp": "2026-03-01"},
+            {"Entity": "User", "Relation": "drinks", "Value": "water", "Confidence": 0.7, "Timestamp": "2026-01-01"},
+        ])
+        row = (mem.query("SELECT * FROM KnowledgeCurrent WHERE Entity = 'USER' AND Relation = 'drinks'") or [{}])[0]
+        report("sqlite_kcur_latest_value", row.get("Value") == "coffee", f"got: {row}")
+        report("sqlite_kcur_max_confidence", row.get("MaxConfidence") == 0.9, f"got: {row}")
+        report("sqlite_kcur_mentions", row.get("Mentions") == 3, f"got: {row}")
+
+        mem.query("DELETE FROM Knowledge WHERE Value = 'coffee'")
+        row = (mem.query("SELECT * FROM KnowledgeCurrent WHERE Entity = 'User' AND Relation = 'drinks'") or [{}])[0]
+        report("sqlite_kcur_delete_rebuild", row.get("Value") == "tea" and row.get("Mentions") == 2,
+               f"got: {row}")
+        mem.close()
+
+        # Simulate a database from before KnowledgeCurrent existed
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP TABLE KnowledgeCurrent")
+        conn.commit()
+        conn.close()
+        mem = sqlite_memory.SqliteMemory(db_path)
+        knowledge_keys = mem.query(
+            "SELECT COUNT(*) AS n FROM (SELECT 1 FROM Knowledge GROUP BY Entity COLLATE NOCASE, Relation)"
+        )[0]["n"]
+        report("sqlite_kcur_backfill", mem.count("KnowledgeCurrent") == knowledge_keys,
+               f"current={mem.count('KnowledgeCurrent')} keys={knowledge_keys}")
+        mem.close()
+
+
+def test_sqlite_fts_tables():
+    """Conversation/reflection FTS ranks with bm25, snippets, and backfills old DBs."""
+    import sqlite3
+    import tempfile
+
+    sqlite_memory = _load_sqlite_memory()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "memory.db")
+        mem = sqlite_memory.SqliteMemory(db_path)
+        mem.ingest("Conversations", ["SessionId", "Role", "Content"], [
+            {"SessionId": "a", "Role": "user", "Content": "We planned a hiking trip to the Cascades in July."},
+            {"SessionId": "b", "Role": "user", "Content": "Hiking hiking hiking, the Cascades trail again."},
+            {"SessionId": "c", "Role": "user", "Content": "Let's bake sourdough bread tomorrow."},
+        ])
+        mem.ingest("Reflections", ["Trigger", "Observation"],
+                   [{"Trigger": "t", "Observation": "User enjoys mountain hiking."}])
+        hits = mem.fts_search("Conversations", "hiking", limit=5)
+        report("sqlite_fts_conversations", [h["SessionId"] for h in hits] == ["b", "a"],
+               f"got: {[h.get('SessionId') for h in hits]}")
+        report("sqlite_fts_snippet", bool(hits) and "hiking" in hits[0].get("Snippet", "").lower(),
+               f"got: {hits[:1]}")
+        any_hits = mem.fts_search("Conversations", "sourdough cascades", limit=5, match_any=True)
+        report("sqlite_fts_match_any", len(any_hits) == 3, f"got: {len(any_hits)}")
+        refl = mem.fts_search("Reflections", "mountain", limit=5)
+        report("sqlite_fts_reflections", len(refl) == 1, f"got: {refl}")
+        mem.query("DELETE FROM Conversations WHERE SessionId = 'b'")
+        hits = mem.fts_search("Conversations", "hiking", limit=5)
+        report("sqlite_fts_delete_trigger", [h["SessionId"] for h in hits] == ["a"],
+               f"got: {[h.get('SessionId') for h in hits]}")
+        mem.close()
+
+        # Simulate a database from before Conversations_fts existed
+        conn = sqlite3.connect(db_path)
+        for trigger in ("conv_ai", "conv_ad", "conv_au"):
+            conn.execute(f"DROP TRIGGER {trigger}")
+        conn.execute("DROP TABLE Conversations_fts")
+        conn.executemany("INSERT INTO Conversations (SessionId, Role, Content) VALUES (?, ?, ?)",
+                         [("old", "user", f"legacy telescope note {i}") for i in range(25)])
+        conn.commit()
+        conn.close()
+        sqlite_memory._FTS_BACKFILL_CHUNK = 4
+        mem = sqlite_memory.SqliteMemory(db_path)
+        mem.ingest("Conversations", ["SessionId", "Role", "Content"],
+                   [{"SessionId": "new", "Role": "user", "Content": "fresh telescope note"}])
+        if mem._fts_thread is not None:
+            mem._fts_thread.join(timeout=10)
+        hits = mem.fts_search("Conversations", "telescope", limit=50)
+        report("sqlite_fts_chunked_backfill", len(hits) == 26 and "Snippet" in hits[0],
+               f"got: {len(hits)}")
+        docs = mem.query("SELECT COUNT(*) AS n FROM Conversations_fts_docsize")[0]["n"]
+        report("sqlite_fts_backfill_no_duplicates", docs == mem.count("Conversations"),
+               f"indexed={docs} rows={mem.count('Conversations')}")
+        mem.close()
+
+        # Simulate a database from before the update trigger: an edit left stale terms
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP TRIGGER conv_au")
+        conn.execute("UPDATE Conversations SET Content = 'fresh microscope note' WHERE SessionId = 'new'")
+        conn.commit()
+        conn.close()
+        mem = sqlite_memory.SqliteMemory(db_path)
+        pending = "Conversations" in mem._fts_pending
+        if mem._fts_thread is not None:
+            mem._fts_thread.join(timeout=10)
+        report("sqlite_fts_stale_reindexed_in_background",
+               pending and len(mem.fts_search("Conversations", "microscope", limit=5)) == 1
+               and len(mem.fts_search("Conversations", "telescope", limit=50)) == 25,
+               f"pending={pending}")
+        mem.close()
+
+
+def test_sqlite_upsert_compact():
+    """Knowledge/HeuristicsIndex repeats merge into counters; compaction folds old duplicates."""
+    import sqlite3
+    import tempfile
+
+    sqlite_memory = _load_sqlite_memory()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "memory.db")
+        mem = sqlite_memory.SqliteMemory(db_path, write_behind=True)
+        cols = ["Entity", "Relation", "Value", "Confidence", "Timestamp"]
+        before = mem.count("Knowledge")
+        mem.upsert("Knowledge", cols, [
+            {"Entity": "User", "Relation": "drinks", "Value": "tea", "Confidence": 0.9, "Timestamp": "2026-02-01"},
+            {"Entity": "user", "Relation": "drinks", "Value": "tea", "Confidence": 0.6, "Timestamp": "2026-03-01"},
+        ], defer=True)
+        mem.upsert("Knowledge", cols, [
+            {"Entity": "USER", "Relation": "drinks", "Value": "tea", "Confidence": 0.7, "Timestamp": "2026-01-01"},
+        ], defer=True)
+        mem.flush(timeout=5)
+        rows = mem.query("SELECT Value, Confidence, Mentions, Timestamp FROM Knowledge WHERE Relation = 'drinks'")
+        report("sqlite_upsert_one_row", mem.count("Knowledge") == before + 1 and len(rows) == 1, f"got: {rows}")
+        row = rows[0] if rows else {}
+        report("sqlite_upsert_merges",
+               row.get("Value") == "tea" and row.get("Confidence") == 0.9
+               and row.get("Mentions") == 3 and row.get("Timestamp") == "2026-03-01", f"got: {row}")
+        current = (mem.query("SELECT * FROM KnowledgeCurrent WHERE Entity = 'user' AND Relation = 'drinks'") or [{}])[0]
+        report("sqlite_upsert_kcur_mentions",
+               current.get("Mentions") == 3 and current.get("Value") == "tea", f"got: {current}")
+        likes = [{"Entity": "User", "Relation": "likes", "Value": v, "Confidence": 0.8, "Timestamp": "2026-03-01"}
+                 for v in ("hiking", "jazz")]
+        mem.upsert("Knowledge", cols, likes)
+        mem.upsert("Knowledge", cols, likes)
+        kept = mem.query("SELECT Value, Mentions FROM Knowledge WHERE Relation = 'likes' ORDER BY Value")
+        report("sqlite_upsert_keeps_values",
+               kept == [{"Value": "hiking", "Mentions": 2}, {"Value": "jazz", "Mentions": 2}], f"got: {kept}")
+        mem.upsert("HeuristicsIndex", ["Entity", "Category", "LastSeen", "Frequency"], [
+            {"Entity": "Seattle", "Category": "place", "LastSeen": "2026-03-01", "Frequency": 1},
+            {"Entity": "seattle", "Category": "city", "LastSeen": "2026-03-02", "Frequency": 2},
+        ])
+        heur = mem.query("SELECT Category, Frequency, LastSeen FROM HeuristicsIndex "
+                         "WHERE Entity = 'seattle' COLLATE NOCASE")
+        report("sqlite_upsert_heuristics",
+               heur == [{"Category": "city", "Frequency": 3, "LastSeen": "2026-03-02"}], f"got: {heur}")
+
+        mem.ingest("Knowledge", cols + ["Source"], [
+            {"Entity": "Rex", "Relation": "is", "Value": "dog", "Confidence": 0.5 + i / 10,
+             "Timestamp": f"2026-04-0{i + 1}", "Source": f"chat {i}"} for i in range(4)
+        ])
+        mem.ingest("Knowledge", cols, [
+            {"Entity": "Rex", "Relation": "likes", "Value": v, "Confidence": 0.5, "Timestamp": "2026-04-01"}
+            for v in ("balls", "sticks", "balls", "sticks")
+        ])
+        first_id = mem.query("SELECT MIN(rowid) AS id FROM Knowledge WHERE Entity = 'Rex'")[0]["id"]
+        result = mem.compact()
+        rex = mem.query("SELECT rowid AS id, Value, Confidence, Mentions, Source FROM Knowledge "
+                        "WHERE Entity = 'Rex' AND Relation = 'is'")
+        report("sqlite_compact_counts", result.get("Knowledge", {}).get("before", 0)
+               - result.get("Knowledge", {}).get("after", 0) == 5, f"got: {result}")
+        report("sqlite_compact_folds",
+               len(rex) == 1 and rex[0]["id"] == first_id and rex[0]["Source"] == "chat 3"
+               and rex[0]["Mentions"] == 4 and abs(rex[0]["Confidence"] - 0.8) < 1e-9, f"got: {rex}")
+        likes = mem.query("SELECT Value, Mentions FROM Knowledge WHERE Entity = 'Rex' AND Relation = 'likes' "
+                          "ORDER BY Value")
+        report("sqlite_compact_keeps_values",
+               likes == [{"Value": "balls", "Mentions": 2}, {"Value": "sticks", "Mentions": 2}], f"got: {likes}")
+        current = (mem.query("SELECT Mentions FROM KnowledgeCurrent WHERE Entity = 'Rex' AND Relation = 'is'")
+                   or [{}])[0]
+        report("sqlite_compact_kcur", current.get("Mentions") == 4, f"got: {current}")
+        mem.close()
+
+        # Simulate a database from before the Mentions counter existed
+        conn = sqlite3.connect(db_path)
+        for name in ("knowledge_current_ai_v2", "knowledge_current_au_v2", "knowledge_current_ad_v2"):
+            conn.execute(f"DROP TRIGGER {name}")
+        conn.execute("DROP INDEX idx_knowledge_key")
+        conn.execute("ALTER TABLE Knowledge DROP COLUMN Mentions")
+        conn.execute("CREATE TRIGGER knowledge_current_ai AFTER INSERT ON Knowledge BEGIN SELECT 1; END")
+        conn.commit()
+        conn.close()
+        mem = sqlite_memory.SqliteMemory(db_path)
+        cols_now = [c for c, _ in mem.get_schema("Knowledge")]
+        triggers = {r["name"] for r in mem.query("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        report("sqlite_upsert_migration",
+               "Mentions" in cols_now and "knowledge_current_ai" not in triggers
+               and "knowledge_current_ai_v2" in triggers, f"cols={cols_now} triggers={sorted(triggers)}")
+        mem.close()
+
+
+def test_embedding_store():
+    """Vectors round-trip as float32 BLOBs and the legacy JSON cache migrates once."""
+    import json
+    import tempfile
+
+    embedding_store = _load_tools_module("embedding_store")
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = os.path.join(tmp, "embeddings_cache.json")
+        with open(legacy, "w") as f:
+            json.dump({"aaa": [0.5, -1.0, 2.0], "bbb": [1.0, 0.0, 0.0], "bad": "x"}, f)
+        store = embedding_store.EmbeddingStore(os.path.join(tmp, "embeddings.db"))
+        report("embedding_json_migrated", store.migrate_json(legacy, "m1") == 2)
+        report("embedding_json_renamed", not os.path.exists(legacy)
+               and os.path.exists(legacy + ".migrated"))
+        report("embedding_migrate_idempotent", store.migrate_json(legacy, "m1") == 0)
+
+        got = store.get_many("m1", ["aaa", "missing"])
+        report("embedding_lookup_subset", list(got) == ["aaa"], f"got: {list(got)}")
+        report("embedding_float32_roundtrip", list(got.get("aaa", [])) == [0.5, -1.0, 2.0],
+               f"got: {got.get('aaa')}")
+        report("embedding_model_namespace", store.get_many("m2", ["aaa"]) == {})
+
+        added = store.put_many("m1", {"aaa": [9.0, 9.0, 9.0], "ccc": [0.25, 0.25, 0.25]})
+        report("embedding_put_only_new", added == 1 and store.count("m1") == 3,
+               f"added={added} count={store.count('m1')}")
+        report("embedding_existing_untouched", list(store.get_many("m1", ["aaa"])["aaa"]) == [0.5, -1.0, 2.0])
+        store.close()
+
+
+# ═══════════════════════════════════════════════════════════════════
+#  Section 9: Semantic Recall Scoring
+# ═══════════════════════════════════════════════════════════════════
+
+def _load_acp_bridge():
+    spec = importlib.util.spec_from_file_location("acp_bridge", "tools/acp_bridge.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_batched_top_k():
+    """Batched top-k matches per-row cosine ranking, with and without NumPy."""
+    import array
+    import random
+    import sys as _sys
+
+    _load_acp_bridge()
+    memory = _sys.modules["bridge.memory"]
+    rng = random.Random(3)
+    query = [rng.gauss(0, 1) for _ in range(32)]
+    vectors = [array.array("f", [rng.gauss(0, 1) for _ in range(32)]) for _ in range(200)]
+    vectors[5] = None                      # missing embedding
+    vectors[9] = [1.0, 2.0]                # wrong width
+    vectors[11] = array.array("f", [0.0] * 32)
+    expected = sorted(
+        ((memory._cosine_similarity(query, v), i) for i, v in enumerate(vectors)
+         if v is not None and len(v) == 32),
+        key=lambda x: x[0], reverse=True)[:6]
+
+    numpy_mod = memory._np
+    try:
+        for label, np_mod in (("numpy", numpy_mod), ("fallback", None)):
+            if label == "numpy" and np_mod is None:
+                report("topk_numpy_available", None, "numpy not installed; fallback only")
+                continue
+            memory._np = np_mod
+            got = memory._top_k_cosine(query, vectors, 6)
+            same_order = [i for _, i in got] == [i for _, i in expected]
+            close = all(abs(a - b) < 1e-4 for (a, _), (b, _) in zip(got, expected))
+            report(f"topk_{label}_matches_loop", same_order and close, f"got: {got[:3]}")
+        report("topk_empty_pool", memory._top_k_cosine(query, [], 6) == [])
+    finally:
+        memory._np = numpy_mod
+
+
+def test_knowledge_ann_index():
+    """IVF index persists, finds indexed rows, and the bridge sync fills it."""
+    import hashlib
+    import random
+    import sys as _sys
+    import tempfile
+
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        report("ann_numpy_available", None, "numpy not installed; ANN index disabled")
+        return
+    vector_index = _load_tools_module("vector_index")
+    rng = random.Random(5)
+    centers = [[rng.gauss(0, 1) for _ in range(16)] for _ in range(20)]
+    vectors = [[c + rng.gauss(0, 0.3) for c in centers[i % 20]] for i in range(3000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "memory.ann")
+        index = vector_index.VectorIndex(path, model="m")
+        index.add(list(range(1, 1501)), vectors[:1500], watermark=1500)
+        index.add(list(range(1501, 3001)), vectors[1500:], watermark=3000)
+        report("ann_trained_past_threshold", index.trained and index.count == 3000, f"{index.stats()}")
+        hits = index.search(vectors[1234], k=1)
+        report("ann_finds_indexed_row", bool(hits) and hits[0][1] == 1235, f"got: {hits}")
+        reopened = vector_index.VectorIndex(path, model="m")
+        report("ann_persisted", reopened.stats() == index.stats()
+               and reopened.search(vectors[7], k=3) == index.search(vectors[7], k=3))
+        report("ann_model_change_resets", vector_index.VectorIndex(path, model="other").count == 0)
+
+    # Bridge sync: vectors come from the hot embedding cache, no API key needed
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    memory = _sys.modules["bridge.memory"]
+    sqlite_memory = _sys.modules.get("sqlite_memory") or _load_sqlite_memory()
+    saved = (st.memory_backend, st.sqlite_mem, st.embedding_store, st.knowledge_index)
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            st.memory_backend = "sqlite"
+            st.sqlite_mem = sqlite_memory.SqliteMemory(os.path.join(tmp, "memory.db"))
+            st.embedding_store = False
+            st.knowledge_index = None
+            cols = ["Entity", "Relation", "Value", "Confidence"]
+            facts = [{"Entity": "User", "Relation": f"likes_{i}", "Value": f"thing {i}", "Confidence": 0.9}
+                     for i in range(20)]
+            facts.append(dict(facts[3]))  # repeat of an earlier fact
+            facts.append({"Entity": "Zed", "Relation": "candidate_mentioned", "Value": "x", "Confidence": 0.2})
+            st.sqlite_mem.ingest("Knowledge", cols, facts)
+            for rec in st.sqlite_mem.query("SELECT Entity, Relation, Value FROM Knowledge"):
+                text = memory._knowledge_text(rec)
+                st.embedding_cache[hashlib.sha1(text.encode("utf-8")).hexdigest()] = \
+                    [rng.gauss(0, 1) for _ in range(16)]
+            while memory._sync_knowledge_index() > 0:
+                pass
+            index = memory._get_knowledge_index()
+            expected = st.sqlite_mem.query(
+                "SELECT COUNT(*) AS n FROM (SELECT DISTINCT Entity, Relation, Value FROM Knowledge "
+                "WHERE Relation NOT IN ('mentioned', 'candidate_mentioned'))")[0]["n"]
+            report("ann_sync_skips_repeats_and_candidates", index.count == expected,
+                   f"count={index.count} expected={expected}")
+            target = memory._knowledge_text(facts[11])
+            qvec = st.embedding_cache[hashlib.sha1(target.encode("utf-8")).hexdigest()]
+            hits = memory._knowledge_index_search(qvec, 1)
+            report("ann_search_returns_record", bool(hits) and hits[0][1]["Relation"] == "likes_11",
+                   f"got: {hits}")
+            st.sqlite_mem.close()
+        finally:
+            st.memory_backend, st.sqlite_mem, st.embedding_store, st.knowledge_index = saved
+
+
+def test_embedding_worker():
+    """Written Knowledge/Skills texts are embedded off the request path."""
+    import hashlib
+    import time as _time
+    import sys as _sys
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    memory = _sys.modules["bridge.memory"]
+    calls = []
+
+    def fake_embed(texts):
+        calls.append(list(texts))
+        out = {}
+        for t in texts:
+            vec = [float(len(t)), 1.0]
+            st.embedding_cache[hashlib.sha1(t.encode("utf-8")).hexdigest()] = vec
+            out[t] = vec
+        return out
+
+    saved = (memory._embed_texts, memory._EMBED_WORKER_COALESCE_SECONDS,
+             st.embedding_store, st.knowledge_index)
+    try:
+        memory._embed_texts = fake_embed
+        memory._EMBED_WORKER_COALESCE_SECONDS = 0
+        st.embedding_store = False
+        st.knowledge_index = False
+        rows = [{"Entity": "User", "Relation": f"owns_{i}", "Value": f"widget {i}"} for i in range(5)]
+        rows.append({"Entity": "Zed", "Relation": "candidate_mentioned", "Value": "x"})
+        texts = [memory._knowledge_text(r) for r in rows[:5]]
+        report("embed_lookup_never_calls_api", memory._cached_embeddings(texts) == {} and not calls)
+        memory._queue_row_embeddings("Knowledge", rows)
+        memory._queue_row_embeddings("Skills", [{"Name": "n", "Description": "Summarize a PDF"}])
+        deadline = _time.time() + 5
+        while memory._embedding_worker_status()["depth"] and _time.time() < deadline:
+            _time.sleep(0.02)
+        status = memory._embedding_worker_status()
+        embedded = {t for batch in calls for t in batch}
+        report("embed_worker_drains_queue", status["depth"] == 0 and status["lag_ms"] == 0.0, f"{status}")
+        report("embed_worker_skips_candidates",
+               embedded == set(texts) | {"Summarize a PDF"}, f"embedded: {sorted(embedded)}")
+        report("embed_lookup_hits_after_worker", len(memory._cached_embeddings(texts)) == len(texts))
+    finally:
+        (memory._embed_texts, memory._EMBED_WORKER_COALESCE_SECONDS,
+         st.embedding_store, st.knowledge_index) = saved
+
+
+def test_local_embedding_provider():
+    """The offline provider is deterministic, normalized and namespaced."""
+    import math as _math
+    import sys as _sys
+    providers = _sys.modules.get("embedding_providers") or _load_tools_module("embedding_providers")
+    local = providers.make_provider("local")
+    openai = providers.make_provider("openai", key_fn=lambda: "")
+    a = local.embed_one("User likes hiking in the Cascades")
+    b = local.embed_one("any good hikes near the cascades this weekend?")
+    c = local.embed_one("allergic to peanuts")
+    dot = lambda x, y: sum(p * q for p, q in zip(x, y))
+    report("local_embed_deterministic", list(a) == list(local.embed_one("User likes hiking in the Cascades")))
+    report("local_embed_normalized", abs(_math.sqrt(dot(a, a)) - 1.0) < 1e-5)
+    report("local_embed_ranks_related", dot(a, b) >= local.min_score > dot(a, c),
+           f"related={dot(a, b):.3f} unrelated={dot(a, c):.3f}")
+    report("provider_namespaces_distinct", local.namespace != openai.namespace
+           and openai.namespace == "text-embedding-3-small")
+    report("openai_unavailable_without_key", not openai.available() and openai.embed(["x"]) == {})
+
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    memory = _sys.modules["bridge.memory"]
+    saved = (st.embedding_provider, st.embedding_store)
+    try:
+        st.embedding_provider = local
+        st.embedding_store = False
+        vecs = memory._cached_embeddings(["User likes hiking in the Cascades"])
+        report("local_provider_embeds_inline", list(vecs.get("User likes hiking in the Cascades", [])) == list(a)
+               and memory._embedding_worker_status()["depth"] == 0)
+    finally:
+        st.embedding_provider, st.embedding_store = saved
+
+
+# ═══════════════════════════════════════════════════════════════════
+#  Section 10: Memory Context Assembly
+# ═══════════════════════════════════════════════════════════════════
+
+def test_candidate_history_batch():
+    """A turn's candidates share one history query; candidate state is bounded."""
+    import sys as _sys
+    import tempfile
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    cognition = _sys.modules["bridge.cognition"]
+    sqlite_memory = _sys.modules.get("sqlite_memory") or _load_sqlite_memory()
+    saved = (st.memory_backend, st.sqlite_mem, cognition._CANDIDATE_COUNTS_MAX,
+             dict(st.cognition_candidate_counts))
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            st.memory_backend = "sqlite"
+            st.sqlite_mem = sqlite_memory.SqliteMemory(os.path.join(tmp, "memory.db"))
+            st.sqlite_mem.ingest("Knowledge", ["Entity", "Relation", "Value", "Confidence"], [
+                {"Entity": "Rust", "Relation": "recurring_topic", "Value": "x", "Confidence": 0.7},
+                {"Entity": "rust", "Relation": "candidate_mentioned", "Value": "x", "Confidence": 0.2},
+                {"Entity": "Kusto", "Relation": "candidate_mentioned", "Value": "x", "Confidence": 0.2},
+            ])
+            st.candidate_history_cache.clear()
+            queries = []
+            real_query = st.sqlite_mem.query
+            st.sqlite_mem.query = lambda sql, params=None: queries.append(sql) or real_query(sql, params)
+            got = cognition._load_candidate_histories(["Rust", "Kusto", "Zeppelin", "rust"])
+            again = cognition._load_candidate_histories(["Rust", "Kusto", "Zeppelin"])
+            report("candidate_history_one_query", len(queries) == 1, f"queries={len(queries)}")
+            report("candidate_history_values",
+                   got == {"rust": (2, 0.7), "kusto": (1, 0.2), "zeppelin": (0, 0.0)} and again == got,
+                   f"got: {got}")
+            promotion = cognition._maybe_promote_candidate("Rust", got["rust"])
+            report("candidate_promotion_uses_prefetch",
+                   len(queries) == 1 and promotion and promotion["reason"] == "prior_high_confidence",
+                   f"{promotion}")
+            st.sqlite_mem.close()
+
+            cognition._CANDIDATE_COUNTS_MAX = 3
+            st.cognition_candidate_counts.clear()
+            for entity in ("Alpha", "Bravo", "Alpha", "Charlie", "Delta"):
+                cognition._track_candidate_observation(entity)
+            counts = dict(st.cognition_candidate_counts)
+            report("candidate_counts_bounded_lru", counts == {"alpha": 2, "charlie": 1, "delta": 1},
+                   f"got: {counts}")
+        finally:
+            st.memory_backend, st.sqlite_mem, cognition._CANDIDATE_COUNTS_MAX, counts = saved
+            st.cognition_candidate_counts.clear()
+            st.cognition_candidate_counts.update(counts)
+            st.candidate_history_cache.clear()
+
+
+def test_reflection_worker():
+    """Queued turns are reflected in order and written one ingest per table."""
+    import sys as _sys
+    import tempfile
+    import types
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    cognition = _sys.modules["bridge.cognition"]
+    providers = _sys.modules.get("embedding_providers") or _load_tools_module("embedding_providers")
+    sqlite_memory = _sys.modules.get("sqlite_memory") or _load_sqlite_memory()
+    saved = (st.memory_backend, st.sqlite_mem, st.embedding_provider, st.knowledge_index,
+             st.cognition_enabled, st.session_exchange_count, list(st.session_conversation_buffer),
+             st.reflection_worker_thread, dict(st.reflection_stats), cognition._REFLECTION_QUEUE_MAX)
+    saved_emit = cognition._telemetry_emit
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            cognition._telemetry_emit = lambda event, **fields: None
+            st.memory_backend = "sqlite"
+            st.sqlite_mem = sqlite_memory.SqliteMemory(os.path.join(tmp, "memory.db"))
+            st.embedding_provider = providers.make_provider("local")
+            st.knowledge_index = False
+            st.cognition_enabled = True
+            st.session_exchange_count = 0
+            st.session_conversation_buffer = []
+            ingests = []
+            real_ingest = st.sqlite_mem.ingest
+            real_upsert = st.sqlite_mem.upsert
+            st.sqlite_mem.ingest = lambda table, cols, rows, **kw: ingests.append(table) or real_ingest(table, cols, rows, **kw)
+            st.sqlite_mem.upsert = lambda table, cols, rows, **kw: ingests.append(table) or real_upsert(table, cols, rows, **kw)
+            turns = [(0.0, f"Tell me about Lisbon and Porto, part {i}", "Happy to help.", "test") for i in range(3)]
+            reflected, rows, writes = cognition._reflect_queued_turns(turns)
+            convs = st.sqlite_mem.query("SELECT Content FROM Conversations WHERE Role = 'user' ORDER BY rowid")
+            report("reflection_turns_coalesced",
+                   reflected == 3 and ingests.count("Conversations") == 1 and len(ingests) == writes,
+                   f"reflected={reflected} ingests={ingests}")
+            report("reflection_turns_in_order",
+                   [r["Content"][-1] for r in convs] == ["0", "1", "2"] and st.session_exchange_count == 3
+                   and len(st.session_conversation_buffer) == 3, f"{convs}")
+            st.sqlite_mem.close()
+
+            # A worker that is "busy" never drains, so the bounded queue sheds.
+            st.reflection_worker_thread = types.SimpleNamespace(is_alive=lambda: True)
+            cognition._REFLECTION_QUEUE_MAX = 2
+            st.reflection_queue.clear()
+            shed = st.reflection_stats["shed"]
+            for i in range(3):
+                cognition._enqueue_reflection(f"turn {i}", "ok", "test")
+            status = cognition._reflection_worker_status()
+            report("reflection_queue_sheds_oldest",
+                   status["depth"] == 2 and status["shed"] == shed + 1
+                   and st.reflection_queue[0][1] == "turn 1", f"{status}")
+        finally:
+            cognition._telemetry_emit = saved_emit
+            st.reflection_queue.clear()
+            (st.memory_backend, st.sqlite_mem, st.embedding_provider, st.knowledge_index,
+             st.cognition_enabled, st.session_exchange_count, st.session_conversation_buffer,
+             st.reflection_worker_thread, stats, cognition._REFLECTION_QUEUE_MAX) = saved
+            st.reflection_stats.update(stats)
+            st.candidate_history_cache.clear()
+
+
+def test_context_section_cache():
+    """Static context sections are reused until their table is written."""
+    import sqlite3
+    import sys as _sys
+    import tempfile
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    cognition = _sys.modules["bridge.cognition"]
+    providers = _sys.modules.get("embedding_providers") or _load_tools_module("embedding_providers")
+    sqlite_memory = _sys.modules.get("sqlite_memory") or _load_sqlite_memory()
+    saved = (st.memory_backend, st.sqlite_mem, st.embedding_provider, st.knowledge_index)
+    saved_emit = cognition._telemetry_emit
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            cognition._telemetry_emit = lambda event, **fields: None
+            st.memory_backend = "sqlite"
+            st.sqlite_mem = sqlite_memory.SqliteMemory(os.path.join(tmp, "memory.db"))
+            st.embedding_provider = providers.make_provider("local")
+            st.knowledge_index = False
+            st.context_cache.clear()
+            st.context_cache_stats.clear()
+            cognition._build_memory_context_sqlite("hello there")
+            cognition._build_memory_context_sqlite("hello there")
+            stats = cognition._context_cache_status()["sections"]
+            report("context_cache_hits_unchanged_sections",
+                   stats["identity"]["hits"] == 1 and stats["emotion"]["hits"] == 1, f"{stats}")
+
+            gen = st.sqlite_mem.generation("Goals")
+            st.sqlite_mem.ingest("Goals", ["GoalId", "Title", "Description"],
+                                 [{"GoalId": "g1", "Title": "Learn cache keys", "Description": "x"}])
+            report("sqlite_generation_bumped_on_ingest", st.sqlite_mem.generation("Goals") == gen + 1)
+            ctx = cognition._build_memory_context_sqlite("hello there")
+            stats = cognition._context_cache_status()["sections"]
+            report("context_cache_reloads_written_table",
+                   "Learn cache keys" in ctx and stats["goals"]["misses"] == 2
+                   and stats["identity"]["hits"] == 2, f"{stats['goals']}")
+
+            # A fact saved by another process (the SQLite MCP server) must show up.
+            other = sqlite3.connect(st.sqlite_mem.db_path)
+            other.execute("INSERT INTO Knowledge (Entity, Relation, Value) VALUES ('User', 'name', 'Robin')")
+            other.commit()
+            other.close()
+            ctx = cognition._build_memory_context_sqlite("hello there")
+            report("context_cache_sees_other_process_writes", "Robin" in ctx, ctx[:200])
+            before = cognition._context_cache_status()["sections"]["identity"]["hits"]
+            cognition._build_memory_context_sqlite("hello there")
+            report("context_cache_own_writes_keep_hits",
+                   cognition._context_cache_status()["sections"]["identity"]["hits"] == before + 1)
+
+            # A foreign commit followed by one of ours before the next build
+            # must not be absorbed as our own.
+            other = sqlite3.connect(st.sqlite_mem.db_path)
+            other.execute("INSERT INTO Knowledge (Entity, Relation, Value) VALUES ('User', 'pet', 'Biscuit')")
+            other.commit()
+            other.close()
+            st.sqlite_mem.ingest("Goals", ["GoalId", "Title", "Description"],
+                                 [{"GoalId": "g2", "Title": "Another goal", "Description": "x"}])
+            ctx = cognition._build_memory_context_sqlite("hello there")
+            report("context_cache_sees_other_process_write_before_own", "Biscuit" in ctx, ctx[:200])
+            st.sqlite_mem.close()
+        finally:
+            cognition._telemetry_emit = saved_emit
+            st.memory_backend, st.sqlite_mem, st.embedding_provider, st.knowledge_index = saved
+            st.context_cache.clear()
+
+
+def test_context_packer():
+    """The packer fills the token budget by section priority, keeping prompt order."""
+    import sys as _sys
+    _load_acp_bridge()
+    cognition = _sys.modules["bridge.cognition"]
+    parts = [
+        ("identity", "[Identity — Who You Are]\n- name: Eva"),
+        ("profile", "[User Profile]\n" + "\n".join(f"- fact_{i}: value {i}" for i in range(6))),
+        ("datetime", "[Current Date & Time] Sunday"),
+        ("workflows", "[Workflow: Memory]\n" + "Be specific about what you remember. " * 20),
+        ("core", "[Memory — Core Facts]\n" + "\n".join(f"  Thing{i} — is: value {i}" for i in range(10))),
+        ("relevant", "[Memory — Relevant]\n  Kusto — is: a database"),
+    ]
+    kept, usage = cognition._pack_context(parts, 0)
+    report("context_pack_unlimited_keeps_all", kept == parts)
+
+    budget = sum(cognition._estimate_tokens(t + "\n\n") for n, t in parts) - 20
+    kept, usage = cognition._pack_context(parts, budget)
+    names = [n for n, _ in kept]
+    core = dict(kept).get("core", "")
+    report("context_pack_priority_order",
+           names == ["identity", "profile", "datetime", "workflows", "core", "relevant"]
+           and usage["workflows"]["cut"] == 0 and dict(kept)["workflows"] == parts[3][1], f"{names}")
+    report("context_pack_trims_line_lists",
+           core.startswith("[Memory — Core Facts]\n  Thing0") and "Thing9" not in core
+           and usage["core"]["cut"] > 0, f"{usage['core']}")
+    report("context_pack_within_budget",
+           sum(u["used"] for u in usage.values()) <= budget, f"{usage}")
+
+    kept, usage = cognition._pack_context(parts, 40)
+    report("context_pack_never_trims_static_sections",
+           dict(kept).get("workflows") == parts[3][1] and usage["workflows"]["cut"] == 0
+           and "core" not in dict(kept), f"{[n for n, _ in kept]}")
+
+    saved = cognition._CONTEXT_TOKEN_BUDGETS
+    try:
+        cognition._CONTEXT_TOKEN_BUDGETS = {"gpt-4o": 2000, "gpt-4o-mini": 800}
+        report("context_budget_per_model",
+               cognition._context_token_budget("gpt-4o-mini-2024") == 800
+               and cognition._context_token_budget("GPT-4o") == 2000
+               and cognition._context_token_budget("claude-opus-4.8") == cognition._CONTEXT_TOKEN_BUDGET)
+    finally:
+        cognition._CONTEXT_TOKEN_BUDGETS = saved
+
+
+def test_kusto_context_parallel_sections():
+    """Kusto section queries run concurrently; late sections are dropped."""
+    import sys as _sys
+    import time as _time
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    cognition = _sys.modules["bridge.cognition"]
+    providers = _sys.modules.get("embedding_providers") or _load_tools_module("embedding_providers")
+    rows = {
+        "Entity =~ 'User'": [{"Relation": "name", "Value": "Sam", "Confidence": 0.9}],
+        "Entity !~ 'User'": [{"Entity": "Kusto", "Relation": "is", "Value": "a database"}],
+        "Goals": [{"Category": "self", "Title": "Ship it", "Description": "soon"}],
+        "EmotionState": [{"Joy": 0.5}],
+    }
+
+    def fake_query(cluster, db, query, is_mgmt=False, deadline=None):
+        _time.sleep(0.6 if "EmotionState" in query else 0.15)
+        for needle, result in rows.items():
+            if needle in query:
+                return result
+        return []
+
+    events = []
+    names = ("_kusto_query_direct", "_get_table_columns", "_get_kusto_config",
+             "_CONTEXT_QUERY_DEADLINE_SECONDS", "_telemetry_emit")
+    saved = [getattr(cognition, n) for n in names]
+    saved_st = (st.memory_backend, st.cognition_enabled, st.embedding_provider)
+    try:
+        cognition._kusto_query_direct = fake_query
+        cognition._get_table_columns = lambda cluster, db, table, deadline=None: ["Status"]
+        cognition._get_kusto_config = lambda: ("https://example.kusto.invalid", "Eva")
+        cognition._CONTEXT_QUERY_DEADLINE_SECONDS = 0.4
+        cognition._telemetry_emit = lambda event, **fields: events.append(dict(fields, event=event))
+        st.memory_backend, st.cognition_enabled = "kusto", True
+        st.embedding_provider = providers.make_provider("local")
+        t0 = _time.time()
+        ctx = cognition._build_memory_context("hello there")
+        elapsed = _time.time() - t0
+        order = [ctx.find(h) for h in ("[User Profile]", "[Memory — Core Facts]", "[Active Goals]")]
+        report("kusto_context_sections_ordered", -1 not in order and order == sorted(order), f"{order}")
+        report("kusto_context_parallel", elapsed < 0.55, f"{elapsed * 1000:.0f}ms (serial ~1500ms)")
+        report("kusto_context_drops_late_section", "[Emotion State]" not in ctx)
+        ev = next((e for e in reversed(events) if e["event"] == "memory_context"), {})
+        report("kusto_context_section_latency_recorded",
+               ev.get("dropped") == "emotion" and ev.get("profile_ms", 0) >= 150, f"{ev}")
+    finally:
+        for n, v in zip(names, saved):
+            setattr(cognition, n, v)
+        st.memory_backend, st.cognition_enabled, st.embedding_provider = saved_st
+
+
+def test_kusto_batched_context():
+    """One batched request returns every section, split by the table of contents."""
+    import sys as _sys
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    kusto = _sys.modules["bridge.kusto"]
+    cognition = _sys.modules["bridge.cognition"]
+    providers = _sys.modules.get("embedding_providers") or _load_tools_module("embedding_providers")
+
+    def table(cols, rows):
+        return {"Columns": [{"ColumnName": c} for c in cols], "Rows": rows}
+
+    toc_cols = ["Ordinal", "Kind", "Name", "Id", "PrettyName"]
+    data = {"Tables": [
+        table(["Relation", "Value"], [["name", "Sam"]]),
+        table(["Joy"], [[0.5]]),
+        table(["Value"], [["{}"]]),
+        table(toc_cols, [[0, "QueryResult", "profile", "0", ""], [1, "QueryResult", "emotion", "1", ""],
+                         [2, "QueryProperties", "@ExtendedProperties", "2", ""]]),
+    ]}
+    parsed = kusto._kusto_result_tables(data)
+    report("kusto_result_tables_toc", [n for n, _ in parsed] == ["profile", "emotion"]
+           and parsed[0][1] == [{"Relation": "name", "Value": "Sam"}], f"{parsed}")
+
+    sent = []
+    saved_post = kusto._kusto_post
+    try:
+        kusto._kusto_post = lambda cluster, db, query, is_mgmt=False, deadline=None: sent.append(query) or data
+        multi = kusto._kusto_query_multi("https://example.kusto.invalid", "Eva",
+                                         [("emotion", "EmotionState | take 1"), ("profile", "Knowledge")])
+    finally:
+        kusto._kusto_post = saved_post
+    report("kusto_query_multi_by_name", multi == {"emotion": [{"Joy": 0.5}],
+                                                  "profile": [{"Relation": "name", "Value": "Sam"}]}
+           and len(sent) == 1 and "EmotionState | take 1 | as emotion" in sent[0], f"{multi}")
+
+    batches, singles = [], []
+    rows = {"profile": [{"Relation": "name", "Value": "Sam", "Confidence": 0.9}],
+            "core": [{"Entity": "Kusto", "Relation": "is", "Value": "a database"}],
+            "goals": [{"Category": "self", "Title": "Ship it", "Description": "soon"}],
+            "emotion": [{"Joy": 0.5}]}
+
+    def fake_multi(cluster, db, named_queries, deadline=None):
+        batches.append([n for n, _ in named_queries])
+        return {n: rows.get(n, []) for n, _ in named_queries}
+
+    names = ("_kusto_query_multi", "_kusto_query_direct", "_get_table_columns", "_get_kusto_config",
+             "_KUSTO_CONTEXT_BATCH", "_telemetry_emit")
+    saved = [getattr(cognition, n) for n in names]
+    saved_st = (st.memory_backend, st.cognition_enabled, st.embedding_provider)
+    try:
+        cognition._kusto_query_multi = fake_multi
+        cognition._kusto_query_direct = lambda cluster, db, query, is_mgmt=False, deadline=None: singles.append(query) or []
+        cognition._get_table_columns = lambda cluster, db, table, deadline=None: ["Status"]
+        cognition._get_kusto_config = lambda: ("https://example.kusto.invalid", "Eva")
+        cognition._KUSTO_CONTEXT_BATCH = True
+        cognition._telemetry_emit = lambda event, **fields: None
+        st.memory_backend, st.cognition_enabled = "kusto", True
+        st.embedding_provider = providers.make_provider("local")
+        ctx = cognition._build_memory_context("hello there")
+        report("kusto_context_batched_one_request",
+               len(batches) == 1 and {"profile", "core", "goals", "emotion"} <= set(batches[0])
+               and not any("EmotionState" in q or "Goals" in q for q in singles), f"{batches}")
+        report("kusto_context_batched_sections",
+               all(h in ctx for h in ("[User Profile]", "[Memory — Core Facts]", "[Active Goals]",
+                                      "[Emotion State]")))
+    finally:
+        for n, v in zip(names, saved):
+            setattr(cognition, n, v)
+        st.memory_backend, st.cognition_enabled, st.embedding_provider = saved_st
+
+
+# ═══════════════════════════════════════════════════════════════════
+#  Section 11: Prompt Assembly
+# ═══════════════════════════════════════════════════════════════════
+
+def test_kusto_result_cache():
+    """Kusto reads are cached per query until a referenced table is ingested into."""
+    import sys as _sys
+    import types
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    kusto = _sys.modules["bridge.kusto"]
+    saved = (kusto._kusto_post, kusto._KUSTO_RESULT_CACHE, st.kusto_token_cache, kusto._get_kusto_spool,
+             kusto._get_table_columns, dict(st.kusto_result_cache_stats))
+    cluster, db = "https://example.kusto.invalid", "Eva"
+    posts = []
+
+    def fake_post(cluster_url, database, query, is_mgmt=False, deadline=None):
+        posts.append(query)
+        return {"Tables": [{"Columns": [{"ColumnName": "Title"}], "Rows": [[f"row {len(posts)}"]]}]}
+
+    try:
+        kusto._kusto_post = fake_post
+        kusto._KUSTO_RESULT_CACHE = True
+        kusto._invalidate_kusto_results()
+        goals = "Goals\n| where Status == 'active'"
+        first = kusto._kusto_query_direct(cluster, db, goals)
+        first[0]["Title"] = "edited by caller"
+        again = kusto._kusto_query_direct(cluster + "/", db, "  Goals\n    | where Status == 'active'\n")
+        report("kusto_cache_hit", len(posts) == 1 and again == [{"Title": "row 1"}],
+               f"posts={len(posts)} got={again}")
+        kusto._kusto_query_direct(cluster, db, "print 1")
+        kusto._kusto_query_direct(cluster, db, "print 1")
+        report("kusto_cache_skips_non_memory", len(posts) == 3, f"posts={len(posts)}")
+
+        st.kusto_token_cache = "test-token"
+        kusto._get_kusto_spool = lambda: None
+        kusto._get_table_columns = lambda *a, **k: ["Title"]
+        kusto._kusto_query_direct(cluster, db, "Skills | take 5")
+        requests_stub = types.SimpleNamespace(post=lambda *a, **k: types.SimpleNamespace(
+            status_code=200, json=lambda: {}, text=""))
+        saved_session = kusto._kusto_session
+        kusto._kusto_session = lambda url: requests_stub
+        try:
+            kusto._kusto_ingest_direct(cluster, db, "Goals", ["Title"], [{"Title": "new"}])
+        finally:
+            kusto._kusto_session = saved_session
+        before = len(posts)
+        fresh = kusto._kusto_query_direct(cluster, db, goals)
+        kusto._kusto_query_direct(cluster, db, "Skills | take 5")
+        report("kusto_cache_invalidated_by_ingest",
+               len(posts) == before + 1 and fresh == [{"Title": f"row {before + 1}"}], f"got={fresh}")
+        status = kusto._kusto_result_cache_status()
+        report("kusto_cache_status", status["hits"] >= 2 and status["bytes_saved"] > 0
+               and status["hit_rate"] is not None, f"{status}")
+    finally:
+        (kusto._kusto_post, kusto._KUSTO_RESULT_CACHE, st.kusto_token_cache, kusto._get_kusto_spool,
+         kusto._get_table_columns) = saved[:5]
+        kusto._invalidate_kusto_results()
+        st.kusto_result_cache_stats.update(saved[5])
+
+
+def test_kusto_upsert_merge():
+    """Kusto reflection batches fold repeats per key before they are ingested."""
+    import sys as _sys
+    _load_acp_bridge()
+    kusto = _sys.modules["bridge.kusto"]
+    merged = kusto._merge_upsert_rows("Knowledge", [
+        {"Entity": "Rex", "Relation": "is", "Value": "dog", "Confidence": 0.9, "Timestamp": "2026-01-01",
+         "Source": "chat"},
+        {"Entity": "rex", "Relation": "is", "Value": "dog", "Confidence": 0.6, "Timestamp": "2026-02-01",
+         "Source": "reflection"},
+        {"Entity": "Rex", "Relation": "likes", "Value": "balls", "Confidence": 0.5, "Timestamp": "2026-01-15"},
+        {"Entity": "Rex", "Relation": "likes", "Value": "sticks", "Confidence": 0.5, "Timestamp": "2026-01-15"},
+    ])
+    rex = [r for r in merged if r["Relation"] == "is"]
+    report("kusto_upsert_merge_rows", len(merged) == 3 and len(rex) == 1, f"got: {merged}")
+    report("kusto_upsert_merge_values",
+           rex and rex[0]["Source"] == "reflection" and rex[0]["Confidence"] == 0.9 and rex[0]["Mentions"] == 2,
+           f"got: {rex}")
+    report("kusto_upsert_keeps_values",
+           sorted(r["Value"] for r in merged if r["Relation"] == "likes") == ["balls", "sticks"], f"got: {merged}")
+    goals = [{"GoalId": "g"}, {"GoalId": "g"}]
+    report("kusto_upsert_merge_other_tables", kusto._merge_upsert_rows("Goals", goals) == goals)
+    sqlite_memory = _sys.modules["sqlite_memory"]
+    report("kusto_upsert_specs_from_schema",
+           kusto._UPSERT_TABLES["Knowledge"] is sqlite_memory._SCHEMA["Knowledge"]["upsert"]
+           and set(kusto._UPSERT_TABLES) == {"Knowledge", "HeuristicsIndex"}, f"got: {kusto._UPSERT_TABLES}")
+
+    cognition = _sys.modules["bridge.cognition"]
+    names = ("_resolve_memory_backend", "_get_kusto_config", "_get_table_columns", "_kusto_ingest_direct",
+             "_queue_row_embeddings")
+    saved = [getattr(cognition, n) for n in names]
+    sent = []
+    schema = ["Timestamp", "Entity", "Relation", "Value", "Confidence", "Source", "Decay"]
+    try:
+        cognition._resolve_memory_backend = lambda: "kusto"
+        cognition._get_kusto_config = lambda: ("https://example.kusto.invalid", "Eva")
+        cognition._get_table_columns = lambda *a, **k: schema
+        cognition._kusto_ingest_direct = lambda c, d, table, columns, rows: sent.append((columns, rows)) or True
+        cognition._queue_row_embeddings = lambda *a: None
+        repeat = {"Entity": "User", "Relation": "candidate_mentioned", "Value": "candidate",
+                  "Timestamp": "2026-01-01"}
+        for _ in range(2):
+            batch = cognition._ReflectionBatch()
+            batch.add("Knowledge", list(repeat), [dict(repeat) for _ in range(3)])
+            batch.flush()
+            schema = schema + ["Mentions"]
+        report("kusto_reflection_merge_needs_counter_column",
+               len(sent[0][1]) == 3 and "Mentions" not in sent[0][0]
+               and len(sent[1][1]) == 1 and sent[1][1][0]["Mentions"] == 3 and "Mentions" in sent[1][0],
+               f"{sent}")
+    finally:
+        for n, v in zip(names, saved):
+            setattr(cognition, n, v)
+
+
+def test_kusto_token_refresher():
+    """Kusto tokens are reused until near expiry, refreshed ahead of it, and a
+    401 (not a routine refresh) clears the cached table schemas."""
+    import sys as _sys
+    import types
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    kusto = _sys.modules["bridge.kusto"]
+    saved = (st.kusto_token_cache, st.kusto_credential, st.kusto_token_expires_on, st.kusto_token_thread,
+             st.kusto_table_columns_cache, dict(st.kusto_token_stats), kusto._kusto_clock)
+    clock = [1_000_000.0]
+
+    class FakeCredential:
+        calls = 0
+        fail = False
+
+        def get_token(self, *scopes):
+            if self.fail:
+                raise RuntimeError("token endpoint unavailable")
+            self.calls += 1
+            return types.SimpleNamespace(token=f"token-{self.calls}", expires_on=int(clock[0]) + 3600)
+
+    try:
+        kusto._kusto_clock = lambda: clock[0]
+        # A live stand-in thread keeps the real refresher from starting.
+        st.kusto_token_thread = types.SimpleNamespace(is_alive=lambda: True)
+        cred = FakeCredential()
+        kusto._set_kusto_token(cred.get_token(), cred)
+        st.kusto_table_columns_cache = {("c", "db", "Goals"): ["Title"]}
+        margin = kusto._KUSTO_TOKEN_REFRESH_MARGIN_SECONDS
+
+        config = kusto._inject_kusto_token({"kusto-mcp-server": {}})
+        report("kusto_token_warm_uses_cache",
+               cred.calls == 1 and config["kusto-mcp-server"]["env"]["KUSTO_ACCESS_TOKEN"] == "token-1",
+               f"calls={cred.calls}")
+        delay = kusto._kusto_token_refresh_step()
+        report("kusto_token_not_due", cred.calls == 1 and abs(delay - (3600 - margin)) < 1, f"delay={delay}")
+
+        clock[0] += 3600 - margin + 1
+        delay = kusto._kusto_token_refresh_step()
+        report("kusto_token_proactive_refresh",
+               cred.calls == 2 and st.kusto_token_cache == "token-2" and delay > 3000, f"delay={delay}")
+        report("kusto_token_refresh_keeps_schema", bool(st.kusto_table_columns_cache))
+
+        report("kusto_token_401_clears_schema",
+               kusto._kusto_token_rejected() and cred.calls == 3 and not st.kusto_table_columns_cache,
+               f"calls={cred.calls}")
+
+        cred.fail = True
+        clock[0] += 3600
+        delay = kusto._kusto_token_refresh_step()
+        status = kusto._kusto_token_status()
+        report("kusto_token_failure_retries", delay == kusto._KUSTO_TOKEN_RETRY_SECONDS
+               and status["failures"] >= 1 and "unavailable" in status["last_error"], f"{status}")
+    finally:
+        (st.kusto_token_cache, st.kusto_credential, st.kusto_token_expires_on, st.kusto_token_thread,
+         st.kusto_table_columns_cache) = saved[:5]
+        st.kusto_token_stats.clear()
+        st.kusto_token_stats.update(saved[5])
+        kusto._kusto_clock = saved[6]
+
+
+def test_kusto_circuit_breaker():
+    """A failing cluster trips its breaker: calls fail fast, one probe goes out
+    when half-open, and the memory context falls back to cached sections."""
+    import sys as _sys
+    import time as _time
+    import types
+    import requests
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    kusto = _sys.modules["bridge.kusto"]
+    cognition = _sys.modules["bridge.cognition"]
+    providers = _sys.modules.get("embedding_providers") or _load_tools_module("embedding_providers")
+    cluster, db = "https://example.kusto.invalid", "Eva"
+    key = kusto._normalize_kusto_cluster_url(cluster)
+    names = ("_kusto_session", "_reset_kusto_session", "_telemetry_emit", "_KUSTO_BREAKER_FAILURE_THRESHOLD")
+    saved = [getattr(kusto, n) for n in names]
+    saved_cog = (cognition._get_kusto_config, cognition._telemetry_emit)
+    saved_st = (st.kusto_token_cache, dict(st.kusto_breakers), dict(st.kusto_budget_stats), st.memory_backend,
+                st.cognition_enabled, st.embedding_provider, st.last_interaction_date, st.kusto_table_columns_cache)
+    posts = []
+    healthy = [True]
+    slow = [False]
+    events = []
+
+    class Session:
+        def post(self, url, json=None, headers=None, timeout=None):
+            posts.append(json["csl"])
+            if slow[0]:
+                raise requests.exceptions.ReadTimeout(f"read timed out after {timeout}s")
+            if not healthy[0]:
+                raise requests.exceptions.ConnectionError("connection refused")
+            return types.SimpleNamespace(status_code=200, text="", json=lambda: {
+                "Tables": [{"Columns": [{"ColumnName": "Title"}], "Rows": [["cached goal"]]}]})
+
+    def fail_twice():
+        for _ in range(2):
+            kusto._kusto_post(cluster, db, "print 1", deadline=kusto._kusto_deadline(0.1))
+
+    try:
+        kusto._kusto_session = lambda url: Session()
+        kusto._reset_kusto_session = lambda url: None
+        kusto._telemetry_emit = lambda event, **fields: events.append(dict(fields, event=event))
+        kusto._KUSTO_BREAKER_FAILURE_THRESHOLD = 2
+        st.kusto_token_cache = "test-token"
+        st.kusto_breakers.clear()
+        kusto._invalidate_kusto_results()
+        goals = "Goals | where Status == 'active'"
+        kusto._kusto_query_direct(cluster, db, goals)
+
+        healthy[0] = False
+        fail_twice()
+        before = len(posts)
+        t0 = _time.time()
+        result = kusto._kusto_post(cluster, db, "print 2")
+        report("kusto_breaker_fails_fast", result is None and len(posts) == before and _time.time() - t0 < 0.05,
+               f"posts={len(posts) - before}")
+        status = kusto._kusto_breaker_status()
+        report("kusto_breaker_status", status["open"] == [key] and status["trips"] == 1 and status["rejected"] >= 1
+               and any(e["event"] == "kusto_breaker" and e["state"] == "open" for e in events), f"{status}")
+
+        for cache_key, entry in list(st.kusto_result_cache.items()):
+            st.kusto_result_cache[cache_key] = (0.0,) + entry[1:]  # expire every entry
+        stale = kusto._kusto_query_direct(cluster, db, goals)
+        report("kusto_breaker_serves_stale_cache", stale == [{"Title": "cached goal"}]
+               and st.kusto_result_cache_stats["stale_hits"] >= 1 and len(posts) == before, f"got={stale}")
+
+        cognition._get_kusto_config = lambda: (cluster, db)
+        cognition._telemetry_emit = lambda event, **fields: events.append(dict(fields, event=event))
+        st.memory_backend, st.cognition_enabled = "kusto", True
+        st.embedding_provider = providers.make_provider("local")
+        st.last_interaction_date = None
+        st.kusto_table_columns_cache = {}
+        t0 = _time.time()
+        ctx = cognition._build_memory_context("hello there")
+        ev = next((e for e in reversed(events) if e["event"] == "memory_context"), {})
+        report("kusto_breaker_context_immediate",
+               _time.time() - t0 < 0.5 and len(posts) == before and "[Init" not in ctx
+               and st.last_interaction_date is None and ev.get("breaker_open")
+               and not st.kusto_table_columns_cache, f"{ev}")
+
+        st.kusto_breakers[key]["opened_at"] -= kusto._KUSTO_BREAKER_OPEN_SECONDS
+        kusto._kusto_post(cluster, db, "print 3")
+        report("kusto_breaker_failed_probe_reopens",
+               len(posts) == before + 1 and st.kusto_breakers[key]["state"] == "open", f"posts={len(posts) - before}")
+        st.kusto_breakers[key]["opened_at"] -= kusto._KUSTO_BREAKER_OPEN_SECONDS
+        healthy[0] = True
+        ok = kusto._kusto_post(cluster, db, "print 4")
+        report("kusto_breaker_probe_closes", ok is not None and st.kusto_breakers[key]["state"] == "closed"
+               and kusto._kusto_breaker_status()["trips"] == 1)
+
+        slow[0] = True
+        for _ in range(3):
+            kusto._kusto_post(cluster, db, "print 5", deadline=kusto._kusto_deadline(0.2))
+        report("kusto_breaker_ignores_deadline_timeouts",
+               st.kusto_breakers[key]["state"] == "closed" and st.kusto_breakers[key]["failures"] == 0,
+               f"{st.kusto_breakers[key]}")
+        kusto._kusto_post(cluster, db, "print 6")
+        report("kusto_breaker_counts_full_timeouts", st.kusto_breakers[key]["state"] == "open",
+               f"{st.kusto_breakers[key]}")
+
+        st.kusto_breakers.clear()
+        before = len(posts)
+        ok = kusto._kusto_ingest_inline(cluster, db, "Knowledge", ["Entity"], [{"Entity": "x"}])
+        report("kusto_inline_ingest_no_resend_after_read_timeout", ok is False and len(posts) == before + 1,
+               f"posts={len(posts) - before}")
+    finally:
+        for n, v in zip(names, saved):
+            setattr(kusto, n, v)
+        cognition._get_kusto_config, cognition._telemetry_emit = saved_cog
+        (st.kusto_token_cache, breakers, budget, st.memory_backend, st.cognition_enabled, st.embedding_provider,
+         st.last_interaction_date, st.kusto_table_columns_cache) = saved_st
+        st.kusto_breakers.clear()
+        st.kusto_breakers.update(breakers)
+        st.kusto_budget_stats.update(budget)
+        kusto._invalidate_kusto_results()
+
+
+def test_kusto_session_pool():
+    """Kusto REST calls share one keep-alive session per cluster."""
+    import sys as _sys
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    kusto = _sys.modules["bridge.kusto"]
+    saved = (dict(st.kusto_sessions), dict(st.kusto_http_stats))
+    try:
+        st.kusto_sessions.clear()
+        first = kusto._kusto_session("https://example.kusto.invalid/")
+        again = kusto._kusto_session("HTTPS://example.kusto.invalid")
+        adapter = first.get_adapter("https://example.kusto.invalid")
+        report("kusto_session_shared", first is again and len(st.kusto_sessions) == 1)
+        report("kusto_session_pool_sized", adapter._pool_maxsize == kusto._KUSTO_HTTP_POOL_MAXSIZE,
+               f"maxsize={adapter._pool_maxsize}")
+        report("kusto_session_gzip", "gzip" in first.headers.get("Accept-Encoding", ""))
+        kusto._reset_kusto_session("https://example.kusto.invalid")
+        fresh = kusto._kusto_session("https://example.kusto.invalid")
+        status = kusto._kusto_http_status()
+        report("kusto_session_reset", fresh is not first and status["resets"] >= 1, f"{status}")
+    finally:
+        for session in st.kusto_sessions.values():
+            session.close()
+        st.kusto_sessions.clear()
+        st.kusto_sessions.update(saved[0])
+        st.kusto_http_stats.clear()
+        st.kusto_http_stats.update(saved[1])
+
+
+def test_kusto_ingest_spool():
+    """Kusto ingests land in the local spool and ship in batches with backoff."""
+    import sys as _sys
+    import tempfile
+    import time
+    import types
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    kusto = _sys.modules["bridge.kusto"]
+    ingest_spool = _load_tools_module("ingest_spool")
+    saved = (st.kusto_spool, st.kusto_spool_thread, st.kusto_token_cache, dict(st.kusto_spool_stats),
+             kusto._kusto_ingest_send)
+    cluster, db = "https://example.kusto.invalid", "Eva"
+    cols = ["Entity", "Relation", "Value"]
+    sends = []
+    healthy = [False]
+    rejected = [False]
+
+    def fake_send(cluster_url, database, table, columns, rows_data, failure=None):
+        sends.append((table, len(rows_data)))
+        if rejected[0] and failure is not None:
+            failure.update(permanent=True, error="HTTP 400: bad row")
+        return healthy[0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "kusto_spool.db")
+        try:
+            st.kusto_spool = ingest_spool.IngestSpool(path)
+            st.kusto_spool_thread = types.SimpleNamespace(is_alive=lambda: True)  # no live shipper
+            st.kusto_token_cache = "test-token"
+            kusto._kusto_ingest_send = fake_send
+            ok = all(kusto._kusto_ingest_direct(cluster, db, "Knowledge", cols,
+                                                [{"Entity": f"E{i}", "Relation": "r", "Value": "v"}])
+                     for i in range(3))
+            st.kusto_spool.close()
+            st.kusto_spool = ingest_spool.IngestSpool(path)
+            status = kusto._kusto_spool_status()
+            report("kusto_spool_append_is_local",
+                   ok and not sends and status["pending_entries"] == 3 and status["pending_rows"] == 3,
+                   f"sends={sends} {status}")
+
+            shipped, failed = kusto._ship_kusto_spool_once()
+            status = kusto._kusto_spool_status()
+            report("kusto_spool_failure_backs_off",
+                   (shipped, failed) == (0, 3) and sends == [("Knowledge", 3)]
+                   and status["pending_rows"] == 3 and status["next_attempt_in_s"] > 0
+                   and status["consecutive_failures"] == 1,
+                   f"{status}")
+            report("kusto_spool_not_due_during_backoff", kusto._ship_kusto_spool_once() == (0, 0))
+
+            healthy[0] = True
+            shipped, failed = kusto._ship_kusto_spool_once(now=time.time() + 3600)
+            status = kusto._kusto_spool_status()
+            report("kusto_spool_ships_one_batch",
+                   shipped == 3 and sends[-1] == ("Knowledge", 3) and status["pending_entries"] == 0
+                   and status["consecutive_failures"] == 0, f"sends={sends} {status}")
+
+            healthy[0] = False
+            kusto._kusto_ingest_direct(cluster, db, "Goals", ["GoalId"], [{"GoalId": "g1"}])
+            later = time.time()
+            for _ in range(30):  # an outage: every send fails, none is a rejection
+                later += 3600
+                kusto._ship_kusto_spool_once(now=later)
+            status = kusto._kusto_spool_status()
+            report("kusto_spool_transient_failures_retry",
+                   status["dead_entries"] == 0 and status["pending_entries"] == 1
+                   and status["next_attempt_in_s"] <= kusto._KUSTO_SPOOL_BACKOFF_MAX_SECONDS * 1.2, f"{status}")
+
+            report("kusto_spool_backoff_capped",
+                   kusto._kusto_spool_backoff(5000) <= kusto._KUSTO_SPOOL_BACKOFF_MAX_SECONDS * 1.2)
+
+            rejected[0] = True
+            kusto._ship_kusto_spool_once(now=later + 3600)
+            status = kusto._kusto_spool_status()
+            report("kusto_spool_dead_letters_rejections",
+                   status["dead_entries"] == 1 and status["pending_entries"] == 0
+                   and status["last_error"] == "HTTP 400: bad row", f"{status}")
+
+            healthy[0], rejected[0] = True, False
+            st.kusto_spool_stats["backoff_until"] = 0.0
+            requeued = kusto._requeue_kusto_spool()
+            shipped, failed = kusto._ship_kusto_spool_once()
+            status = kusto._kusto_spool_status()
+            report("kusto_spool_requeue_dead",
+                   requeued == 1 and shipped == 1 and status["dead_entries"] == 0
+                   and status["pending_entries"] == 0, f"requeued={requeued} {status}")
+            st.kusto_spool.close()
+        finally:
+            (st.kusto_spool, st.kusto_spool_thread, st.kusto_token_cache, stats,
+             kusto._kusto_ingest_send) = saved
+            st.kusto_spool_stats.update(stats)
+
+
+def test_kusto_standin():
+    """The bridge's Kusto REST paths work end to end against the SQLite stand-in."""
+    import datetime
+    import sys as _sys
+    import tempfile
+    import types
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    kusto = _sys.modules["bridge.kusto"]
+    config = _sys.modules["bridge.config"]
+    sqlite_memory = _sys.modules.get("sqlite_memory") or _load_tools_module("sqlite_memory")
+    core = _sys.modules["bridge.core"]
+    kusto_standin = _load_tools_module("kusto_standin")
+    ingest_spool = _load_tools_module("ingest_spool")
+    saved = (st.kusto_token_cache, kusto._KUSTO_RESULT_CACHE, st.kusto_spool, st.kusto_spool_thread,
+             st.memory_backend)
+    db = "Eva"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mem = sqlite_memory.SqliteMemory(os.path.join(tmp, "memory.db"))
+        standin = kusto_standin.KustoStandIn(mem, seed=7).start()
+        cluster = standin.url
+        try:
+            st.kusto_token_cache = "test-token"
+            kusto._KUSTO_RESULT_CACHE = False
+            tables = kusto._kusto_query_direct(cluster, db, ".show tables", is_mgmt=True) or []
+            report("kusto_standin_show_tables", "Knowledge" in {r.get("TableName") for r in tables},
+                   f"{len(tables)} tables")
+            columns = kusto._get_table_columns(cluster, db, "Knowledge")
+            report("kusto_standin_cslschema", columns == mem.get_columns("Knowledge"), f"{columns}")
+
+            now = config.to_utc_iso(datetime.datetime.now(datetime.timezone.utc))
+            rows = [{"Timestamp": now, "Entity": "User", "Relation": "likes",
+                     "Value": 'tea, "green"', "Confidence": 0.9, "Source": "chat"},
+                    {"Timestamp": "2020-01-01T00:00:00Z", "Entity": "User", "Relation": "likes",
+                     "Value": "coffee", "Confidence": 0.4, "Source": "chat"}]
+            ok = kusto._kusto_ingest_send(cluster, db, "Knowledge", list(rows[0]), rows)
+            stored = mem.query("SELECT Value FROM Knowledge WHERE Source = 'chat' ORDER BY Confidence DESC")
+            report("kusto_standin_ingest_inline", ok and [r["Value"] for r in stored] == ['tea, "green"', "coffee"],
+                   f"{stored}")
+
+            latest = kusto._kusto_query_direct(
+                cluster, db, "Knowledge | where Entity =~ 'user' | summarize arg_max(Timestamp, Value) by Relation")
+            recent = kusto._kusto_query_direct(
+                cluster, db, "Knowledge | where Source == 'chat' and Timestamp > ago(365d) | project Value")
+            ordered = kusto._kusto_query_direct(
+                cluster, db, "Knowledge | where Value has 'GREEN' or Value == 'coffee' | order by Confidence asc "
+                             "| take 1 | project Value, Pct = Confidence * 100")
+            report("kusto_standin_query_subset",
+                   latest == [{"Relation": "likes", "Timestamp": rows[0]["Timestamp"], "Value": 'tea, "green"'}]
+                   and recent == [{"Value": 'tea, "green"'}]
+                   and ordered == [{"Value": "coffee", "Pct": 40.0}], f"{latest} {recent} {ordered}")
+            agg = kusto._kusto_query_direct(
+                cluster, db, "Knowledge | where Source == 'chat' "
+                             "| summarize N=count(), High=countif(Confidence > 0.5), Avg=avg(Confidence)")
+            report("kusto_standin_aggregates", agg and agg[0]["N"] == 2 and agg[0]["High"] == 1
+                   and abs(agg[0]["Avg"] - 0.65) < 1e-9, f"{agg}")
+            batch = kusto._kusto_query_multi(cluster, db, [("n", "Knowledge | count"),
+                                                          ("top", "Knowledge | top 1 by Confidence")])
+            report("kusto_standin_batch", batch and batch["n"] == [{"Count": mem.count("Knowledge")}]
+                   and len(batch["top"]) == 1, f"{batch}")
+            rows_bad, error = kusto._kusto_query_with_error(cluster, db, "Knowledge | mv-expand Value")
+            report("kusto_standin_rejects_unsupported", rows_bad is None and "400" in (error or ""), error)
+
+            # Goal and skill CRUD skips the spool: the row is queryable on return.
+            st.kusto_spool = ingest_spool.IngestSpool(os.path.join(tmp, "kusto_spool.db"))
+            st.kusto_spool_thread = types.SimpleNamespace(is_alive=lambda: True)  # no live shipper
+            st.memory_backend = "kusto"
+            handler = core.BridgeHandler.__new__(core.BridgeHandler)
+            goal_ok = handler._write_goal_row(cluster, db, {"GoalId": "g-crud", "Title": "Ship it",
+                                                            "Status": "active", "Priority": 1})
+            skill_ok = handler._write_skill_row(cluster, db, {"SkillId": "sk-crud", "Name": "Deploy"})
+            report("kusto_crud_writes_not_spooled",
+                   goal_ok and skill_ok and st.kusto_spool.stats()["pending_entries"] == 0
+                   and mem.query("SELECT Title FROM Goals WHERE GoalId = 'g-crud'") == [{"Title": "Ship it"}]
+                   and len(mem.query("SELECT Name FROM Skills WHERE SkillId = 'sk-crud'")) == 1,
+                   f"{st.kusto_spool.stats()}")
+            st.kusto_spool.close()
+
+            standin.error_rate = 1.0
+            failed = kusto._kusto_query_direct(cluster, db, "Knowledge | take 1")
+            report("kusto_standin_injects_errors", failed is None and standin.stats()["errors_injected"] >= 1,
+                   f"{standin.stats()}")
+        finally:
+            standin.stop()
+            mem.close()
+            st.kusto_breakers.pop(kusto._normalize_kusto_cluster_url(cluster), None)
+            (st.kusto_token_cache, kusto._KUSTO_RESULT_CACHE, st.kusto_spool, st.kusto_spool_thread,
+             st.memory_backend) = saved
+
+
+def test_kusto_streaming_ingest():
+    """Ingests use the streaming endpoint, batch across spool appends, and fall
+    back to .ingest inline only for tables without streaming ingestion."""
+    import sys as _sys
+    import tempfile
+    import time
+    import types
+    import requests
+    _load_acp_bridge()
+    st = _sys.modules["bridge.state"]
+    kusto = _sys.modules["bridge.kusto"]
+    sqlite_memory = _sys.modules.get("sqlite_memory") or _load_tools_module("sqlite_memory")
+    kusto_standin = _load_tools_module("kusto_standin")
+    ingest_spool = _load_tools_module("ingest_spool")
+    kusto_mcp = _load_tools_module("kusto_mcp")
+    names = ("_KUSTO_STREAMING_FORMAT", "_KUSTO_STREAMING_MAX_BYTES", "_KUSTO_RESULT_CACHE", "_kusto_session")
+    saved = [getattr(kusto, n) for n in names]
+    real_session = kusto._kusto_session
+    saved_st = (st.kusto_token_cache, st.kusto_spool, st.kusto_spool_thread, dict(st.kusto_ingest_stats),
+                dict(st.kusto_streaming_disabled), dict(st.kusto_spool_stats))
+    saved_requests = getattr(kusto_mcp, "_requests", None)
+    db = "Eva"
+
+    def stored(source):
+        return [r["Value"] for r in mem.query(f"SELECT Value FROM Knowledge WHERE Source = '{source}' ORDER BY Value")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mem = sqlite_memory.SqliteMemory(os.path.join(tmp, "memory.db"))
+        standin = kusto_standin.KustoStandIn(mem).start()
+        cluster = standin.url
+        try:
+            st.kusto_token_cache = "test-token"
+            kusto._KUSTO_RESULT_CACHE = False
+            for key in st.kusto_ingest_stats:
+                st.kusto_ingest_stats[key] = 0
+            st.kusto_streaming_disabled.clear()
+
+            # Entity/Value only: positional CSV must still land in the right columns.
+            ok = kusto._kusto_ingest_send(cluster, db, "Knowledge", ["Value", "Entity", "Source"],
+                                          [{"Entity": "User", "Value": "streamed, once", "Source": "stream"}])
+            row = mem.query("SELECT Entity, Relation FROM Knowledge WHERE Source = 'stream'")
+            report("kusto_stream_ingest_lands", ok and stored("stream") == ["streamed, once"]
+                   and row == [{"Entity": "User", "Relation": ""}]
+                   and st.kusto_ingest_stats["stream_rows"] == 1 and not st.kusto_ingest_stats["inline_requests"],
+                   f"{row} {st.kusto_ingest_stats}")
+
+            kusto._KUSTO_STREAMING_FORMAT = "json"
+            kusto._KUSTO_STREAMING_MAX_BYTES = 64
+            rows = [{"Entity": "User", "Relation": "r", "Value": f"json {i}", "Source": "json"} for i in range(3)]
+            before = st.kusto_ingest_stats["stream_requests"]
+            ok = kusto._kusto_ingest_send(cluster, db, "Knowledge", ["Entity", "Relation", "Value", "Source"], rows)
+            report("kusto_stream_ingest_json_chunks",
+                   ok and stored("json") == ["json 0", "json 1", "json 2"]
+                   and st.kusto_ingest_stats["stream_requests"] - before == 3, f"{st.kusto_ingest_stats}")
+            kusto._KUSTO_STREAMING_FORMAT, kusto._KUSTO_STREAMING_MAX_BYTES = saved[0], saved[1]
+
+            st.kusto_spool = ingest_spool.IngestSpool(os.path.join(tmp, "kusto_spool.db"))
+            st.kusto_spool_thread = types.SimpleNamespace(is_alive=lambda: True)  # no live shipper
+            kusto._kusto_ingest_direct(cluster, db, "Knowledge", ["Entity", "Value", "Source"],
+                                       [{"Entity": "A", "Value": "spooled 1", "Source": "spool"}])
+            kusto._kusto_ingest_direct(cluster, db, "Knowledge", ["Entity", "Relation", "Value", "Source"],
+                                       [{"Entity": "B", "Relation": "r", "Value": "spooled 2", "Source": "spool"}])
+            before = standin.stats()["streaming_ingests"]
+            shipped, failed = kusto._ship_kusto_spool_once()
+            report("kusto_stream_spool_batches_calls",
+                   shipped == 2 and not failed and standin.stats()["streaming_ingests"] - before == 1
+                   and stored("spool") == ["spooled 1", "spooled 2"], f"shipped={shipped} {standin.stats()}")
+            st.kusto_spool.close()
+
+            # A later piece fails: the pieces that landed are acked, not resent.
+            st.kusto_spool = ingest_spool.IngestSpool(os.path.join(tmp, "kusto_spool_partial.db"))
+            kusto._KUSTO_STREAMING_FORMAT, kusto._KUSTO_STREAMING_MAX_BYTES = "json", 64
+            partial_cols = ["Entity", "Relation", "Value", "Source"]
+            kusto._kusto_ingest_direct(cluster, db, "Knowledge", partial_cols,
+                                       [{"Entity": "P", "Relation": "r", "Value": f"partial {i}", "Source": "partial"}
+                                        for i in range(2)])
+            kusto._kusto_ingest_direct(cluster, db, "Knowledge", partial_cols,
+                                       [{"Entity": "P", "Relation": "r", "Value": "partial 2", "Source": "partial"}])
+            ingest_posts = [0]
+
+            class DropSecond:
+                def __init__(self, inner):
+                    self.inner = inner
+
+                def post(self, url, **kwargs):
+                    if "/v1/rest/ingest/" in url:
+                        ingest_posts[0] += 1
+                        if ingest_posts[0] == 2:
+                            raise RuntimeError("connection dropped mid-batch")
+                    return self.inner.post(url, **kwargs)
+
+            kusto._kusto_session = lambda url: DropSecond(real_session(url))
+            shipped, failed = kusto._ship_kusto_spool_once()
+            pending = st.kusto_spool.stats()
+            report("kusto_stream_partial_acks_landed",
+                   shipped == 1 and failed == 2 and stored("partial") == ["partial 0"]
+                   and pending["pending_entries"] == 2 and pending["pending_rows"] == 2,
+                   f"shipped={shipped} failed={failed} {pending}")
+            shipped, failed = kusto._ship_kusto_spool_once(now=time.time() + 3600)
+            report("kusto_stream_partial_no_duplicates",
+                   shipped == 2 and stored("partial") == ["partial 0", "partial 1", "partial 2"],
+                   f"{stored('partial')}")
+
+            # A read timeout after the body went out is not resent in-process.
+            class TimeOut:
+                def post(self, url, **kwargs):
+                    ingest_posts[0] += 1
+                    raise requests.exceptions.ReadTimeout("read timed out")
+
+            kusto._kusto_session = lambda url: TimeOut()
+            ingest_posts[0] = 0
+            failure = {}
+            ok = kusto._kusto_ingest_stream(cluster, db, "Knowledge", partial_cols,
+                                            [{"Entity": "T", "Relation": "r", "Value": "t", "Source": "t"}], failure)
+            report("kusto_stream_no_resend_after_read_timeout",
+                   ok is False and ingest_posts[0] == 1 and not failure.get("permanent"), f"posts={ingest_posts[0]}")
+            st.kusto_breakers.pop(kusto._normalize_kusto_cluster_url(cluster), None)
+            kusto._kusto_session = real_session
+            kusto._KUSTO_STREAMING_FORMAT, kusto._KUSTO_STREAMING_MAX_BYTES = saved[0], saved[1]
+            st.kusto_spool.close()
+            st.kusto_spool = saved_st[1]
+
+            before = standin.stats()
+            ok = kusto._kusto_ingest_send(cluster, db, "NoSuchTable", ["Entity", "Value"],
+                                          [{"Entity": "X", "Value": "y"}])
+            after = standin.stats()
+            report("kusto_stream_unknown_schema_not_sent",
+                   ok is False and after["streaming_ingests"] == before["streaming_ingests"]
+                   and after["mgmt"] - before["mgmt"] == after["requests"] - before["requests"], f"{after}")
+
+            standin.streaming = False
+            ok = kusto._kusto_ingest_send(cluster, db, "Knowledge", ["Entity", "Value", "Source"],
+                                          [{"Entity": "User", "Value": "inline 1", "Source": "inline"}])
+            status = kusto._kusto_ingest_status()
+            report("kusto_stream_falls_back_inline",
+                   ok and stored("inline") == ["inline 1"] and status["fallbacks"] == 1
+                   and status["inline_rows"] == 1 and status["streaming_disabled"] == ["Eva.Knowledge"], f"{status}")
+            before = standin.stats()["streaming_ingests"]
+            ok = kusto._kusto_ingest_send(cluster, db, "Knowledge", ["Entity", "Value", "Source"],
+                                          [{"Entity": "User", "Value": "inline 2", "Source": "inline"}])
+            report("kusto_stream_disabled_remembered",
+                   ok and standin.stats()["streaming_ingests"] == before
+                   and kusto._kusto_ingest_status()["fallbacks"] == 1, f"{standin.stats()}")
+
+            kusto_mcp._requests = requests
+            server = kusto_mcp.KustoMCPServer()
+            server._get_token = lambda: "test-token"
+            server._resolve_cluster = lambda args: (cluster, None)  # the stand-in is not *.kusto.windows.net
+            standin.streaming = True
+            args = {"cluster_url": cluster, "database": db, "table": "Knowledge",
+                    "data": [{"Entity": "User", "Value": "mcp, streamed", "Source": "mcp"}]}
+            streamed = server._tool_ingest_inline(args)
+            standin.streaming = False
+            inline = server._tool_ingest_inline(dict(args, data=[{"Entity": "User", "Value": "mcp inline",
+                                                                   "Source": "mcp"}]))
+            report("kusto_mcp_stream_then_inline",
+                   "via streaming ingestion" in streamed and "via streaming" not in inline
+                   and stored("mcp") == ["mcp inline", "mcp, streamed"], f"{streamed!r} {inline[:80]!r}")
+
+            answers = [401, 200, 503, 503, 200]
+            calls = []
+
+            def flaky_post(url, headers=None, timeout=None, **kwargs):
+                calls.append(headers["Authorization"])
+                answer = answers.pop(0)
+                if answer == "timeout":
+                    raise requests.exceptions.ReadTimeout("read timed out")
+                return types.SimpleNamespace(status_code=answer, text="", json=lambda: {"Tables": []})
+
+            tokens = iter(["stale-token"] + ["fresh-token"] * 10)
+            server._get_token = lambda: next(tokens)
+            kusto_mcp._requests = types.SimpleNamespace(post=flaky_post, exceptions=requests.exceptions)
+            ok = server._stream_ingest(cluster, db, "Reflections", "a,b")  # Knowledge is marked disabled
+            report("kusto_mcp_stream_refreshes_token",
+                   ok is True and calls == ["Bearer stale-token", "Bearer fresh-token"], f"{ok!r} {calls}")
+            del calls[:]
+            failed = server._stream_ingest(cluster, db, "Reflections", "a,b")
+            server._kusto_query(cluster, db, "Reflections | take 1")
+            report("kusto_mcp_only_queries_retry_5xx",
+                   "503" in str(failed) and len(calls) == 3 and not answers, f"{failed!r} {len(calls)}")
+            answers[:] = ["timeout", 200]
+            try:
+                server._stream_ingest(cluster, db, "Reflections", "a,b")
+                raised = False
+            except requests.exceptions.ReadTimeout:
+                raised = True
+            report("kusto_mcp_ingest_no_resend_after_read_timeout", raised and answers == [200], f"{answers}")
+        finally:
+            standin.stop()
+            mem.close()
+            if saved_requests is None:
+                kusto_mcp.__dict__.pop("_requests", None)
+            else:
+                kusto_mcp._requests = saved_requests
+            for name, value in zip(names, saved):
+                setattr(kusto, name, value)
+            st.kusto_breakers.pop(kusto._normalize_kusto_cluster_url(cluster), None)
+            (st.kusto_token_cache, st.kusto_spool, st.kusto_spool_thread) = saved_st[:3]
+            for current, old in zip((st.kusto_ingest_stats, st.kusto_streaming_disabled, st.kusto_spool_stats),
+                                    saved_st[3:]):
+                current.clear()
+                current.update(old)
+
+
+def test_aig_prompt_prefix():
+    """The responder prompt starts with a byte-stable prefix per model and route."""
+    import sys as _sys
+    _load_acp_bridge()
+    utils = _sys.modules["bridge.utils"]
+    cognition = _sys.modules["bridge.cognition"]
+    telemetry = _sys.modules["bridge.telemetry"]
+    runtime = ("claude-opus-4.8", "claude-opus-4.8", "Copilot CLI ACP bridge")
+    first = utils._aig_system_prefix(False, runtime)
+    report("aig_prefix_reused", utils._aig_system_prefix(False, runtime) is first
+           and first.startswith("You are Eva") and "Active responder model: claude-opus-4.8" in first)
+    judge = utils._aig_system_prefix(True, runtime)
+    other = utils._aig_system_prefix(False, ("gpt-4o", "gpt-4o", "GitHub Models API (PAT)"))
+    report("aig_prefix_keyed_by_route", judge.startswith("JUDGE MODE") and judge.endswith(first)
+           and other != first)
+
+    a = utils._track_prompt_prefix(first, first + "[User Profile]\n- name: Sam\n\n[Current Date & Time] 10:01")
+    b = utils._track_prompt_prefix(first, first + "[User Profile]\n- name: Sam\n\n[Current Date & Time] 10:02")
+    report("aig_prompt_shared_prefix",
+           a["prefix_fp"] == b["prefix_fp"] and a["prompt_fp"] != b["prompt_fp"]
+           and b["shared_prefix_chars"] == b["prompt_chars"] - 1, f"{b}")
+    summary = telemetry._telemetry_summarize([
+        {"event": "aig_turn", "total_ms": 10, **a}, {"event": "aig_turn", "total_ms": 10, **b},
+        {"event": "aig_turn", "total_ms": 10, "prefix_fp": "other", "prompt_chars": 5, "shared_prefix_chars": 0},
+    ])
+    report("aig_prefix_reuse_summarized", summary["aig_prefix"]["prefix_reuse_rate"] == 0.5,
+           f"{summary['aig_prefix']}")
+
+    saved_emit = cognition._telemetry_emit
+    try:
+        cognition._telemetry_emit = lambda event, **fields: None
+        kept = cognition._pack_memory_context(
+            [("profile", "[User Profile]\n- name: Sam"), ("datetime", "[Current Date & Time] now"),
+             ("skills_manifest", "[Skills]\n..."), ("workflows", "[Workflow: Memory]\n...")], None, "sqlite")
+    finally:
+        cognition._telemetry_emit = saved_emit
+    report("context_static_sections_lead",
+           [n for n, _ in kept] == ["skills_manifest", "workflows", "profile", "datetime"])
+
+
 # ═══════════════════════════════════════════════════════════════════
 #  Runner
 # ═══════════════════════════════════════════════════════════════════
@@ -516,7 +2147,18 @@ def main():
         ("Goals Static Contract", [test_goals_static_contract]),
         ("Background Static Contract", [test_background_static_contract]),
         ("MCP Config", [test_mcp_config]),
-        ("Behavioral Eval", [test_eval_contract]),
+        ("Behavioral Eval", [test_eval_contract, test_intent_router_golden]),
+        ("SQLite Memory", [test_sqlite_reader_pool, test_sqlite_write_behind,
+                           test_sqlite_knowledge_current, test_sqlite_fts_tables,
+                           test_sqlite_upsert_compact, test_embedding_store]),
+        ("Semantic Recall", [test_batched_top_k, test_knowledge_ann_index,
+                             test_embedding_worker, test_local_embedding_provider]),
+        ("Reflection", [test_candidate_history_batch, test_reflection_worker]),
+        ("Memory Context", [test_context_section_cache, test_context_packer,
+                            test_kusto_context_parallel_sections,
+                            test_kusto_batched_context]),
+        ("Kusto Ingest", [test_kusto_token_refresher, test_kusto_circuit_breaker, test_kusto_session_pool, test_kusto_result_cache, test_kusto_upsert_merge, test_kusto_ingest_spool, test_kusto_standin, test_kusto_streaming_ingest]),
+        ("Prompt Assembly", [test_aig_prompt_prefix]),
     ]
 
     for name, tests in sections:
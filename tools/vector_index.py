@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Eva Vector Index
+
+Persistent approximate nearest-neighbour index (IVF, cosine) used by the
+bridge to recall Knowledge facts from the whole table instead of a fixed
+top-by-confidence pool. Requires NumPy; callers treat ImportError as "no
+index" and keep their exact-scoring path.
+
+On-disk layout (a directory next to memory.db, e.g. ~/.eva/memory.ann/):
+    meta.json       dim, model, count, watermark, training state
+    vectors.f32     unit-length float32 rows, append-only, memory-mapped
+    ids.i64         caller ids (Knowledge rowids), append-only
+    keys.bin        optional 20-byte content keys (sha1) for de-duplication
+    assign.i32      inverted-list number per row, rewritten on retrain
+    centroids.f32   IVF centroids
+
+add() appends only the new rows and rewrites meta.json last, so a crash
+mid-append loses at most the rows that were being added. Below
+_TRAIN_MIN_ROWS the index is flat (exact); past it the rows are clustered
+with spherical k-means and retrained whenever the table has grown
+_RETRAIN_GROWTH times since the last training.
+
+Usage:
+    from vector_index import VectorIndex
+    index = VectorIndex("~/.eva/memory.ann", model="text-embedding-3-small")
+    index.add([rowid, ...], [vector, ...], watermark=rowid, keys=[sha1_bytes, ...])
+    hits = index.search(query_vector, k=6)  # [(cosine, rowid), ...]
+"""
+
+import json
+import math
+import os
+import threading
+
+import numpy as np
+
+_TRAIN_MIN_ROWS = 2048
+_RETRAIN_GROWTH = 4
+_KMEANS_ITERATIONS = 12
+_KMEANS_SAMPLE_PER_LIST = 64
+_ASSIGN_BATCH = 8192
+_KEY_BYTES = 20
+
+
+def _unit_rows(vectors):
+    mat = np.asarray(vectors, dtype=np.float32)
+    if mat.ndim == 1:
+        mat = mat.reshape(1, -1)
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    return mat / norms
+
+
+def _top_k(scores, k):
+    """Indices of the k largest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class VectorIndex:
+    """IVF cosine index over float32 vectors keyed by integer ids."""
+
+    def __init__(self, path, model="", nprobe=None):
+        self._path = os.path.expanduser(path)
+        self._model = model
+        self._nprobe = nprobe
+        self._lock = threading.Lock()
+        os.makedirs(self._path, exist_ok=True)
+        self._meta = {"dim": 0, "model": model, "count": 0, "watermark": 0, "trained_count": 0}
+        self._vectors = None    # memmap (count, dim)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._assign = np.empty(0, dtype=np.int32)
+        self._centroids = None
+        self._lists = None      # (order, offsets), rebuilt lazily
+        self._keys = set()
+        self._load()
+
+    # ── Persistence ────────────────────────────────────────────────────
+
+    def _file(self, name):
+        return os.path.join(self._path, name)
+
+    def _load(self):
+        try:
+            with open(self._file("meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return
+        if meta.get("model", "") != self._model:
+            print(f"[Index] {self._path}: embedding model changed, rebuilding from scratch")
+            self.reset()
+            return
+        if not meta.get("dim"):
+            self._meta["watermark"] = int(meta.get("watermark", 0))
+            return
+        count, dim = int(meta.get("count", 0)), int(meta["dim"])
+        try:
+            ids = np.fromfile(self._file("ids.i64"), dtype=np.int64, count=count)
+            assign = np.fromfile(self._file("assign.i32"), dtype=np.int32, count=count)
+            if len(ids) != count or len(assign) != count:
+                raise ValueError("index files shorter than meta.json")
+            if meta.get("trained_count"):
+                centroids = np.fromfile(self._file("centroids.f32"), dtype=np.float32)
+                self._centroids = centroids.reshape(-1, dim)
+        except (OSError, ValueError) as e:
+            print(f"[Index] {self._path} unreadable ({e}), rebuilding from scratch")
+            self.reset()
+            return
+        self._meta = meta
+        self._ids = ids
+        self._assign = assign
+        self._keys = self._read_keys(int(meta.get("key_count", 0)))
+        self._map_vectors()
+
+    def _read_keys(self, key_count):
+        try:
+            with open(self._file("keys.bin"), "rb") as f:
+                raw = f.read(key_count * _KEY_BYTES)
+        except OSError:
+            return set()
+        return {raw[i:i + _KEY_BYTES] for i in range(0, len(raw), _KEY_BYTES)}
+
+    def _map_vectors(self):
+        count, dim = self._meta["count"], self._meta["dim"]
+        if count:
+            self._vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32,
+                                      mode="r", shape=(count, dim))
+        else:
+            self._vectors = None
+
+    def _write_meta(self):
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self._meta, f)
+        os.replace(tmp, self._file("meta.json"))
+
+    def _truncate_to_count(self):
+        """Drop bytes past meta.count left behind by an interrupted append."""
+        count, dim = self._meta["count"], self._meta["dim"]
+        key_count = self._meta.get("key_count", 0)
+        for name, size in (("vectors.f32", count * 4 * dim), ("ids.i64", count * 8),
+                           ("assign.i32", count * 4), ("keys.bin", key_count * _KEY_BYTES)):
+            path = self._file(name)
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def reset(self):
+        """Forget every vector (e.g. after an embedding model change)."""
+        for name in ("meta.json", "vectors.f32", "ids.i64", "assign.i32", "centroids.f32", "keys.bin"):
+            try:
+                os.remove(self._file(name))
+            except FileNotFoundError:
+                pass
+        self._meta = {"dim": 0, "model": self._model, "count": 0, "watermark": 0, "trained_count": 0}
+        self._vectors = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._assign = np.empty(0, dtype=np.int32)
+        self._centroids = None
+        self._lists = None
+        self._keys = set()
+
+    # ── Properties ─────────────────────────────────────────────────────
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def count(self):
+        return self._meta["count"]
+
+    @property
+    def watermark(self):
+        """Highest source id the caller has processed (indexed or skipped)."""
+        return self._meta["watermark"]
+
+    @property
+    def trained(self):
+        return self._centroids is not None
+
+    def has_key(self, key):
+        """True if a row was added with this content key."""
+        return key in self._keys
+
+    def stats(self):
+        return {
+            "count": self.count,
+            "dim": self._meta["dim"],
+            "lists": 0 if self._centroids is None else len(self._centroids),
+            "trained_count": self._meta["trained_count"],
+            "watermark": self.watermark,
+        }
+
+    # ── Writes ─────────────────────────────────────────────────────────
+
+    def add(self, ids, vectors, watermark=None, keys=None):
+        """Append vectors for ids and advance the watermark.
+
+        keys (20-byte content hashes, one per row) are remembered for
+        has_key(). Vectors of a different width than the index are skipped.
+        Returns the number of rows added. May (re)train the lists first.
+        """
+        with self._lock:
+            added = 0
+            rows = _unit_rows(vectors) if len(ids) else None
+            if rows is not None and self._meta["dim"] and rows.shape[1] != self._meta["dim"]:
+                print(f"[Index] Skipping {len(rows)} vectors of width {rows.shape[1]} "
+                      f"(index is {self._meta['dim']})")
+                rows = None
+            if rows is not None:
+                self._meta["dim"] = rows.shape[1]
+                self._truncate_to_count()
+                ids_arr = np.asarray(ids, dtype=np.int64)
+                if self._centroids is not None:
+                    assign = self._nearest_list(rows, self._centroids)
+                else:
+                    assign = np.zeros(len(rows), dtype=np.int32)
+                with open(self._file("vectors.f32"), "ab") as f:
+                    f.write(rows.tobytes())
+                with open(self._file("ids.i64"), "ab") as f:
+                    f.write(ids_arr.tobytes())
+                with open(self._file("assign.i32"), "ab") as f:
+                    f.write(assign.tobytes())
+                if keys:
+                    with open(self._file("keys.bin"), "ab") as f:
+                        f.write(b"".join(keys))
+                    self._keys.update(keys)
+                    self._meta["key_count"] = self._meta.get("key_count", 0) + len(keys)
+                self._ids = np.concatenate([self._ids, ids_arr])
+                self._assign = np.concatenate([self._assign, assign])
+                self._meta["count"] += len(rows)
+                self._lists = None
+                added = len(rows)
+            if watermark is not None:
+                self._meta["watermark"] = max(self._meta["watermark"], int(watermark))
+            self._write_meta()
+            self._map_vectors()
+            count, trained = self._meta["count"], self._meta["trained_count"]
+            needs_training = count >= _TRAIN_MIN_ROWS and (not trained or count >= trained * _RETRAIN_GROWTH)
+            snapshot = self._vectors
+        if needs_training:
+            self._train(snapshot)
+        return added
+
+    @staticmethod
+    def _nearest_list(rows, centroids):
+        out = np.empty(len(rows), dtype=np.int32)
+        for start in range(0, len(rows), _ASSIGN_BATCH):
+            block = np.asarray(rows[start:start + _ASSIGN_BATCH])
+            out[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return out
+
+    def _train(self, vectors):
+        """Spherical k-means over a sample of vectors, then reassign every row.
+
+        Runs without the lock (searches keep using the old lists); rows added
+        meanwhile are assigned to the new centroids when they are installed.
+        """
+        count = len(vectors)
+        nlist = max(8, int(math.sqrt(count)))
+        rng = np.random.default_rng(count)
+        sample_size = min(count, nlist * _KMEANS_SAMPLE_PER_LIST)
+        sample = np.asarray(vectors[np.sort(rng.choice(count, sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(_KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            sizes = np.bincount(labels, minlength=nlist)
+            starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+            sums = np.empty_like(centroids)
+            filled = sizes > 0
+            sums[filled] = np.add.reduceat(sample[order], starts[filled], axis=0)
+            # Re-seed empty lists from random sample rows
+            sums[~filled] = sample[rng.choice(sample_size, int((~filled).sum()))]
+            centroids = _unit_rows(sums)
+        assign = self._nearest_list(vectors, centroids)
+
+        with self._lock:
+            if self._meta["count"] > count:
+                late = self._vectors[count:]
+                assign = np.concatenate([assign, self._nearest_list(late, centroids)])
+            with open(self._file("centroids.f32.tmp"), "wb") as f:
+                f.write(centroids.tobytes())
+            os.replace(self._file("centroids.f32.tmp"), self._file("centroids.f32"))
+            with open(self._file("assign.i32.tmp"), "wb") as f:
+                f.write(assign.tobytes())
+            os.replace(self._file("assign.i32.tmp"), self._file("assign.i32"))
+            self._centroids = centroids
+            self._assign = assign
+            self._meta["trained_count"] = count
+            self._write_meta()
+            self._lists = None
+        print(f"[Index] Trained {nlist} lists over {count} vectors")
+
+    # ── Reads ──────────────────────────────────────────────────────────
+
+    def _inverted_lists(self):
+        if self._lists is None:
+            order = np.argsort(self._assign, kind="stable")
+            offsets = np.searchsorted(self._assign[order], np.arange(len(self._centroids) + 1))
+            self._lists = (order, offsets)
+        return self._lists
+
+    def search(self, query, k=10, nprobe=None):
+        """Return up to k (cosine, id) pairs, best first.
+
+        Probes the nprobe nearest lists (default: an eighth of the lists, at
+        least 8) and rescores their rows exactly. Flat indexes scan every row.
+        """
+        with self._lock:
+            if not self._meta["count"] or len(query) != self._meta["dim"]:
+                return []
+            q = _unit_rows(query)[0]
+            if self._centroids is None:
+                rows = np.arange(self._meta["count"])
+            else:
+                nlist = len(self._centroids)
+                probe = nprobe or self._nprobe or max(8, nlist // 8)
+                lists = _top_k(self._centroids @ q, probe)
+                order, offsets = self._inverted_lists()
+                rows = np.concatenate([order[offsets[c]:offsets[c + 1]] for c in lists])
+                rows.sort()  # sequential memmap reads
+            scores = np.asarray(self._vectors[rows]) @ q
+            return [(float(scores[j]), int(self._ids[rows[j]])) for j in _top_k(scores, k)]
+
+    def exact_search(self, query, k=10):
+        """Brute-force search over every row (recall baseline)."""
+        with self._lock:
+            if not self._meta["count"] or len(query) != self._meta["dim"]:
+                return []
+            scores = np.asarray(self._vectors) @ _unit_rows(query)[0]
+            return [(float(scores[j]), int(self._ids[j])) for j in _top_k(scores, k)]